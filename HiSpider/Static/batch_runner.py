@@ -0,0 +1,290 @@
+"""
+批量任务运行器
+从任务清单读取大量结果页URL/matchId，按爬虫类型分别放入进程池并发运行，
+每个任务独立输出目录和日志，单个任务失败不影响其他任务，最后写出汇总清单
+"""
+
+import contextlib
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import crawl_log
+
+
+RESULT_URL_TEMPLATE = "https://qiye.qizhidao.com/batch-query-result?matchId={match_id}"
+
+# 爬虫类型 -> (模块名, 类名, 允许的构造参数)
+SPIDER_TYPES = {
+    'basic': ('qizhidao_spider', 'QizhidaoSpider', ('enrich',)),
+    'advanced': ('qizhidao_advanced_spider', 'QizhidaoAdvancedSpider', ('max_retries', 'delay_range', 'enrich')),
+    'table': ('qizhidao_table_spider', 'QizhidaoTableSpider', ('max_pages', 'start_page', 'page_size', 'parse_workers', 'enrich')),
+    'smart': ('qizhidao_smart_spider', 'QizhidaoSmartSpider',
+              ('headless', 'implicit_wait', 'start_page', 'maximize_page_size', 'pipeline', 'enrich', 'tabs',
+               'debugger_address', 'call_timeout', 'max_restarts')),
+}
+
+# 与启动脚本菜单编号保持一致
+SPIDER_ALIASES = {'1': 'basic', '2': 'advanced', '3': 'table', '4': 'smart'}
+
+# 各爬虫类型的默认并发进程数：所有任务访问同一个网站，进程越多每个进程分到的速率越低
+# （见 run_batch 中的速率份额），默认只开少量进程
+DEFAULT_CONCURRENCY = {
+    'basic': 2,
+    'advanced': 2,
+    'table': 2,
+    'smart': 2,
+}
+
+# 批量模式下浏览器爬虫默认无头运行、不进入交互
+DEFAULT_JOB_OPTIONS = {
+    'smart': {'headless': True},
+}
+
+
+def normalize_spider_type(name):
+    """把 '3'/'table' 等写法统一成爬虫类型名"""
+    name = str(name).strip().lower()
+    name = SPIDER_ALIASES.get(name, name)
+    if name not in SPIDER_TYPES:
+        raise ValueError(f"未知的爬虫类型: {name}（可用: {', '.join(SPIDER_TYPES)}）")
+    return name
+
+
+def _make_job(entry, index, defaults):
+    """把清单中的一项（字符串或字典）规范化为任务字典"""
+    if isinstance(entry, str):
+        entry = {'url': entry} if entry.startswith('http') else {'match_id': entry}
+    job = dict(defaults)
+    job.update(entry)
+
+    if not job.get('url'):
+        if not job.get('match_id'):
+            raise ValueError(f"第 {index + 1} 个任务缺少 url 或 match_id")
+        job['url'] = RESULT_URL_TEMPLATE.format(match_id=job['match_id'])
+
+    job['spider'] = normalize_spider_type(job.get('spider', 'table'))
+    job.setdefault('id', job.get('match_id') or f"job{index + 1:04d}")
+    options = dict(DEFAULT_JOB_OPTIONS.get(job['spider'], {}))
+    options.update(job.get('options') or {})
+    job['options'] = options
+    return job
+
+
+def load_manifest(path, default_spider='table'):
+    """
+    读取任务清单
+
+    支持三种格式：
+        .json  - 任务列表，或 {"defaults": {...}, "jobs": [...]}
+        .jsonl - 每行一个任务（JSON对象或字符串）
+        其他   - 每行一个URL或matchId，# 开头的行为注释
+
+    任务字段：url / match_id、spider（basic/advanced/table/smart 或 1-4）、
+    id、options（传给爬虫构造函数，如 max_pages、headless）、save_json、save_excel、
+    json_compression（JSON文件压缩方式：gzip/zstd）
+
+    Returns:
+        list: 规范化后的任务字典列表
+    """
+    defaults = {'spider': default_spider}
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.json'):
+            content = json.load(f)
+            if isinstance(content, dict):
+                defaults.update(content.get('defaults', {}))
+                entries = content.get('jobs', [])
+            else:
+                entries = content
+        elif path.endswith('.jsonl'):
+            entries = [json.loads(line) for line in f if line.strip()]
+        else:
+            entries = [line.strip() for line in f
+                       if line.strip() and not line.strip().startswith('#')]
+
+    jobs = [_make_job(entry, i, defaults) for i, entry in enumerate(entries)]
+
+    # 任务ID用作输出目录名，必须唯一
+    seen = {}
+    for job in jobs:
+        job_id = str(job['id'])
+        if job_id in seen:
+            seen[job_id] += 1
+            job_id = f"{job_id}_{seen[job_id]}"
+        else:
+            seen[job_id] = 0
+        job['id'] = job_id
+    return jobs
+
+
+def output_file_names(output_dir):
+    """生成输出目录下的JSON/Excel文件名（同一时间戳），未指定目录时返回(None, None)使用默认文件名"""
+    if not output_dir:
+        return None, None
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return (os.path.join(output_dir, f"qizhidao_data_{timestamp}.json"),
+            os.path.join(output_dir, f"qizhidao_data_{timestamp}.xlsx"))
+
+
+def run_job(job, output_dir, rate_share=1.0):
+    """
+    在子进程中运行单个任务（顶层函数，便于进程池序列化）
+
+    爬虫的日志和输出重定向到任务目录下的 run.log，异常被捕获并记录在返回结果中
+
+    Args:
+        job: 任务字典
+        output_dir: 输出根目录
+        rate_share: 本进程在网站总请求速率中的份额（所有进程合计为1）
+
+    Returns:
+        dict: 任务结果（状态、文件、行数、耗时、错误信息）
+    """
+    job_dir = os.path.join(output_dir, str(job['id']))
+    os.makedirs(job_dir, exist_ok=True)
+    result = {
+        'id': job['id'],
+        'spider': job['spider'],
+        'url': job['url'],
+        'status': 'failed',
+        'files': [],
+        'rows': 0,
+        'pages': None,
+        'log': os.path.join(job_dir, 'run.log'),
+        'started_at': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'elapsed_seconds': None,
+        'error': None,
+    }
+    start = time.time()
+
+    module_name, class_name, allowed_options = SPIDER_TYPES[job['spider']]
+    options = job.get('options', {})
+    unknown = [key for key in options if key not in allowed_options]
+
+    from rate_limiter import set_rate_share
+    set_rate_share(rate_share)
+
+    with open(result['log'], 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        try:
+            if unknown:
+                raise ValueError(f"{job['spider']} 爬虫不支持参数: {', '.join(unknown)}")
+            module = __import__(module_name)
+            spider = getattr(module, class_name)(url=job['url'], **options)
+            run_result = spider.run(
+                save_json=job.get('save_json', True),
+                save_excel=job.get('save_excel', False),
+                output_dir=job_dir,
+                json_compression=job.get('json_compression'),
+            )
+            if run_result:
+                result['status'] = 'ok'
+                result['files'] = run_result['files']
+                result['rows'] = len(run_result['data']['companies'])
+                result['pages'] = run_result['data'].get('total_pages')
+            else:
+                result['status'] = 'empty'
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        finally:
+            # 爬虫日志由后台线程写出，离开重定向之前等它写完
+            crawl_log.flush()
+
+    result['elapsed_seconds'] = round(time.time() - start, 2)
+    return result
+
+
+def run_batch(jobs, output_dir, concurrency=None, progress=print):
+    """
+    按爬虫类型分组，用进程池并发运行所有任务，并写出汇总清单
+
+    Args:
+        jobs: load_manifest 返回的任务列表
+        output_dir: 输出根目录
+        concurrency: {爬虫类型: 进程数}，未指定的类型使用 DEFAULT_CONCURRENCY
+        progress: 进度输出函数，传None关闭
+
+    Returns:
+        dict: 汇总信息（同时写入 output_dir/batch_summary.json）
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    limits = dict(DEFAULT_CONCURRENCY)
+    limits.update(concurrency or {})
+
+    groups = {}
+    for job in jobs:
+        groups.setdefault(job['spider'], []).append(job)
+
+    started_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    start = time.time()
+    results = []
+    executors = []
+    futures = {}
+    workers_by_type = {spider_type: max(1, min(int(limits[spider_type]), len(group)))
+                       for spider_type, group in groups.items()}
+    # 每个进程有自己的限速器，按总进程数分摊速率，使对网站的总请求速率与单进程运行时相同
+    rate_share = 1.0 / sum(workers_by_type.values()) if workers_by_type else 1.0
+    try:
+        for spider_type, group in groups.items():
+            workers = workers_by_type[spider_type]
+            executor = ProcessPoolExecutor(max_workers=workers)
+            executors.append(executor)
+            if progress:
+                progress(f"[批量] {spider_type}: {len(group)} 个任务，{workers} 个进程")
+            for job in group:
+                futures[executor.submit(run_job, job, output_dir, rate_share)] = job
+
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # 子进程崩溃等情况：记录为失败，不影响其他任务
+                result = {'id': job['id'], 'spider': job['spider'], 'url': job['url'],
+                          'status': 'failed', 'files': [], 'rows': 0,
+                          'error': f"{type(e).__name__}: {e}"}
+            results.append(result)
+            if progress:
+                detail = f"{result['rows']} 条" if result['status'] == 'ok' else (result['error'] or '无数据')
+                progress(f"[批量] ({len(results)}/{len(jobs)}) {result['id']} {result['status']}: {detail}")
+    finally:
+        for executor in executors:
+            executor.shutdown(wait=True)
+
+    order = {job['id']: i for i, job in enumerate(jobs)}
+    results.sort(key=lambda r: order.get(r['id'], 0))
+    summary = {
+        'started_at': started_at,
+        'elapsed_seconds': round(time.time() - start, 2),
+        'output_dir': os.path.abspath(output_dir),
+        'concurrency': {spider_type: limits[spider_type] for spider_type in groups},
+        'total_jobs': len(jobs),
+        'succeeded': sum(1 for r in results if r['status'] == 'ok'),
+        'empty': sum(1 for r in results if r['status'] == 'empty'),
+        'failed': sum(1 for r in results if r['status'] == 'failed'),
+        'total_rows': sum(r['rows'] for r in results),
+        'jobs': results,
+    }
+    summary_path = os.path.join(output_dir, 'batch_summary.json')
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    summary['summary_file'] = summary_path
+    return summary
+
+
+def parse_concurrency(text):
+    """解析 'table=8,smart=2' 形式的并发配置"""
+    concurrency = {}
+    if not text:
+        return concurrency
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        name, _, value = part.partition('=')
+        concurrency[normalize_spider_type(name)] = int(value)
+    return concurrency
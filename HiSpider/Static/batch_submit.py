@@ -0,0 +1,326 @@
+"""
+批量查询自动提交
+读取本地的企业名称/统一社会信用代码名单，按网站单次批量查询的上限切分，
+通过多个浏览器同时在 batch-query-home 页面提交，收集每次提交得到的 matchId 作为爬取任务，
+代替人工上传名单、等待结果页后再启动爬虫
+"""
+
+import csv
+import json
+import os
+import queue
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse, parse_qs
+
+from batch_runner import RESULT_URL_TEMPLATE
+from rate_limiter import get_host_limiter
+from retry_policy import RetryPolicy
+from crawl_log import get_logger
+
+log = get_logger('batch_submit')
+
+
+BATCH_HOME_URL = "https://qiye.qizhidao.com/batch-query-home"
+
+# 单次批量查询的企业数上限（网站限制，可通过 chunk_size 调整）
+DEFAULT_CHUNK_SIZE = 1000
+
+# 提交按钮上可能出现的文字（按优先级）
+SUBMIT_BUTTON_TEXTS = ('开始查询', '批量查询', '立即查询', '查询', '提交', '确定')
+
+# 把名单填入页面上可见的文本框，并触发 input 事件让 Vue 的 v-model 同步；没有文本框时返回false
+_FILL_TEXTAREA_SCRIPT = """
+    var value = arguments[0];
+    var boxes = Array.prototype.filter.call(document.querySelectorAll('textarea'), function (el) {
+        return el.offsetParent !== null && !el.disabled && !el.readOnly;
+    });
+    if (!boxes.length) { return false; }
+    var box = boxes[0];
+    var setter = Object.getOwnPropertyDescriptor(HTMLTextAreaElement.prototype, 'value').set;
+    setter.call(box, value);
+    box.dispatchEvent(new Event('input', {bubbles: true}));
+    box.dispatchEvent(new Event('change', {bubbles: true}));
+    return true;
+"""
+
+# 按文字优先级点击可见的提交按钮，返回点击的按钮文字，找不到时返回null
+_CLICK_SUBMIT_SCRIPT = """
+    var texts = arguments[0];
+    var buttons = Array.prototype.filter.call(document.querySelectorAll('button, .el-button, [role=button]'),
+        function (el) { return el.offsetParent !== null && !el.disabled && !el.classList.contains('is-disabled'); });
+    for (var i = 0; i < texts.length; i++) {
+        for (var j = 0; j < buttons.length; j++) {
+            var text = (buttons[j].textContent || '').replace(/\\s+/g, '');
+            if (text === texts[i] || (text.length <= 8 && text.indexOf(texts[i]) >= 0)) {
+                buttons[j].click();
+                return text;
+            }
+        }
+    }
+    return null;
+"""
+
+
+class SubmitError(Exception):
+    """批量查询提交失败（找不到输入框/按钮，或等待结果页超时）"""
+
+
+def read_company_list(path):
+    """
+    读取企业名单：.txt 每行一个企业名称或信用代码（# 开头为注释），.csv 取第一列（跳过表头行）
+
+    Returns:
+        list: 去重后的名单（保持原顺序）
+    """
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        if path.lower().endswith('.csv'):
+            items = [row[0].strip() for row in csv.reader(f) if row and row[0].strip()]
+            if items and items[0] in ('企业名称', '公司名称', '统一社会信用代码', '名称'):
+                items = items[1:]
+        else:
+            items = [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+    return list(dict.fromkeys(items))
+
+
+def chunk_list(items, chunk_size=DEFAULT_CHUNK_SIZE):
+    """按上限切分名单"""
+    if chunk_size < 1:
+        raise ValueError("chunk_size 必须大于0")
+    return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+def extract_match_id(url):
+    """从结果页URL中取出matchId，不是结果页时返回None"""
+    if not url or 'batch-query-result' not in urlparse(url).path:
+        return None
+    values = parse_qs(urlparse(url).query).get('matchId')
+    return values[0] if values else None
+
+
+def _default_driver_factory(headless):
+    def factory():
+        from qizhidao_smart_spider import QizhidaoSmartSpider
+        spider = QizhidaoSmartSpider(headless=headless, implicit_wait=0)
+        if not spider.init_driver():
+            raise SubmitError("WebDriver初始化失败")
+        return spider.driver
+    return factory
+
+
+class BatchSubmitter:
+    """
+    多浏览器批量查询提交器
+
+    第一个浏览器负责登录（未登录时等待用户在浏览器中完成），
+    其余浏览器复制它的Cookie；每个名单分块由空闲的浏览器提交，多个分块同时进行
+    """
+
+    def __init__(self, drivers=2, chunk_size=DEFAULT_CHUNK_SIZE, headless=True, driver_factory=None,
+                 home_url=BATCH_HOME_URL, result_timeout=120, login_timeout=300,
+                 poll_interval=0.5, retry_policy=None, rate_limiter=None, spider='smart'):
+        """
+        Args:
+            drivers: 同时提交的浏览器数
+            chunk_size: 每次提交的企业数（不超过网站的批量上限）
+            headless: 默认浏览器是否无头运行（需要人工登录时应设为False）
+            driver_factory: 可选的无参函数，返回一个WebDriver（默认复用智能爬虫的浏览器配置）
+            home_url: 批量查询页面URL
+            result_timeout: 提交后等待跳转到结果页的最长时间（秒）
+            login_timeout: 等待用户登录的最长时间（秒）
+            poll_interval: 等待时的轮询间隔（秒）
+            retry_policy: 单个分块点击提交之前的重试策略，默认失败后重试1次
+            rate_limiter: 限速器，默认使用该主机共享的限速器（所有浏览器的提交共用）
+            spider: 生成的爬取任务使用的爬虫类型
+        """
+        self.driver_count = max(1, drivers)
+        self.chunk_size = chunk_size
+        self.driver_factory = driver_factory or _default_driver_factory(headless)
+        self.home_url = home_url
+        self.result_timeout = result_timeout
+        self.login_timeout = login_timeout
+        self.poll_interval = poll_interval
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=1, base_delay=2.0, max_delay=10.0)
+        self.rate_limiter = rate_limiter or get_host_limiter(home_url)
+        self.spider = spider
+        self.drivers = []
+        self.stats = {'chunks': 0, 'submitted': 0, 'failed': 0, 'items': 0, 'seconds': 0.0}
+
+    def _wait(self, condition, timeout):
+        deadline = time.time() + timeout
+        while True:
+            result = condition()
+            if result:
+                return result
+            if time.time() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def _logged_in(self, driver):
+        return 'login' not in (driver.current_url or '').lower()
+
+    def start(self):
+        """启动浏览器：第一个浏览器登录，其余浏览器复制登录Cookie"""
+        if self.drivers:
+            return
+        first = self.driver_factory()
+        self.drivers.append(first)
+        first.get(self.home_url)
+        if not self._logged_in(first):
+            log.info("[批量提交] 请在浏览器中完成登录（最多等待 %s 秒）...", self.login_timeout)
+            if not self._wait(lambda: self._logged_in(first), self.login_timeout):
+                raise SubmitError("等待登录超时")
+        cookies = first.get_cookies()
+
+        for _ in range(self.driver_count - 1):
+            driver = self.driver_factory()
+            driver.get(self.home_url)
+            for cookie in cookies:
+                try:
+                    driver.add_cookie({key: cookie[key] for key in ('name', 'value', 'path', 'domain', 'secure')
+                                       if key in cookie})
+                except Exception:
+                    pass
+            self.drivers.append(driver)
+        log.info("[批量提交] 已启动 %s 个浏览器", len(self.drivers))
+
+    def _fill(self, driver, names):
+        if driver.execute_script(_FILL_TEXTAREA_SCRIPT, '\n'.join(names)):
+            return None
+        # 没有文本框时，把名单写入临时文件交给上传控件
+        from selenium.webdriver.common.by import By
+        uploads = driver.find_elements(By.CSS_SELECTOR, 'input[type=file]')
+        if not uploads:
+            raise SubmitError("批量查询页面上找不到名单输入框或上传控件")
+        fd, path = tempfile.mkstemp(suffix='.txt', prefix='qizhidao_batch_')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(names))
+            uploads[0].send_keys(path)
+        except BaseException:
+            # 写入或上传失败时调用方拿不到路径，由这里删除临时文件
+            os.remove(path)
+            raise
+        return path
+
+    def _result_match_id(self, driver):
+        match_id = extract_match_id(driver.current_url)
+        if match_id:
+            return match_id
+        # 结果页也可能在新标签页中打开
+        for handle in driver.window_handles[1:]:
+            driver.switch_to.window(handle)
+            match_id = extract_match_id(driver.current_url)
+            if match_id:
+                driver.close()
+                driver.switch_to.window(driver.window_handles[0])
+                return match_id
+        driver.switch_to.window(driver.window_handles[0])
+        return None
+
+    def _fill_and_click(self, driver, names):
+        """打开批量查询页面、填入名单并点击提交按钮"""
+        self.rate_limiter.acquire()
+        driver.get(self.home_url)
+        upload_path = self._fill(driver, names)
+        try:
+            # 上传文件后按钮可能需要一点时间才可用
+            clicked = self._wait(lambda: driver.execute_script(_CLICK_SUBMIT_SCRIPT, list(SUBMIT_BUTTON_TEXTS)),
+                                 min(10, self.result_timeout))
+            if not clicked:
+                raise SubmitError("批量查询页面上找不到可用的提交按钮")
+        finally:
+            if upload_path:
+                os.remove(upload_path)
+
+    def submit_chunk(self, driver, names):
+        """
+        用一个浏览器提交一个名单分块
+
+        点击提交之前的失败（页面没加载好、找不到输入框或按钮）按重试策略重新打开页面再试；
+        点击之后等待结果页的失败不重试：服务器可能已经建好了这次查询，重试会重复提交同一批名单
+
+        Returns:
+            str: 结果页的matchId
+
+        Raises:
+            SubmitError: 找不到输入框/提交按钮，或等待结果页超时
+        """
+        self.retry_policy.run(lambda: self._fill_and_click(driver, names))
+        match_id = self._wait(lambda: self._result_match_id(driver), self.result_timeout)
+        if not match_id:
+            raise SubmitError(f"提交后 {self.result_timeout} 秒内没有跳转到结果页")
+        return match_id
+
+    def submit_all(self, items):
+        """
+        切分名单并用浏览器池并发提交
+
+        Args:
+            items: 企业名称/信用代码列表
+
+        Returns:
+            list: 爬取任务字典（match_id、url、spider、id、count），按分块顺序排列，失败的分块不包含在内
+        """
+        chunks = chunk_list(list(items), self.chunk_size)
+        if not chunks:
+            return []
+        start = time.time()
+        self.start()
+        idle = queue.Queue()
+        for driver in self.drivers:
+            idle.put(driver)
+
+        def submit(index, names):
+            driver = idle.get()
+            try:
+                return self.submit_chunk(driver, names)
+            finally:
+                idle.put(driver)
+
+        jobs = {}
+        with ThreadPoolExecutor(max_workers=len(self.drivers), thread_name_prefix='submit') as pool:
+            futures = {pool.submit(submit, i, names): (i, names) for i, names in enumerate(chunks)}
+            for future in as_completed(futures):
+                index, names = futures[future]
+                try:
+                    match_id = future.result()
+                except Exception as e:
+                    self.stats['failed'] += 1
+                    log.warning("[批量提交] 第 %s 块（%s 家）提交失败: %s", index + 1, len(names), e)
+                    continue
+                self.stats['submitted'] += 1
+                self.stats['items'] += len(names)
+                jobs[index] = {'id': f"chunk{index + 1:04d}", 'match_id': match_id,
+                               'url': RESULT_URL_TEMPLATE.format(match_id=match_id),
+                               'spider': self.spider, 'count': len(names)}
+                log.info("[批量提交] 第 %s/%s 块（%s 家）-> matchId=%s",
+                         index + 1, len(chunks), len(names), match_id)
+        self.stats['chunks'] += len(chunks)
+        self.stats['seconds'] += time.time() - start
+        return [jobs[i] for i in sorted(jobs)]
+
+    def close(self):
+        """关闭所有浏览器"""
+        for driver in self.drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        self.drivers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def write_jobs(jobs, path):
+    """把任务写成 .jsonl 清单（批量模式和分布式模式的 --enqueue 都可以直接读取）"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for job in jobs:
+            f.write(json.dumps(job, ensure_ascii=False) + '\n')
+    return path
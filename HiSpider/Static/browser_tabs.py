@@ -0,0 +1,242 @@
+"""
+单浏览器多标签页并行翻页
+在一个已登录的Chrome中打开多个标签页（共享Cookie），每个标签页负责一段连续的页码，
+通过直接跳页在各自的页码范围内前进；主线程轮流切换标签页：在一个标签页发出跳页请求后
+立即切到下一个标签页抓取已加载好的页面，一个标签页的加载等待与其他标签页的提取重叠进行
+"""
+
+import time
+from collections import deque
+
+from crawl_log import get_logger
+
+log = get_logger('tabs')
+
+
+def split_page_ranges(first, last, count):
+    """
+    把页码范围 [first, last] 尽量均匀地分成 count 段连续的页码
+
+    Returns:
+        list: [(起始页, 结束页), ...]，段数不超过页数
+    """
+    total = last - first + 1
+    if total <= 0:
+        return []
+    count = max(1, min(count, total))
+    size, extra = divmod(total, count)
+    ranges = []
+    start = first
+    for i in range(count):
+        end = start + size - 1 + (1 if i < extra else 0)
+        ranges.append((start, end))
+        start = end + 1
+    return ranges
+
+
+class BrowserTab:
+    """一个标签页及其负责的页码"""
+
+    def __init__(self, handle, index):
+        self.handle = handle
+        self.index = index
+        self.pages = deque()
+        self.pending = None  # 已发出跳页请求、尚未抓取的页码
+        self.requested_at = 0.0
+        self.retried = False
+
+    @property
+    def finished(self):
+        return self.pending is None and not self.pages
+
+    def __repr__(self):
+        return f"BrowserTab({self.index}, pending={self.pending}, remaining={len(self.pages)})"
+
+
+class TabScheduler:
+    """
+    轮流驱动同一浏览器中的多个标签页
+
+    WebDriver 同一时刻只能操作一个标签页，但页面的网络请求和渲染在每个标签页中独立进行，
+    所以对每个标签页只做不等待的操作：发出跳页请求、检查目标页是否已就绪、抓取快照。
+    具体的浏览器操作由调用方以回调函数提供（见 run）
+
+    用法::
+
+        scheduler = TabScheduler(driver, tabs=3)
+        scheduler.open(result_url, prepare=lambda tab: ...)
+        scheduler.assign(1, total_pages)
+        for page, snapshot in scheduler.run(request, ready, capture):
+            ...
+        scheduler.close()
+    """
+
+    def __init__(self, driver, tabs=2, poll_interval=0.1, page_timeout=15):
+        """
+        Args:
+            driver: 已登录的 WebDriver
+            tabs: 标签页数量（包括当前标签页）
+            poll_interval: 所有标签页都在等待加载时的轮询间隔（秒）
+            page_timeout: 一次跳页请求等待就绪的最长时间（秒），超时后重新请求一次，再超时则放弃该页
+        """
+        self.driver = driver
+        self.count = max(1, int(tabs))
+        self.poll_interval = poll_interval
+        self.page_timeout = page_timeout
+        self.tabs = []
+        self._current = None
+        self.failed_pages = []
+        self.stats = {'pages': 0, 'requests': 0, 'timeouts': 0, 'switches': 0, 'idle_seconds': 0.0}
+
+    def _new_tab(self):
+        before = set(self.driver.window_handles)
+        switch_to = self.driver.switch_to
+        if hasattr(switch_to, 'new_window'):
+            switch_to.new_window('tab')
+            return self.driver.current_window_handle
+        # 旧版本Selenium没有 new_window，用 window.open 打开后找出新的句柄
+        self.driver.execute_script("window.open('about:blank', '_blank');")
+        handle = next(h for h in self.driver.window_handles if h not in before)
+        switch_to.window(handle)
+        return handle
+
+    def open(self, url, prepare=None):
+        """
+        在当前标签页之外再打开 tabs-1 个标签页并加载 url
+
+        Args:
+            url: 新标签页加载的结果页URL（与当前标签页共享登录状态）
+            prepare: 可选的回调 prepare(tab)，在切换到新标签页后调用（等待表格、切换每页条数等），
+                     返回False表示该标签页不可用，将被关闭
+
+        Returns:
+            int: 可用的标签页数量
+        """
+        first = BrowserTab(self.driver.current_window_handle, 0)
+        self.tabs = [first]
+        self._current = first.handle
+        for index in range(1, self.count):
+            try:
+                handle = self._new_tab()
+                self._current = handle
+                self.driver.get(url)
+            except Exception as e:
+                log.warning("[标签页] 打开第 %s 个标签页失败: %s", index + 1, e)
+                break
+            tab = BrowserTab(handle, index)
+            if prepare is not None and prepare(tab) is False:
+                log.warning("[标签页] 第 %s 个标签页未能加载结果页，已关闭", index + 1)
+                self.driver.close()
+                self._current = None
+                continue
+            self.tabs.append(tab)
+        self.switch(first)
+        return len(self.tabs)
+
+    def switch(self, tab):
+        """切换到标签页（已经是当前标签页时不发送命令）"""
+        if self._current != tab.handle:
+            self.driver.switch_to.window(tab.handle)
+            self._current = tab.handle
+            self.stats['switches'] += 1
+
+    def assign(self, first, last, skip=()):
+        """
+        把页码范围 [first, last] 分给各标签页，每个标签页一段按顺序的页码
+
+        Args:
+            skip: 已经爬取过的页码（如浏览器重启后续爬），不再分配，剩下的页码仍均匀分给各标签页
+        """
+        for tab in self.tabs:
+            tab.pages.clear()
+            tab.pending = None
+        pages = [page for page in range(first, last + 1) if page not in skip]
+        for tab, (start, end) in zip(self.tabs, split_page_ranges(0, len(pages) - 1, len(self.tabs))):
+            tab.pages.extend(pages[start:end + 1])
+
+    def _request(self, tab, request):
+        tab.pending = tab.pages.popleft()
+        tab.requested_at = time.time()
+        tab.retried = False
+        self.stats['requests'] += 1
+        request(tab.pending)
+
+    def run(self, request, ready, capture, on_timeout=None):
+        """
+        轮流驱动各标签页，逐页产出快照（不同标签页的页面交错产出，不保证页码顺序）
+
+        Args:
+            request: request(page)，在当前标签页发出跳页请求，不等待加载完成
+            ready: ready(page) -> bool，当前标签页是否已显示该页且表格已渲染
+            capture: capture(page) -> 快照，抓取当前标签页的表格
+            on_timeout: 可选的 on_timeout(page) -> bool，页面超时未就绪时调用（如检测验证码），
+                        返回True表示已处理，重新等待该页
+
+        Yields:
+            tuple: (页码, 快照)
+        """
+        while True:
+            active = [tab for tab in self.tabs if not tab.finished]
+            if not active:
+                return
+            progressed = False
+            for tab in active:
+                self.switch(tab)
+                if tab.pending is None:
+                    self._request(tab, request)
+                    progressed = True
+                    continue
+                page = tab.pending
+                if ready(page):
+                    snapshot = capture(page)
+                    self.stats['pages'] += 1
+                    tab.pending = None
+                    # 立即在这个标签页请求下一页，切到其他标签页时它在后台加载
+                    if tab.pages:
+                        self._request(tab, request)
+                    progressed = True
+                    yield page, snapshot
+                    continue
+                if time.time() - tab.requested_at < self.page_timeout:
+                    continue
+                self.stats['timeouts'] += 1
+                if on_timeout is not None and on_timeout(page):
+                    tab.requested_at = time.time()
+                elif not tab.retried:
+                    log.warning("[标签页] 标签页%s的第 %s 页加载超时，重新请求", tab.index + 1, page)
+                    tab.retried = True
+                    tab.requested_at = time.time()
+                    request(page)
+                else:
+                    log.warning("[标签页] 标签页%s的第 %s 页仍未加载，跳过", tab.index + 1, page)
+                    self.failed_pages.append(page)
+                    tab.pending = None
+                progressed = True
+            if not progressed:
+                # 所有标签页都在等待加载
+                time.sleep(self.poll_interval)
+                self.stats['idle_seconds'] += self.poll_interval
+
+    def close(self):
+        """关闭额外打开的标签页，切回第一个标签页"""
+        if not self.tabs:
+            return
+        for tab in self.tabs[1:]:
+            try:
+                self.switch(tab)
+                self.driver.close()
+            except Exception:
+                pass
+            self._current = None
+        try:
+            self.driver.switch_to.window(self.tabs[0].handle)
+            self._current = self.tabs[0].handle
+        except Exception:
+            pass
+        self.tabs = self.tabs[:1]
+
+    def summary(self):
+        """运行统计的一行摘要"""
+        stats = self.stats
+        return (f"{len(self.tabs)} 个标签页，抓取 {stats['pages']} 页，跳页请求 {stats['requests']} 次，"
+                f"超时 {stats['timeouts']} 次，空闲等待 {stats['idle_seconds']:.1f} 秒")
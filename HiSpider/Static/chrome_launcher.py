@@ -0,0 +1,219 @@
+"""
+常驻Chrome与远程调试连接
+用 --remote-debugging-port 启动一个长期运行的Chrome（独立的用户数据目录，保留登录状态），
+智能爬虫通过调试地址连接到它，而不是每个任务都启动一个新浏览器：
+连续的任务复用已经启动好的浏览器和登录会话，每个任务只在自己的标签页中工作，结束时关闭这些标签页
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from urllib.request import urlopen
+
+from crawl_log import get_logger
+
+log = get_logger('chrome')
+
+
+DEFAULT_DEBUG_PORT = 9222
+DEFAULT_PROFILE_DIR = 'chrome_profile'
+
+# 常见的Chrome可执行文件名和安装位置
+_CHROME_NAMES = ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+_CHROME_PATHS = (
+    r'C:\Program Files\Google\Chrome\Application\chrome.exe',
+    r'C:\Program Files (x86)\Google\Chrome\Application\chrome.exe',
+    os.path.expandvars(r'%LOCALAPPDATA%\Google\Chrome\Application\chrome.exe'),
+    '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+)
+
+
+def find_chrome_binary():
+    """查找本机的Chrome可执行文件，找不到时返回None"""
+    for name in _CHROME_NAMES:
+        path = shutil.which(name)
+        if path:
+            return path
+    for path in _CHROME_PATHS:
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def debugger_address(port=DEFAULT_DEBUG_PORT, host='127.0.0.1'):
+    """调试地址 host:port（传给 QizhidaoSmartSpider 的 debugger_address）"""
+    return f"{host}:{port}"
+
+
+def read_browser_version(address, timeout=1.0):
+    """
+    读取调试端口上的浏览器信息（/json/version）
+
+    Returns:
+        dict: Browser、webSocketDebuggerUrl 等；端口上没有可用的浏览器时返回None
+    """
+    try:
+        with urlopen(f"http://{address}/json/version", timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def is_debugger_alive(address, timeout=1.0):
+    """调试端口上是否有正在运行的浏览器"""
+    return read_browser_version(address, timeout) is not None
+
+
+class ChromeLauncher:
+    """
+    启动并看护带远程调试端口的常驻Chrome
+
+    端口上已经有浏览器时直接复用；ensure_running 在浏览器退出或失去响应后重新启动它
+    （用户数据目录不变，登录状态保留）
+    """
+
+    def __init__(self, port=DEFAULT_DEBUG_PORT, profile_dir=DEFAULT_PROFILE_DIR, chrome_path=None,
+                 headless=False, extra_args=(), start_timeout=30):
+        """
+        Args:
+            port: 远程调试端口
+            profile_dir: Chrome用户数据目录（保存Cookie和登录状态）
+            chrome_path: Chrome可执行文件，默认自动查找
+            headless: 是否无头运行
+            extra_args: 额外的命令行参数
+            start_timeout: 等待调试端口就绪的最长时间（秒）
+        """
+        self.port = port
+        self.profile_dir = os.path.abspath(profile_dir)
+        self.chrome_path = chrome_path
+        self.headless = headless
+        self.extra_args = list(extra_args)
+        self.start_timeout = start_timeout
+        self.process = None
+        self.stats = {'starts': 0, 'restarts': 0, 'reused': 0}
+
+    @property
+    def address(self):
+        return debugger_address(self.port)
+
+    def command(self):
+        """启动Chrome的命令行"""
+        chrome = self.chrome_path or find_chrome_binary()
+        if not chrome:
+            raise FileNotFoundError("未找到Chrome浏览器，请安装Chrome或通过 chrome_path 指定可执行文件")
+        args = [
+            chrome,
+            f'--remote-debugging-port={self.port}',
+            f'--user-data-dir={self.profile_dir}',
+            '--no-first-run',
+            '--no-default-browser-check',
+            '--disable-blink-features=AutomationControlled',
+            '--disable-background-timer-throttling',  # 后台标签页也按正常速度运行（多标签页模式需要）
+            '--disable-renderer-backgrounding',
+        ]
+        if self.headless:
+            args.append('--headless=new')
+        args.extend(self.extra_args)
+        args.append('about:blank')
+        return args
+
+    def start(self):
+        """
+        确保调试端口上有浏览器：已有时复用，否则启动一个新的Chrome
+
+        Returns:
+            str: 调试地址
+        """
+        if is_debugger_alive(self.address):
+            self.stats['reused'] += 1
+            return self.address
+        os.makedirs(self.profile_dir, exist_ok=True)
+        kwargs = {'stdout': subprocess.DEVNULL, 'stderr': subprocess.DEVNULL}
+        if sys.platform == 'win32':
+            kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs['start_new_session'] = True  # 启动脚本退出或收到Ctrl+C时浏览器继续运行
+        self.process = subprocess.Popen(self.command(), **kwargs)
+        self.stats['starts'] += 1
+
+        deadline = time.time() + self.start_timeout
+        while time.time() < deadline:
+            if is_debugger_alive(self.address):
+                log.info("[Chrome] 已启动，调试地址: %s（用户数据目录: %s）", self.address, self.profile_dir)
+                return self.address
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Chrome启动后立即退出（退出码 {self.process.returncode}）")
+            time.sleep(0.2)
+        self.stop()
+        raise TimeoutError(f"等待Chrome调试端口 {self.port} 就绪超时（{self.start_timeout} 秒）")
+
+    def ensure_running(self):
+        """浏览器已退出或调试端口失去响应时重新启动，返回调试地址"""
+        if is_debugger_alive(self.address, timeout=3.0):
+            return self.address
+        log.warning("[Chrome] 浏览器没有响应，正在重新启动...")
+        self.stop()
+        self.stats['restarts'] += 1
+        return self.start()
+
+    def supervise(self, interval=5.0, max_restarts=None):
+        """
+        前台看护浏览器：定期检查调试端口，浏览器退出或失去响应时自动重启，Ctrl+C 停止
+
+        Args:
+            interval: 检查间隔（秒）
+            max_restarts: 最多重启次数，None表示不限
+        """
+        self.start()
+        try:
+            while max_restarts is None or self.stats['restarts'] < max_restarts:
+                time.sleep(interval)
+                self.ensure_running()
+        except KeyboardInterrupt:
+            log.info("[Chrome] 停止看护")
+
+    def stop(self, timeout=5):
+        """关闭由本对象启动的Chrome（复用的外部浏览器不会被关闭）"""
+        process, self.process = self.process, None
+        if process is None or process.poll() is not None:
+            return
+        process.terminate()
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def attach_driver(address, implicit_wait=0):
+    """
+    连接到调试地址上正在运行的Chrome
+
+    Args:
+        address: 调试地址 host:port
+        implicit_wait: 隐式等待时间（秒）
+
+    Returns:
+        WebDriver
+    """
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    if not is_debugger_alive(address):
+        raise ConnectionError(f"调试地址 {address} 上没有正在运行的Chrome，"
+                              f"请先运行: python run_qizhidao_spider.py chrome")
+    options = Options()
+    options.add_experimental_option('debuggerAddress', address)
+    driver = webdriver.Chrome(options=options)
+    driver.implicitly_wait(implicit_wait)
+    return driver
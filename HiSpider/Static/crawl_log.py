@@ -0,0 +1,294 @@
+"""
+爬虫日志
+所有爬虫共用的 'qizhidao' 日志树：调用方只把日志记录放进内存队列（QueueHandler），
+由后台线程（QueueListener）写到终端或JSON行文件，爬取主循环不再因为终端或管道慢而阻塞；
+同一调用位置短时间内重复的消息按频率限流，恢复输出时附上省略的条数。
+
+用法::
+
+    from crawl_log import get_logger
+    log = get_logger('table_spider')
+    log.info("[步骤3] 正在爬取第 %s 页...", page)
+    log.debug("找到 %s 个页码元素", count)      # 默认级别INFO时不输出，也不格式化参数
+
+第一次 get_logger 时按默认配置（INFO级别、文字格式输出到标准输出）启动；
+启动脚本通过 --log-level / --log-json 调用 configure 修改。需要与 input() 交替输出时先调用 flush()
+"""
+
+import atexit
+import contextlib
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+
+ROOT_LOGGER = 'qizhidao'
+DEFAULT_LEVEL = 'INFO'
+
+# 同一调用位置每 RATE_INTERVAL 秒最多输出 RATE_BURST 条
+RATE_BURST = 10
+RATE_INTERVAL = 5.0
+
+# 文字格式中非INFO级别消息的前缀（与原来手写的前缀保持一致）
+LEVEL_TAGS = {
+    logging.DEBUG: '[调试] ',
+    logging.WARNING: '[警告] ',
+    logging.ERROR: '[错误] ',
+    logging.CRITICAL: '[严重错误] ',
+}
+
+_state = {'listener': None, 'queue': None, 'options': None}
+_lock = threading.RLock()
+
+
+class TextFormatter(logging.Formatter):
+    """终端文字格式：级别前缀 + 消息，可选时间和线程名"""
+
+    def __init__(self, show_time=False):
+        super().__init__()
+        self.show_time = show_time
+
+    def format(self, record):
+        text = LEVEL_TAGS.get(record.levelno, '') + record.getMessage()
+        if self.show_time:
+            text = f"{time.strftime('%H:%M:%S', time.localtime(record.created))} {record.threadName} {text}"
+        if getattr(record, 'suppressed', 0):
+            text += f"（此前 {record.suppressed} 条同类消息已省略）"
+        if record.exc_info:
+            text += '\n' + self.formatException(record.exc_info)
+        return text
+
+
+class JsonFormatter(logging.Formatter):
+    """每条记录一行JSON，便于日志收集程序解析"""
+
+    def format(self, record):
+        entry = {
+            'time': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'suppressed', 0):
+            entry['suppressed'] = record.suppressed
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    按调用位置（文件+行号）限流：每 interval 秒最多放行 burst 条，
+    被丢弃的条数记在下一条放行的记录上（record.suppressed）。
+
+    WARNING 及以上级别不限流
+    """
+
+    def __init__(self, burst=RATE_BURST, interval=RATE_INTERVAL):
+        super().__init__()
+        self.burst = burst
+        self.interval = interval
+        self.stats = {'passed': 0, 'suppressed': 0}
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.burst <= 0 or record.levelno >= logging.WARNING:
+            self.stats['passed'] += 1
+            return True
+        key = (record.pathname, record.lineno)
+        now = record.created
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                # 新窗口：[窗口开始时间, 已放行条数, 已丢弃条数]
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < self.burst:
+                window[1] += 1
+                suppressed = window[2]
+                window[2] = 0
+            else:
+                window[2] += 1
+                self.stats['suppressed'] += 1
+                return False
+        if suppressed:
+            record.suppressed = suppressed
+        self.stats['passed'] += 1
+        return True
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """每次输出时取当前的 sys.stdout（跟随 redirect_stdout 和测试框架的捕获）"""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, value):
+        pass
+
+
+def configure(level=None, json_output=None, show_time=False, burst=RATE_BURST, interval=RATE_INTERVAL,
+              console=True):
+    """
+    (重新)配置 'qizhidao' 日志树，可重复调用，旧的后台线程会先输出完已排队的记录再停止
+
+    Args:
+        level: 日志级别（'DEBUG'/'INFO'/'WARNING'/... 或数值），默认 INFO
+        json_output: None 不输出JSON；'-' 终端输出改为JSON行；其他值为额外写入的JSON行文件路径
+        show_time: 文字格式是否带时间和线程名
+        burst: 同一调用位置每 interval 秒最多输出的条数，0表示不限流
+        interval: 限流窗口（秒）
+        console: 是否输出到终端
+
+    Returns:
+        logging.Logger: 根日志对象
+    """
+    options = {'level': level or DEFAULT_LEVEL, 'json_output': json_output, 'show_time': show_time,
+               'burst': burst, 'interval': interval, 'console': console}
+    with _lock:
+        shutdown()
+        handlers = []
+        if console:
+            handler = _StdoutHandler()
+            handler.setFormatter(JsonFormatter() if json_output == '-' else TextFormatter(show_time))
+            handlers.append(handler)
+        if json_output and json_output != '-':
+            directory = os.path.dirname(json_output)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handler = logging.FileHandler(json_output, encoding='utf-8')
+            handler.setFormatter(JsonFormatter())
+            handlers.append(handler)
+
+        log_queue = queue.Queue()
+        # 调用线程只负责合并消息参数并入队，写终端、写文件和JSON序列化都在后台线程完成
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter(burst, interval))
+
+        root = logging.getLogger(ROOT_LOGGER)
+        for old in list(root.handlers):
+            root.removeHandler(old)
+        root.addHandler(queue_handler)
+        root.setLevel(options['level'].upper() if isinstance(options['level'], str) else options['level'])
+        root.propagate = False
+
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        _state.update(listener=listener, queue=log_queue, options=options)
+        return root
+
+
+def get_logger(name):
+    """
+    获取爬虫模块的日志对象（'qizhidao.<name>'），尚未配置时按默认配置启动
+
+    Args:
+        name: 模块短名，如 'smart_spider'
+    """
+    if _state['listener'] is None:
+        with _lock:
+            if _state['listener'] is None:
+                configure()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def flush():
+    """等待已排队的日志全部写出（在 input() 提示和重定向结束之前调用）"""
+    log_queue = _state['queue']
+    if log_queue is not None and _state['listener'] is not None:
+        log_queue.join()
+    for handler in _handlers():
+        handler.flush()
+
+
+def _handlers():
+    listener = _state['listener']
+    return listener.handlers if listener else ()
+
+
+def shutdown():
+    """写出已排队的日志并停止后台线程"""
+    with _lock:
+        listener = _state['listener']
+        if listener is None:
+            return
+        listener.stop()
+        for handler in listener.handlers:
+            handler.flush()
+            if isinstance(handler, logging.FileHandler):
+                handler.close()
+        _state.update(listener=None, queue=None)
+
+
+def rate_limit_stats():
+    """当前配置的限流统计 {'passed', 'suppressed'}"""
+    for handler in logging.getLogger(ROOT_LOGGER).handlers:
+        for log_filter in handler.filters:
+            if isinstance(log_filter, RateLimitFilter):
+                return dict(log_filter.stats)
+    return {'passed': 0, 'suppressed': 0}
+
+
+@contextlib.contextmanager
+def quiet():
+    """临时关闭所有爬虫日志（解析回归、回放基准等只关心结果的场景）"""
+    root = logging.getLogger(ROOT_LOGGER)
+    level = root.level
+    root.setLevel(logging.CRITICAL + 1)
+    try:
+        yield
+    finally:
+        root.setLevel(level)
+
+
+def parse_log_args(argv):
+    """
+    从命令行参数中取出日志选项（可以出现在任意位置），其余参数原样返回
+
+    --log-level=LEVEL        DEBUG/INFO/WARNING/ERROR（默认 INFO；DEBUG 输出原来的 [调试] 信息）
+    --log-json[=文件]        不带文件时终端输出改为JSON行，带文件时额外写入该文件
+    --log-time               文字格式带时间和线程名
+    --log-burst=N            同一位置每5秒最多输出N条（默认 10，0 不限流）
+
+    Returns:
+        tuple: (configure 的参数字典，没有日志选项时为None, 剩余参数列表)
+    """
+    options = {}
+    rest = []
+    args = iter(argv)
+    for arg in args:
+        if arg == '--log-level' or arg.startswith('--log-level='):
+            options['level'] = (arg.split('=', 1)[1] if '=' in arg else next(args, DEFAULT_LEVEL)).upper()
+        elif arg == '--log-json' or arg.startswith('--log-json='):
+            options['json_output'] = arg.split('=', 1)[1] if '=' in arg else '-'
+        elif arg == '--log-time':
+            options['show_time'] = True
+        elif arg.startswith('--log-burst='):
+            options['burst'] = int(arg.split('=', 1)[1])
+        else:
+            rest.append(arg)
+    return (options or None), rest
+
+
+def _reset_after_fork():
+    # 子进程（批量模式的进程池）不继承后台线程：丢掉父进程的队列，按相同配置重新启动
+    global _lock
+    _lock = threading.RLock()
+    options = _state['options']
+    _state.update(listener=None, queue=None)
+    if options is not None:
+        configure(**options)
+
+
+atexit.register(shutdown)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,588 @@
+"""
+Selenium爬取的录制与回放
+录制：智能爬虫每抓取一页就保存该页的DOM快照（page_source，含当时的分页组件状态）和URL，
+写入录制目录（每页一个 gzip 文件 + manifest.json）。
+回放：ReplayDriver 实现爬虫用到的 WebDriver 接口（查找元素、读取属性、执行脚本、page_source、current_url、
+标签页），用录制的快照应答，点击页码、下一页按钮或跳页时切换到对应页的快照。
+这样不需要浏览器和网络，就能离线测量解析、去重和翻页逻辑本身的吞吐量
+"""
+
+import gzip
+import json
+import os
+import re
+import time
+
+from bs4 import BeautifulSoup
+from selenium.common.exceptions import (NoSuchElementException, StaleElementReferenceException,
+                                        NoSuchWindowException, InvalidSelectorException)
+from selenium.webdriver.common.keys import Keys
+
+import el_table
+
+
+MANIFEST_NAME = 'manifest.json'
+REPLAY_URL = "https://qiye.qizhidao.com/batch-query-result?matchId=replay"
+
+# 智能爬虫中 "在某个页码按钮上查找" 的 XPath
+_NUMBER_XPATH = re.compile(r'^\.//li\[contains\(@class, "number"\) and text\(\)="(\d+)"\]$')
+
+
+def _page_file(page):
+    return f"page_{page:04d}.html.gz"
+
+
+def load_manifest(directory):
+    """读取录制目录的 manifest.json"""
+    with open(os.path.join(directory, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class SnapshotRecorder:
+    """
+    把爬取过程中每一页的DOM快照保存到录制目录
+
+    用法::
+
+        recorder = SnapshotRecorder('recordings/job1')
+        recorder.start(result_url, total_pages=50, page_size=100)
+        recorder.record(page, driver.page_source, driver.current_url)
+        recorder.close()
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.manifest = {'url': None, 'total_pages': None, 'page_size': None, 'recorded_at': None, 'pages': {}}
+        self.stats = {'pages': 0, 'bytes': 0}
+
+    def start(self, url, total_pages=None, page_size=None):
+        """开始录制：记录结果页URL和分页信息"""
+        os.makedirs(self.directory, exist_ok=True)
+        self.manifest.update(url=url, total_pages=total_pages, page_size=page_size,
+                             recorded_at=time.strftime('%Y-%m-%d %H:%M:%S'))
+        self._write_manifest()
+
+    def record(self, page, page_source, url=None):
+        """
+        保存一页的快照（同一页再次录制时覆盖）
+
+        Args:
+            page: 页码
+            page_source: 该页的 page_source
+            url: 该页的URL，默认使用结果页URL
+        """
+        name = _page_file(page)
+        data = page_source.encode('utf-8')
+        with gzip.open(os.path.join(self.directory, name), 'wb', compresslevel=5) as f:
+            f.write(data)
+        self.manifest['pages'][str(page)] = {'file': name, 'url': url or self.manifest['url']}
+        self.stats['pages'] += 1
+        self.stats['bytes'] += len(data)
+        # 每页都更新清单，爬取中途退出时已录制的页面仍可回放
+        self._write_manifest()
+
+    def _write_manifest(self):
+        path = os.path.join(self.directory, MANIFEST_NAME)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=2)
+        os.replace(path + '.tmp', path)
+
+    def close(self):
+        self._write_manifest()
+
+    def summary(self):
+        return f"录制 {self.stats['pages']} 页（{self.stats['bytes'] / 1024:.0f} KB）到 {self.directory}"
+
+
+class ReplayElement:
+    """
+    回放页面中的元素
+
+    元素以从文档根开始的子元素序号路径定位，每次访问都在所属标签页当前显示的快照上重新解析，
+    所以翻页后缓存的分页组件元素仍然可用（与Vue原地更新DOM的行为一致），路径失效时抛出 StaleElementReferenceException
+    """
+
+    def __init__(self, driver, handle, path):
+        self._driver = driver
+        self._handle = handle
+        self._path = path
+
+    @property
+    def _tag(self):
+        tag = self._driver._resolve(self._handle, self._path)
+        if tag is None:
+            raise StaleElementReferenceException(f"元素已不在页面中: {self._path}")
+        return tag
+
+    @property
+    def tag_name(self):
+        return self._tag.name
+
+    @property
+    def text(self):
+        return ' '.join(self._tag.stripped_strings)
+
+    @property
+    def size(self):
+        return {'height': 20, 'width': 100}
+
+    def is_displayed(self):
+        return self._tag is not None
+
+    def is_enabled(self):
+        return self._tag.get('disabled') is None
+
+    def get_attribute(self, name):
+        tag = self._tag
+        if name == 'outerHTML':
+            return str(tag)
+        if name == 'innerHTML':
+            return tag.decode_contents()
+        if name in ('textContent', 'innerText'):
+            return tag.get_text()
+        value = tag.get(name)
+        if value is None:
+            return None
+        if isinstance(value, list):
+            return ' '.join(value)
+        # 布尔属性（disabled 等）与浏览器一样返回 'true'
+        return value or 'true'
+
+    def get_dom_attribute(self, name):
+        return self.get_attribute(name)
+
+    def find_element(self, by, value):
+        return self._driver._find(self._handle, self._tag, by, value, single=True)
+
+    def find_elements(self, by, value):
+        return self._driver._find(self._handle, self._tag, by, value)
+
+    def click(self):
+        self._driver._click(self._handle, self._tag)
+
+    def send_keys(self, *values):
+        self._driver._type(self._handle, ''.join(str(value) for value in values))
+
+    def __eq__(self, other):
+        return isinstance(other, ReplayElement) and (self._handle, self._path) == (other._handle, other._path)
+
+    def __hash__(self):
+        return hash((self._handle, self._path))
+
+    def __repr__(self):
+        return f"ReplayElement({self._handle}, {self._path})"
+
+
+class _SwitchTo:
+    def __init__(self, driver):
+        self._driver = driver
+
+    def window(self, handle):
+        if handle not in self._driver._tabs:
+            raise NoSuchWindowException(f"没有标签页 {handle}")
+        self._driver._current = handle
+
+    def new_window(self, type_hint=None):
+        self._driver._current = self._driver._open_tab()
+
+
+class ReplayDriver:
+    """
+    用录制的快照应答的 WebDriver 替身（不启动浏览器）
+
+    支持智能爬虫用到的接口：get、current_url、page_source、title、find_element(s)（CSS、标签名、类名、ID，
+    以及 "./.." 和按页码文字查找的XPath）、元素的 text/get_attribute/click/send_keys、execute_script
+    （el-table快照、行快照、分页组件跳页、标签页状态、点击等脚本）和多标签页。
+    未录制的页面不会被切换到（跳页请求被忽略），与网站拒绝越界页码时的表现一致
+    """
+
+    def __init__(self, directory=None, pages=None, url=REPLAY_URL):
+        """
+        Args:
+            directory: SnapshotRecorder 的录制目录
+            pages: 不使用录制目录时直接给出页面 {页码: HTML}
+            url: 直接给出页面时各页的URL
+        """
+        self.directory = directory
+        if pages is not None:
+            self.manifest = {'url': url, 'pages': {str(page): {'file': None, 'url': url} for page in pages}}
+        else:
+            self.manifest = load_manifest(directory)
+        self._entries = {int(page): entry for page, entry in self.manifest['pages'].items()}
+        if not self._entries:
+            raise ValueError(f"录制目录中没有页面: {directory}")
+        self._sources = dict(pages or {})
+        self._soups = {}
+        self._tabs = {}  # 标签页句柄 -> 显示的页码（None 表示空白页）
+        self._typed = {}  # 标签页句柄 -> 跳页输入框中已输入的文字
+        self._tab_counter = 0
+        self._current = self._open_tab()
+        self.switch_to = _SwitchTo(self)
+        self.stats = {'navigations': 0, 'ignored_navigations': 0, 'scripts': 0, 'lookups': 0, 'parsed_pages': 0}
+
+    # ---- 页面与标签页 ----
+
+    def _open_tab(self):
+        self._tab_counter += 1
+        handle = f"replay-tab-{self._tab_counter}"
+        self._tabs[handle] = None
+        return handle
+
+    def _source(self, page):
+        source = self._sources.get(page)
+        if source is None:
+            with gzip.open(os.path.join(self.directory, self._entries[page]['file']), 'rb') as f:
+                source = f.read().decode('utf-8')
+            self._sources[page] = source
+        return source
+
+    def _soup(self, handle):
+        page = self._tabs[handle]
+        if page is None:
+            return BeautifulSoup('<html><head></head><body></body></html>', 'lxml')
+        soup = self._soups.get(page)
+        if soup is None:
+            soup = BeautifulSoup(self._source(page), 'lxml')
+            self._soups[page] = soup
+            self.stats['parsed_pages'] += 1
+        return soup
+
+    def _navigate(self, handle, page):
+        """让标签页显示第 page 页，没有录制该页时忽略并返回False"""
+        if page not in self._entries:
+            self.stats['ignored_navigations'] += 1
+            return False
+        self._tabs[handle] = page
+        self._typed.pop(handle, None)
+        self.stats['navigations'] += 1
+        return True
+
+    def _active_page(self, handle):
+        active = self._soup(handle).select_one('ul.el-pager li.number.active')
+        text = active.get_text(strip=True) if active is not None else ''
+        return int(text) if text.isdigit() else self._tabs[handle]
+
+    # ---- 元素定位 ----
+
+    @staticmethod
+    def _path_of(tag):
+        path = []
+        while tag.parent is not None:
+            siblings = [child for child in tag.parent.contents if getattr(child, 'name', None)]
+            path.append(next(i for i, child in enumerate(siblings) if child is tag))
+            tag = tag.parent
+        return tuple(reversed(path))
+
+    def _resolve(self, handle, path):
+        if handle not in self._tabs:
+            return None
+        tag = self._soup(handle)
+        for index in path:
+            children = [child for child in tag.contents if getattr(child, 'name', None)]
+            if index >= len(children):
+                return None
+            tag = children[index]
+        return tag
+
+    def _element(self, handle, tag):
+        return ReplayElement(self, handle, self._path_of(tag))
+
+    def _select(self, scope, by, value):
+        if by == 'css selector':
+            try:
+                return scope.select(value)
+            except Exception as e:
+                raise InvalidSelectorException(f"无效的CSS选择器 {value}: {e}") from None
+        if by == 'tag name':
+            return scope.find_all(value)
+        if by == 'class name':
+            return scope.find_all(class_=value)
+        if by == 'id':
+            return scope.find_all(id=value)
+        if by == 'name':
+            return scope.find_all(attrs={'name': value})
+        if by == 'xpath':
+            if value == './..':
+                return [scope.parent] if scope.parent is not None else []
+            match = _NUMBER_XPATH.match(value)
+            if match:
+                return [li for li in scope.find_all('li', class_='number')
+                        if ''.join(li.find_all(string=True, recursive=False)).strip() == match.group(1)]
+        raise InvalidSelectorException(f"回放不支持的定位方式: {by}={value}")
+
+    def _find(self, handle, scope, by, value, single=False):
+        self.stats['lookups'] += 1
+        tags = self._select(scope, by, value)
+        if single:
+            if not tags:
+                raise NoSuchElementException(f"找不到元素: {by}={value}")
+            return self._element(handle, tags[0])
+        return [self._element(handle, tag) for tag in tags]
+
+    # ---- 交互 ----
+
+    def _click(self, handle, tag):
+        classes = tag.get('class') or []
+        if tag.get('disabled') is not None or 'disabled' in classes:
+            return
+        if 'number' in classes:
+            text = tag.get_text(strip=True)
+            if text.isdigit():
+                self._navigate(handle, int(text))
+        elif 'btn-next' in classes or 'next' in classes:
+            self._navigate(handle, self._active_page(handle) + 1)
+        elif 'btn-prev' in classes or 'prev' in classes:
+            self._navigate(handle, self._active_page(handle) - 1)
+
+    def _type(self, handle, text):
+        if Keys.CONTROL in text:
+            # Ctrl+A 之后输入的内容替换原有文字
+            self._typed[handle] = ''
+            text = text.replace(Keys.CONTROL, '').lstrip('a')
+        typed = self._typed.get(handle, '')
+        for char in text:
+            if char == Keys.ENTER:
+                if typed.isdigit():
+                    self._navigate(handle, int(typed))
+                typed = ''
+            elif char.isdigit():
+                typed += char
+        self._typed[handle] = typed
+
+    # ---- WebDriver 接口 ----
+
+    def get(self, url):
+        """打开结果页：URL中带 page=N 时显示第N页，否则显示录制的第一页"""
+        match = re.search(r'[?&]page=(\d+)', url or '')
+        page = int(match.group(1)) if match and int(match.group(1)) in self._entries else min(self._entries)
+        self._navigate(self._current, page)
+
+    def refresh(self):
+        pass
+
+    @property
+    def current_url(self):
+        page = self._tabs[self._current]
+        if page is None:
+            return 'about:blank'
+        return self._entries[page].get('url') or self.manifest.get('url') or REPLAY_URL
+
+    @property
+    def page_source(self):
+        page = self._tabs[self._current]
+        return self._source(page) if page is not None else '<html><head></head><body></body></html>'
+
+    @property
+    def title(self):
+        title = self._soup(self._current).title
+        return title.get_text(strip=True) if title is not None else ''
+
+    @property
+    def window_handles(self):
+        return list(self._tabs)
+
+    @property
+    def current_window_handle(self):
+        return self._current
+
+    def find_element(self, by='id', value=None):
+        return self._find(self._current, self._soup(self._current), by, value, single=True)
+
+    def find_elements(self, by='id', value=None):
+        return self._find(self._current, self._soup(self._current), by, value)
+
+    def execute_script(self, script, *args):
+        self.stats['scripts'] += 1
+        handle = self._current
+        if script == el_table.SNAPSHOT_SCRIPT:
+            return el_table.snapshot_from_soup(self._soup(handle))
+        if 'arguments[0].click()' in script:
+            args[0].click()
+            return None
+        if 'handleCurrentChange' in script:
+            # 分页组件跳页：与浏览器中一样只要找到组件就返回true，页面是否切换由调用方校验
+            if self._soup(handle).select_one('.el-pagination') is None:
+                return False
+            self._navigate(handle, int(args[0]))
+            return True
+        if 'el-loading-mask' in script:
+            return self._tab_state(handle)
+        if "querySelectorAll('tr')" in script:
+            return self._rows_html(handle)
+        if 'window.open' in script:
+            self._open_tab()
+            return None
+        if 'navigator.userAgent' in script:
+            return 'Mozilla/5.0 (ReplayDriver)'
+        if script.strip().startswith('return document.body.scrollHeight'):
+            return 1000
+        # 切换每页条数、滚动等：录制的快照已是最终状态
+        return None
+
+    def _tab_state(self, handle):
+        soup = self._soup(handle)
+        active = soup.select_one('ul.el-pager li.number.active')
+        body = soup.select_one('.el-table__body-wrapper tbody') or soup.select_one('table tbody')
+        row = body.find('tr') if body is not None else None
+        return [active.get_text().strip() if active is not None else None,
+                row.get_text().strip() if row is not None else None, False]
+
+    def _rows_html(self, handle):
+        tables = self._soup(handle).find_all('table')
+        rows = tables[0].find_all('tr') if tables else []
+        if len(rows) <= 1:
+            for table in tables:
+                other = table.find_all('tr')
+                if len(other) > len(rows):
+                    rows = other
+        return [str(row) for row in rows]
+
+    def execute_cdp_cmd(self, cmd, params=None):
+        return {}
+
+    def get_cookies(self):
+        return []
+
+    def implicitly_wait(self, seconds):
+        pass
+
+    def set_page_load_timeout(self, seconds):
+        pass
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def maximize_window(self):
+        pass
+
+    def close(self):
+        """关闭当前标签页"""
+        self._tabs.pop(self._current, None)
+        self._typed.pop(self._current, None)
+
+    def quit(self):
+        self._tabs.clear()
+        self._soups.clear()
+        self._sources.clear()
+
+
+def build_result_page(page, total_pages, rows_per_page=50):
+    """
+    生成一页与结果页渲染后结构相同的HTML（el-table 表头/表体分离 + 带激活页码和上一页/下一页按钮的分页组件）
+
+    Returns:
+        str: 页面HTML
+    """
+    names = ['序号', '企业名称', '登记状态', '统一社会信用代码', '法定代表人', '成立日期', '注册资本']
+    header = ''.join(f'<th class="el-table_1_column_{n} is-leaf"><div class="cell">{name}</div></th>'
+                     for n, name in enumerate(names, 1))
+    rows = []
+    start = (page - 1) * rows_per_page
+    for i in range(start, start + rows_per_page):
+        values = [str(i + 1), f'<a href="/company/{i:08d}">测试{i}科技有限公司</a>', '存续',
+                  f'91440300MA{i:08d}', f'张{i % 97}', f'2015-0{i % 9 + 1}-1{i % 10}', f'{(i % 50 + 1) * 100}万人民币']
+        rows.append('<tr class="el-table__row">' + ''.join(
+            f'<td class="el-table_1_column_{n}"><div class="cell">{value}</div></td>'
+            for n, value in enumerate(values, 1)) + '</tr>')
+
+    # 与 el-pager 一样显示第一页、当前页附近的页码和最后一页
+    numbers = sorted({1, total_pages} | set(range(max(1, page - 2), min(total_pages, page + 2) + 1)))
+    pager = ''.join(f'<li class="number{" active" if n == page else ""}">{n}</li>' for n in numbers)
+    prev_disabled = ' disabled="disabled"' if page <= 1 else ''
+    next_disabled = ' disabled="disabled"' if page >= total_pages else ''
+    return (
+        '<html><head><meta charset="utf-8"><title>企知道 - 批量查询结果</title></head><body>'
+        '<div class="el-table">'
+        f'<div class="el-table__header-wrapper"><table><thead><tr>{header}</tr></thead></table></div>'
+        f'<div class="el-table__body-wrapper"><table><tbody>{"".join(rows)}</tbody></table></div></div>'
+        '<div class="el-pagination">'
+        f'<button type="button" class="btn-prev"{prev_disabled}></button>'
+        f'<ul class="el-pager">{pager}</ul>'
+        f'<button type="button" class="btn-next"{next_disabled}></button>'
+        '<span class="el-pagination__jump"><div class="el-input"><input type="number" class="el-input__inner"></div></span>'
+        '</div></body></html>'
+    )
+
+
+def build_recording(directory, pages=20, rows_per_page=50, url=REPLAY_URL):
+    """生成一份模拟的录制（没有真实录制时用于基准测试和测试）"""
+    recorder = SnapshotRecorder(directory)
+    recorder.start(url, total_pages=pages, page_size=rows_per_page)
+    for page in range(1, pages + 1):
+        recorder.record(page, build_result_page(page, pages, rows_per_page))
+    recorder.close()
+    return directory
+
+
+def benchmark_replay(directory, tabs=1, pipeline=False, repeat=1):
+    """
+    用智能爬虫回放录制，测量不含浏览器和网络的爬取吞吐量（解析、去重、翻页逻辑）
+
+    Args:
+        directory: 录制目录
+        tabs: 标签页数量
+        pipeline: 是否启用解析流水线
+        repeat: 重复次数（取最好成绩）
+
+    Returns:
+        dict: pages、rows、seconds、pages_per_second、rows_per_second、lookups、scripts
+    """
+    import crawl_log
+    from qizhidao_smart_spider import QizhidaoSmartSpider
+    from rate_limiter import AdaptiveRateLimiter
+
+    manifest = load_manifest(directory)
+    url = manifest.get('url') or REPLAY_URL
+    best = None
+    for _ in range(max(1, repeat)):
+        drivers = []
+
+        def factory():
+            drivers.append(ReplayDriver(directory))
+            return drivers[-1]
+
+        # 限速器和固定等待都不参与测量
+        limiter = AdaptiveRateLimiter(initial_rate=1e6, max_rate=1e6)
+        spider = QizhidaoSmartSpider(url=url, headless=True, rate_limiter=limiter, maximize_page_size=False,
+                                     pipeline=pipeline, tabs=tabs, driver_factory=factory, wait_scale=0)
+        start = time.perf_counter()
+        with crawl_log.quiet():
+            data = spider.crawl_all_pages()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best['seconds']:
+            stats = drivers[-1].stats if drivers else {}
+            best = {'pages': len(spider.crawled_pages), 'rows': len(data['companies']) if data else 0,
+                    'seconds': elapsed, 'lookups': stats.get('lookups', 0), 'scripts': stats.get('scripts', 0)}
+    best['pages_per_second'] = best['pages'] / best['seconds'] if best['seconds'] else 0.0
+    best['rows_per_second'] = best['rows'] / best['seconds'] if best['seconds'] else 0.0
+    return best
+
+
+def main(argv=None):
+    """命令行入口"""
+    import argparse
+    import tempfile
+    parser = argparse.ArgumentParser(description='回放录制的页面，离线测量智能爬虫的吞吐量')
+    parser.add_argument('directory', nargs='?', default=None, help='录制目录（不指定时生成模拟录制）')
+    parser.add_argument('--pages', type=int, default=20, help='模拟录制的页数（默认 20）')
+    parser.add_argument('--rows', type=int, default=50, help='模拟录制的每页行数（默认 50）')
+    parser.add_argument('--tabs', type=int, default=1, help='标签页数量（默认 1）')
+    parser.add_argument('--pipeline', action='store_true', help='启用解析流水线')
+    parser.add_argument('--repeat', type=int, default=3, help='重复次数，取最好成绩（默认 3）')
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.directory or build_recording(tmp, args.pages, args.rows)
+        result = benchmark_replay(directory, tabs=args.tabs, pipeline=args.pipeline, repeat=args.repeat)
+    print(f"\n回放基准测试（{'录制目录 ' + args.directory if args.directory else '模拟录制'}，"
+          f"标签页 {args.tabs}，流水线 {'开' if args.pipeline else '关'}）")
+    print("-" * 60)
+    print(f"页数: {result['pages']}，行数: {result['rows']}，耗时: {result['seconds']:.3f} 秒")
+    print(f"吞吐量: {result['pages_per_second']:.1f} 页/秒，{result['rows_per_second']:.0f} 行/秒")
+    print(f"元素查找 {result['lookups']} 次，脚本 {result['scripts']} 次")
+    print("-" * 60)
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,420 @@
+"""
+详情页补全
+列表页每行都带有企业详情页链接（企业名称_链接 等），这里在列表爬取的同时用有限的线程并发抓取详情页，
+提取经营范围、股东、联系方式等字段，爬取结束后按统一社会信用代码合并回列表行。
+详情页请求与列表页共用同一个主机限速器，抓到的页面按链接缓存在磁盘上，重跑时不再请求
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from rate_limiter import get_host_limiter
+from retry_policy import RetryPolicy
+from extraction_schema import DEFAULT_SCHEMA
+from crawl_log import get_logger
+
+log = get_logger('enricher')
+
+
+# 默认补全的字段：字段名 -> 详情页中可能使用的标签文字
+# （与列表页抽取模式同义的字段使用模式中的列名，列表页已有该列时合并到同一列）
+DEFAULT_DETAIL_FIELDS = {
+    '经营范围': ('经营范围',),
+    '股东': ('股东信息', '股东'),
+    '电话': ('联系电话', '电话'),
+    '邮箱': ('邮箱', '电子邮箱'),
+    '注册地址': ('注册地址', '企业地址', '地址'),
+    '官网': ('官网', '网址'),
+}
+
+CODE_FIELD = '统一社会信用代码'
+
+# 标签文字后面常见的冒号
+_LABEL_SUFFIX = re.compile(r'[:：\s]+$')
+
+# 标签所在元素只可能是较短的文本节点
+_MAX_LABEL_LENGTH = 12
+
+
+def _schema_name(name):
+    """列表页抽取模式中的列名（如 联系电话 -> 电话），模式中没有时原样返回"""
+    for spec in DEFAULT_SCHEMA.columns:
+        if name in spec.aliases:
+            return spec.name
+    return name
+
+
+def resolve_fields(fields=None):
+    """
+    把字段配置整理为 {字段名: 标签元组}
+
+    Args:
+        fields: None（默认字段）、字段名列表/逗号分隔的字符串（取默认字段中的同名项，
+                未知字段用字段名本身作为标签）或完整的 {字段名: 标签} 字典；
+                字段名是列表页抽取模式中某列的别名时改用该列的列名
+    """
+    if fields is None or fields is True:
+        return dict(DEFAULT_DETAIL_FIELDS)
+    if isinstance(fields, dict):
+        return {_schema_name(name): tuple([labels] if isinstance(labels, str) else labels)
+                for name, labels in fields.items()}
+    if isinstance(fields, str):
+        fields = [name.strip() for name in fields.split(',') if name.strip()]
+    return {_schema_name(name): DEFAULT_DETAIL_FIELDS.get(_schema_name(name), (name,)) for name in fields}
+
+
+def pick_detail_link(row):
+    """
+    选出一行中的企业详情页链接：优先企业名称列的链接，其次任一"_链接"列，最后"链接N"列
+
+    Returns:
+        str: 详情页URL，没有可用链接时返回None
+    """
+    candidates = []
+    for key, value in row.items():
+        if not isinstance(value, str) or not value.startswith(('http://', 'https://')):
+            continue
+        if key.endswith('_链接'):
+            priority = 0 if ('企业' in key or '名称' in key) else 1
+        elif key.startswith('链接'):
+            priority = 2
+        else:
+            continue
+        candidates.append((priority, value))
+    return min(candidates)[1] if candidates else None
+
+
+def _table_values(table):
+    """提取股东等列表型字段：每个数据行取第一个不是序号的单元格"""
+    values = []
+    for tr in table.find_all('tr'):
+        for td in tr.find_all('td'):
+            text = td.get_text(strip=True)
+            if text and not text.isdigit():
+                values.append(text)
+                break
+    return '；'.join(values) or None
+
+
+def _value_after(label_tag):
+    sibling = label_tag.find_next_sibling()
+    if sibling is None and label_tag.parent is not None:
+        # 标签包在 span/label 中时，值位于父元素的下一个兄弟元素
+        sibling = label_tag.parent.find_next_sibling()
+    if sibling is None:
+        return None
+    table = sibling if sibling.name == 'table' else sibling.find('table')
+    if table is not None:
+        return _table_values(table)
+    text = sibling.get_text(' ', strip=True)
+    return text if text and text != '-' else None
+
+
+def parse_detail_fields(html, fields=None):
+    """
+    从详情页中提取字段
+
+    页面只遍历一次：收集所有短文本元素作为候选标签，再按字段配置查找标签后面的值。
+    支持 "<td>标签</td><td>值</td>"、"<span>标签：</span><span>值</span>"、
+    "标签：值" 写在同一个元素中，以及标签后跟一个表格（如股东信息）几种写法
+
+    Args:
+        html: 详情页HTML
+        fields: 字段配置（见 resolve_fields）
+
+    Returns:
+        dict: 找到的字段（未找到的字段不出现）
+    """
+    from bs4 import BeautifulSoup
+    fields = resolve_fields(fields)
+    wanted = {label for labels in fields.values() for label in labels}
+
+    labels = {}   # 标签文字 -> 第一个标签元素
+    inline = {}   # 标签文字 -> 与标签写在同一元素中的值
+    for tag in BeautifulSoup(html, 'lxml').find_all(True):
+        text = tag.string
+        if text is None:
+            continue
+        text = text.strip()
+        if not text:
+            continue
+        label = _LABEL_SUFFIX.sub('', text)
+        if label in wanted and len(label) <= _MAX_LABEL_LENGTH:
+            labels.setdefault(label, tag)
+            continue
+        for sep in ('：', ':'):
+            head, found, tail = text.partition(sep)
+            head = head.strip()
+            if found and head in wanted and tail.strip():
+                inline.setdefault(head, tail.strip())
+                break
+
+    result = {}
+    for name, candidates in fields.items():
+        for label in candidates:
+            value = inline.get(label)
+            if value is None and label in labels:
+                value = _value_after(labels[label])
+            if value:
+                result[name] = value
+                break
+    return result
+
+
+class DetailCache:
+    """按链接缓存详情页HTML（gzip压缩，写入时先写临时文件再替换，多线程安全）"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, link):
+        digest = hashlib.sha1(link.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + '.html.gz')
+
+    def get(self, link):
+        """读取缓存的页面，没有时返回None"""
+        try:
+            with gzip.open(self._path(link), 'rt', encoding='utf-8') as f:
+                return f.read()
+        except (OSError, EOFError):
+            return None
+
+    def put(self, link, html):
+        """写入页面"""
+        path = self._path(link)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(gzip.compress(html.encode('utf-8')))
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+
+class DetailEnricher:
+    """
+    详情页补全器：列表爬取过程中逐页提交行，后台线程抓取并解析详情页，结束时合并回列表行
+
+    用法::
+
+        enricher = DetailEnricher(rate_limiter=spider.rate_limiter)
+        enricher.submit_rows(page_data)      # 每爬完一页调用一次，不等待详情页
+        rows = list(enricher.merge(rows))    # 爬取结束后等待剩余详情页并合并
+    """
+
+    def __init__(self, fields=None, max_workers=4, max_pending=None, rate_limiter=None,
+                 cache_dir='detail_cache', headers=None, cookies=None, timeout=30,
+                 retry_policy=None, fetch=None):
+        """
+        Args:
+            fields: 要提取的字段（见 resolve_fields）
+            max_workers: 并发抓取详情页的线程数
+            max_pending: 最多排队的详情页数，超过时 submit_rows 会等待（默认线程数的8倍）
+            rate_limiter: 限速器，默认使用详情页所在主机共享的限速器（与列表页相同主机时共用一个）
+            cache_dir: 磁盘缓存目录，None表示不缓存
+            headers: 请求头（通常直接使用列表爬虫的请求头）
+            cookies: Cookie字典（智能爬虫从浏览器中取出登录状态）
+            timeout: 单个请求的超时时间（秒）
+            retry_policy: 重试策略，默认最多重试2次
+            fetch: 可选的抓取函数 fetch(link) -> HTML，替换默认的HTTP请求（测试或自定义会话时使用）
+        """
+        self.fields = resolve_fields(fields)
+        self.max_workers = max_workers
+        self.rate_limiter = rate_limiter
+        self.cache = DetailCache(cache_dir) if cache_dir else None
+        self.headers = dict(headers or {})
+        self.cookies = dict(cookies or {})
+        self.timeout = timeout
+        self.retry_policy = retry_policy or RetryPolicy(max_retries=2, base_delay=1.0, max_delay=10.0)
+        self._fetch = fetch or self._fetch_http
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='detail')
+        self._slots = threading.BoundedSemaphore(max_pending or max_workers * 8)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._futures = []
+        self._submitted_links = set()
+        self.results = {}  # 信用代码（没有时为链接）-> 详情字段
+        self.stats = {'submitted': 0, 'skipped': 0, 'cache_hits': 0, 'fetched': 0,
+                      'failed': 0, 'parse_failed': 0, 'cache_errors': 0, 'merged': 0, 'fetch_seconds': 0.0}
+
+    @staticmethod
+    def row_key(row, link=None):
+        """合并用的键：统一社会信用代码，没有时使用详情页链接"""
+        return row.get(CODE_FIELD) or link or pick_detail_link(row)
+
+    def submit_rows(self, rows):
+        """
+        提交一页的行（立即返回；排队的详情页达到上限时等待空位）
+
+        Returns:
+            int: 本次提交的详情页数
+        """
+        submitted = 0
+        for row in rows:
+            link = pick_detail_link(row)
+            if not link or link in self._submitted_links:
+                self.stats['skipped'] += 1
+                continue
+            self._submitted_links.add(link)
+            self._slots.acquire()
+            future = self._executor.submit(self._enrich_one, self.row_key(row, link), link)
+            future.add_done_callback(lambda _: self._slots.release())
+            self._futures.append(future)
+            submitted += 1
+        self.stats['submitted'] += submitted
+        return submitted
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+            session = requests.Session()
+            session.headers.update(self.headers)
+            session.cookies.update(self.cookies)
+            self._local.session = session
+        return session
+
+    def _fetch_http(self, link):
+        limiter = self.rate_limiter or get_host_limiter(link)
+        limiter.acquire()
+        start = time.time()
+        response = self._session().get(link, timeout=self.timeout)
+        limiter.on_response(response.status_code, time.time() - start, response.headers)
+        response.raise_for_status()
+        response.encoding = response.encoding or 'utf-8'
+        return response.text
+
+    def _enrich_one(self, key, link):
+        html = self.cache.get(link) if self.cache else None
+        if html is not None:
+            with self._lock:
+                self.stats['cache_hits'] += 1
+        else:
+            start = time.time()
+            try:
+                html = self.retry_policy.run(lambda: self._fetch(link))
+            except Exception as e:
+                with self._lock:
+                    self.stats['failed'] += 1
+                log.warning("[详情页] 获取失败: %s (%s)", link, e)
+                return
+            with self._lock:
+                self.stats['fetched'] += 1
+                self.stats['fetch_seconds'] += time.time() - start
+            if self.cache:
+                try:
+                    self.cache.put(link, html)
+                except OSError as e:
+                    # 缓存写不进去只影响重跑，本次抓到的页面照常解析
+                    with self._lock:
+                        self.stats['cache_errors'] += 1
+                    log.warning("[详情页] 缓存写入失败: %s (%s)", link, e)
+
+        try:
+            fields = parse_detail_fields(html, self.fields)
+        except Exception as e:
+            # 个别详情页结构异常时只丢掉这一条，不影响 wait/merge 和其他详情页
+            with self._lock:
+                self.stats['parse_failed'] += 1
+            log.warning("[详情页] 解析失败: %s (%s)", link, e)
+            return
+        if fields:
+            with self._lock:
+                self.results[key] = fields
+
+    def wait(self):
+        """等待所有已提交的详情页处理完成"""
+        for future in self._futures:
+            future.result()
+        self._futures.clear()
+
+    def merge(self, rows):
+        """
+        等待剩余的详情页，然后把详情字段合并到行中（已有非空值的字段不覆盖）
+
+        Args:
+            rows: 行字典的可迭代对象（可以是 RowStore）
+
+        Yields:
+            dict: 合并后的行
+        """
+        self.wait()
+        for row in rows:
+            fields = self.results.get(self.row_key(row))
+            if fields:
+                for name, value in fields.items():
+                    if not row.get(name):
+                        row[name] = value
+                self.stats['merged'] += 1
+            yield row
+
+    def close(self):
+        """停止后台线程（未开始的详情页不再抓取）"""
+        # 逐个取消还在排队的任务（shutdown 的 cancel_futures 参数需要 Python 3.9）
+        for future in self._futures:
+            future.cancel()
+        self._executor.shutdown(wait=True)
+
+    def summary(self):
+        """统计信息的一行文字"""
+        s = self.stats
+        text = (f"提交 {s['submitted']}，抓取 {s['fetched']}，缓存命中 {s['cache_hits']}，"
+                f"失败 {s['failed']}，合并 {s['merged']} 行")
+        if s['parse_failed'] or s['cache_errors']:
+            text += f"（解析失败 {s['parse_failed']}，缓存写入失败 {s['cache_errors']}）"
+        return text
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def build_enricher(enrich, **kwargs):
+    """
+    根据爬虫的 enrich 参数创建补全器
+
+    Args:
+        enrich: None/False（不补全）、True（默认字段）、字段名列表或逗号分隔的字符串、
+                或已经创建好的 DetailEnricher
+        **kwargs: 传给 DetailEnricher 的其他参数
+    """
+    if not enrich:
+        return None
+    if isinstance(enrich, DetailEnricher):
+        return enrich
+    return DetailEnricher(fields=None if enrich is True else enrich, **kwargs)
+
+
+def enrich_rows(enrich, rows, **kwargs):
+    """
+    一次补全全部行：基础版和高级版爬虫只爬一页，没有翻页可以重叠，解析完成后提交、等待并合并
+
+    Args:
+        enrich: 同 build_enricher
+        rows: 行字典的可迭代对象（可以是 RowStore）
+        **kwargs: 传给 DetailEnricher 的其他参数
+
+    Returns:
+        list: 合并后的行；enrich 为空时原样返回 rows
+    """
+    enricher = build_enricher(enrich, **kwargs)
+    if enricher is None:
+        return rows
+    with enricher:
+        enricher.submit_rows(rows)
+        merged = list(enricher.merge(rows))
+    log.info("[详情页] %s", enricher.summary())
+    return merged
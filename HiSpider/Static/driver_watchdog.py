@@ -0,0 +1,183 @@
+"""
+WebDriver调用看门狗
+每个WebDriver调用都在截止时间内完成：调用交给一个专用线程执行，主线程最多等待截止时间，
+超时即认为浏览器卡死（渲染进程无响应、chromedriver挂起），之后的调用立即失败，由爬虫重启浏览器并续爬。
+同时统计失败的查找（找不到元素、脚本出错）各自花掉的时间，便于发现代价高的回退链
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from crawl_log import get_logger
+
+log = get_logger('watchdog')
+
+
+# 默认的单次调用截止时间（秒），页面导航类调用放宽
+DEFAULT_CALL_TIMEOUT = 30
+DEFAULT_CALL_TIMEOUTS = {'get': 60, 'refresh': 60, 'back': 60, 'forward': 60, 'execute_async_script': 60}
+
+# 这些异常表示"没找到 / 没成功"，不表示浏览器卡死，花掉的时间计入失败查找
+_LOOKUP_ERRORS = ('NoSuchElementException', 'StaleElementReferenceException', 'TimeoutException',
+                  'JavascriptException', 'ElementNotInteractableException', 'NoSuchFrameException')
+
+
+class DriverHangError(RuntimeError):
+    """WebDriver调用超过截止时间（或浏览器此前已卡死）"""
+
+
+class WatchedDriver:
+    """
+    给 WebDriver 加上调用截止时间的代理对象，用法与原 WebDriver 相同
+
+    driver.find_element(...)、driver.current_url 等方法和属性都在截止时间内执行；
+    switch_to、find_element 返回的元素等对象直接使用原对象，它们的请求受 HTTP 客户端超时兜底
+    """
+
+    def __init__(self, driver, call_timeout=DEFAULT_CALL_TIMEOUT, call_timeouts=None):
+        """
+        Args:
+            driver: 原始 WebDriver
+            call_timeout: 单次调用的截止时间（秒）
+            call_timeouts: 按方法名覆盖截止时间，默认放宽 get/refresh 等页面导航
+        """
+        object.__setattr__(self, '_driver', driver)
+        object.__setattr__(self, 'call_timeout', call_timeout)
+        object.__setattr__(self, 'call_timeouts', dict(DEFAULT_CALL_TIMEOUTS, **(call_timeouts or {})))
+        object.__setattr__(self, 'hung', None)  # 卡死时记录卡住的调用名
+        object.__setattr__(self, 'stats', {'calls': 0, 'call_seconds': 0.0, 'failed_lookups': 0,
+                                           'failed_seconds': 0.0, 'empty_lookups': 0, 'hangs': 0})
+        object.__setattr__(self, 'lost_by_call', {})  # 调用名 -> 失败查找花掉的秒数
+        object.__setattr__(self, '_executor', ThreadPoolExecutor(max_workers=1, thread_name_prefix='webdriver'))
+        object.__setattr__(self, '_kinds', {})  # 属性名 -> 'property' / 'method' / 'plain'
+        object.__setattr__(self, '_lock', threading.Lock())
+        self._apply_backstop_timeouts()
+
+    def _apply_backstop_timeouts(self):
+        """让浏览器端和HTTP客户端也有超时，兜底覆盖不经过代理的元素调用"""
+        driver = self._driver
+        limit = max(self.call_timeouts.values(), default=self.call_timeout)
+        try:
+            driver.set_page_load_timeout(self.call_timeouts.get('get', self.call_timeout))
+            driver.set_script_timeout(self.call_timeout)
+        except Exception:
+            pass
+        config = getattr(getattr(driver, 'command_executor', None), '_client_config', None)
+        if config is not None and hasattr(config, 'timeout'):
+            config.timeout = limit + 5
+
+    @property
+    def raw(self):
+        """原始 WebDriver"""
+        return self._driver
+
+    def _kind(self, name):
+        kind = self._kinds.get(name)
+        if kind is None:
+            attribute = getattr(type(self._driver), name, None)
+            if isinstance(attribute, property):
+                kind = 'property'
+            elif callable(attribute):
+                kind = 'method'
+            else:
+                kind = 'plain'
+            self._kinds[name] = kind
+        return kind
+
+    def call(self, name, func, *args, **kwargs):
+        """在截止时间内执行 func(*args, **kwargs)，超时抛出 DriverHangError"""
+        if self.hung:
+            raise DriverHangError(f"浏览器已卡死（{self.hung}），等待重启")
+        timeout = self.call_timeouts.get(name, self.call_timeout)
+        start = time.perf_counter()
+        future = self._executor.submit(func, *args, **kwargs)
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeout:
+            self._mark_hung(name, timeout)
+            raise DriverHangError(f"WebDriver调用 {name} 超过 {timeout} 秒没有返回") from None
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            self._record(elapsed)
+            if type(e).__name__ in _LOOKUP_ERRORS:
+                self._record_failure(name, elapsed)
+            raise
+        elapsed = time.perf_counter() - start
+        self._record(elapsed)
+        if name == 'find_elements' and not result:
+            self.stats['empty_lookups'] += 1
+            self._record_failure(name, elapsed, count=False)
+        return result
+
+    def _record(self, elapsed):
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats['call_seconds'] += elapsed
+
+    def _record_failure(self, name, elapsed, count=True):
+        with self._lock:
+            if count:
+                self.stats['failed_lookups'] += 1
+            self.stats['failed_seconds'] += elapsed
+            self.lost_by_call[name] = self.lost_by_call.get(name, 0.0) + elapsed
+
+    def _mark_hung(self, name, timeout):
+        object.__setattr__(self, 'hung', name)
+        self.stats['hangs'] += 1
+        # 卡住的线程无法中断：这里只关闭执行器（不等待），此后的调用都直接抛出 DriverHangError；
+        # 原线程在浏览器被结束后自行退出，重启浏览器时由爬虫创建新的 WatchedDriver
+        self._executor.shutdown(wait=False)
+        log.warning("[看门狗] WebDriver调用 %s 超过 %s 秒没有返回，判定浏览器卡死", name, timeout)
+
+    def __getattr__(self, name):
+        kind = self._kind(name)
+        if kind == 'property':
+            return self.call(name, getattr, self._driver, name)
+        attribute = getattr(self._driver, name)
+        if kind != 'method':
+            return attribute
+
+        def guarded(*args, **kwargs):
+            return self.call(name, attribute, *args, **kwargs)
+
+        guarded.__name__ = name
+        return guarded
+
+    def __setattr__(self, name, value):
+        setattr(self._driver, name, value)
+
+    def quit(self, timeout=10):
+        """退出浏览器：卡死或退出超时时直接结束 chromedriver 进程"""
+        if not self.hung:
+            future = self._executor.submit(self._driver.quit)
+            try:
+                future.result(timeout=timeout)
+                self._executor.shutdown(wait=False)
+                return
+            except FutureTimeout:
+                log.warning("[看门狗] 浏览器退出超时，强制结束")
+            except Exception:
+                pass
+        self.kill()
+
+    def kill(self):
+        """强制结束 chromedriver 进程（卡住的调用随之返回）"""
+        process = getattr(getattr(self._driver, 'service', None), 'process', None)
+        if process is not None:
+            try:
+                process.kill()
+            except Exception:
+                pass
+        self._executor.shutdown(wait=False)
+
+    def summary(self):
+        """调用统计的一行摘要（失败查找最多的调用排在前面）"""
+        stats = self.stats
+        text = (f"WebDriver调用 {stats['calls']} 次共 {stats['call_seconds']:.1f} 秒，"
+                f"失败查找 {stats['failed_lookups']} 次、空结果 {stats['empty_lookups']} 次，"
+                f"损失 {stats['failed_seconds']:.1f} 秒，卡死 {stats['hangs']} 次")
+        worst = sorted(self.lost_by_call.items(), key=lambda item: item[1], reverse=True)[:3]
+        if worst:
+            text += "（" + "，".join(f"{name} {seconds:.1f}秒" for name, seconds in worst) + "）"
+        return text
@@ -0,0 +1,152 @@
+"""
+Element UI 表格（el-table）提取
+el-table 把表头和表体渲染为两个独立的 <table>（el-table__header-wrapper / el-table__body-wrapper），
+固定列（el-table__fixed、el-table__fixed-right）还会各渲染一份完整的表头和表体副本。
+按 "table tr" 抓取会把每一行读取多次，这里只读主表体，并按列编号把表头和单元格对应起来
+"""
+
+import re
+
+
+# 固定列副本的容器
+FIXED_CLASSES = ('el-table__fixed', 'el-table__fixed-right', 'el-table__fixed-left')
+
+# 表头和单元格共有的列编号类名，如 el-table_1_column_3
+_COLUMN_CLASS = re.compile(r'^el-table_\d+_column_(\d+)$')
+
+# 在浏览器中一次取回主表头文字和主表体各行的HTML（跳过固定列副本），页面没有 el-table 时返回null
+SNAPSHOT_SCRIPT = """
+    var root = document.querySelector('.el-table');
+    if (!root) { return null; }
+    var fixed = '.el-table__fixed, .el-table__fixed-right, .el-table__fixed-left';
+    var main = function (selector) {
+        return Array.prototype.filter.call(root.querySelectorAll(selector), function (el) {
+            return !el.closest(fixed);
+        })[0];
+    };
+    var headerWrapper = main('.el-table__header-wrapper');
+    var bodyWrapper = main('.el-table__body-wrapper');
+    if (!bodyWrapper) { return null; }
+    var headers = [];
+    if (headerWrapper) {
+        var ths = headerWrapper.querySelectorAll('th.is-leaf');
+        if (!ths.length) { ths = headerWrapper.querySelectorAll('th'); }
+        Array.prototype.forEach.call(ths, function (th) {
+            if (th.classList.contains('gutter')) { return; }
+            headers.push([th.className, (th.textContent || '').trim()]);
+        });
+    }
+    var rows = Array.prototype.map.call(bodyWrapper.querySelectorAll('tbody > tr'), function (tr) {
+        return tr.outerHTML;
+    });
+    return {headers: headers, rows_html: rows};
+"""
+
+
+def column_key(class_value):
+    """从 class 属性（字符串或列表）中取出列编号，没有时返回None"""
+    classes = class_value.split() if isinstance(class_value, str) else (class_value or [])
+    for name in classes:
+        match = _COLUMN_CLASS.match(name)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def _is_fixed_copy(tag):
+    for parent in tag.parents:
+        if any(name in FIXED_CLASSES for name in parent.get('class') or []):
+            return True
+    return False
+
+
+def _main_wrapper(root, class_name):
+    for wrapper in root.find_all(class_=class_name):
+        if not _is_fixed_copy(wrapper):
+            return wrapper
+    return None
+
+
+def extract_headers(header_cells):
+    """
+    把表头单元格整理为按列编号排序的 (列编号, 表头文字) 列表
+
+    Args:
+        header_cells: [(class属性, 文字), ...]，第一项可以是字符串或类名列表
+    """
+    headers = []
+    for position, (class_value, text) in enumerate(header_cells):
+        key = column_key(class_value)
+        headers.append((key if key is not None else position, text.strip()))
+    if all(column_key(c) is not None for c, _ in header_cells):
+        headers.sort(key=lambda item: item[0])
+    return headers
+
+
+def _locate(soup):
+    """找出主表头单元格 [(class列表, 文字), ...] 和主表体的行，不是 el-table 时返回None"""
+    root = soup.find(class_='el-table')
+    if root is None:
+        return None
+    body_wrapper = _main_wrapper(root, 'el-table__body-wrapper')
+    if body_wrapper is None:
+        return None
+
+    header_cells = []
+    header_wrapper = _main_wrapper(root, 'el-table__header-wrapper')
+    if header_wrapper is not None:
+        ths = header_wrapper.find_all('th', class_='is-leaf') or header_wrapper.find_all('th')
+        header_cells = [(th.get('class') or [], th.get_text(strip=True)) for th in ths
+                        if 'gutter' not in (th.get('class') or [])]
+
+    tbody = body_wrapper.find('tbody') or body_wrapper
+    rows = [tr for tr in tbody.find_all('tr', recursive=False)]
+    return header_cells, rows
+
+
+def find_el_table(soup):
+    """
+    在静态HTML中查找 el-table 的主表头和主表体（忽略固定列副本）
+
+    Returns:
+        tuple: ([(列编号, 表头文字), ...], [主表体的 tr, ...])；不是 el-table 时返回None
+    """
+    found = _locate(soup)
+    if found is None:
+        return None
+    header_cells, rows = found
+    return extract_headers(header_cells), rows
+
+
+def snapshot_from_soup(soup):
+    """
+    在静态HTML上得到与 SNAPSHOT_SCRIPT 相同的结果（回放录制的页面时代替浏览器执行脚本）
+
+    Returns:
+        dict: {'headers': [[class属性, 文字], ...], 'rows_html': [行HTML, ...]}；不是 el-table 时返回None
+    """
+    found = _locate(soup)
+    if found is None:
+        return None
+    header_cells, rows = found
+    return {'headers': [[' '.join(classes), text] for classes, text in header_cells],
+            'rows_html': [str(tr) for tr in rows]}
+
+
+def align_cells(row, header_keys):
+    """
+    按列编号把一行的单元格与表头对齐
+
+    Args:
+        row: 主表体中的 tr
+        header_keys: 表头的列编号列表（extract_headers 的第一列）
+
+    Returns:
+        list: 与表头顺序一致的单元格（缺失的列为None）；单元格没有列编号时按位置返回
+    """
+    cells = row.find_all('td', recursive=False)
+    keys = [column_key(cell.get('class')) for cell in cells]
+    if not header_keys or any(key is None for key in keys):
+        return cells
+    by_key = dict(zip(keys, cells))
+    return [by_key.get(key) for key in header_keys]
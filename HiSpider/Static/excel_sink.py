@@ -0,0 +1,206 @@
+"""
+流式Excel导出
+使用 openpyxl 的只写模式逐行写入（不构造 DataFrame，也不创建单元格对象），
+达到单个工作表的行数上限时自动切换到新的工作表，可选按行数切换到新文件；
+列的顺序在整个导出过程中保持稳定：已有的列位置不变，后出现的新列追加在右侧
+"""
+
+import os
+
+from row_store import RowStore
+
+
+# Excel单个工作表的最大行数（含表头行）
+EXCEL_MAX_ROWS = 1048576
+
+# Excel单元格文本的最大长度
+EXCEL_MAX_CELL_LENGTH = 32767
+
+DEFAULT_SHEET_TITLE = '企业数据'
+
+
+class ExcelSink:
+    """
+    逐页写入的Excel输出
+
+    用法::
+
+        with ExcelSink('out.xlsx') as sink:
+            for page_data in pages:
+                sink.append_rows(page_data)
+        print(sink.files)
+
+    只写模式下表头行写出后无法修改，因此前 buffer_rows 行先缓存，用来确定列；
+    之后如果出现新列，当前工作表结束，新列追加在列表末尾并从新的工作表继续写（原有列的位置不变）
+    """
+
+    def __init__(self, filename, columns=None, sheet_title=DEFAULT_SHEET_TITLE,
+                 max_rows_per_sheet=EXCEL_MAX_ROWS - 1, max_rows_per_file=None, buffer_rows=1000):
+        """
+        Args:
+            filename: 输出文件名（切换文件时依次生成 name_2.xlsx、name_3.xlsx……）
+            columns: 预先确定的列顺序（如表头），后出现的新列追加在末尾
+            sheet_title: 工作表名称（切换工作表时依次为 名称_2、名称_3……）
+            max_rows_per_sheet: 每个工作表的最大数据行数（不含表头）
+            max_rows_per_file: 每个文件的最大数据行数，None表示不切换文件
+            buffer_rows: 写出表头前缓存的行数
+        """
+        if max_rows_per_sheet < 1 or max_rows_per_sheet > EXCEL_MAX_ROWS - 1:
+            raise ValueError(f"max_rows_per_sheet 必须在 1 到 {EXCEL_MAX_ROWS - 1} 之间")
+        self.filename = filename
+        self.sheet_title = sheet_title
+        self.max_rows_per_sheet = max_rows_per_sheet
+        self.max_rows_per_file = max_rows_per_file
+        self.buffer_rows = buffer_rows
+        self.columns = []
+        self._index = {}
+        for column in columns or []:
+            self._add_column(column)
+        self._buffer = []
+        self._workbook = None
+        self._sheet = None
+        self._sheet_columns = 0  # 当前工作表表头中的列数
+        self._sheet_rows = 0
+        self._file_rows = 0
+        self._sheet_count = 0
+        self.files = []
+        self.stats = {'rows': 0, 'sheets': 0, 'files': 0, 'truncated_cells': 0}
+        from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+        self._illegal_characters = ILLEGAL_CHARACTERS_RE  # openpyxl 拒绝写入的控制字符
+
+    def _add_column(self, column):
+        if column not in self._index:
+            self._index[column] = len(self.columns)
+            self.columns.append(column)
+
+    def _file_name(self, number):
+        if number == 1:
+            return self.filename
+        base, ext = os.path.splitext(self.filename)
+        return f"{base}_{number}{ext or '.xlsx'}"
+
+    def _open_file(self):
+        from openpyxl import Workbook
+        self._close_file()
+        self._workbook = Workbook(write_only=True)
+        self.files.append(self._file_name(len(self.files) + 1))
+        self._file_rows = 0
+        self._sheet_count = 0
+        self.stats['files'] += 1
+
+    def _close_file(self):
+        if self._workbook is not None:
+            self._workbook.save(self.files[-1])
+            self._workbook = None
+            self._sheet = None
+
+    def _open_sheet(self):
+        if (self._workbook is None or (self.max_rows_per_file
+                                       and self._file_rows >= self.max_rows_per_file)):
+            self._open_file()
+        self._sheet_count += 1
+        title = self.sheet_title if self._sheet_count == 1 else f"{self.sheet_title}_{self._sheet_count}"
+        self._sheet = self._workbook.create_sheet(title=title[:31])
+        self._sheet.append(list(self.columns))
+        self._sheet_columns = len(self.columns)
+        self._sheet_rows = 0
+        self.stats['sheets'] += 1
+
+    def _clean(self, value):
+        if isinstance(value, str):
+            value = self._illegal_characters.sub('', value)
+            if len(value) > EXCEL_MAX_CELL_LENGTH:
+                self.stats['truncated_cells'] += 1
+                value = value[:EXCEL_MAX_CELL_LENGTH]
+        return value
+
+    def _write(self, values):
+        if (self._sheet is None or self._sheet_rows >= self.max_rows_per_sheet
+                or len(self.columns) > self._sheet_columns
+                or (self.max_rows_per_file and self._file_rows >= self.max_rows_per_file)):
+            self._open_sheet()
+        self._sheet.append([self._clean(value) for value in values])
+        self._sheet_rows += 1
+        self._file_rows += 1
+        self.stats['rows'] += 1
+
+    def _row_values(self, row):
+        for key in row:
+            self._add_column(key)
+        return [row.get(column) for column in self.columns]
+
+    def append_rows(self, rows):
+        """写入一批行（字典）"""
+        for row in rows:
+            if self._sheet is None and len(self._buffer) < self.buffer_rows:
+                for key in row:
+                    self._add_column(key)
+                self._buffer.append(row)
+                continue
+            self._flush_buffer()
+            self._write(self._row_values(row))
+
+    def append_tuples(self, columns, tuples):
+        """
+        按给定的列写入值元组（RowStore.iter_tuples 的输出），不构造字典
+
+        Args:
+            columns: 元组中各值对应的列名
+            tuples: 值元组的可迭代对象
+        """
+        self._flush_buffer()
+        for column in columns:
+            self._add_column(column)
+        positions = [self._index[column] for column in columns]
+        width = len(self.columns)
+        if positions == list(range(width)):
+            for values in tuples:
+                self._write(values)
+            return
+        for values in tuples:
+            row = [None] * width
+            for position, value in zip(positions, values):
+                row[position] = value
+            self._write(row)
+
+    def _flush_buffer(self):
+        if self._buffer:
+            buffered, self._buffer = self._buffer, []
+            for row in buffered:
+                self._write(self._row_values(row))
+
+    def close(self):
+        """写出缓存的行并保存文件，返回生成的文件列表"""
+        self._flush_buffer()
+        if self._sheet is None and not self.files:
+            self._open_sheet()  # 没有数据时也生成只有表头的文件
+        self._close_file()
+        return self.files
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def write_excel(filename, rows, **kwargs):
+    """
+    把全部行写入Excel（RowStore 直接按列元组写出，其他序列逐行写入）
+
+    Args:
+        filename: 输出文件名
+        rows: RowStore 或字典列表
+        **kwargs: 传给 ExcelSink 的参数
+
+    Returns:
+        list: 生成的文件列表（超过每个文件的行数上限时不止一个）
+    """
+    with ExcelSink(filename, **kwargs) as sink:
+        if isinstance(rows, RowStore):
+            columns = rows.columns
+            sink.append_tuples(columns, rows.iter_tuples(columns))
+        else:
+            sink.append_rows(rows or [])
+    return sink.files
@@ -0,0 +1,249 @@
+"""
+声明式抽取模式
+用"输出列名 -> 表头别名、类型、是否提取链接、是否必填"描述要抽取的字段，
+在一次爬取中按第一页的表头编译为"单元格下标 -> 输出列"的抽取计划，之后各页直接按下标执行；
+只有表头签名变化时才重新编译。所有爬虫共用同一套模式，输出列名保持一致
+"""
+
+import re
+from urllib.parse import urljoin
+
+from row_classifier import RowClassifier
+from crawl_log import get_logger
+
+log = get_logger('extraction')
+
+
+DEFAULT_BASE_URL = "https://qiye.qizhidao.com/"
+
+# 链接列的后缀：企业名称 -> 企业名称_链接
+LINK_SUFFIX = '_链接'
+
+# 表头之外多出来的单元格按位置命名：列9、列10……
+EXTRA_COLUMN_PREFIX = '列'
+
+_DATE_PATTERN = re.compile(r'^(\d{4})\s*[-/.年]\s*(\d{1,2})\s*[-/.月]\s*(\d{1,2})\s*日?$')
+_NUMBER_PATTERN = re.compile(r'^-?[\d,]+(\.\d+)?$')
+
+
+def _to_int(text):
+    return int(text) if text.isdigit() else text
+
+
+def _to_float(text):
+    return float(text.replace(',', '')) if _NUMBER_PATTERN.match(text) else text
+
+
+def _to_date(text):
+    match = _DATE_PATTERN.match(text)
+    if not match:
+        return text
+    year, month, day = match.groups()
+    return f"{year}-{int(month):02d}-{int(day):02d}"
+
+
+# 字段类型 -> 转换函数（无法转换时保留原文本），'str' 不转换
+CONVERTERS = {'str': None, 'int': _to_int, 'float': _to_float, 'date': _to_date}
+
+
+class ColumnSpec:
+    """一个输出列的抽取规则"""
+
+    __slots__ = ('name', 'aliases', 'type', 'link', 'required')
+
+    def __init__(self, name, aliases=(), type='str', link=False, required=False):
+        """
+        Args:
+            name: 输出列名
+            aliases: 表头中可能使用的文字（精确匹配优先，其次按包含关系匹配），列名本身总是别名之一
+            type: 'str'、'int'、'float' 或 'date'
+            link: 是否同时提取单元格中的链接（输出为 "列名_链接"）
+            required: 是否必填；表头中有该列而某行的值为空时丢弃该行
+        """
+        if type not in CONVERTERS:
+            raise ValueError(f"未知的字段类型: {type}（可用: {', '.join(CONVERTERS)}）")
+        self.name = name
+        self.aliases = tuple(dict.fromkeys((name,) + tuple(aliases)))
+        self.type = type
+        self.link = link
+        self.required = required
+
+    def __repr__(self):
+        return f"ColumnSpec({self.name!r}, type={self.type!r}, link={self.link}, required={self.required})"
+
+
+class ExtractionPlan:
+    """按表头编译出的抽取计划：每一步是 (单元格下标, 输出列名, 转换函数, 链接列名)"""
+
+    def __init__(self, signature, steps, width, required, missing_required, keep_extra):
+        self.signature = signature
+        self.steps = steps
+        self.width = width
+        self.required = required
+        self.missing_required = missing_required
+        self.keep_extra = keep_extra
+
+    @property
+    def columns(self):
+        """计划输出的列名（按表头顺序，链接列紧跟在对应列之后）"""
+        columns = []
+        for _, name, _, link_name in self.steps:
+            columns.append(name)
+            if link_name:
+                columns.append(link_name)
+        return columns
+
+    def extract(self, cells, base_url=DEFAULT_BASE_URL):
+        """
+        按计划抽取一行
+
+        Args:
+            cells: [(文本, 链接或None), ...]（RowClassifier.extract_cells 的返回值）
+            base_url: 补全相对链接的基础URL
+
+        Returns:
+            dict: 行数据；必填列为空时返回None
+        """
+        count = len(cells)
+        row = {}
+        for index, name, convert, link_name in self.steps:
+            if index >= count:
+                break
+            text, href = cells[index]
+            if text:
+                row[name] = convert(text) if convert else text
+            if link_name and href:
+                row[link_name] = urljoin(base_url, href)
+        for index in self.required:
+            if index >= count or not cells[index][0]:
+                return None
+        if self.keep_extra and count > self.width:
+            for index in range(self.width, count):
+                text, href = cells[index]
+                if text:
+                    row[f"{EXTRA_COLUMN_PREFIX}{index + 1}"] = text
+                if href:
+                    row[f"{EXTRA_COLUMN_PREFIX}{index + 1}{LINK_SUFFIX}"] = urljoin(base_url, href)
+        return row
+
+
+class ExtractionSchema:
+    """抽取模式：一组 ColumnSpec 加上表头缺失时使用的默认列顺序"""
+
+    def __init__(self, columns, fallback=None, keep_unknown=True, keep_extra=True):
+        """
+        Args:
+            columns: ColumnSpec 列表
+            fallback: 页面没有表头时按位置使用的列名，默认使用全部列
+            keep_unknown: 表头中模式未声明的列是否按表头文字原样保留（同时提取链接）
+            keep_extra: 单元格多于表头时，多出的单元格是否按"列N"保留
+        """
+        self.columns = list(columns)
+        self._by_name = {spec.name: spec for spec in self.columns}
+        self.fallback = list(fallback or [spec.name for spec in self.columns])
+        self.keep_unknown = keep_unknown
+        self.keep_extra = keep_extra
+
+    def match(self, header):
+        """找出与表头文字对应的列规则，没有时返回None"""
+        header = header.strip()
+        for spec in self.columns:
+            if header in spec.aliases:
+                return spec
+        best = None
+        best_length = 0
+        for spec in self.columns:
+            for alias in spec.aliases:
+                if len(alias) > best_length and alias in header:
+                    best, best_length = spec, len(alias)
+        return best
+
+    def compile(self, headers):
+        """
+        按表头编译抽取计划
+
+        Args:
+            headers: 表头文字列表；为空时按 fallback 的顺序逐列对应
+
+        Returns:
+            ExtractionPlan
+        """
+        headers = [header.strip() for header in headers] or list(self.fallback)
+        steps = []
+        used = set()
+        required = []
+        for index, header in enumerate(headers):
+            spec = self._by_name.get(header) or self.match(header)
+            if spec is not None and spec.name not in used:
+                used.add(spec.name)
+                link_name = spec.name + LINK_SUFFIX if spec.link else None
+                steps.append((index, spec.name, CONVERTERS[spec.type], link_name))
+                if spec.required:
+                    required.append(index)
+            elif self.keep_unknown and header:
+                steps.append((index, header, None, header + LINK_SUFFIX))
+        missing = [spec.name for spec in self.columns if spec.required and spec.name not in used]
+        return ExtractionPlan(tuple(headers), steps, len(headers), tuple(required), missing, self.keep_extra)
+
+
+class ExtractionPlanner:
+    """
+    一次爬取共用的计划缓存：表头签名不变时直接复用已编译的计划
+
+    用法::
+
+        planner = ExtractionPlanner()
+        plan = planner.plan_for(headers)          # 每页调用，签名相同时只是一次字典查找
+        row = plan.extract(planner.cells(tr))
+    """
+
+    def __init__(self, schema=None):
+        self.schema = schema or DEFAULT_SCHEMA
+        self._plans = {}
+        self.stats = {'compiled': 0, 'reused': 0}
+
+    def plan_for(self, headers):
+        """返回表头对应的抽取计划（首次遇到该表头签名时编译）"""
+        signature = tuple(headers)
+        plan = self._plans.get(signature)
+        if plan is None:
+            plan = self.schema.compile(headers)
+            self._plans[signature] = plan
+            self.stats['compiled'] += 1
+            if plan.missing_required:
+                log.warning("[抽取] 表头中缺少必填列: %s", ', '.join(plan.missing_required))
+        else:
+            self.stats['reused'] += 1
+        return plan
+
+    # 每个单元格的文本和链接只提取一次
+    cells = staticmethod(RowClassifier.extract_cells)
+    cell = staticmethod(RowClassifier.extract_cell)
+
+
+# 企知道批量查询结果表格的默认抽取模式
+DEFAULT_SCHEMA = ExtractionSchema(
+    [
+        ColumnSpec('序号'),
+        ColumnSpec('企业名称', ('公司名称', '企业名'), link=True, required=True),
+        ColumnSpec('登记状态', ('经营状态', '企业状态')),
+        ColumnSpec('统一社会信用代码', ('信用代码', '统一社会信')),
+        ColumnSpec('法定代表人', ('法人代表', '法人')),
+        ColumnSpec('成立日期', type='date'),
+        ColumnSpec('注册资本'),
+        ColumnSpec('实缴资本'),
+        ColumnSpec('核准日期', type='date'),
+        ColumnSpec('营业期限'),
+        ColumnSpec('所属省份'),
+        ColumnSpec('所属城市'),
+        ColumnSpec('所属区县'),
+        ColumnSpec('电话', ('联系电话',)),
+        ColumnSpec('邮箱', ('电子邮箱',)),
+        ColumnSpec('纳税人识别号', ('纳税人识',)),
+    ],
+    # 页面没有表头时按结果页的默认列顺序对应
+    fallback=['序号', '企业名称', '登记状态', '统一社会信用代码', '法定代表人', '成立日期', '注册资本', '实缴资本'],
+)
+
+# 页面没有表头时使用的默认字段名
+DEFAULT_HEADERS = tuple(DEFAULT_SCHEMA.fallback)
@@ -0,0 +1,131 @@
+"""
+导入耗时预算检查
+在独立的子进程中测量各爬虫模块的导入耗时，并检查重型依赖是否被提前加载
+"""
+
+import os
+import subprocess
+import sys
+import time
+
+
+STATIC_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(STATIC_DIR))
+
+# 重型依赖：只应在真正需要的代码路径上加载
+HEAVY_MODULES = ['pandas', 'selenium', 'openpyxl']
+
+# 模块名 -> (导入耗时预算(毫秒), 允许加载的重型依赖)
+DEFAULT_BUDGETS = {
+    'qizhidao_spider': (400, []),
+    'qizhidao_advanced_spider': (400, []),
+    'qizhidao_table_spider': (400, []),
+    'qizhidao_smart_spider': (1500, ['selenium']),
+    'crawl_log': (100, []),
+}
+
+# 启动脚本 --help 的总耗时预算（毫秒，包含解释器启动）
+LAUNCHER_BUDGET_MS = 300
+
+
+def _probe_code(module_name):
+    """生成在子进程中执行的探测代码"""
+    return (
+        "import sys, time\n"
+        f"sys.path.insert(0, {STATIC_DIR!r})\n"
+        "start = time.perf_counter()\n"
+        f"import {module_name}\n"
+        "elapsed = (time.perf_counter() - start) * 1000\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(round(elapsed, 1))\n"
+        "print(','.join(heavy))\n"
+    )
+
+
+def measure_module(module_name):
+    """
+    在新的解释器中测量模块导入耗时
+
+    Returns:
+        dict: {'module', 'import_ms', 'heavy_loaded', 'error'}
+    """
+    result = {'module': module_name, 'import_ms': None, 'heavy_loaded': [], 'error': None}
+    proc = subprocess.run(
+        [sys.executable, '-c', _probe_code(module_name)],
+        capture_output=True, text=True, timeout=120
+    )
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        result['error'] = lines[-1] if lines else f"退出码 {proc.returncode}"
+        return result
+
+    lines = proc.stdout.strip().splitlines()
+    result['import_ms'] = float(lines[0])
+    if len(lines) > 1 and lines[1]:
+        result['heavy_loaded'] = lines[1].split(',')
+    return result
+
+
+def measure_launcher(args=('--help',)):
+    """测量启动脚本的总耗时（毫秒，包含解释器启动）"""
+    script = os.path.join(PROJECT_ROOT, 'run_qizhidao_spider.py')
+    start = time.perf_counter()
+    subprocess.run([sys.executable, script, *args], capture_output=True, timeout=60)
+    return round((time.perf_counter() - start) * 1000, 1)
+
+
+def check_import_budget(budgets=None, launcher_budget_ms=LAUNCHER_BUDGET_MS, verbose=True):
+    """
+    检查所有模块是否满足导入耗时预算
+
+    Args:
+        budgets: 模块预算表，默认使用 DEFAULT_BUDGETS
+        launcher_budget_ms: 启动脚本 --help 的耗时预算
+        verbose: 是否打印报告
+
+    Returns:
+        list: 违反预算的问题描述，空列表表示全部通过
+    """
+    budgets = budgets or DEFAULT_BUDGETS
+    problems = []
+
+    if verbose:
+        print(f"{'模块':<28}{'导入耗时(ms)':>14}{'预算(ms)':>10}  重型依赖")
+
+    for module_name, (budget_ms, allowed_heavy) in budgets.items():
+        result = measure_module(module_name)
+        if result['error']:
+            # 依赖未安装时无法测量耗时，但不算违反预算
+            if verbose:
+                print(f"{module_name:<28}{'-':>14}{budget_ms:>10}  无法导入: {result['error']}")
+            continue
+
+        unexpected = [m for m in result['heavy_loaded'] if m not in allowed_heavy]
+        if verbose:
+            heavy_text = ','.join(result['heavy_loaded']) or '无'
+            print(f"{module_name:<28}{result['import_ms']:>14}{budget_ms:>10}  {heavy_text}")
+
+        if result['import_ms'] > budget_ms:
+            problems.append(f"{module_name} 导入耗时 {result['import_ms']}ms 超出预算 {budget_ms}ms")
+        if unexpected:
+            problems.append(f"{module_name} 导入时加载了重型依赖: {', '.join(unexpected)}")
+
+    launcher_ms = measure_launcher()
+    if verbose:
+        print(f"{'run_qizhidao_spider --help':<28}{launcher_ms:>14}{launcher_budget_ms:>10}")
+    if launcher_ms > launcher_budget_ms:
+        problems.append(f"启动脚本 --help 耗时 {launcher_ms}ms 超出预算 {launcher_budget_ms}ms")
+
+    if verbose:
+        if problems:
+            print("\n✗ 导入预算检查未通过:")
+            for problem in problems:
+                print(f"  - {problem}")
+        else:
+            print("\n✓ 导入预算检查通过")
+
+    return problems
+
+
+if __name__ == "__main__":
+    sys.exit(1 if check_import_budget() else 0)
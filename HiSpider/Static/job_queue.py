@@ -0,0 +1,854 @@
+"""
+分布式爬取任务队列
+多个节点从共享队列中领取互不重叠的工作单元（matchId + 页码范围），
+支持租约、心跳和节点失联后的重新入队，结果统一写入共享的结果目录
+
+队列后端：
+    SQLiteQueueBackend - SQLite + 文件锁，适用于共享磁盘
+    RedisQueueBackend  - Redis协议（内置最小客户端，无需安装redis包），
+                         可用 LocalRedisStandIn 在本机测试
+"""
+
+import json
+import os
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+from batch_runner import RESULT_URL_TEMPLATE
+from crawl_log import get_logger
+
+log = get_logger('job_queue')
+
+
+class WorkUnit:
+    """一个工作单元：某个matchId的一段页码（page_end为None表示爬到最后一页）"""
+
+    __slots__ = ('match_id', 'page_start', 'page_end', 'attempts')
+
+    def __init__(self, match_id, page_start=1, page_end=None, attempts=0):
+        self.match_id = str(match_id)
+        self.page_start = int(page_start)
+        self.page_end = int(page_end) if page_end is not None else None
+        self.attempts = attempts
+
+    @property
+    def unit_id(self):
+        end = self.page_end if self.page_end is not None else 'end'
+        return f"{self.match_id}:{self.page_start}-{end}"
+
+    @property
+    def url(self):
+        return RESULT_URL_TEMPLATE.format(match_id=self.match_id)
+
+    def to_dict(self):
+        return {'match_id': self.match_id, 'page_start': self.page_start,
+                'page_end': self.page_end, 'attempts': self.attempts}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['match_id'], data.get('page_start', 1), data.get('page_end'),
+                   data.get('attempts', 0))
+
+    def __repr__(self):
+        return f"WorkUnit({self.unit_id})"
+
+
+def plan_units(match_ids, total_pages=None, pages_per_unit=10):
+    """
+    把matchId列表切分为工作单元
+
+    Args:
+        match_ids: matchId列表
+        total_pages: 每个matchId的总页数（已知时按页码范围切分）
+        pages_per_unit: 每个单元包含的页数
+    """
+    units = []
+    for match_id in match_ids:
+        if not total_pages:
+            units.append(WorkUnit(match_id))
+            continue
+        for start in range(1, total_pages + 1, pages_per_unit):
+            units.append(WorkUnit(match_id, start, min(total_pages, start + pages_per_unit - 1)))
+    return units
+
+
+class QueueBackend:
+    """队列后端接口"""
+
+    def __init__(self, max_attempts=3):
+        self.max_attempts = max_attempts
+
+    def enqueue(self, units):
+        """加入工作单元（已存在的单元忽略），返回新加入的数量"""
+        raise NotImplementedError
+
+    def claim(self, worker_id, lease_seconds):
+        """领取一个工作单元，没有可领取的单元时返回None"""
+        raise NotImplementedError
+
+    def heartbeat(self, unit_id, worker_id, lease_seconds):
+        """续租，租约已失效（被其他节点收回）时返回False"""
+        raise NotImplementedError
+
+    def complete(self, unit_id, worker_id):
+        """标记完成"""
+        raise NotImplementedError
+
+    def fail(self, unit_id, worker_id, error):
+        """标记失败：未达到最大尝试次数时重新入队"""
+        raise NotImplementedError
+
+    def requeue_expired(self):
+        """把租约过期（节点失联）的单元重新入队，返回数量"""
+        raise NotImplementedError
+
+    def stats(self):
+        """返回各状态的单元数量"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class _FileLock:
+    """基于独占创建锁文件的跨进程/跨主机锁，适用于共享磁盘"""
+
+    def __init__(self, path, stale_seconds=30.0, poll_interval=0.05):
+        self.path = path
+        self.stale_seconds = stale_seconds
+        self.poll_interval = poll_interval
+
+    def __enter__(self):
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, f"{socket.gethostname()}:{os.getpid()}".encode())
+                os.close(fd)
+                return self
+            except FileExistsError:
+                # 持锁进程崩溃留下的锁文件，超过一定时间后强制清除
+                try:
+                    if time.time() - os.path.getmtime(self.path) > self.stale_seconds:
+                        os.remove(self.path)
+                        continue
+                except OSError:
+                    pass
+                time.sleep(self.poll_interval)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class SQLiteQueueBackend(QueueBackend):
+    """SQLite队列：所有写操作在文件锁 + IMMEDIATE 事务中执行"""
+
+    def __init__(self, path, max_attempts=3):
+        super().__init__(max_attempts)
+        self.path = path
+        self._lock = _FileLock(path + '.lock')
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS units ("
+                " unit_id TEXT PRIMARY KEY, data TEXT NOT NULL,"
+                " state TEXT NOT NULL DEFAULT 'pending',"
+                " worker_id TEXT, lease_expires REAL, attempts INTEGER NOT NULL DEFAULT 0,"
+                " error TEXT, updated_at REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_units_state ON units(state)")
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        backend = self
+
+        class _Transaction:
+            def __enter__(self):
+                backend._lock.__enter__()
+                self.conn = backend._connection()
+                self.conn.execute("BEGIN IMMEDIATE")
+                return self.conn
+
+            def __exit__(self, exc_type, exc, tb):
+                try:
+                    self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+                finally:
+                    backend._lock.__exit__(exc_type, exc, tb)
+
+        return _Transaction()
+
+    def enqueue(self, units):
+        added = 0
+        now = time.time()
+        with self._transaction() as conn:
+            for unit in units:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO units (unit_id, data, updated_at) VALUES (?, ?, ?)",
+                    (unit.unit_id, json.dumps(unit.to_dict()), now)
+                )
+                added += cursor.rowcount
+        return added
+
+    def _requeue_expired(self, conn, now):
+        cursor = conn.execute(
+            "UPDATE units SET state = 'pending', worker_id = NULL, lease_expires = NULL,"
+            " updated_at = ? WHERE state = 'leased' AND lease_expires < ?",
+            (now, now)
+        )
+        return cursor.rowcount
+
+    def requeue_expired(self):
+        with self._transaction() as conn:
+            return self._requeue_expired(conn, time.time())
+
+    def claim(self, worker_id, lease_seconds):
+        now = time.time()
+        with self._transaction() as conn:
+            self._requeue_expired(conn, now)
+            row = conn.execute(
+                "SELECT unit_id, data, attempts FROM units WHERE state = 'pending'"
+                " ORDER BY rowid LIMIT 1"
+            ).fetchone()
+            if row is None:
+                return None
+            unit_id, data, attempts = row
+            conn.execute(
+                "UPDATE units SET state = 'leased', worker_id = ?, lease_expires = ?,"
+                " attempts = attempts + 1, updated_at = ? WHERE unit_id = ?",
+                (worker_id, now + lease_seconds, now, unit_id)
+            )
+        unit = WorkUnit.from_dict(json.loads(data))
+        unit.attempts = attempts + 1
+        return unit
+
+    def heartbeat(self, unit_id, worker_id, lease_seconds):
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE units SET lease_expires = ?, updated_at = ?"
+                " WHERE unit_id = ? AND worker_id = ? AND state = 'leased'",
+                (now + lease_seconds, now, unit_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, unit_id, worker_id):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE units SET state = 'done', lease_expires = NULL, updated_at = ?"
+                " WHERE unit_id = ? AND state = 'leased' AND worker_id = ?",
+                (time.time(), unit_id, worker_id)
+            )
+
+    def fail(self, unit_id, worker_id, error):
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE units SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,"
+                " worker_id = NULL, lease_expires = NULL, error = ?, updated_at = ?"
+                " WHERE unit_id = ? AND state = 'leased' AND worker_id = ?",
+                (self.max_attempts, str(error), time.time(), unit_id, worker_id)
+            )
+
+    def stats(self):
+        rows = self._connection().execute(
+            "SELECT state, COUNT(*) FROM units GROUP BY state"
+        ).fetchall()
+        counts = {'pending': 0, 'leased': 0, 'done': 0, 'failed': 0}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class RespError(Exception):
+    """Redis协议返回的错误"""
+
+
+class RespClient:
+    """最小的Redis协议（RESP2）客户端，只依赖标准库"""
+
+    def __init__(self, host='127.0.0.1', port=6379, db=0, timeout=10):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout = timeout
+        self._sock = None
+        self._reader = None
+        # 可重入：transaction 在持锁期间还要逐条 execute
+        self._lock = threading.RLock()
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile('rb')
+        if self.db:
+            self._send(['SELECT', str(self.db)])
+            self._read_reply()
+
+    def _send(self, args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode('utf-8')
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._sock.sendall(b''.join(parts))
+
+    def _read_reply(self, nested=False):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Redis连接已关闭")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b'+':
+            return payload.decode('utf-8')
+        if prefix == b'-':
+            # 数组（EXEC的回复）中的错误先读完整个数组再由调用方处理，避免连接中残留未读数据
+            if nested:
+                return RespError(payload.decode('utf-8'))
+            raise RespError(payload.decode('utf-8'))
+        if prefix == b':':
+            return int(payload)
+        if prefix == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)[:-2]
+            return data.decode('utf-8')
+        if prefix == b'*':
+            count = int(payload)
+            if count < 0:
+                return None
+            return [self._read_reply(nested=True) for _ in range(count)]
+        raise RespError(f"无法识别的回复: {line!r}")
+
+    def execute(self, *args):
+        """发送一条命令并返回回复"""
+        with self._lock:
+            if self._sock is None:
+                self._connect()
+            try:
+                self._send(args)
+                return self._read_reply()
+            except (OSError, ConnectionError):
+                self.close()
+                raise
+
+    def transaction(self, keys, prepare, max_retries=50):
+        """
+        乐观事务：WATCH keys 后由 prepare() 读取当前值并返回要一起执行的命令列表，
+        在 MULTI/EXEC 中原子执行；EXEC 前被监视的键被其他连接修改时重新读取并重试
+
+        Args:
+            keys: 要监视的键
+            prepare: 无参函数，返回命令元组列表，返回None表示放弃（条件不满足）
+            max_retries: 最大重试次数
+
+        Returns:
+            list: EXEC 的回复列表；放弃时返回None
+        """
+        with self._lock:
+            for _ in range(max_retries):
+                self.execute('WATCH', *keys)
+                commands = prepare()
+                if commands is None:
+                    self.execute('UNWATCH')
+                    return None
+                self.execute('MULTI')
+                for command in commands:
+                    self.execute(*command)
+                replies = self.execute('EXEC')
+                if replies is not None:
+                    for reply in replies:
+                        if isinstance(reply, RespError):
+                            raise reply
+                    return replies
+            raise RespError(f"事务冲突重试 {max_retries} 次仍未成功: {keys}")
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+                self._reader = None
+
+
+class RedisQueueBackend(QueueBackend):
+    """
+    Redis队列，键结构：
+        {prefix}:units              哈希  unit_id -> 单元JSON（用于去重）
+        {prefix}:pending            列表  待领取的unit_id
+        {prefix}:processing:{节点}  列表  该节点已领取、尚未完成的unit_id
+        {prefix}:leases             哈希  unit_id -> {"worker", "expires"}
+        {prefix}:done               集合  已完成的unit_id
+        {prefix}:failed             哈希  unit_id -> 错误信息
+
+    领取、续租、完成、失败和收回过期租约都在 WATCH/MULTI/EXEC 事务中完成：
+    检查租约归属与修改之间被其他节点改动时整个事务不执行并重试，
+    不会出现两个节点同时持有一个单元，或已被收回的单元又被原节点标记完成
+    """
+
+    def __init__(self, host='127.0.0.1', port=6379, db=0, prefix='qizhidao', max_attempts=3):
+        super().__init__(max_attempts)
+        self.client = RespClient(host, port, db)
+        self.prefix = prefix
+
+    def _key(self, name):
+        return f"{self.prefix}:{name}"
+
+    def _processing_key(self, worker_id):
+        return self._key(f"processing:{worker_id}")
+
+    def _load_unit(self, unit_id):
+        return WorkUnit.from_dict(json.loads(self.client.execute('HGET', self._key('units'), unit_id)))
+
+    def _lease_owner(self, unit_id):
+        lease = self.client.execute('HGET', self._key('leases'), unit_id)
+        return json.loads(lease) if lease is not None else None
+
+    def enqueue(self, units):
+        added = 0
+        for unit in units:
+            def prepare(unit=unit):
+                if self.client.execute('HEXISTS', self._key('units'), unit.unit_id):
+                    return None
+                return [('HSET', self._key('units'), unit.unit_id, json.dumps(unit.to_dict())),
+                        ('RPUSH', self._key('pending'), unit.unit_id)]
+
+            if self.client.transaction([self._key('units')], prepare) is not None:
+                added += 1
+        return added
+
+    def requeue_expired(self):
+        requeued = 0
+        now = time.time()
+        leases = self.client.execute('HGETALL', self._key('leases')) or []
+        for unit_id, lease in zip(leases[::2], leases[1::2]):
+            if json.loads(lease)['expires'] >= now:
+                continue
+
+            def prepare(unit_id=unit_id):
+                # 事务中重新检查：读取之后可能已被续租，或已被其他节点收回
+                lease = self._lease_owner(unit_id)
+                if lease is None or lease['expires'] >= now:
+                    return None
+                return [('HDEL', self._key('leases'), unit_id),
+                        ('LREM', self._processing_key(lease['worker']), 0, unit_id),
+                        ('RPUSH', self._key('pending'), unit_id)]
+
+            if self.client.transaction([self._key('leases')], prepare) is not None:
+                requeued += 1
+        return requeued
+
+    def claim(self, worker_id, lease_seconds):
+        self.requeue_expired()
+        pending = self._key('pending')
+        claimed = []
+
+        def prepare():
+            claimed.clear()
+            unit_id = self.client.execute('LINDEX', pending, 0)
+            if unit_id is None:
+                return None
+            unit = self._load_unit(unit_id)
+            unit.attempts += 1
+            claimed.append(unit)
+            lease = {'worker': worker_id, 'expires': time.time() + lease_seconds}
+            return [('LMOVE', pending, self._processing_key(worker_id), 'LEFT', 'RIGHT'),
+                    ('HSET', self._key('leases'), unit_id, json.dumps(lease)),
+                    ('HSET', self._key('units'), unit_id, json.dumps(unit.to_dict()))]
+
+        if self.client.transaction([pending], prepare) is None:
+            return None
+        return claimed[0]
+
+    def _owned(self, unit_id, worker_id, commands):
+        """租约仍属于 worker_id 时原子执行 commands(unit_id)，返回是否执行"""
+        def prepare():
+            lease = self._lease_owner(unit_id)
+            if lease is None or lease['worker'] != worker_id:
+                return None
+            return commands()
+
+        return self.client.transaction([self._key('leases')], prepare) is not None
+
+    def heartbeat(self, unit_id, worker_id, lease_seconds):
+        def commands():
+            lease = {'worker': worker_id, 'expires': time.time() + lease_seconds}
+            return [('HSET', self._key('leases'), unit_id, json.dumps(lease))]
+
+        return self._owned(unit_id, worker_id, commands)
+
+    def complete(self, unit_id, worker_id):
+        self._owned(unit_id, worker_id, lambda: [
+            ('SADD', self._key('done'), unit_id),
+            ('HDEL', self._key('leases'), unit_id),
+            ('LREM', self._processing_key(worker_id), 0, unit_id),
+        ])
+
+    def fail(self, unit_id, worker_id, error):
+        def commands():
+            release = [('HDEL', self._key('leases'), unit_id),
+                       ('LREM', self._processing_key(worker_id), 0, unit_id)]
+            if self._load_unit(unit_id).attempts >= self.max_attempts:
+                return release + [('HSET', self._key('failed'), unit_id, str(error))]
+            return release + [('RPUSH', self._key('pending'), unit_id)]
+
+        self._owned(unit_id, worker_id, commands)
+
+    def stats(self):
+        return {
+            'pending': self.client.execute('LLEN', self._key('pending')),
+            'leased': self.client.execute('HLEN', self._key('leases')),
+            'done': self.client.execute('SCARD', self._key('done')),
+            'failed': self.client.execute('HLEN', self._key('failed')),
+        }
+
+    def close(self):
+        self.client.close()
+
+
+class LocalRedisStandIn:
+    """
+    本机的Redis替身：只实现队列用到的命令（含 WATCH/MULTI/EXEC 事务），
+    用于在没有Redis服务的环境下测试 RedisQueueBackend
+
+    用法:
+        with LocalRedisStandIn() as server:
+            backend = RedisQueueBackend(port=server.port)
+    """
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self._data = {}
+        # 每个键的修改版本号，WATCH 记录版本，EXEC 时版本变化则放弃事务
+        self._versions = {}
+        self._lock = threading.Lock()
+        stand_in = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                session = {'watched': {}, 'queued': None}
+                while True:
+                    try:
+                        args = stand_in._read_command(self.rfile)
+                    except (ConnectionError, ValueError):
+                        return
+                    if args is None:
+                        return
+                    self.wfile.write(stand_in._dispatch(args, session))
+
+        class Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self._server = Server((host, port), Handler)
+        self.host, self.port = self._server.server_address
+        self._thread = None
+
+    @staticmethod
+    def _read_command(rfile):
+        line = rfile.readline()
+        if not line:
+            return None
+        count = int(line[1:-2])
+        args = []
+        for _ in range(count):
+            length = int(rfile.readline()[1:-2])
+            args.append(rfile.read(length + 2)[:-2].decode('utf-8'))
+        return args
+
+    @staticmethod
+    def _encode(value):
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, list):
+            return b"*%d\r\n" % len(value) + b''.join(LocalRedisStandIn._encode(v) for v in value)
+        data = str(value).encode('utf-8')
+        return b"$%d\r\n%s\r\n" % (len(data), data)
+
+    # 会修改数据的命令：第一个参数是被修改的键（LMOVE还修改第二个，DEL修改全部）
+    _WRITE_COMMANDS = {'RPUSH', 'LPOP', 'LMOVE', 'LREM', 'HSET', 'HSETNX', 'HDEL', 'SADD', 'DEL'}
+
+    def _dispatch(self, args, session):
+        command = args[0].upper()
+        with self._lock:
+            if session['queued'] is not None and command not in ('EXEC', 'DISCARD', 'MULTI', 'WATCH'):
+                session['queued'].append(args)
+                return b"+QUEUED\r\n"
+            if command == 'WATCH':
+                session['watched'].update((key, self._versions.get(key, 0)) for key in args[1:])
+                return b"+OK\r\n"
+            if command == 'UNWATCH':
+                session['watched'] = {}
+                return b"+OK\r\n"
+            if command == 'MULTI':
+                session['queued'] = []
+                return b"+OK\r\n"
+            if command in ('EXEC', 'DISCARD'):
+                queued, watched = session['queued'], session['watched']
+                session['queued'], session['watched'] = None, {}
+                if queued is None:
+                    return f"-ERR {command} without MULTI\r\n".encode()
+                if command == 'DISCARD':
+                    return b"+OK\r\n"
+                if any(self._versions.get(key, 0) != version for key, version in watched.items()):
+                    return b"*-1\r\n"
+                return b"*%d\r\n" % len(queued) + b''.join(self._execute(queued_args) for queued_args in queued)
+            return self._execute(args)
+
+    def _execute(self, args):
+        command, args = args[0].upper(), args[1:]
+        if command in self._WRITE_COMMANDS and args:
+            changed = args if command == 'DEL' else args[:2] if command == 'LMOVE' else args[:1]
+            for key in changed:
+                self._versions[key] = self._versions.get(key, 0) + 1
+        data = self._data
+        try:
+            if command == 'PING':
+                return b"+PONG\r\n"
+            if command == 'SELECT':
+                return b"+OK\r\n"
+            if command == 'RPUSH':
+                lst = data.setdefault(args[0], [])
+                lst.extend(args[1:])
+                return self._encode(len(lst))
+            if command == 'LPOP':
+                lst = data.get(args[0]) or []
+                return self._encode(lst.pop(0) if lst else None)
+            if command == 'LMOVE':
+                source = data.get(args[0]) or []
+                if not source:
+                    return self._encode(None)
+                value = source.pop(0 if args[2].upper() == 'LEFT' else -1)
+                destination = data.setdefault(args[1], [])
+                destination.insert(0 if args[3].upper() == 'LEFT' else len(destination), value)
+                return self._encode(value)
+            if command == 'LINDEX':
+                lst = data.get(args[0]) or []
+                index = int(args[1])
+                return self._encode(lst[index] if -len(lst) <= index < len(lst) else None)
+            if command == 'LREM':
+                lst = data.get(args[0]) or []
+                kept = [v for v in lst if v != args[2]]  # 只用到 count=0（全部删除）
+                data[args[0]] = kept
+                return self._encode(len(lst) - len(kept))
+            if command == 'LLEN':
+                return self._encode(len(data.get(args[0], [])))
+            if command in ('HSET', 'HSETNX'):
+                h = data.setdefault(args[0], {})
+                if command == 'HSETNX' and args[1] in h:
+                    return self._encode(0)
+                added = sum(1 for k in args[1::2] if k not in h)
+                h.update(zip(args[1::2], args[2::2]))
+                return self._encode(1 if command == 'HSETNX' else added)
+            if command == 'HGET':
+                return self._encode(data.get(args[0], {}).get(args[1]))
+            if command == 'HDEL':
+                h = data.get(args[0], {})
+                return self._encode(sum(1 for k in args[1:] if h.pop(k, None) is not None))
+            if command == 'HEXISTS':
+                return self._encode(args[1] in data.get(args[0], {}))
+            if command == 'HGETALL':
+                return self._encode([x for kv in data.get(args[0], {}).items() for x in kv])
+            if command == 'HLEN':
+                return self._encode(len(data.get(args[0], {})))
+            if command == 'SADD':
+                s = data.setdefault(args[0], set())
+                before = len(s)
+                s.update(args[1:])
+                return self._encode(len(s) - before)
+            if command == 'SCARD':
+                return self._encode(len(data.get(args[0], set())))
+            if command == 'DEL':
+                return self._encode(sum(1 for k in args if data.pop(k, None) is not None))
+            return f"-ERR unknown command '{command}'\r\n".encode()
+        except (IndexError, TypeError, AttributeError) as e:
+            return f"-ERR {e}\r\n".encode()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def open_backend(queue_url, max_attempts=3):
+    """
+    根据地址创建队列后端
+
+    Args:
+        queue_url: sqlite:///路径/queue.db、redis://主机:端口/库号?prefix=前缀，或直接给出文件路径
+    """
+    if queue_url.startswith('redis://'):
+        parsed = urlparse(queue_url)
+        db = int(parsed.path.strip('/') or 0)
+        prefix = 'qizhidao'
+        for part in parsed.query.split('&'):
+            if part.startswith('prefix='):
+                prefix = part[len('prefix='):]
+        return RedisQueueBackend(parsed.hostname or '127.0.0.1', parsed.port or 6379, db,
+                                 prefix=prefix, max_attempts=max_attempts)
+    path = queue_url[len('sqlite:///'):] if queue_url.startswith('sqlite:///') else queue_url
+    return SQLiteQueueBackend(path, max_attempts=max_attempts)
+
+
+class ResultSink:
+    """
+    共享的结果目录：每个工作单元写一个JSONL文件（先写临时文件再原子替换），
+    同一单元被重新爬取时覆盖旧文件，合并时不会出现重复页
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, unit_id):
+        safe = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in unit_id)
+        return os.path.join(self.directory, f"{safe}.jsonl")
+
+    def write(self, unit, rows):
+        path = self._path(unit.unit_id)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False))
+                f.write('\n')
+        os.replace(tmp_path, path)
+        return path
+
+    def iter_rows(self):
+        """按文件名顺序读出所有结果行"""
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith('.jsonl'):
+                continue
+            with open(os.path.join(self.directory, name), 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def merge(self, filename):
+        """把所有单元的结果合并为一个JSON文件（.gz / .zst 后缀时压缩），返回行数"""
+        from json_writer import write_json
+        rows = list(self.iter_rows())
+        write_json(filename, {'companies': rows, 'total_results': len(rows)})
+        return len(rows)
+
+
+def crawl_unit_with_table_spider(unit):
+    """默认的单元爬取函数：用表格爬虫爬取该单元的页码范围，返回行字典列表"""
+    from qizhidao_table_spider import QizhidaoTableSpider
+    from row_store import as_dict_rows
+    # 页码范围是按网站默认的每页条数切分的，这里不能自动切换条数
+    spider = QizhidaoTableSpider(url=unit.url, start_page=unit.page_start, max_pages=unit.page_end,
+                                 page_size=None)
+    data = spider.crawl_all_pages()
+    return as_dict_rows(data['companies'])
+
+
+class CrawlWorker:
+    """爬取节点：循环领取工作单元、定期心跳续租、把结果写入共享目录"""
+
+    def __init__(self, backend, sink, worker_id=None, lease_seconds=120,
+                 heartbeat_interval=30, crawl_unit=crawl_unit_with_table_spider,
+                 idle_exit=True, poll_interval=5):
+        """
+        Args:
+            backend: 队列后端
+            sink: ResultSink
+            worker_id: 节点ID，默认使用 主机名:进程号
+            lease_seconds: 租约时长，节点失联超过该时间后单元会被其他节点接手
+            heartbeat_interval: 心跳间隔（应明显小于租约时长）
+            crawl_unit: 爬取单元的函数 crawl_unit(unit) -> 行字典列表
+            idle_exit: 队列为空时是否退出（否则持续轮询）
+            poll_interval: 持续轮询时的等待间隔
+        """
+        self.backend = backend
+        self.sink = sink
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.crawl_unit = crawl_unit
+        self.idle_exit = idle_exit
+        self.poll_interval = poll_interval
+        self.stats = {'completed': 0, 'failed': 0, 'lost_leases': 0, 'rows': 0}
+
+    def _heartbeat_loop(self, unit, stop_event, lost_event):
+        while not stop_event.wait(self.heartbeat_interval):
+            try:
+                if not self.backend.heartbeat(unit.unit_id, self.worker_id, self.lease_seconds):
+                    lost_event.set()
+                    return
+            except Exception as e:
+                log.warning("[节点 %s] 心跳失败: %s", self.worker_id, e)
+
+    def process(self, unit):
+        """处理一个已领取的单元"""
+        stop_event = threading.Event()
+        lost_event = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat_loop,
+                                     args=(unit, stop_event, lost_event), daemon=True)
+        heartbeat.start()
+        try:
+            rows = self.crawl_unit(unit)
+        except Exception as e:
+            stop_event.set()
+            heartbeat.join()
+            self.stats['failed'] += 1
+            log.warning("[节点 %s] 单元 %s 失败: %s", self.worker_id, unit.unit_id, e)
+            self.backend.fail(unit.unit_id, self.worker_id, e)
+            return False
+        stop_event.set()
+        heartbeat.join()
+
+        if lost_event.is_set():
+            # 租约已被收回，该单元会由其他节点重新爬取，丢弃本次结果
+            self.stats['lost_leases'] += 1
+            log.warning("[节点 %s] 单元 %s 租约已失效，丢弃结果", self.worker_id, unit.unit_id)
+            return False
+
+        self.sink.write(unit, rows)
+        self.backend.complete(unit.unit_id, self.worker_id)
+        self.stats['completed'] += 1
+        self.stats['rows'] += len(rows)
+        log.info("[节点 %s] 单元 %s 完成，%s 条", self.worker_id, unit.unit_id, len(rows))
+        return True
+
+    def run(self, max_units=None):
+        """持续领取并处理单元，返回统计信息"""
+        processed = 0
+        while max_units is None or processed < max_units:
+            unit = self.backend.claim(self.worker_id, self.lease_seconds)
+            if unit is None:
+                if self.idle_exit:
+                    break
+                time.sleep(self.poll_interval)
+                continue
+            self.process(unit)
+            processed += 1
+        return self.stats
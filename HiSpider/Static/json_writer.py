@@ -0,0 +1,184 @@
+"""
+JSON输出
+优先使用 orjson 编码（未安装时退回标准库 json），默认输出紧凑格式；
+企业数据列表按块编码后逐块写出，不在内存中拼出整个文件，并可以边写边压缩为 gzip 或 zstd
+"""
+
+import gzip
+import json
+import os
+
+
+# 压缩方式 -> 文件后缀
+COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+
+_COMPRESSION_ALIASES = {'gz': 'gzip', 'gzip': 'gzip', 'zst': 'zstd', 'zstd': 'zstd'}
+
+
+def _load_orjson():
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+class JsonSerializer:
+    """可替换后端的JSON编码器，输出UTF-8字节（中文不转义）"""
+
+    def __init__(self, pretty=False, backend='auto'):
+        """
+        Args:
+            pretty: 是否缩进输出（便于阅读，文件更大、写入更慢）
+            backend: 'auto'（有 orjson 时使用 orjson）、'orjson' 或 'json'
+        """
+        self.pretty = pretty
+        self._orjson = None
+        if backend in ('auto', 'orjson'):
+            self._orjson = _load_orjson()
+            if self._orjson is None and backend == 'orjson':
+                raise ImportError("未安装 orjson，请运行: pip install orjson")
+        elif backend != 'json':
+            raise ValueError(f"未知的JSON后端: {backend}")
+        self.backend = 'orjson' if self._orjson else 'json'
+
+    def dumps(self, obj):
+        """编码为UTF-8字节"""
+        if self._orjson is not None:
+            option = self._orjson.OPT_INDENT_2 if self.pretty else 0
+            try:
+                return self._orjson.dumps(obj, option=option)
+            except TypeError:
+                pass  # orjson 不支持的类型（如超过64位的整数）交给标准库处理
+        if self.pretty:
+            return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def resolve_compression(filename, compression=None):
+    """
+    确定压缩方式：显式指定优先，否则按文件后缀（.gz / .zst）判断
+
+    Returns:
+        str: 'gzip'、'zstd' 或 None
+    """
+    if compression:
+        name = _COMPRESSION_ALIASES.get(str(compression).lower())
+        if name is None:
+            raise ValueError(f"不支持的压缩方式: {compression}（可用: gzip, zstd）")
+        return name
+    for name, suffix in COMPRESSION_SUFFIXES.items():
+        if filename.endswith(suffix):
+            return name
+    return None
+
+
+def output_filename(filename, compression=None):
+    """需要压缩时为文件名补上 .gz / .zst 后缀"""
+    compression = resolve_compression(filename, compression)
+    if compression and not filename.endswith(COMPRESSION_SUFFIXES[compression]):
+        filename += COMPRESSION_SUFFIXES[compression]
+    return filename
+
+
+def open_output(filename, compression=None, level=None):
+    """
+    以二进制写入方式打开输出文件，按需套上流式压缩
+
+    Args:
+        filename: 文件名
+        compression: 'gzip'、'zstd' 或 None（按后缀判断）
+        level: 压缩级别，默认 gzip 6、zstd 3
+    """
+    compression = resolve_compression(filename, compression)
+    if compression == 'gzip':
+        return gzip.open(filename, 'wb', compresslevel=6 if level is None else level)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd压缩需要安装 zstandard，请运行: pip install zstandard") from None
+        compressor = zstandard.ZstdCompressor(level=3 if level is None else level)
+        return compressor.stream_writer(open(filename, 'wb'), closefd=True)
+    return open(filename, 'wb')
+
+
+def open_input(filename):
+    """以二进制读取方式打开（自动识别 .gz / .zst 压缩）"""
+    compression = resolve_compression(filename)
+    if compression == 'gzip':
+        return gzip.open(filename, 'rb')
+    if compression == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(open(filename, 'rb'), closefd=True)
+    return open(filename, 'rb')
+
+
+def read_json(filename):
+    """读取 write_json 写出的文件（支持压缩文件）"""
+    with open_input(filename) as f:
+        return json.loads(f.read().decode('utf-8'))
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def write_json(filename, data, pretty=False, compression=None, stream_key='companies',
+               chunk_rows=1000, serializer=None):
+    """
+    写出JSON文件
+
+    紧凑模式下 data[stream_key]（企业数据列表，可以是 RowStore 或任意可迭代对象）
+    每 chunk_rows 行编码一次并立即写出；缩进模式为了得到规整的缩进，整体编码一次
+
+    Args:
+        filename: 文件名（需要压缩时自动补上后缀）
+        data: 顶层字典
+        pretty: 是否缩进输出
+        compression: 'gzip'、'zstd' 或 None（按文件后缀判断）
+        stream_key: 逐块写出的列表字段
+        chunk_rows: 每次编码的行数
+        serializer: 可选的 JsonSerializer
+
+    Returns:
+        str: 实际写入的文件名
+    """
+    serializer = serializer or JsonSerializer(pretty=pretty)
+    filename = output_filename(filename, compression)
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with open_output(filename, compression) as f:
+        if serializer.pretty or stream_key not in data:
+            output = dict(data)
+            if stream_key in output and not isinstance(output[stream_key], list):
+                output[stream_key] = list(output[stream_key])
+            f.write(serializer.dumps(output))
+            return filename
+
+        f.write(b'{')
+        for i, (key, value) in enumerate(data.items()):
+            if i:
+                f.write(b',')
+            f.write(serializer.dumps(key))
+            f.write(b':')
+            if key != stream_key:
+                f.write(serializer.dumps(value))
+                continue
+            f.write(b'[')
+            for j, chunk in enumerate(_chunks(value or [], chunk_rows)):
+                if j:
+                    f.write(b',')
+                f.write(serializer.dumps(chunk)[1:-1])  # 去掉块两端的方括号
+            f.write(b']')
+        f.write(b'}')
+    return filename
@@ -0,0 +1,78 @@
+"""
+页面处理流水线
+主线程抓取第N页的原始快照后立即放入有界队列，工作线程负责解析、去重和保存，
+主线程同时翻到第N+1页并等待加载，每页耗时从"翻页 + 解析"降为两者中的较大值
+"""
+
+import queue
+import threading
+import time
+
+from crawl_log import get_logger
+
+log = get_logger('pipeline')
+
+
+class PagePipeline:
+    """单工作线程的有界处理流水线（按提交顺序处理，保证去重和保存的顺序与翻页一致）"""
+
+    _STOP = object()
+
+    def __init__(self, handler, maxsize=2, name='page-pipeline'):
+        """
+        Args:
+            handler: 处理函数 handler(item)，在工作线程中按顺序调用
+            maxsize: 队列容量，队列满时 submit 阻塞（防止解析跟不上时快照无限堆积）
+            name: 工作线程名称
+        """
+        self.handler = handler
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._error = None
+        self.stats = {'submitted': 0, 'processed': 0, 'failed': 0,
+                      'handler_seconds': 0.0, 'submit_wait_seconds': 0.0}
+        self._thread = threading.Thread(target=self._worker, name=name, daemon=True)
+        self._thread.start()
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                start = time.perf_counter()
+                try:
+                    self.handler(item)
+                    self.stats['processed'] += 1
+                except Exception as e:
+                    # 单页处理失败不影响后续页面，第一个异常在 close 时报告
+                    self.stats['failed'] += 1
+                    if self._error is None:
+                        self._error = e
+                    log.warning("[流水线] 处理失败: %s", e)
+                self.stats['handler_seconds'] += time.perf_counter() - start
+            finally:
+                self._queue.task_done()
+
+    def submit(self, item):
+        """提交一项，队列满时阻塞等待工作线程"""
+        start = time.perf_counter()
+        self._queue.put(item)
+        self.stats['submit_wait_seconds'] += time.perf_counter() - start
+        self.stats['submitted'] += 1
+
+    def drain(self):
+        """等待已提交的所有项处理完毕"""
+        self._queue.join()
+
+    def close(self):
+        """处理完剩余的项并停止工作线程，返回第一个处理异常（没有则为None）"""
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+        return self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
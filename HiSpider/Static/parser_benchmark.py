@@ -0,0 +1,276 @@
+"""
+解析进程池基准测试
+用生成的与结果页结构相同的页面（或保存下来的真实页面）作为语料，
+比较主进程逐页解析与不同进程数的解析进程池的吞吐量
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from table_parser import parse_page_html
+from row_classifier import RowClassifier, HEADER_KEYWORDS, DATA
+
+
+BENCHMARK_URL = "https://qiye.qizhidao.com/batch-query-result?matchId=benchmark"
+
+
+def build_page(page, rows_per_page=100, total_pages=50):
+    """生成一页与结果页结构相同的HTML（Element UI表格 + 分页组件），返回UTF-8字节"""
+    start = (page - 1) * rows_per_page
+    rows = []
+    for i in range(start, start + rows_per_page):
+        rows.append(
+            f'<tr class="el-table__row"><td><div class="cell">{i + 1}</div></td>'
+            f'<td><div class="cell"><a href="/company/{i:08d}">测试{i}科技有限公司</a></div></td>'
+            f'<td><div class="cell">存续</div></td>'
+            f'<td><div class="cell">91440300MA{i:08d}</div></td>'
+            f'<td><div class="cell">张{i % 97}</div></td>'
+            f'<td><div class="cell">2015-0{i % 9 + 1}-1{i % 10}</div></td>'
+            f'<td><div class="cell">{(i % 50 + 1) * 100}万人民币</div></td>'
+            f'<td><div class="cell">-</div></td></tr>'
+        )
+    headers = ''.join(f'<th><div class="cell">{name}</div></th>' for name in
+                      ['序号', '企业名称', '登记状态', '统一社会信用代码',
+                       '法定代表人', '成立日期', '注册资本', '实缴资本'])
+    pager = ''.join(f'<li class="number">{n}</li>' for n in range(1, 8))
+    html = (
+        '<html><head><meta charset="utf-8"><title>企知道 - 批量查询结果</title></head><body>'
+        '<div class="el-table"><table class="el-table__body">'
+        f'<thead><tr>{headers}</tr></thead><tbody>{"".join(rows)}</tbody></table></div>'
+        f'<div class="el-pagination"><span class="el-pagination__total">共 {total_pages * rows_per_page} 条</span>'
+        f'<ul class="el-pager">{pager}<li class="number">{total_pages}</li></ul></div>'
+        '</body></html>'
+    )
+    return html.encode('utf-8')
+
+
+def load_corpus(corpus_dir=None, pages=40, rows_per_page=100):
+    """
+    读取语料：指定目录时读取其中保存的 .html 页面，否则生成模拟页面
+
+    Returns:
+        list: 页面字节列表
+    """
+    if corpus_dir:
+        names = sorted(name for name in os.listdir(corpus_dir) if name.endswith(('.html', '.htm')))
+        corpus = []
+        for name in names:
+            with open(os.path.join(corpus_dir, name), 'rb') as f:
+                corpus.append(f.read())
+        return corpus
+    return [build_page(page, rows_per_page) for page in range(1, pages + 1)]
+
+
+def _parse_all_serial(corpus):
+    return sum(len(parse_page_html(content, BENCHMARK_URL, page)['rows'])
+               for page, content in enumerate(corpus, 1))
+
+
+def _parse_all_pool(pool, corpus):
+    futures = [pool.submit(parse_page_html, content, BENCHMARK_URL, page)
+               for page, content in enumerate(corpus, 1)]
+    return sum(len(future.result()['rows']) for future in futures)
+
+
+def run_benchmark(corpus, worker_counts=None, repeat=2):
+    """
+    测量不同解析方式的吞吐量
+
+    Args:
+        corpus: 页面字节列表
+        worker_counts: 要测试的进程数列表，默认 1、2、4……直到CPU数
+        repeat: 每种方式重复的次数（取最好成绩）
+
+    Returns:
+        list: 每种方式的结果字典（mode, workers, seconds, pages_per_second, rows, speedup）
+    """
+    cpu_count = os.cpu_count() or 1
+    if worker_counts is None:
+        worker_counts = []
+        n = 1
+        while n < cpu_count:
+            worker_counts.append(n)
+            n *= 2
+        worker_counts.append(cpu_count)
+
+    results = []
+    best = None
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = _parse_all_serial(corpus)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    results.append({'mode': 'serial', 'workers': 0, 'seconds': best, 'rows': rows})
+
+    for workers in worker_counts:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # 预热：进程启动和模块导入不计入解析耗时
+            list(pool.map(parse_page_html, corpus[:workers], [BENCHMARK_URL] * workers,
+                          range(1, workers + 1)))
+            best = None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                rows = _parse_all_pool(pool, corpus)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+        results.append({'mode': 'pool', 'workers': workers, 'seconds': best, 'rows': rows})
+
+    baseline = results[0]['seconds']
+    for result in results:
+        result['pages_per_second'] = len(corpus) / result['seconds'] if result['seconds'] else 0.0
+        result['speedup'] = baseline / result['seconds'] if result['seconds'] else 0.0
+    return results
+
+
+def print_report(results, pages):
+    """打印基准测试结果"""
+    print(f"\n解析进程池基准测试（{pages} 页，CPU数: {os.cpu_count()}）")
+    print("-" * 60)
+    print(f"{'方式':<12}{'进程数':>8}{'耗时(秒)':>12}{'页/秒':>12}{'加速比':>10}")
+    for result in results:
+        mode = '主进程' if result['mode'] == 'serial' else '进程池'
+        print(f"{mode:<12}{result['workers']:>8}{result['seconds']:>12.3f}"
+              f"{result['pages_per_second']:>12.1f}{result['speedup']:>10.2f}")
+    print("-" * 60)
+
+
+def build_rows_html(rows=500, columns=20, header_every=50):
+    """生成行分类基准测试用的表格行（多列，夹杂重复表头行和空行）"""
+    names = (HEADER_KEYWORDS * (columns // len(HEADER_KEYWORDS) + 1))[:columns]
+    header = '<tr>' + ''.join(f'<th>{name}</th>' for name in names) + '</tr>'
+    html = [header]
+    for i in range(rows):
+        if i and i % header_every == 0:
+            html.append(header)
+        if i % 97 == 0:
+            html.append('<tr>' + '<td></td>' * columns + '</tr>')
+        cells = [f'<td>{i + 1}</td>', f'<td><a href="/company/{i}">测试{i}科技有限公司</a></td>']
+        cells += [f'<td><span>字段{c}-{i}</span></td>' for c in range(2, columns)]
+        html.append('<tr>' + ''.join(cells) + '</tr>')
+    return '<table>' + ''.join(html) + '</table>', list(names)
+
+
+def _legacy_classify_rows(rows, headers):
+    """分类器引入前的逐行判断方式（每个单元格多次 get_text、逐个关键词扫描），作为对照"""
+    kept = 0
+    header_skipped = False
+    for idx, row in enumerate(rows):
+        cells = row.find_all(['td', 'th'])
+        if len(cells) < 2:
+            continue
+        row_text = ' '.join([cell.get_text(strip=True) for cell in cells])
+        [cell.get_text(strip=True) for cell in cells]
+        keyword_count = sum(1 for keyword in HEADER_KEYWORDS if keyword in row_text)
+        if keyword_count >= 3:
+            has_urls = False
+            all_short_text = True
+            for cell in cells:
+                text = cell.get_text(strip=True)
+                if cell.find('a') and cell.find('a').get('href'):
+                    has_urls = True
+                if len(text) > 20:
+                    all_short_text = False
+            if not has_urls and all_short_text:
+                continue
+        if not header_skipped and idx < 2:
+            if any(keyword in row_text for keyword in HEADER_KEYWORDS[:5]):
+                if idx == 0 or len(cells) == len(headers):
+                    header_skipped = True
+                    continue
+        cell_count = 0
+        has_data = False
+        for cell in cells:
+            text = cell.get_text(strip=True)
+            if text:
+                cell_count += 1
+                if len(text) > 1:
+                    has_data = True
+        if cell_count < 2 or not has_data:
+            continue
+        for cell in cells:
+            cell.get_text(strip=True)
+            cell.find('a')
+        kept += 1
+    return kept
+
+
+def _classifier_rows(rows, headers):
+    classifier = RowClassifier()
+    kept = 0
+    header_skipped = False
+    for idx, row in enumerate(rows):
+        cells = classifier.extract_cells(row)
+        kind = classifier.classify(cells, idx, len(headers), header_skipped)
+        if kind != DATA:
+            header_skipped = header_skipped or kind != 'empty'
+            continue
+        kept += 1
+    return kept
+
+
+def run_row_benchmark(rows=500, columns=20, repeat=3):
+    """
+    行分类基准测试：比较旧的逐行判断方式与 RowClassifier 的单行耗时
+
+    Returns:
+        dict: legacy_us / classifier_us（每行微秒）、speedup、保留的数据行数
+    """
+    from bs4 import BeautifulSoup
+    html, headers = build_rows_html(rows, columns)
+    tr_list = BeautifulSoup(html, 'lxml').find_all('tr')
+    timings = {}
+    kept = {}
+    for name, func in (('legacy', _legacy_classify_rows), ('classifier', _classifier_rows)):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            kept[name] = func(tr_list, headers)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        timings[name] = best
+    return {
+        'rows': len(tr_list),
+        'columns': columns,
+        'legacy_us': timings['legacy'] / len(tr_list) * 1e6,
+        'classifier_us': timings['classifier'] / len(tr_list) * 1e6,
+        'speedup': timings['legacy'] / timings['classifier'],
+        'kept': kept,
+    }
+
+
+def main(argv=None):
+    """命令行入口"""
+    import argparse
+    parser = argparse.ArgumentParser(description='表格解析进程池基准测试')
+    parser.add_argument('--pages', type=int, default=40, help='生成的模拟页面数（默认 40）')
+    parser.add_argument('--rows', type=int, default=100, help='每页行数（默认 100）')
+    parser.add_argument('--corpus', default=None, help='保存的真实页面目录（.html），指定后不生成模拟页面')
+    parser.add_argument('--workers', default=None, help='要测试的进程数，如 1,2,4,8')
+    parser.add_argument('--classifier', action='store_true', help='改为运行行分类器的基准测试')
+    parser.add_argument('--columns', type=int, default=20, help='行分类基准测试的列数（默认 20）')
+    args = parser.parse_args(argv)
+
+    if args.classifier:
+        result = run_row_benchmark(args.pages * 10, args.columns)
+        print(f"\n行分类基准测试（{result['rows']} 行 x {result['columns']} 列）")
+        print("-" * 60)
+        print(f"逐行判断（旧）: {result['legacy_us']:.1f} 微秒/行")
+        print(f"RowClassifier : {result['classifier_us']:.1f} 微秒/行")
+        print(f"加速比        : {result['speedup']:.2f}，保留数据行 {result['kept']}")
+        print("-" * 60)
+        return result
+
+    corpus = load_corpus(args.corpus, args.pages, args.rows)
+    if not corpus:
+        print("语料为空")
+        return None
+    worker_counts = [int(n) for n in args.workers.split(',')] if args.workers else None
+    results = run_benchmark(corpus, worker_counts)
+    print_report(results, len(corpus))
+    return results
+
+
+if __name__ == '__main__':
+    main()
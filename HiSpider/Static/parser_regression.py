@@ -0,0 +1,325 @@
+"""
+解析回归与速度语料
+parser_corpus/ 中保存了几种结果页变体（有/无 thead、重复表头行、固定列副本、空行、各种链接），
+expected.json 记录每个页面上正确的数据行（每个页面一份，四个爬虫的解析器都与它比较）。
+已知某个解析器在某个页面上解析错误时记入 KNOWN_DIVERGENCES，作为预期失败单独列出，
+修好之后必须从中删除；其余任何差异都算回归。
+time_parsers 测量每个解析器在每个页面上的单行耗时和内存分配
+"""
+
+import gc
+import json
+import os
+import time
+import tracemalloc
+
+import crawl_log
+
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parser_corpus')
+EXPECTED_NAME = 'expected.json'
+FIXTURE_URL = "https://qiye.qizhidao.com/batch-query-result?matchId=corpus"
+
+# 新页面的期望行从该解析器的输出生成（目前它在全部语料上都正确），写入前需人工核对
+REFERENCE_PARSER = 'smart'
+
+# 只有部分爬虫写入的列，比较时忽略
+IGNORED_COLUMNS = ('页码',)
+
+# 已知的解析错误 (页面, 解析器) -> 原因：仍与期望不同时记为预期失败，变为一致时提示删除该项
+KNOWN_DIVERGENCES = {
+    ('fixed_columns', 'basic'): "el-table 的表头和表体分在两个 table 中，只取到表头行",
+    ('fixed_columns', 'advanced'): "el-table 的表头和表体分在两个 table 中，没有取到数据行",
+    ('no_thead', 'basic'): "没有 thead 时把 tbody 中的表头行当作数据",
+    ('no_thead', 'table'): "没有 thead 时把 tbody 中的表头行当作数据",
+    ('repeated_headers', 'basic'): "保留了表格中间重复的表头行",
+    ('repeated_headers', 'advanced'): "保留了表格中间重复的表头行",
+}
+
+
+def _prepare_basic(html):
+    from qizhidao_spider import QizhidaoSpider
+    from row_store import RowStore
+    spider = QizhidaoSpider(url=FIXTURE_URL)
+
+    def parse():
+        spider.companies_data = RowStore()
+        result = spider.parse_page(html)
+        return result['companies'].to_dicts() if result else []
+    return parse
+
+
+def _prepare_advanced(html):
+    from qizhidao_advanced_spider import QizhidaoAdvancedSpider
+    from row_store import RowStore
+    spider = QizhidaoAdvancedSpider(url=FIXTURE_URL)
+
+    def parse():
+        spider.companies_data = RowStore()
+        result = spider.parse_page(html)
+        return result['companies'].to_dicts() if result else []
+    return parse
+
+
+def _prepare_table(html):
+    from qizhidao_table_spider import QizhidaoTableSpider
+    spider = QizhidaoTableSpider(url=FIXTURE_URL, page_size=None)
+
+    def parse():
+        result = spider.parse_page(html)
+        return result['page_data'] if result else []
+    return parse
+
+
+def _prepare_smart(html):
+    # 智能爬虫解析的是浏览器中抓取的快照：用回放驱动在页面上执行抓取脚本，只测量快照之后的解析
+    from crawl_replay import ReplayDriver
+    from qizhidao_smart_spider import QizhidaoSmartSpider
+    spider = QizhidaoSmartSpider(url=FIXTURE_URL)
+    spider.driver = ReplayDriver(pages={1: html}, url=FIXTURE_URL)
+    spider.driver.get(FIXTURE_URL)
+    snapshot = spider.capture_table_snapshot()
+    spider.driver = None
+
+    def parse():
+        return spider.parse_table_snapshot(snapshot)
+    return parse
+
+
+# 解析器名称 -> prepare(html)，返回不带参数的解析函数（准备工作不计入耗时）
+PARSERS = {
+    'basic': _prepare_basic,
+    'advanced': _prepare_advanced,
+    'table': _prepare_table,
+    'smart': _prepare_smart,
+}
+
+
+def load_fixtures(corpus_dir=CORPUS_DIR):
+    """
+    读取语料目录中的页面
+
+    Returns:
+        list: [(页面名, HTML), ...]，按名称排序
+    """
+    fixtures = []
+    for name in sorted(os.listdir(corpus_dir)):
+        if name.endswith(('.html', '.htm')):
+            with open(os.path.join(corpus_dir, name), 'r', encoding='utf-8') as f:
+                fixtures.append((os.path.splitext(name)[0], f.read()))
+    return fixtures
+
+
+def load_expected(corpus_dir=CORPUS_DIR):
+    """读取期望行 {页面名: 行列表}，还没有时返回空字典"""
+    path = os.path.join(corpus_dir, EXPECTED_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_expected(expected, corpus_dir):
+    # 每行数据占一行，期望行变化时 git diff 只显示改变的行
+    lines = ['{']
+    fixtures = sorted(expected)
+    for i, fixture in enumerate(fixtures):
+        rows = [json.dumps(row, ensure_ascii=False, sort_keys=True) for row in expected[fixture]]
+        body = ('[\n' + ',\n'.join(f'  {row}' for row in rows) + '\n ]') if rows else '[]'
+        lines.append(f' {json.dumps(fixture, ensure_ascii=False)}: {body}' + (',' if i < len(fixtures) - 1 else ''))
+    lines.append('}')
+    with open(os.path.join(corpus_dir, EXPECTED_NAME), 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def _quiet(func):
+    """运行解析函数并丢弃其中的调试输出"""
+    with crawl_log.quiet():
+        return func()
+
+
+def _normalize(rows):
+    # 与JSON往返后的期望行比较（元组变列表、键统一为字符串），去掉只有部分爬虫写入的列
+    rows = json.loads(json.dumps(list(rows), ensure_ascii=False))
+    return [{key: value for key, value in row.items() if key not in IGNORED_COLUMNS} for row in rows]
+
+
+def describe_diff(expected, actual):
+    """两组行之间第一处差异的简短说明，相同时返回空字符串"""
+    if expected == actual:
+        return ''
+    if len(expected) != len(actual):
+        return f"行数 {len(expected)} -> {len(actual)}"
+    for index, (old, new) in enumerate(zip(expected, actual)):
+        if old != new:
+            keys = sorted(set(old) | set(new), key=str)
+            changed = [key for key in keys if old.get(key) != new.get(key)]
+            key = changed[0]
+            return f"第 {index + 1} 行的 {key}: {old.get(key)!r} -> {new.get(key)!r}（共 {len(changed)} 列不同）"
+    return '顺序不同'
+
+
+def run_parsers(fixtures, parsers=None):
+    """
+    在每个页面上运行各解析器
+
+    Returns:
+        dict: {页面名: {解析器: 行列表}}
+    """
+    names = parsers or list(PARSERS)
+    outputs = {}
+    for fixture, html in fixtures:
+        outputs[fixture] = {name: _normalize(_quiet(lambda: PARSERS[name](html)())) for name in names}
+    return outputs
+
+
+def check_corpus(corpus_dir=CORPUS_DIR, parsers=None, update=False, outputs=None):
+    """
+    把各解析器的当前输出与页面的期望行比较
+
+    Args:
+        corpus_dir: 语料目录
+        parsers: 要检查的解析器名称列表，默认全部
+        update: 为还没有期望行的页面写入 REFERENCE_PARSER 的输出（已有的期望行只能手工修改）
+        outputs: 已经运行过的 run_parsers 结果，默认重新运行
+
+    Returns:
+        list: 每个 (页面, 解析器) 一项 {'fixture', 'parser', 'rows', 'status', 'diff'}，status 为
+              'ok'（一致）、'changed'（与期望不同）、'known'（KNOWN_DIVERGENCES 中的已知错误）、
+              'fixed'（已知错误已经修好，应从 KNOWN_DIVERGENCES 中删除）或 'new'（页面还没有期望行）
+    """
+    expected = load_expected(corpus_dir)
+    if outputs is None:
+        names = parsers or list(PARSERS)
+        if update and REFERENCE_PARSER not in names:
+            names = names + [REFERENCE_PARSER]
+        outputs = run_parsers(load_fixtures(corpus_dir), names)
+    if update:
+        added = {fixture: by_parser[REFERENCE_PARSER] for fixture, by_parser in outputs.items()
+                 if fixture not in expected and REFERENCE_PARSER in by_parser}
+        if added:
+            expected.update(added)
+            _save_expected(expected, corpus_dir)
+    results = []
+    for fixture, by_parser in outputs.items():
+        for parser, rows in by_parser.items():
+            if parsers and parser not in parsers:
+                continue
+            if fixture not in expected:
+                status, diff = 'new', ''
+            else:
+                diff = describe_diff(expected[fixture], rows)
+                if (fixture, parser) in KNOWN_DIVERGENCES:
+                    status = 'known' if diff else 'fixed'
+                else:
+                    status = 'changed' if diff else 'ok'
+            results.append({'fixture': fixture, 'parser': parser, 'rows': len(rows),
+                            'status': status, 'diff': diff})
+    return results
+
+
+def failed(checks):
+    """回归检查中需要处理的项：与期望不同，或已知错误已修好但还留在 KNOWN_DIVERGENCES 中"""
+    return [item for item in checks if item['status'] in ('changed', 'fixed')]
+
+
+def time_parsers(corpus_dir=CORPUS_DIR, parsers=None, repeat=5):
+    """
+    测量各解析器在每个页面上的耗时和内存分配
+
+    Args:
+        repeat: 计时重复次数（取最好成绩）
+
+    Returns:
+        list: 每个 (页面, 解析器) 一项 {'fixture', 'parser', 'rows', 'us_per_row', 'peak_bytes_per_row', 'blocks_per_row'}
+              （peak 为一次解析中分配内存的峰值，blocks 为解析结束后新增的存活内存块数）
+    """
+    names = parsers or list(PARSERS)
+    results = []
+    for fixture, html in load_fixtures(corpus_dir):
+        for name in names:
+            parse = _quiet(lambda: PARSERS[name](html))
+            rows = len(_quiet(parse))  # 预热：抽取计划、表头缓存等在第一次解析时建立
+            best = None
+            with crawl_log.quiet():
+                for _ in range(max(1, repeat)):
+                    start = time.perf_counter()
+                    parse()
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+
+                # 内存分配单独测量（tracemalloc 会拖慢解析，不与计时混在一起）。
+                # 峰值和留存块分两次解析测量：每次 start 都从零开始统计峰值，
+                # 快照本身的分配不会计入峰值（reset_peak 需要 Python 3.9）
+                tracemalloc.start()
+                baseline = tracemalloc.get_traced_memory()[0]
+                parse()
+                peak = tracemalloc.get_traced_memory()[1] - baseline
+                tracemalloc.stop()
+
+                tracemalloc.start()
+                before = tracemalloc.take_snapshot()
+                result = parse()
+                gc.collect()  # 解析树有循环引用，回收后剩下的才是真正留存的分配
+                after = tracemalloc.take_snapshot()
+                tracemalloc.stop()
+            blocks = sum(stat.count_diff for stat in after.compare_to(before, 'filename'))
+            del result
+            per_row = max(rows, 1)
+            results.append({'fixture': fixture, 'parser': name, 'rows': rows,
+                            'us_per_row': best / per_row * 1e6,
+                            'peak_bytes_per_row': peak / per_row,
+                            'blocks_per_row': blocks / per_row})
+    return results
+
+
+def print_report(checks, timings=None):
+    """打印回归检查结果（与期望行比较，忽略页码列）和速度"""
+    print("\n解析回归检查")
+    print("-" * 72)
+    labels = {'ok': '一致', 'changed': '与期望不同', 'known': '已知错误', 'fixed': '已知错误已修好，请从 KNOWN_DIVERGENCES 删除',
+              'new': '没有期望行'}
+    for item in checks:
+        line = f"{item['fixture']:<20}{item['parser']:<10}{item['rows']:>6} 行  {labels[item['status']]}"
+        if item['diff']:
+            line += f"  {item['diff']}"
+        if item['status'] == 'known':
+            line += f"（{KNOWN_DIVERGENCES[(item['fixture'], item['parser'])]}）"
+        print(line)
+    if timings:
+        print("\n解析速度")
+        print("-" * 72)
+        print(f"{'页面':<20}{'解析器':<10}{'行数':>6}{'微秒/行':>12}{'峰值字节/行':>14}{'新增块/行':>12}")
+        for item in timings:
+            print(f"{item['fixture']:<20}{item['parser']:<10}{item['rows']:>6}{item['us_per_row']:>12.1f}"
+                  f"{item['peak_bytes_per_row']:>14.0f}{item['blocks_per_row']:>12.1f}")
+    print("-" * 72)
+
+
+def main(argv=None):
+    """命令行入口，有解析器与期望行不同（已知错误除外）或已知错误已修好时返回1"""
+    import argparse
+    parser = argparse.ArgumentParser(description='解析回归与速度语料')
+    parser.add_argument('--corpus', default=CORPUS_DIR, help='语料目录（默认 parser_corpus）')
+    parser.add_argument('--parsers', default=None, help='要运行的解析器，如 table,smart（默认全部）')
+    parser.add_argument('--update', action='store_true',
+                        help=f'为新页面写入 {REFERENCE_PARSER} 解析器的输出作为期望行（写入后需人工核对）')
+    parser.add_argument('--repeat', type=int, default=5, help='计时重复次数（默认 5）')
+    parser.add_argument('--no-timing', action='store_true', help='只做回归检查，不计时')
+    args = parser.parse_args(argv)
+
+    names = args.parsers.split(',') if args.parsers else None
+    unknown = [name for name in names or () if name not in PARSERS]
+    if unknown:
+        parser.error(f"未知的解析器: {', '.join(unknown)}（可选: {', '.join(PARSERS)}）")
+
+    checks = check_corpus(args.corpus, names, update=args.update)
+    timings = None if args.no_timing else time_parsers(args.corpus, names, args.repeat)
+    print_report(checks, timings)
+    if args.update:
+        print(f"新页面的期望行已写入: {os.path.join(args.corpus, EXPECTED_NAME)}")
+    return 1 if failed(checks) else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
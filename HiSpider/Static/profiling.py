@@ -0,0 +1,280 @@
+"""
+性能剖析钩子
+在命令行打开后把一次运行包在CPU剖析器中（cProfile 或可选的 pyinstrument），同时用采样线程记录所有线程的调用栈，
+输出 pstats 文件和火焰图工具可直接读取的折叠栈文件（flamegraph.pl、speedscope 等）；
+内存方面每爬取N页做一次 tracemalloc 快照，输出与上一次快照相比增长最多的分配位置，结束时再与第一次快照比较，用于发现泄漏。
+每次运行的结果写入单独的目录，不需要修改代码就能在正式运行中定位热点和内存增长
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from crawl_log import get_logger
+
+log = get_logger('profiling')
+
+
+DEFAULT_PROFILE_ROOT = 'profiles'
+DEFAULT_MEMORY_EVERY = 10
+CPU_PROFILERS = ('cprofile', 'pyinstrument')
+
+_IGNORED_FILES = ('<frozen importlib', '<unknown>', os.path.join(os.path.dirname(os.__file__), 'tracemalloc.py'))
+
+_active = None
+
+
+def active_session():
+    """当前正在运行的剖析会话，没有时返回None"""
+    return _active
+
+
+def page_done(page):
+    """爬虫每保存一页调用一次（没有剖析会话时什么也不做）"""
+    session = _active
+    if session is not None:
+        session.page_done(page)
+
+
+class StackSampler(threading.Thread):
+    """
+    定时采样所有线程的调用栈，按折叠栈格式（"线程;模块:函数;... 次数"）统计
+
+    采样的是挂钟时间：等待网络、锁和浏览器的线程也会出现在结果里，便于看出时间花在等待还是计算上
+    """
+
+    def __init__(self, interval=0.005):
+        super().__init__(name='stack-sampler', daemon=True)
+        self.interval = interval
+        self.counts = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop_event.wait(self.interval):
+            if self.samples % 200 == 0:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.counts[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(timeout=5)
+
+    def write(self, path):
+        """写出折叠栈文件，返回行数"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+        return len(self.counts)
+
+
+class ProfileSession:
+    """
+    一次运行的剖析会话
+
+    用法::
+
+        with ProfileSession(cpu='cprofile', memory_every=10) as session:
+            spider.run()          # 爬虫每保存一页调用 profiling.page_done(page)
+        print(session.output_dir)
+    """
+
+    def __init__(self, cpu=None, memory_every=0, output_dir=None, label='run', top=25,
+                 sample_interval=0.005, trace_frames=1):
+        """
+        Args:
+            cpu: CPU剖析器，'cprofile'、'pyinstrument' 或 None（不做CPU剖析）
+            memory_every: 每爬取多少页做一次内存快照，0表示不跟踪内存
+            output_dir: 结果目录，默认 profiles/<时间>-<label>
+            label: 结果目录名中的运行标签
+            top: 内存快照报告中列出的分配位置数
+            sample_interval: 调用栈采样间隔（秒）
+            trace_frames: tracemalloc 为每次分配保存的栈帧数（越多越慢）
+        """
+        if cpu not in (None,) + CPU_PROFILERS:
+            raise ValueError(f"未知的CPU剖析器: {cpu}（可选: {', '.join(CPU_PROFILERS)}）")
+        self.cpu = cpu
+        self.memory_every = max(0, int(memory_every or 0))
+        label = re.sub(r'[^\w.-]+', '_', label) or 'run'
+        self.output_dir = output_dir or os.path.join(DEFAULT_PROFILE_ROOT,
+                                                     f"{time.strftime('%Y%m%d-%H%M%S')}-{label}")
+        self.top = top
+        self.sample_interval = sample_interval
+        self.trace_frames = trace_frames
+        self.stats = {'pages': 0, 'snapshots': 0, 'samples': 0, 'seconds': 0.0}
+        self._profiler = None
+        self._sampler = None
+        self._first_snapshot = None
+        self._last_snapshot = None
+        self._timeline = []
+        self._lock = threading.Lock()
+        self._started = None
+
+    # ---- 开始与结束 ----
+
+    def start(self):
+        global _active
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._started = time.perf_counter()
+        if self.memory_every:
+            import tracemalloc
+            tracemalloc.start(self.trace_frames)
+            self._first_snapshot = self._last_snapshot = self._take_snapshot()
+        if self.cpu == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+                self._profiler = Profiler(async_mode='disabled')
+            except ImportError:
+                log.warning("[剖析] 未安装 pyinstrument（pip install pyinstrument），改用 cProfile")
+                self.cpu = 'cprofile'
+        if self.cpu == 'cprofile':
+            import cProfile
+            self._profiler = cProfile.Profile()
+        if self.cpu:
+            self._sampler = StackSampler(self.sample_interval)
+            self._sampler.start()
+            if self.cpu == 'pyinstrument':
+                self._profiler.start()
+            else:
+                self._profiler.enable()
+        _active = self
+        log.info("[剖析] 结果目录: %s（CPU: %s，内存快照: %s）", self.output_dir, self.cpu or '关',
+                 f'每 {self.memory_every} 页' if self.memory_every else '关')
+        return self
+
+    def stop(self):
+        """停止剖析并写出所有结果文件，返回结果目录"""
+        global _active
+        if _active is self:
+            _active = None
+        if self._started is None:
+            return self.output_dir
+        self.stats['seconds'] = time.perf_counter() - self._started
+        if self.cpu:
+            self._write_cpu()
+        if self.memory_every:
+            self._write_memory_final()
+        self._started = None
+        with open(os.path.join(self.output_dir, 'session.json'), 'w', encoding='utf-8') as f:
+            json.dump({'argv': sys.argv, 'cpu': self.cpu, 'memory_every': self.memory_every,
+                       'stats': self.stats}, f, ensure_ascii=False, indent=2)
+        log.info("[剖析] 运行 %.1f 秒，%s 页，结果已写入 %s",
+                 self.stats['seconds'], self.stats['pages'], self.output_dir)
+        return self.output_dir
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    # ---- CPU ----
+
+    def _write_cpu(self):
+        if self.cpu == 'pyinstrument':
+            self._profiler.stop()
+            with open(os.path.join(self.output_dir, 'cpu.html'), 'w', encoding='utf-8') as f:
+                f.write(self._profiler.output_html())
+            with open(os.path.join(self.output_dir, 'cpu.txt'), 'w', encoding='utf-8') as f:
+                f.write(self._profiler.output_text(unicode=True))
+        else:
+            import pstats
+            self._profiler.disable()
+            path = os.path.join(self.output_dir, 'cpu.pstats')
+            self._profiler.dump_stats(path)
+            # 按累计耗时排序的文字摘要（cProfile 只剖析主线程，其他线程见折叠栈文件）
+            with open(os.path.join(self.output_dir, 'cpu.txt'), 'w', encoding='utf-8') as f:
+                pstats.Stats(path, stream=f).sort_stats('cumulative').print_stats(60)
+        self._sampler.stop()
+        self.stats['samples'] = self._sampler.samples
+        self._sampler.write(os.path.join(self.output_dir, 'cpu.collapsed'))
+
+    # ---- 内存 ----
+
+    def _take_snapshot(self):
+        import tracemalloc
+        return tracemalloc.take_snapshot()
+
+    def page_done(self, page):
+        """一页已保存：每 memory_every 页做一次内存快照"""
+        with self._lock:
+            self.stats['pages'] += 1
+            if not self.memory_every or self.stats['pages'] % self.memory_every:
+                return
+            snapshot = self._take_snapshot()
+            self._write_diff(snapshot, self._last_snapshot, f"memory_page{page:04d}.txt",
+                             f"第 {page} 页（已保存 {self.stats['pages']} 页）与上一次快照相比")
+            self._last_snapshot = snapshot
+            self.stats['snapshots'] += 1
+
+    def _write_diff(self, snapshot, baseline, name, title):
+        import tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        self._timeline.append({'pages': self.stats['pages'], 'seconds': time.perf_counter() - self._started,
+                               'current_kb': current / 1024, 'peak_kb': peak / 1024})
+        key = 'traceback' if self.trace_frames > 1 else 'lineno'
+        # 比较之后再去掉导入机制和 tracemalloc 自身的分配（逐条过滤快照要慢得多）
+        diffs = [stat for stat in snapshot.compare_to(baseline, key)
+                 if not stat.traceback[0].filename.startswith(_IGNORED_FILES)]
+        with open(os.path.join(self.output_dir, name), 'w', encoding='utf-8') as f:
+            f.write(f"{title}\n当前已分配 {current / 1024 / 1024:.1f} MB，峰值 {peak / 1024 / 1024:.1f} MB\n\n")
+            f.write(f"增长最多的 {self.top} 个分配位置:\n")
+            for stat in diffs[:self.top]:
+                f.write(f"{stat.size_diff / 1024:+10.1f} KB {stat.count_diff:+8d} 块  {stat.traceback}\n")
+                if self.trace_frames > 1:
+                    for line in stat.traceback.format()[:-1]:
+                        f.write(f"        {line}\n")
+        with open(os.path.join(self.output_dir, 'memory_timeline.json'), 'w', encoding='utf-8') as f:
+            json.dump(self._timeline, f, indent=1)
+
+    def _write_memory_final(self):
+        import tracemalloc
+        snapshot = self._take_snapshot()
+        self._write_diff(snapshot, self._first_snapshot, 'memory_final.txt',
+                         f"运行结束（已保存 {self.stats['pages']} 页）与开始时相比")
+        tracemalloc.stop()
+        self._first_snapshot = self._last_snapshot = None
+
+
+def parse_profile_args(argv):
+    """
+    从命令行参数中取出剖析选项（可以出现在任意位置），其余参数原样返回
+
+    --profile[=cprofile|pyinstrument]   CPU剖析
+    --trace-memory[=N]                  每N页做一次内存快照（默认 10）
+    --profile-dir 目录                  结果目录（默认 profiles/<时间>-<命令>）
+
+    Returns:
+        tuple: (ProfileSession 的参数字典，没有剖析选项时为None, 剩余参数列表)
+    """
+    options = {}
+    rest = []
+    args = iter(argv)
+    for arg in args:
+        if arg == '--profile' or arg.startswith('--profile='):
+            options['cpu'] = arg.split('=', 1)[1].lower() if '=' in arg else 'cprofile'
+        elif arg == '--trace-memory' or arg.startswith('--trace-memory='):
+            options['memory_every'] = int(arg.split('=', 1)[1]) if '=' in arg else DEFAULT_MEMORY_EVERY
+        elif arg == '--profile-dir' or arg.startswith('--profile-dir='):
+            options['output_dir'] = arg.split('=', 1)[1] if '=' in arg else next(args, None)
+        else:
+            rest.append(arg)
+    if not options.get('cpu') and not options.get('memory_every'):
+        return None, rest
+    return options, rest
@@ -5,38 +5,60 @@
 
 import requests
 from bs4 import BeautifulSoup
-import json
-import pandas as pd
+import os
 from datetime import datetime
 import time
-import random
 import re
-from fake_useragent import UserAgent
+from user_agents import UserAgentPool
+from row_store import RowStore
+from extraction_schema import ExtractionPlanner
+from rate_limiter import get_host_limiter
+from retry_policy import RetryPolicy, RetryBudget, CircuitOpenError, get_host_breaker
+from crawl_log import get_logger
+
+log = get_logger('advanced_spider')
 
 
 class QizhidaoAdvancedSpider:
     """企知道网站高级爬虫"""
     
-    def __init__(self, url=None, max_retries=3, delay_range=(1, 3)):
+    def __init__(self, url=None, max_retries=3, delay_range=(1, 3), rate_limiter=None,
+                 retry_policy=None, enrich=None):
         """
         初始化爬虫
         
         Args:
             url: 目标URL
             max_retries: 最大重试次数
-            delay_range: 延迟时间范围（秒）
+            delay_range: 延迟时间范围（秒），用于确定限速器的初始速率
+            rate_limiter: 自适应限速器，默认使用该主机共享的限速器
+            retry_policy: 重试策略，默认使用抖动退避 + 本次运行的重试预算 + 主机熔断器
+            enrich: 详情页补全；True 使用默认字段，也可以是字段名列表或 DetailEnricher，None表示不补全
         """
         self.url = url or "https://qiye.qizhidao.com/batch-query-home"
         self.max_retries = max_retries
         self.delay_range = delay_range
+        self.enrich = enrich
         self.session = requests.Session()
-        self.ua = UserAgent()
-        self.companies_data = []
+        self.ua = UserAgentPool()  # 内置的离线User-Agent池
+        self.companies_data = RowStore()  # 紧凑行存储，导出时才还原为字典
+        self.planner = ExtractionPlanner()  # 表头 -> 抽取计划（同一表头只编译一次）
+        # 初始速率取延迟范围的平均值，之后根据服务器反馈自适应调整
+        mean_delay = sum(delay_range) / 2.0
+        self.rate_limiter = rate_limiter or get_host_limiter(
+            self.url, initial_rate=1.0 / mean_delay if mean_delay > 0 else 1.0, jitter=0.3
+        )
+        self.retry_policy = retry_policy or RetryPolicy(
+            max_retries=max_retries,
+            base_delay=1.0,
+            budget=RetryBudget(max_retries * 5),
+            breaker=get_host_breaker(self.url),
+        )
         
     def get_random_headers(self):
-        """获取随机请求头"""
-        return {
-            'User-Agent': self.ua.random,
+        """获取随机请求头（User-Agent与Sec-CH-UA来自同一个浏览器身份）"""
+        headers = self.ua.choice().headers()
+        headers.update({
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'zh-CN,zh;q=0.9,en-US;q=0.8,en;q=0.7',
             'Accept-Encoding': 'gzip, deflate, br',
@@ -47,63 +69,68 @@ class QizhidaoAdvancedSpider:
             'Sec-Fetch-Site': 'none',
             'Cache-Control': 'max-age=0',
             'Referer': 'https://qiye.qizhidao.com/'
-        }
+        })
+        return headers
     
     def random_delay(self):
-        """随机延迟"""
-        delay = random.uniform(*self.delay_range)
-        time.sleep(delay)
+        """按限速器的当前速率等待（带少量随机抖动）"""
+        self.rate_limiter.acquire()
     
-    def fetch_page(self, retry_count=0):
-        """获取页面内容（带重试机制）"""
+    def _fetch_once(self):
+        """发出一次请求，失败时抛出 requests 异常"""
+        headers = self.get_random_headers()
+        
+        # 按限速器节奏等待
+        self.random_delay()
+        
+        start = time.time()
         try:
-            headers = self.get_random_headers()
-            
-            # 随机延迟
-            self.random_delay()
-            
             response = self.session.get(
                 self.url, 
                 headers=headers, 
                 timeout=30,
                 allow_redirects=True
             )
-            
-            response.raise_for_status()
-            
-            # 检测是否包含验证码或人机校验
-            if self.detect_captcha(response.text):
-                print("警告: 检测到验证码或人机校验，可能需要手动处理")
-            
-            response.encoding = 'utf-8'
-            return response.text
-            
-        except requests.exceptions.Timeout:
-            if retry_count < self.max_retries:
-                print(f"请求超时，正在重试 ({retry_count + 1}/{self.max_retries})...")
-                time.sleep(2 ** retry_count)  # 指数退避
-                return self.fetch_page(retry_count + 1)
+        except requests.RequestException:
+            # 超时或连接错误：让限速器降速后交给重试策略
+            self.rate_limiter.record_failure()
+            raise
+        
+        # 检测是否包含验证码或人机校验，并把结果反馈给限速器
+        has_captcha = response.ok and self.detect_captcha(response.text)
+        self.rate_limiter.on_response(response.status_code, time.time() - start,
+                                      response.headers, captcha=has_captcha)
+        
+        response.raise_for_status()
+        
+        if has_captcha:
+            log.warning("检测到验证码或人机校验，可能需要手动处理")
+        
+        response.encoding = 'utf-8'
+        return response.text
+    
+    def fetch_page(self):
+        """获取页面内容（带重试机制：抖动退避、重试预算、主机熔断）"""
+        def on_retry(attempt, error, delay):
+            if isinstance(error, requests.exceptions.Timeout):
+                reason = "请求超时"
+            elif isinstance(error, requests.exceptions.HTTPError):
+                reason = f"HTTP错误 {error.response.status_code}"
             else:
-                print("请求超时，已达到最大重试次数")
-                return None
-                
+                reason = f"请求失败: {error}"
+            log.warning("%s，%.1f秒后重试 (%s/%s)...", reason, delay, attempt, self.max_retries)
+        
+        try:
+            return self.retry_policy.run(self._fetch_once, on_retry=on_retry)
+        except CircuitOpenError as e:
+            log.error("目标主机连续失败，暂停请求: %s", e)
+        except requests.exceptions.Timeout:
+            log.error("请求超时，已达到最大重试次数")
         except requests.exceptions.HTTPError as e:
-            if retry_count < self.max_retries and e.response.status_code in [429, 503, 502]:
-                print(f"HTTP错误 {e.response.status_code}，正在重试 ({retry_count + 1}/{self.max_retries})...")
-                time.sleep(2 ** retry_count)
-                return self.fetch_page(retry_count + 1)
-            else:
-                print(f"HTTP错误: {e}")
-                return None
-                
+            log.error("HTTP错误: %s", e)
         except requests.RequestException as e:
-            if retry_count < self.max_retries:
-                print(f"请求失败: {e}，正在重试 ({retry_count + 1}/{self.max_retries})...")
-                time.sleep(2 ** retry_count)
-                return self.fetch_page(retry_count + 1)
-            else:
-                print(f"获取页面失败: {e}")
-                return None
+            log.error("获取页面失败: %s", e)
+        return None
     
     def detect_captcha(self, html_content):
         """检测页面中是否包含验证码"""
@@ -148,7 +175,7 @@ class QizhidaoAdvancedSpider:
             table = soup.find('table', class_=re.compile(r'table|data|list|result', re.I))
         
         if not table:
-            print("未找到企业信息表格，尝试其他解析方式...")
+            log.warning("未找到企业信息表格，尝试其他解析方式...")
             # 尝试从列表或其他结构中提取
             return self.parse_alternative_structure(soup)
         
@@ -178,6 +205,9 @@ class QizhidaoAdvancedSpider:
         
         rows = tbody.find_all('tr')
         
+        # 按表头编译抽取计划（没有表头时使用模式中的默认列顺序）
+        plan = self.planner.plan_for(headers)
+        
         for idx, row in enumerate(rows):
             # 跳过表头行
             if idx == 0 and headers and len(headers) > 0:
@@ -189,46 +219,7 @@ class QizhidaoAdvancedSpider:
             if len(cells) < 2:  # 跳过空行
                 continue
             
-            company_data = {}
-            
-            # 如果已有表头，按表头提取数据
-            if headers:
-                for i, cell in enumerate(cells):
-                    if i < len(headers):
-                        value = cell.get_text(strip=True)
-                        if value:  # 只保存非空值
-                            company_data[headers[i]] = value
-                        
-                        # 提取链接
-                        link = cell.find('a')
-                        if link:
-                            href = link.get('href')
-                            if href:
-                                # 处理相对URL
-                                if href.startswith('/'):
-                                    href = f"https://qiye.qizhidao.com{href}"
-                                elif not href.startswith('http'):
-                                    href = f"https://qiye.qizhidao.com/{href}"
-                                company_data[f"{headers[i]}_链接"] = href
-            else:
-                # 如果没有表头，使用默认字段名
-                default_headers = ['序号', '企业名称', '登记状态', '统一社会信用代码', 
-                                 '法定代表人', '成立日期', '注册资本', '实缴资本']
-                for i, cell in enumerate(cells):
-                    if i < len(default_headers):
-                        value = cell.get_text(strip=True)
-                        if value:
-                            company_data[default_headers[i]] = value
-                        
-                        link = cell.find('a')
-                        if link and link.get('href'):
-                            href = link.get('href')
-                            if href.startswith('/'):
-                                href = f"https://qiye.qizhidao.com{href}"
-                            elif not href.startswith('http'):
-                                href = f"https://qiye.qizhidao.com/{href}"
-                            company_data[f"{default_headers[i]}_链接"] = href
-            
+            company_data = plan.extract(self.planner.cells(row))
             if company_data:
                 self.companies_data.append(company_data)
         
@@ -260,13 +251,21 @@ class QizhidaoAdvancedSpider:
     
     def parse_alternative_structure(self, soup):
         """尝试从非表格结构中提取数据"""
-        print("尝试从列表或其他结构中提取数据...")
+        log.info("尝试从列表或其他结构中提取数据...")
         # 这里可以根据实际页面结构实现其他解析方式
         # 例如从div列表、JSON数据等提取
         return None
     
-    def save_to_json(self, data, filename=None):
-        """保存数据到JSON文件"""
+    def save_to_json(self, data, filename=None, pretty=False, compression=None):
+        """
+        保存数据到JSON文件
+        
+        Args:
+            data: 爬取结果
+            filename: 文件名，默认 qizhidao_data_时间戳.json
+            pretty: 是否缩进输出（默认紧凑格式）
+            compression: 'gzip' 或 'zstd' 时边写边压缩（文件名自动加上 .gz / .zst）
+        """
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"qizhidao_data_{timestamp}.json"
@@ -278,72 +277,92 @@ class QizhidaoAdvancedSpider:
                 'url': self.url,
                 'crawl_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             },
-            'companies': data.get('companies', []),
+            'companies': data.get('companies') or [],
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=2)
+        # 企业数据按块编码后逐块写出（有 orjson 时使用 orjson）
+        from json_writer import write_json
+        filename = write_json(filename, output_data, pretty=pretty, compression=compression)
         
-        print(f"数据已保存到: {filename}")
+        log.info("数据已保存到: %s", filename)
         return filename
     
     def save_to_excel(self, data, filename=None):
-        """保存数据到Excel文件"""
+        """保存数据到Excel文件，返回生成的文件列表（超过每个文件的行数上限时不止一个）"""
         if not data.get('companies'):
-            print("没有数据可保存")
-            return None
+            log.info("没有数据可保存")
+            return []
         
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"qizhidao_data_{timestamp}.xlsx"
         
-        df = pd.DataFrame(data['companies'])
-        df.to_excel(filename, index=False, engine='openpyxl')
+        # openpyxl只在导出Excel时才需要，延迟导入以加快启动
+        from excel_sink import write_excel
+        files = write_excel(filename, data['companies'])
         
-        print(f"数据已保存到: {filename}")
-        return filename
+        log.info("数据已保存到: %s", ', '.join(files))
+        return files
     
-    def run(self, save_json=True, save_excel=True):
-        """运行爬虫"""
-        print("=" * 50)
-        print("企知道网站高级爬虫 - 开始运行")
-        print("=" * 50)
-        print(f"目标URL: {self.url}")
-        print(f"最大重试次数: {self.max_retries}")
-        print(f"延迟范围: {self.delay_range}秒")
-        print()
+    def run(self, save_json=True, save_excel=True, output_dir=None, json_compression=None):
+        """
+        运行爬虫
+        
+        Args:
+            save_json: 是否保存JSON文件
+            save_excel: 是否保存Excel文件
+            output_dir: 输出目录，默认为当前目录（批量模式下每个任务一个目录）
+            json_compression: JSON文件的压缩方式（'gzip' 或 'zstd'），None表示不压缩
+        """
+        log.info('=' * 50)
+        log.info("企知道网站高级爬虫 - 开始运行")
+        log.info('=' * 50)
+        log.info("目标URL: %s", self.url)
+        log.info("最大重试次数: %s", self.max_retries)
+        log.info("延迟范围: %s秒", self.delay_range)
         
         # 获取页面
-        print("正在获取页面...")
+        log.info("正在获取页面...")
         html_content = self.fetch_page()
+        stats = self.retry_policy.stats
+        if stats['retries'] or stats['circuit_rejections']:
+            log.info("重试统计: 重试 %s 次，退避 %.1f 秒，熔断拒绝 %s 次",
+                     stats['retries'], stats['retry_sleep_seconds'], stats['circuit_rejections'])
         if not html_content:
-            print("无法获取页面内容")
+            log.error("无法获取页面内容")
             return None
         
         # 解析页面
-        print("正在解析页面...")
+        log.info("正在解析页面...")
         data = self.parse_page(html_content)
         if not data:
-            print("页面解析失败")
+            log.error("页面解析失败")
             return None
         
-        print(f"成功提取 {len(data['companies'])} 条企业信息")
-        print(f"页面显示总数: {data['total_results']} 条")
+        log.info("成功提取 %s 条企业信息", len(data['companies']))
+        log.info("页面显示总数: %s 条", data['total_results'])
+        
+        if self.enrich:
+            from detail_enricher import enrich_rows
+            log.info("正在补全详情页...")
+            self.companies_data = RowStore(enrich_rows(self.enrich, data['companies'], rate_limiter=self.rate_limiter,
+                                                       headers=self.get_random_headers()))
+            data['companies'] = self.companies_data
         
         # 保存数据
         files = []
+        from batch_runner import output_file_names
+        json_file_name, excel_file_name = output_file_names(output_dir)
         if save_json:
-            print("\n正在保存JSON文件...")
-            json_file = self.save_to_json(data)
+            log.info("正在保存JSON文件...")
+            json_file = self.save_to_json(data, json_file_name, compression=json_compression)
             if json_file:
                 files.append(json_file)
         
         if save_excel:
-            print("正在保存Excel文件...")
-            excel_file = self.save_to_excel(data)
-            if excel_file:
-                files.append(excel_file)
+            log.info("正在保存Excel文件...")
+            files.extend(self.save_to_excel(data, excel_file_name))
         
         return {
             'data': data,
@@ -357,13 +376,13 @@ def main():
     result = spider.run()
     
     if result:
-        print("\n" + "=" * 50)
-        print("爬取完成！")
-        print("=" * 50)
-        print(f"提取了 {len(result['data']['companies'])} 条企业信息")
-        print(f"生成文件: {', '.join(result['files'])}")
+        log.info('=' * 50)
+        log.info("爬取完成！")
+        log.info('=' * 50)
+        log.info("提取了 %s 条企业信息", len(result['data']['companies']))
+        log.info("生成文件: %s", ', '.join(result['files']))
     else:
-        print("\n爬取失败，请检查网络连接和URL是否正确")
+        log.error("爬取失败，请检查网络连接和URL是否正确")
 
 
 if __name__ == "__main__":
@@ -6,33 +6,61 @@
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from bs4 import BeautifulSoup
-import json
-import pandas as pd
 from datetime import datetime
 import time
 import random
 import re
 import os
+import logging
+from row_store import RowStore
+from rate_limiter import get_host_limiter
+from page_pipeline import PagePipeline
+from row_classifier import RowClassifier, LEADING_HEADER, DATA, HEADER, EMPTY
+import el_table
+from driver_watchdog import WatchedDriver, DriverHangError
+from extraction_schema import ExtractionPlanner, DEFAULT_HEADERS
+from profiling import page_done
+import crawl_log
+
+log = crawl_log.get_logger('smart_spider')
 
 
 class QizhidaoSmartSpider:
     """企知道网站智能爬虫（使用Selenium）"""
     
-    def __init__(self, url=None, headless=False, implicit_wait=10, interactive=False):
+    def __init__(self, url=None, headless=False, implicit_wait=0, interactive=False, rate_limiter=None,
+                 start_page=1, maximize_page_size=True, pipeline=False, pipeline_depth=2, enrich=None,
+                 tabs=1, debugger_address=None, call_timeout=30, max_restarts=3, driver_factory=None,
+                 record_dir=None, wait_scale=1.0):
         """
         初始化爬虫
         
         Args:
             url: 目标URL（可以是首页或结果页URL）
             headless: 是否使用无头模式
-            implicit_wait: 隐式等待时间（秒）
+            implicit_wait: 隐式等待时间（秒），默认0：找不到元素时立即返回，需要等待的地方使用有上限的显式等待
             interactive: 是否使用交互模式（等待用户准备好后开始）
+            rate_limiter: 自适应限速器，默认使用该主机共享的限速器
+            start_page: 起始页码（断点续爬时直接跳转到该页）
+            maximize_page_size: 爬取前是否把每页条数切换为最大的可选值（页数越少，翻页等待越少）
+            pipeline: 是否启用流水线模式（工作线程解析第N页的同时浏览器加载第N+1页）
+            pipeline_depth: 流水线中最多积压的页面快照数
+            enrich: 详情页补全；True 使用默认字段，也可以是字段名列表或 DetailEnricher，None表示不补全
+            tabs: 同一浏览器中并行翻页的标签页数（共享登录状态，每个标签页负责一段页码），1表示单标签页逐页爬取
+            debugger_address: 常驻Chrome的远程调试地址（如 127.0.0.1:9222），给出时连接到该浏览器而不是启动新浏览器，
+                              任务在新标签页中进行，结束时只关闭该标签页
+            call_timeout: 单次WebDriver调用的截止时间（秒），超时判定浏览器卡死
+            max_restarts: 浏览器卡死后最多重启并续爬的次数
+            driver_factory: 可选的 WebDriver 工厂函数（如回放录制页面的 crawl_replay.ReplayDriver），代替启动Chrome
+            record_dir: 录制目录，给出时把每页的DOM快照和分页状态保存下来，供 crawl_replay 离线回放
+            wait_scale: 翻页、滚动等固定等待时间的倍数（回放基准测试中设为0）
         """
         self.base_url = url or "https://qiye.qizhidao.com/batch-query-home"
         self.url = self.base_url
@@ -40,17 +68,53 @@ class QizhidaoSmartSpider:
         self.implicit_wait = implicit_wait
         self.interactive = interactive
         self.driver = None
-        self.companies_data = []
+        self.debugger_address = debugger_address
+        self._own_handles = None  # 连接常驻浏览器时，本任务打开的标签页
+        self.call_timeout = call_timeout
+        self.max_restarts = max_restarts
+        self._result_url = None  # 结果页URL（浏览器重启后从这里续爬）
+        self.driver_factory = driver_factory
+        self.record_dir = record_dir
+        self.recorder = None
+        self.wait_scale = wait_scale
+        self.companies_data = RowStore()  # 紧凑行存储，导出时才还原为字典
+        self.start_page = start_page
+        self.maximize_page_size = maximize_page_size
+        self.page_size = None  # 实际使用的每页条数，记录在输出元数据中
+        self.pipeline = pipeline
+        self.pipeline_depth = pipeline_depth
+        self.enrich = enrich
+        self.enricher = None
+        self.tabs = max(1, int(tabs or 1))
+        self._tab_requests = {}  # 多标签页模式：页码 -> (请求时间, 请求前表格第一行的文字)
         self.current_page = 1
         self.total_pages = None
         self.crawled_pages = set()  # 记录已爬取的页码，避免重复
+        # 已保存数据的去重索引（代替逐条扫描companies_data）
+        self._seen_names = set()  # 已保存的企业名称
+        self._seen_codes = set()  # 已保存的统一社会信用代码
+        self._seen_codes_without_name = set()  # 没有企业名称的行的信用代码
         # 缓存机制：减少重复查找
         self._pagination_cache = None  # 缓存分页元素
         self._table_cache = None  # 缓存表格元素
-        self._debug_mode = False  # 调试模式开关，默认关闭以提升速度
+        self._row_classifier = RowClassifier()  # 行分类器（整个爬取过程中缓存表头签名）
+        self._planner = ExtractionPlanner()  # 表头 -> 抽取计划（表头签名变化时才重新编译）
+        # 逐行、逐次查找的调试信息只在日志级别为DEBUG时生成（默认INFO，不产生这部分开销）
+        self._debug_mode = log.isEnabledFor(logging.DEBUG)
+        # 页面加载和翻页的节奏由自适应限速器控制（遇到验证码自动降速）
+        self.rate_limiter = rate_limiter or get_host_limiter(
+            self.base_url, initial_rate=0.5, max_rate=2.0, jitter=0.5
+        )
         
     def init_driver(self):
-        """初始化WebDriver"""
+        """初始化WebDriver（给出调试地址时连接到常驻Chrome，给出工厂函数时使用工厂创建的驱动）"""
+        if self.debugger_address:
+            return self.attach_driver()
+        if self.driver_factory is not None:
+            self.driver = WatchedDriver(self.driver_factory(), call_timeout=self.call_timeout)
+            self.driver.implicitly_wait(self.implicit_wait)
+            return True
+        
         chrome_options = Options()
         
         if self.headless:
@@ -70,9 +134,14 @@ class QizhidaoSmartSpider:
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
         chrome_options.add_argument('--disable-gpu')
+        if self.tabs > 1:
+            # 多标签页模式下非当前标签页在后台加载，不能让Chrome降低后台标签页的定时器和渲染优先级
+            chrome_options.add_argument('--disable-background-timer-throttling')
+            chrome_options.add_argument('--disable-renderer-backgrounding')
         
         try:
-            self.driver = webdriver.Chrome(options=chrome_options)
+            # 每个WebDriver调用都有截止时间，浏览器卡死时由爬取循环重启并续爬
+            self.driver = WatchedDriver(webdriver.Chrome(options=chrome_options), call_timeout=self.call_timeout)
             self.driver.implicitly_wait(self.implicit_wait)
             self.driver.maximize_window()
             
@@ -85,17 +154,74 @@ class QizhidaoSmartSpider:
                 '''
             })
             
-            print("WebDriver初始化成功", flush=True)
+            log.info("WebDriver初始化成功")
             return True
         except Exception as e:
-            print(f"WebDriver初始化失败: {e}", flush=True)
-            print("请确保已安装Chrome浏览器和ChromeDriver", flush=True)
+            log.error("WebDriver初始化失败: %s", e)
+            log.info("请确保已安装Chrome浏览器和ChromeDriver")
+            return False
+    
+    def attach_driver(self):
+        """
+        连接到常驻Chrome（chrome_launcher 启动的带远程调试端口的浏览器）
+        
+        浏览器和登录会话在任务之间复用，本任务在新打开的标签页中进行，结束时由 close_driver 关闭
+        """
+        from chrome_launcher import attach_driver
+        start = time.time()
+        try:
+            self.driver = WatchedDriver(attach_driver(self.debugger_address, implicit_wait=self.implicit_wait),
+                                        call_timeout=self.call_timeout)
+            existing = set(self.driver.window_handles)
+            self.driver.switch_to.new_window('tab')
+            self._own_handles = existing  # 先记录已有的标签页，结束时关闭其余的
+            self.driver.execute_cdp_cmd('Page.addScriptToEvaluateOnNewDocument', {
+                'source': "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+            })
+        except Exception as e:
+            log.error("连接常驻Chrome失败（%s）: %s", self.debugger_address, e)
+            self.driver = None
             return False
+        log.info("已连接常驻Chrome %s（耗时 %.2f 秒）", self.debugger_address, time.time() - start)
+        return True
+    
+    def close_driver(self):
+        """结束时释放浏览器：自己启动的浏览器直接退出，常驻Chrome只关闭本任务打开的标签页"""
+        driver, self.driver = self.driver, None
+        if driver is None:
+            return
+        self._pagination_cache = None
+        self._table_cache = None
+        if self._own_handles is None:
+            driver.quit()
+            log.info("浏览器已关闭")
+            return
+        existing, self._own_handles = self._own_handles, None
+        try:
+            for handle in driver.window_handles:
+                if handle not in existing:
+                    driver.switch_to.window(handle)
+                    driver.close()
+            remaining = driver.window_handles
+            if remaining:
+                driver.switch_to.window(remaining[0])
+        except Exception as e:
+            log.debug("关闭任务标签页时出错: %s", e)
+        # 只断开WebDriver会话，常驻浏览器继续运行
+        try:
+            driver.service.stop()
+        except Exception:
+            pass
+        log.info("已关闭任务标签页（常驻浏览器继续运行）")
+    
+    def _pause(self, seconds):
+        """固定等待（按 wait_scale 缩放）"""
+        if self.wait_scale:
+            time.sleep(seconds * self.wait_scale)
     
     def human_like_delay(self):
-        """模拟人类行为的延迟"""
-        delay = random.uniform(1, 3)
-        time.sleep(delay)
+        """模拟人类行为的延迟（由限速器决定间隔，并带随机抖动）"""
+        self.rate_limiter.acquire()
     
     def is_result_page(self, url=None):
         """
@@ -142,24 +268,24 @@ class QizhidaoSmartSpider:
             if minimal:
                 # 最小化滚动：只滚动到底部然后回顶部（触发懒加载）
                 self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(0.3)  # 减少等待时间
+                self._pause(0.3)  # 减少等待时间
                 self.driver.execute_script("window.scrollTo(0, 0);")
-                time.sleep(0.2)
+                self._pause(0.2)
             else:
                 # 完整滚动（仅在必要时使用）
                 scroll_height = self.driver.execute_script("return document.body.scrollHeight")
                 for i in range(2):  # 减少滚动次数：从3次改为2次
                     scroll_to = random.randint(0, scroll_height)
                     self.driver.execute_script(f"window.scrollTo(0, {scroll_to});")
-                    time.sleep(random.uniform(0.3, 0.8))  # 减少等待时间
+                    self._pause(random.uniform(0.3, 0.8))  # 减少等待时间
                 
                 self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(0.5)  # 减少等待时间
+                self._pause(0.5)  # 减少等待时间
                 self.driver.execute_script("window.scrollTo(0, 0);")
-                time.sleep(0.3)  # 减少等待时间
+                self._pause(0.3)  # 减少等待时间
         except Exception as e:
             if self._debug_mode:
-                print(f"滚动页面时出错: {e}")
+                log.warning("滚动页面时出错: %s", e)
     
     def detect_captcha(self):
         """检测页面中是否包含验证码"""
@@ -223,18 +349,18 @@ class QizhidaoSmartSpider:
             
             return False if not found_keyword else True
         except Exception as e:
-            print(f"[调试] 验证码检测异常: {e}")
+            log.debug("验证码检测异常: %s", e)
             return False
     
     def wait_for_captcha_solve(self, timeout=300):
         """等待用户手动解决验证码"""
-        print("\n" + "=" * 50)
-        print("检测到验证码或人机校验")
-        print("=" * 50)
-        print("请在浏览器中完成验证码验证")
-        print(f"等待时间: {timeout} 秒")
-        print("提示：完成验证后，程序会自动检测并继续运行")
-        print("=" * 50 + "\n")
+        log.info('=' * 50)
+        log.info("检测到验证码或人机校验")
+        log.info('=' * 50)
+        log.info("请在浏览器中完成验证码验证")
+        log.info("等待时间: %s 秒", timeout)
+        log.info("提示：完成验证后，程序会自动检测并继续运行")
+        log.info('=' * 50)
         
         start_time = time.time()
         check_count = 0
@@ -246,14 +372,14 @@ class QizhidaoSmartSpider:
                 try:
                     current_url = self.driver.current_url
                 except Exception as e:
-                    print(f"浏览器会话检查失败: {e}")
+                    log.warning("浏览器会话检查失败: %s", e)
                     # 尝试重新加载页面
                     try:
                         self.driver.get(self.base_url)
                         time.sleep(2)
-                        print("已重新加载页面")
+                        log.info("已重新加载页面")
                     except:
-                        print("无法重新加载页面")
+                        log.info("无法重新加载页面")
                         time.sleep(2)
                         continue
                 
@@ -264,7 +390,7 @@ class QizhidaoSmartSpider:
                     no_captcha_count += 1
                     # 连续3次检测都无验证码，认为已解决
                     if no_captcha_count >= 3:
-                        print("\n✓ 验证码已解决，等待页面稳定...")
+                        log.info("✓ 验证码已解决，等待页面稳定...")
                         time.sleep(3)  # 等待页面稳定
                         # 再次确认页面已加载
                         try:
@@ -273,7 +399,7 @@ class QizhidaoSmartSpider:
                             )
                         except:
                             pass
-                        print("✓ 页面已稳定，继续爬取...")
+                        log.info("✓ 页面已稳定，继续爬取...")
                         return True
                 else:
                     # 如果又检测到验证码，重置计数
@@ -284,55 +410,55 @@ class QizhidaoSmartSpider:
                     elapsed = int(time.time() - start_time)
                     remaining = timeout - elapsed
                     status = "仍有验证码" if has_captcha else "未检测到验证码"
-                    print(f"等待中... 已等待 {elapsed} 秒，剩余 {remaining} 秒 ({status})")
+                    log.info("等待中... 已等待 %s 秒，剩余 %s 秒 (%s)", elapsed, remaining, status)
                 
                 time.sleep(2)
             except Exception as e:
-                print(f"等待验证码时出错: {e}")
+                log.warning("等待验证码时出错: %s", e)
                 # 尝试重新加载页面
                 try:
                     self.driver.refresh()
                     time.sleep(2)
                 except Exception as refresh_error:
-                    print(f"刷新页面失败: {refresh_error}")
+                    log.warning("刷新页面失败: %s", refresh_error)
                     time.sleep(2)
         
-        print("\n等待验证码超时")
+        log.warning("等待验证码超时")
         return False
     
     def wait_for_url_change(self, original_url, timeout=30, check_interval=1):
         """等待URL变化"""
-        print(f"[调试] 等待URL变化...", flush=True)
-        print(f"[调试] 原始URL: {original_url}", flush=True)
+        log.debug("等待URL变化...")
+        log.debug("原始URL: %s", original_url)
         
         start_time = time.time()
         while time.time() - start_time < timeout:
             try:
                 current_url = self.driver.current_url
                 if current_url != original_url:
-                    print(f"[调试] ✓ URL已变化: {current_url}", flush=True)
+                    log.debug("✓ URL已变化: %s", current_url)
                     return current_url
                 time.sleep(check_interval)
             except Exception as e:
-                print(f"[调试] 检查URL时出错: {e}", flush=True)
+                log.debug("检查URL时出错: %s", e)
                 time.sleep(check_interval)
         
-        print(f"[调试] URL未变化，使用当前URL", flush=True)
+        log.debug("URL未变化，使用当前URL")
         return self.driver.current_url
     
     def wait_for_result_page(self, timeout=60):
         """等待页面跳转到结果页面"""
-        print(f"[调试] 等待跳转到结果页面...", flush=True)
+        log.debug("等待跳转到结果页面...")
         start_time = time.time()
         
         while time.time() - start_time < timeout:
             try:
                 current_url = self.driver.current_url
-                print(f"[调试] 当前URL: {current_url}", flush=True)
+                log.debug("当前URL: %s", current_url)
                 
                 # 检查是否已跳转到结果页面
                 if self.is_result_page(current_url):
-                    print(f"[调试] ✓ 已跳转到结果页面", flush=True)
+                    log.debug("✓ 已跳转到结果页面")
                     # 等待页面加载完成
                     time.sleep(2)
                     try:
@@ -343,38 +469,38 @@ class QizhidaoSmartSpider:
                         try:
                             table = self.driver.find_element(By.TAG_NAME, "table")
                             if table:
-                                print(f"[调试] ✓ 页面数据已加载", flush=True)
+                                log.debug("✓ 页面数据已加载")
                                 return True
                         except:
                             # 即使没找到table，也认为已跳转
-                            print(f"[调试] ✓ 已跳转到结果页面（表格可能动态加载）", flush=True)
+                            log.debug("✓ 已跳转到结果页面（表格可能动态加载）")
                             return True
                     except:
-                        print(f"[调试] ✓ 已跳转到结果页面（等待超时但继续）", flush=True)
+                        log.debug("✓ 已跳转到结果页面（等待超时但继续）")
                         return True
                 
                 # 检查验证码
                 if self.detect_captcha():
-                    print(f"[调试] 检测到验证码，等待用户解决...", flush=True)
+                    log.debug("检测到验证码，等待用户解决...")
                     if not self.wait_for_captcha_solve():
-                        print("[错误] 验证码处理失败或超时", flush=True)
+                        log.error("验证码处理失败或超时")
                         return False
                     # 验证码解决后，继续检查URL
                     continue
                 
                 time.sleep(1)
             except Exception as e:
-                print(f"[调试] 等待结果页面时出错: {e}", flush=True)
+                log.debug("等待结果页面时出错: %s", e)
                 time.sleep(1)
         
-        print(f"[警告] 等待结果页面超时", flush=True)
+        log.warning("等待结果页面超时")
         return False
     
     def load_page(self, url=None):
         """加载页面"""
         target_url = url or self.url
         try:
-            print(f"[调试] 正在加载页面: {target_url}", flush=True)
+            log.debug("正在加载页面: %s", target_url)
             self.driver.get(target_url)
             self.human_like_delay()
             
@@ -384,62 +510,61 @@ class QizhidaoSmartSpider:
                     EC.presence_of_element_located((By.TAG_NAME, "body"))
                 )
             except TimeoutException:
-                print("页面加载超时，但继续尝试...", flush=True)
+                log.warning("页面加载超时，但继续尝试...")
             
             # 检查是否已经在结果页面
             current_url = self.driver.current_url
-            print(f"[调试] 当前URL: {current_url}", flush=True)
+            log.debug("当前URL: %s", current_url)
             
             if self.is_result_page(current_url):
-                print("[调试] 已在结果页面，跳过验证码检测和跳转等待", flush=True)
+                log.debug("已在结果页面，跳过验证码检测和跳转等待")
             else:
                 # 检测验证码
-                print("[调试] 正在检测验证码...", flush=True)
+                log.debug("正在检测验证码...")
                 has_captcha = self.detect_captcha()
-                print(f"[调试] 验证码检测结果: {'有验证码' if has_captcha else '无验证码'}", flush=True)
+                log.debug("验证码检测结果: %s", '有验证码' if has_captcha else '无验证码')
                 
                 if has_captcha:
-                    print("[调试] 检测到验证码，等待用户解决...", flush=True)
+                    log.debug("检测到验证码，等待用户解决...")
                     if not self.wait_for_captcha_solve():
-                        print("[错误] 验证码处理失败或超时", flush=True)
+                        log.error("验证码处理失败或超时")
                         return False
                     # 验证码解决后，等待URL变化或重新检测
-                    print("[调试] 验证码解决，检查URL变化...", flush=True)
+                    log.debug("验证码解决，检查URL变化...")
                     current_url = self.wait_for_url_change(target_url, timeout=10)
                 
                 # 如果不在结果页面，等待跳转
                 if not self.is_result_page(current_url):
-                    print("[调试] 等待页面跳转到结果页面...", flush=True)
+                    log.debug("等待页面跳转到结果页面...")
                     if not self.wait_for_result_page(timeout=60):
-                        print("[警告] 未跳转到结果页面，但继续尝试...", flush=True)
+                        log.warning("未跳转到结果页面，但继续尝试...")
             
             # 模拟人类行为
             try:
                 self.scroll_page()
             except Exception as e:
-                print(f"滚动页面时出错（可忽略）: {e}", flush=True)
+                log.debug("滚动页面时出错（可忽略）: %s", e)
             
             # 最终确认当前URL
             final_url = self.driver.current_url
-            print(f"[调试] 最终URL: {final_url}", flush=True)
+            log.debug("最终URL: %s", final_url)
             
             return True
         except Exception as e:
             error_msg = str(e)
             if "invalid session id" in error_msg.lower() or "session" in error_msg.lower():
-                print(f"浏览器会话失效: {e}", flush=True)
-                print("尝试重新初始化浏览器...", flush=True)
+                log.warning("浏览器会话失效: %s", e)
+                log.info("尝试重新初始化浏览器...")
                 # 尝试重新初始化
                 try:
-                    if self.driver:
-                        self.driver.quit()
+                    self.close_driver()
                     time.sleep(1)
                     if self.init_driver():
                         return self.load_page(url)
                 except:
                     pass
             else:
-                print(f"加载页面时出错: {e}", flush=True)
+                log.error("加载页面时出错: %s", e)
             return False
     
     def get_total_pages(self):
@@ -447,7 +572,7 @@ class QizhidaoSmartSpider:
         if self.total_pages:
             return self.total_pages
         
-        print("[调试] 正在查找分页元素...", flush=True)
+        log.debug("正在查找分页元素...")
         
         try:
             # 查找分页元素 - 多种选择器
@@ -465,17 +590,17 @@ class QizhidaoSmartSpider:
             for selector in selectors:
                 try:
                     pagination = self.driver.find_element(By.CSS_SELECTOR, selector)
-                    print(f"[调试] 找到分页容器: {selector}", flush=True)
+                    log.debug("找到分页容器: %s", selector)
                     break
                 except NoSuchElementException:
                     continue
             
             if not pagination:
-                print("[调试] 未找到分页容器，检查页面是否包含分页信息...", flush=True)
+                log.debug("未找到分页容器，检查页面是否包含分页信息...")
                 # 检查页面文本中是否有页码信息
                 page_text = self.driver.page_source
                 if 'number' in page_text.lower() or 'pagination' in page_text.lower():
-                    print("[调试] 页面包含分页相关文本，但未找到元素", flush=True)
+                    log.debug("页面包含分页相关文本，但未找到元素")
                 return None  # 返回None表示无法确定，让程序继续尝试
             
             # 方法1: 查找分页组件中的总页数文本（Element UI通常有总页数显示）
@@ -483,7 +608,7 @@ class QizhidaoSmartSpider:
                 # 查找分页组件周围的文本，可能包含"共 X 页"或"X 页"
                 pagination_parent = pagination.find_element(By.XPATH, './..')  # 父元素
                 parent_text = pagination_parent.text
-                print(f"[调试] 分页父元素文本: {parent_text[:200]}", flush=True)
+                log.debug("分页父元素文本: %s", parent_text[:200])
                 
                 # 查找总页数模式
                 total_page_patterns = [
@@ -500,7 +625,7 @@ class QizhidaoSmartSpider:
                         total_pages = int(match.group(1))
                         if total_pages > 1:  # 确保是合理的总页数
                             self.total_pages = total_pages
-                            print(f"[调试] 从父元素文本提取到总页数: {self.total_pages}", flush=True)
+                            log.debug("从父元素文本提取到总页数: %s", self.total_pages)
                             return self.total_pages
             except:
                 pass
@@ -513,7 +638,7 @@ class QizhidaoSmartSpider:
                 page_elements = [e for e in page_elements if e.text.strip().isdigit()]
             
             if page_elements:
-                print(f"[调试] 找到 {len(page_elements)} 个页码元素", flush=True)
+                log.debug("找到 %s 个页码元素", len(page_elements))
                 page_numbers = []
                 for element in page_elements:
                     page_text = element.text.strip()
@@ -521,7 +646,7 @@ class QizhidaoSmartSpider:
                         page_num = int(page_text)
                         if 1 <= page_num <= 10000:  # 扩大范围
                             page_numbers.append(page_num)
-                            print(f"[调试] 找到页码: {page_num}", flush=True)
+                            log.debug("找到页码: %s", page_num)
                     except ValueError:
                         pass
                 
@@ -535,7 +660,7 @@ class QizhidaoSmartSpider:
                             # 查找是否有"..."或"下一页"等元素
                             next_btn = pagination.find_elements(By.CSS_SELECTOR, 'button.btn-next, a.btn-next, li.next, .next')
                             if next_btn:
-                                print(f"[调试] 找到下一页按钮，最大页码可能是部分页码", flush=True)
+                                log.debug("找到下一页按钮，最大页码可能是部分页码")
                                 # 如果找到下一页按钮，说明可能还有更多页
                                 # 尝试点击最后一页或查找总页数
                                 # 暂时使用最大页码，但会在循环中继续尝试
@@ -544,17 +669,17 @@ class QizhidaoSmartSpider:
                     
                     # 如果最大页码小于等于7，可能是部分显示，需要继续尝试
                     if max_page <= 7:
-                        print(f"[调试] 最大页码 {max_page} 可能只是部分显示，将在爬取时动态检测", flush=True)
+                        log.debug("最大页码 %s 可能只是部分显示，将在爬取时动态检测", max_page)
                         # 返回None，让程序继续尝试，不设置上限
                         return None
                     else:
                         self.total_pages = max_page
-                        print(f"[调试] 使用最大页码作为总页数: {self.total_pages}", flush=True)
+                        log.debug("使用最大页码作为总页数: %s", self.total_pages)
                         return max_page
             
             # 方法3: 从分页文本中提取
             pagination_text = pagination.text
-            print(f"[调试] 分页文本: {pagination_text[:200]}", flush=True)
+            log.debug("分页文本: %s", pagination_text[:200])
             patterns = [
                 re.compile(r'共\s*(\d+)\s*页', re.I),
                 re.compile(r'(\d+)\s*页', re.I),
@@ -564,24 +689,221 @@ class QizhidaoSmartSpider:
                 match = pattern.search(pagination_text)
                 if match:
                     self.total_pages = int(match.group(1))
-                    print(f"[调试] 从文本提取到总页数: {self.total_pages}", flush=True)
+                    log.debug("从文本提取到总页数: %s", self.total_pages)
                     return self.total_pages
             
         except NoSuchElementException as e:
-            print(f"[调试] 未找到分页元素: {e}", flush=True)
+            log.debug("未找到分页元素: %s", e)
         except Exception as e:
-            print(f"[调试] 获取总页数时出错: {e}", flush=True)
+            log.debug("获取总页数时出错: %s", e)
         
-        print("[调试] 无法确定总页数，将在爬取时动态检测", flush=True)
+        log.debug("无法确定总页数，将在爬取时动态检测")
         return None  # 返回None，让程序继续尝试
     
+    # 通过Element UI分页组件实例直接切换页码（不依赖页码按钮是否可见）
+    _VUE_JUMP_SCRIPT = """
+        var el = document.querySelector('.el-pagination');
+        var vm = el && el.__vue__;
+        if (!vm) { return false; }
+        if (typeof vm.handleCurrentChange === 'function') {
+            vm.handleCurrentChange(arguments[0]);
+        } else {
+            vm.internalCurrentPage = arguments[0];
+        }
+        return true;
+    """
+    
+    # 读取当前标签页的 [激活页码, 表格第一行文字, 是否正在加载]（多标签页模式下判断页面是否就绪）
+    _TAB_STATE_SCRIPT = """
+        var active = document.querySelector('ul.el-pager li.number.active');
+        var body = document.querySelector('.el-table__body-wrapper tbody') || document.querySelector('table tbody');
+        var row = body ? body.querySelector('tr') : null;
+        var mask = document.querySelector('.el-loading-mask');
+        var loading = !!(mask && mask.offsetParent !== null && getComputedStyle(mask).display !== 'none');
+        return [active ? active.textContent.trim() : null, row ? row.textContent.trim() : null, loading];
+    """
+    
+    # 通过分页组件实例切换为最大的每页条数，返回 [切换后的条数, 可选条数列表, 切换前的条数]
+    _VUE_PAGE_SIZE_SCRIPT = """
+        var el = document.querySelector('.el-pagination');
+        var vm = el && el.__vue__;
+        if (!vm || !vm.pageSizes || !vm.pageSizes.length) { return null; }
+        var sizes = vm.pageSizes.map(Number);
+        var target = Math.max.apply(null, sizes);
+        var previous = Number(vm.internalPageSize);
+        if (previous !== target) {
+            var sizer = (vm.$children || []).filter(function (c) {
+                return typeof c.handleChange === 'function' && c.pageSizes;
+            })[0];
+            if (sizer) {
+                sizer.handleChange(target);
+            } else {
+                vm.internalPageSize = target;
+                vm.$emit('update:pageSize', target);
+                vm.$emit('size-change', target);
+            }
+        }
+        return [target, sizes, previous];
+    """
+    
+    def _read_page_size(self):
+        """读取每页条数下拉框当前显示的条数（如 "10条/页"），读取失败返回None"""
+        try:
+            text = self.driver.find_element(By.CSS_SELECTOR, '.el-pagination__sizes input').get_attribute('value')
+        except Exception:
+            return None
+        match = re.search(r'(\d+)', text or '')
+        return int(match.group(1)) if match else None
+    
+    def _select_largest_page_size(self):
+        """点击每页条数下拉框（el-pagination__sizes）并选择最大的选项，返回选择的条数"""
+        sizes_input = self.driver.find_element(By.CSS_SELECTOR, '.el-pagination__sizes .el-input')
+        self.driver.execute_script("arguments[0].click();", sizes_input)
+        self._pause(0.3)
+        options = []
+        for item in self.driver.find_elements(By.CSS_SELECTOR, '.el-select-dropdown__item'):
+            match = re.search(r'(\d+)\s*条\s*/\s*页', item.get_attribute('textContent') or '')
+            if match:
+                options.append((int(match.group(1)), item))
+        if not options:
+            return None
+        size, item = max(options, key=lambda option: option[0])
+        self.driver.execute_script("arguments[0].click();", item)
+        return size
+    
+    def apply_max_page_size(self):
+        """
+        检测分页组件的每页条数选择器，切换为最大的可选条数
+        
+        Returns:
+            int: 切换后的每页条数，未找到选择器时返回None
+        """
+        rows_before = len(self.driver.find_elements(By.CSS_SELECTOR, "table tbody tr"))
+        previous_size = self._read_page_size()
+        page_size = None
+        try:
+            result = self.driver.execute_script(self._VUE_PAGE_SIZE_SCRIPT)
+            if result:
+                page_size = int(result[0])
+                if len(result) > 2 and result[2]:
+                    previous_size = int(result[2])
+                log.debug("可选每页条数: %s，切换为 %s", result[1], page_size)
+        except Exception as e:
+            if self._debug_mode:
+                log.debug("通过分页组件切换每页条数失败: %s", e)
+        
+        if page_size is None:
+            try:
+                page_size = self._select_largest_page_size()
+                if page_size:
+                    log.debug("已在每页条数下拉框中选择 %s", page_size)
+            except NoSuchElementException:
+                log.debug("未找到每页条数选择器，使用默认条数")
+            except Exception as e:
+                log.debug("切换每页条数失败: %s", e)
+        
+        if page_size:
+            # 等待表格按新的条数重新渲染。条数没有变化，或者结果只有一页（行数不足一页）时
+            # 表格行数不会改变，不做等待，否则每次都要白等到超时
+            single_page = ((previous_size is not None and rows_before < previous_size)
+                           or len(self.driver.find_elements(By.CSS_SELECTOR, 'ul.el-pager li.number')) == 1)
+            if page_size != previous_size and not single_page:
+                try:
+                    WebDriverWait(self.driver, 5, poll_frequency=0.2).until(
+                        lambda d: len(d.find_elements(By.CSS_SELECTOR, "table tbody tr")) != rows_before
+                    )
+                except TimeoutException:
+                    pass
+            self._pagination_cache = None
+            self._table_cache = None
+            self.page_size = page_size
+        return page_size
+    
+    def _read_active_page(self):
+        """读取分页组件当前激活的页码，读取失败返回None"""
+        try:
+            active_element = self.driver.find_element(By.CSS_SELECTOR, 'ul.el-pager li.number.active')
+            text = active_element.text.strip()
+            return int(text) if text.isdigit() else None
+        except Exception:
+            return None
+    
+    def _wait_for_active_page(self, page_number, timeout=5, previous_row=None):
+        """
+        等待目标页显示完成：激活页码变为目标页、加载遮罩消失，并且表格第一行已不是跳转前的内容
+        （分页组件的页码先于表格数据更新，只看页码会抓到上一页的行）
+        
+        Args:
+            page_number: 目标页码
+            timeout: 超时时间（秒）
+            previous_row: 跳转前表格第一行的文字，None表示不比较
+        """
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=0.2).until(
+                lambda d: self._page_shown(page_number, previous_row)
+            )
+        except TimeoutException:
+            return False
+        return True
+    
+    def go_to_page(self, page_number, timeout=5):
+        """
+        直接跳转到任意页码，跳转后校验激活页码
+        
+        依次尝试：分页组件的Vue实例方法、分页跳转输入框（el-pagination__jump）。
+        无论目标页是否在可见的页码按钮中，都只需要一次导航
+        
+        Args:
+            page_number: 目标页码
+            timeout: 等待激活页码更新的超时时间（秒）
+        
+        Returns:
+            bool: 是否已到达目标页
+        """
+        active, previous_row, _ = self._read_tab_state()
+        if active == page_number:
+            self.current_page = page_number
+            return True
+        
+        log.debug("直接跳转到第 %s 页", page_number)
+        
+        # 方法1: 调用分页组件自身的API
+        try:
+            if self.driver.execute_script(self._VUE_JUMP_SCRIPT, page_number):
+                if self._wait_for_active_page(page_number, timeout, previous_row):
+                    self.current_page = page_number
+                    log.debug("✓ 已通过分页组件跳转到第 %s 页", page_number)
+                    return True
+        except Exception as e:
+            if self._debug_mode:
+                log.debug("分页组件跳转失败: %s", e)
+        
+        # 方法2: 在跳转输入框中输入页码并回车
+        try:
+            jump_input = self.driver.find_element(By.CSS_SELECTOR, '.el-pagination__jump input')
+            jump_input.send_keys(Keys.CONTROL, 'a')
+            jump_input.send_keys(str(page_number), Keys.ENTER)
+            if self._wait_for_active_page(page_number, timeout, previous_row):
+                self.current_page = page_number
+                log.debug("✓ 已通过跳转输入框跳转到第 %s 页", page_number)
+                return True
+        except NoSuchElementException:
+            if self._debug_mode:
+                log.debug("未找到分页跳转输入框")
+        except Exception as e:
+            if self._debug_mode:
+                log.debug("跳转输入框跳转失败: %s", e)
+        
+        log.warning("无法直接跳转到第 %s 页（当前激活页: %s）", page_number, self._read_active_page())
+        return False
+    
     def click_next_page(self):
         """进入下一页（优先使用前端元素点击方式，优化速度）"""
         try:
             next_page = self.current_page + 1
             next_page_text = str(next_page)
             
-            print(f"[调试] 准备翻页到第 {next_page} 页", flush=True)
+            log.debug("准备翻页到第 %s 页", next_page)
             
             # 方法1: 优先使用前端元素点击（优化：直接查找已知元素）
             try:
@@ -613,33 +935,35 @@ class QizhidaoSmartSpider:
                     
                     # 如果目标页码超出可见范围，尝试使用"下一页"按钮
                     if next_page > max_visible and max_visible > 0:
-                        print(f"[调试] 目标页码 {next_page} 超出可见范围（最大可见: {max_visible}），尝试使用下一页按钮", flush=True)
+                        if self.go_to_page(next_page):
+                            return True
+                        log.debug("目标页码 %s 超出可见范围（最大可见: %s），尝试使用下一页按钮", next_page, max_visible)
                         try:
                             next_btn = pagination.find_element(By.CSS_SELECTOR, 'button.btn-next, a.btn-next, li.next')
                             if next_btn and not next_btn.get_attribute('disabled'):
                                 self.driver.execute_script("arguments[0].click();", next_btn)
-                                print(f"[调试] ✓ 已点击下一页按钮", flush=True)
-                                time.sleep(1.5)
+                                log.debug("✓ 已点击下一页按钮")
+                                self._pause(1.5)
                                 # 验证翻页是否成功
                                 try:
                                     active_element = pagination.find_element(By.CSS_SELECTOR, 'li.number.active')
                                     new_active_page = int(active_element.text.strip())
                                     if new_active_page > self.current_page:
                                         self.current_page = new_active_page
-                                        print(f"[调试] ✓ 通过下一页按钮成功翻到第 {new_active_page} 页", flush=True)
+                                        log.debug("✓ 通过下一页按钮成功翻到第 %s 页", new_active_page)
                                         return True
                                     else:
-                                        print(f"[警告] 点击下一页后页码未变化，可能已到达最后一页", flush=True)
+                                        log.warning("点击下一页后页码未变化，可能已到达最后一页")
                                         return False
                                 except:
                                     # 如果验证失败，也认为成功（已点击）
                                     self.current_page = next_page
                                     return True
                             else:
-                                print(f"[调试] 下一页按钮已禁用或不存在，可能已到达最后一页", flush=True)
+                                log.debug("下一页按钮已禁用或不存在，可能已到达最后一页")
                                 return False
                         except NoSuchElementException:
-                            print(f"[调试] 未找到下一页按钮，尝试直接查找页码元素", flush=True)
+                            log.debug("未找到下一页按钮，尝试直接查找页码元素")
                     
                     # 直接查找目标页码元素（优化：只使用最快的方式）
                     try:
@@ -657,10 +981,10 @@ class QizhidaoSmartSpider:
                     if next_page_element:
                         # 使用JavaScript点击（更快更可靠）
                         self.driver.execute_script("arguments[0].click();", next_page_element)
-                        print(f"[调试] ✓ 已点击页码 {next_page_text}", flush=True)
+                        log.debug("✓ 已点击页码 %s", next_page_text)
                         
                         # 等待页面加载和验证翻页成功（优化：减少等待时间）
-                        time.sleep(0.8)  # 减少等待时间：从1.5秒改为0.8秒
+                        self._pause(0.8)  # 减少等待时间：从1.5秒改为0.8秒
                         
                         # 验证翻页成功：最多尝试5次，每次0.3秒
                         for attempt in range(5):
@@ -675,20 +999,20 @@ class QizhidaoSmartSpider:
                                         WebDriverWait(self.driver, 2).until(
                                             lambda d: len(d.find_elements(By.CSS_SELECTOR, "table tr")) > 1
                                         )
-                                        time.sleep(0.5)  # 减少等待时间：从1秒改为0.5秒
+                                        self._pause(0.5)  # 减少等待时间：从1秒改为0.5秒
                                         # 简化数据稳定性检查：只检查一次
                                         if self._debug_mode:
                                             rows_count = len(self.driver.find_elements(By.CSS_SELECTOR, "table tr"))
-                                            print(f"[调试] ✓ 确认翻页到第 {next_page_text} 页，数据已加载（{rows_count}行）", flush=True)
+                                            log.debug("✓ 确认翻页到第 %s 页，数据已加载（%s行）", next_page_text, rows_count)
                                     except:
-                                        time.sleep(1)  # 如果等待失败，减少额外等待：从2秒改为1秒
+                                        self._pause(1)  # 如果等待失败，减少额外等待：从2秒改为1秒
                                     
                                     # 更新current_page（关键修复：避免重复读取）
                                     self.current_page = next_page
                                     return True
                             except:
                                 pass
-                            time.sleep(0.3)
+                            self._pause(0.3)
                         
                         # 如果active类验证失败，检查URL（优化：简化检查）
                         current_url = self.driver.current_url
@@ -698,12 +1022,12 @@ class QizhidaoSmartSpider:
                                 WebDriverWait(self.driver, 2).until(
                                     lambda d: len(d.find_elements(By.CSS_SELECTOR, "table tr")) > 1
                                 )
-                                time.sleep(0.5)  # 减少等待时间
+                                self._pause(0.5)  # 减少等待时间
                                 if self._debug_mode:
                                     rows_count = len(self.driver.find_elements(By.CSS_SELECTOR, "table tr"))
-                                    print(f"[调试] ✓ URL确认翻页成功，数据已加载（{rows_count}行）", flush=True)
+                                    log.debug("✓ URL确认翻页成功，数据已加载（%s行）", rows_count)
                             except:
-                                time.sleep(1)  # 减少等待时间
+                                self._pause(1)  # 减少等待时间
                             
                             # 更新current_page（关键修复）
                             self.current_page = next_page
@@ -711,21 +1035,21 @@ class QizhidaoSmartSpider:
                         
                         # 即使验证失败，也更新current_page（已点击，假设成功）
                         # 但等待一下确保数据加载（优化：减少等待时间）
-                        time.sleep(0.5)
+                        self._pause(0.5)
                         if self._debug_mode:
-                            print(f"[调试] 已点击，假设翻页成功（等待数据加载）", flush=True)
+                            log.debug("已点击，假设翻页成功（等待数据加载）")
                         self.current_page = next_page
                         return True
                     else:
-                        print(f"[调试] 未找到页码 {next_page_text} 的元素", flush=True)
+                        log.debug("未找到页码 %s 的元素", next_page_text)
                 else:
-                    print("[调试] 未找到分页容器", flush=True)
+                    log.debug("未找到分页容器")
                     
             except Exception as click_error:
-                print(f"[调试] 前端元素点击失败: {click_error}", flush=True)
+                log.debug("前端元素点击失败: %s", click_error)
             
             # 方法2: 如果前端元素点击失败，使用URL参数方式（备选方案）
-            print("[调试] 尝试URL参数方式翻页...", flush=True)
+            log.debug("尝试URL参数方式翻页...")
             try:
                 current_url = self.driver.current_url
                 
@@ -739,7 +1063,7 @@ class QizhidaoSmartSpider:
                 
                 # 直接跳转（优化：减少等待时间）
                 self.driver.get(next_page_url)
-                time.sleep(0.8)  # 减少等待时间：从1.5秒改为0.8秒
+                self._pause(0.8)  # 减少等待时间：从1.5秒改为0.8秒
                 
                 # 等待表格数据更新（优化：缩短超时时间）
                 try:
@@ -747,71 +1071,131 @@ class QizhidaoSmartSpider:
                         lambda d: len(d.find_elements(By.TAG_NAME, "tr")) > 1
                     )
                 except:
-                    time.sleep(0.5)  # 减少等待时间
+                    self._pause(0.5)  # 减少等待时间
                 
                 # 快速验证
                 new_url = self.driver.current_url
                 if f'page={next_page}' in new_url:
-                    print(f"[调试] ✓ URL方式翻页成功，数据已加载", flush=True)
+                    log.debug("✓ URL方式翻页成功，数据已加载")
                     # 更新current_page（关键修复）
                     self.current_page = next_page
                     return True
                 else:
                     # 即使URL不匹配，也更新current_page（已跳转）
-                    print(f"[警告] URL未完全匹配，但已跳转（等待数据加载）", flush=True)
-                    time.sleep(1)  # 额外等待确保数据加载
+                    log.warning("URL未完全匹配，但已跳转（等待数据加载）")
+                    self._pause(1)  # 额外等待确保数据加载
                     self.current_page = next_page
                     return True
                     
             except Exception as url_error:
-                print(f"[错误] URL方式翻页失败: {url_error}", flush=True)
+                log.error("URL方式翻页失败: %s", url_error)
             
             return False
             
         except Exception as e:
-            print(f"[错误] 翻页失败: {e}", flush=True)
+            log.error("翻页失败: %s", e)
             return False
     
+    # 一次脚本调用取回第一个表格的所有行（只有表头时改用行数最多的那个表格），代替逐行 get_attribute
+    # 不再退回 "table tr"：表头、表体和固定列副本各是一个表格，那样每一行会被读取多次
+    _ROWS_SNAPSHOT_SCRIPT = """
+        var toHtml = function (row) { return row.outerHTML; };
+        var table = document.querySelector('table');
+        var rows = table ? table.querySelectorAll('tr') : [];
+        if (rows.length <= 1) {
+            Array.prototype.forEach.call(document.querySelectorAll('table'), function (other) {
+                var otherRows = other.querySelectorAll('tr');
+                if (otherRows.length > rows.length) { rows = otherRows; }
+            });
+        }
+        return Array.prototype.map.call(rows, toHtml);
+    """
+    
+    _ROW_KIND_NAMES = {HEADER: '重复表头行', LEADING_HEADER: '表头行', EMPTY: '空行或无效行'}
+    
+    def capture_table_snapshot(self):
+        """
+        抓取当前页表格的原始HTML快照（只做浏览器交互，不解析）
+        
+        Returns:
+            dict: page（页码）、url、table_html、rows_html，找不到表格时附带 page_source；
+                  Element UI 表格还带有 el_table_headers（此时 rows_html 只包含主表体的行）
+        """
+        snapshot = {'page': self.current_page, 'url': self.driver.current_url,
+                    'table_html': None, 'rows_html': [], 'page_source': None}
+        
+        # Element UI 表格：一次取回主表头和主表体的行，跳过固定列副本
+        try:
+            el_result = self.driver.execute_script(el_table.SNAPSHOT_SCRIPT)
+        except Exception as e:
+            el_result = None
+            log.debug("读取el-table失败: %s", e)
+        if el_result and el_result.get('rows_html'):
+            snapshot['el_table_headers'] = el_result.get('headers') or []
+            snapshot['rows_html'] = [html for html in el_result['rows_html'] if html]
+            if self._debug_mode:
+                log.debug("第 %s 页el-table快照: %s 行", snapshot['page'], len(snapshot['rows_html']))
+            return snapshot
+        
+        # 优先使用Selenium直接查找table元素（优化：使用缓存）
+        table_element = None
+        if self._table_cache:
+            try:
+                if self._table_cache.is_displayed():
+                    table_element = self._table_cache
+            except:
+                self._table_cache = None
+        
+        try:
+            if not table_element:
+                table_element = self.driver.find_element(By.TAG_NAME, "table")
+                self._table_cache = table_element  # 缓存表格元素
+            snapshot['table_html'] = table_element.get_attribute('outerHTML')
+        except:
+            self._table_cache = None
+        
+        if not snapshot['table_html']:
+            # 找不到表格元素时保存整页源码，由解析阶段用多种方式查找
+            snapshot['page_source'] = self.driver.page_source
+        
+        try:
+            snapshot['rows_html'] = [html for html in self.driver.execute_script(self._ROWS_SNAPSHOT_SCRIPT) if html]
+        except Exception as e:
+            log.debug("Selenium方式获取行失败: %s，尝试使用BeautifulSoup", e)
+        
+        if self._debug_mode:
+            log.debug("第 %s 页快照: %s 行", snapshot['page'], len(snapshot['rows_html']))
+        return snapshot
+    
     def parse_table_data(self):
-        """解析表格数据"""
+        """解析当前页的表格数据（抓取快照后立即解析）"""
+        return self.parse_table_snapshot(self.capture_table_snapshot())
+    
+    def parse_table_snapshot(self, snapshot):
+        """
+        解析表格快照（不访问浏览器，可以在工作线程中运行）
+        
+        Args:
+            snapshot: capture_table_snapshot 返回的快照
+        
+        Returns:
+            list: 企业数据字典列表
+        """
         try:
-            # 获取页面源码
-            html = self.driver.page_source
-            soup = BeautifulSoup(html, 'lxml')
+            log.debug("当前URL: %s", snapshot['url'])
             
-            # 调试：检查页面内容
-            current_url = self.driver.current_url
-            print(f"[调试] 当前URL: {current_url}", flush=True)
+            el_rows = self._el_table_rows(snapshot)
+            if el_rows:
+                headers, header_keys, rows = el_rows
+                return self._rows_to_page_data(rows, headers, snapshot['page'], header_keys)
             
-            # 查找表格 - 多种方式
             table = None
+            if snapshot['table_html']:
+                table = BeautifulSoup(snapshot['table_html'], 'lxml').find('table')
+                if table and self._debug_mode:
+                    log.debug("通过Selenium找到表格")
             
-            # 方式1: 使用Selenium直接查找table元素（优化：使用缓存）
-            table_element = None
-            if self._table_cache:
-                try:
-                    # 尝试使用缓存的表格元素
-                    if self._table_cache.is_displayed():
-                        table_element = self._table_cache
-                except:
-                    self._table_cache = None
-            
-            if not table_element:
-                try:
-                    table_element = self.driver.find_element(By.TAG_NAME, "table")
-                    self._table_cache = table_element  # 缓存表格元素
-                    if table_element:
-                        table_html = table_element.get_attribute('outerHTML')
-                        table = BeautifulSoup(table_html, 'lxml').find('table')
-                        if table:
-                            if self._debug_mode:
-                                print("[调试] 通过Selenium找到表格")
-                except:
-                    pass
-            else:
-                # 使用缓存的表格元素
-                table_html = table_element.get_attribute('outerHTML')
-                table = BeautifulSoup(table_html, 'lxml').find('table')
+            soup = BeautifulSoup(snapshot['page_source'] or '', 'lxml')
             
             # 方式2: 直接查找table标签
             if not table:
@@ -823,7 +1207,7 @@ class QizhidaoSmartSpider:
                 for container in table_containers:
                     table = container.find('table')
                     if table:
-                        print(f"[调试] 在容器中找到表格")
+                        log.debug("在容器中找到表格")
                         break
             
             # 方式3: 查找特定的表格ID或类名
@@ -832,7 +1216,7 @@ class QizhidaoSmartSpider:
                     try:
                         table = soup.select_one(selector)
                         if table:
-                            print(f"[调试] 通过选择器找到表格: {selector}")
+                            log.debug("通过选择器找到表格: %s", selector)
                             break
                     except:
                         pass
@@ -846,15 +1230,15 @@ class QizhidaoSmartSpider:
                     if parent:
                         rows = parent.find_all('div', class_=re.compile(r'row|item|tr', re.I))
                         if len(rows) > 1:
-                            print(f"[调试] 找到div表格结构")
+                            log.debug("找到div表格结构")
                             # 这里可以用div结构解析，暂时先返回空，后续可以扩展
                             break
             
             if not table:
-                print(f"[调试] 未找到表格，尝试查找所有可能的表格结构...")
+                log.debug("未找到表格，尝试查找所有可能的表格结构...")
                 # 输出页面的一些关键信息用于调试
                 page_text = soup.get_text()[:500]  # 前500个字符
-                print(f"[调试] 页面文本片段: {page_text[:200]}...")
+                log.debug("页面文本片段: %s...", page_text[:200])
                 return []
             
             # 提取表头
@@ -866,672 +1250,886 @@ class QizhidaoSmartSpider:
                     headers = [th.get_text(strip=True) for th in header_row.find_all(['th', 'td'])]
             
             if not headers:
-                headers = ['序号', '企业名称', '登记状态', '统一社会信用代码', 
-                          '法定代表人', '成立日期', '注册资本', '实缴资本']
+                headers = list(DEFAULT_HEADERS)
             
-            # 提取数据行 - 优先使用Selenium获取真实的行数据（不依赖tbody）
+            # 提取数据行 - 优先使用快照中Selenium取回的行（不依赖tbody）
             rows = []
-            try:
-                # 直接使用Selenium查找table内的所有tr元素（最可靠）
-                table_element = self.driver.find_element(By.TAG_NAME, "table")
-                
-                # 直接查找table内的所有tr（包括tbody内和table直接的tr）
-                selenium_rows = table_element.find_elements(By.CSS_SELECTOR, "tr")
-                
-                if len(selenium_rows) > 0:
-                    if self._debug_mode:
-                        print(f"[调试] 通过Selenium在table中找到 {len(selenium_rows)} 行数据", flush=True)
-                    # 优化：批量解析HTML，减少BeautifulSoup初始化次数
-                    rows_html = []
-                    for row in selenium_rows:
+            rows_html = snapshot['rows_html']
+            if rows_html:
+                # 优化：批量解析HTML，减少BeautifulSoup初始化次数
+                combined_html = '<table>' + ''.join(rows_html) + '</table>'
+                try:
+                    combined_soup = BeautifulSoup(combined_html, 'lxml')
+                    rows = combined_soup.find_all('tr')
+                except:
+                    # 如果批量解析失败，回退到逐行解析
+                    for html in rows_html:
                         try:
-                            html = row.get_attribute('outerHTML')
-                            if html:
-                                rows_html.append(html)
+                            soup_row = BeautifulSoup(html, 'lxml').find('tr')
+                            if soup_row:
+                                rows.append(soup_row)
                         except:
                             continue
-                    
-                    # 批量解析所有行的HTML（优化：一次性解析所有HTML）
-                    if rows_html:
-                        combined_html = '<table>' + ''.join(rows_html) + '</table>'
-                        try:
-                            combined_soup = BeautifulSoup(combined_html, 'lxml')
-                            rows = combined_soup.find_all('tr')
-                        except:
-                            # 如果批量解析失败，回退到逐行解析
-                            for html in rows_html:
-                                try:
-                                    soup_row = BeautifulSoup(html, 'lxml').find('tr')
-                                    if soup_row:
-                                        rows.append(soup_row)
-                                except:
-                                    continue
-                    
-                    if self._debug_mode:
-                        print(f"[调试] 成功解析 {len(rows)} 行HTML", flush=True)
-                        if len(rows) < len(selenium_rows):
-                            print(f"[警告] 解析的行数({len(rows)})少于Selenium找到的行数({len(selenium_rows)})，可能部分行解析失败", flush=True)
-            except Exception as e:
-                print(f"[调试] Selenium方式失败: {e}，尝试使用BeautifulSoup", flush=True)
-                # 如果Selenium失败，使用BeautifulSoup
+                
+                if self._debug_mode:
+                    log.debug("成功解析 %s 行HTML", len(rows))
+                    if len(rows) < len(rows_html):
+                        log.warning("解析的行数(%s)少于Selenium找到的行数(%s)，可能部分行解析失败", len(rows), len(rows_html))
+            else:
                 tbody = table.find('tbody')
                 if not tbody:
                     tbody = table
                 
                 # 查找tbody内的所有tr（不使用recursive=False，因为可能嵌套）
                 rows = tbody.find_all('tr')
-                print(f"[调试] 通过BeautifulSoup找到 {len(rows)} 行数据", flush=True)
-            
-            if not rows or len(rows) <= 1:
-                if self._debug_mode:
-                    print(f"[调试] 未找到足够的数据行（只有 {len(rows)} 行），尝试查找页面中所有table tr元素", flush=True)
-                # 如果表格内找不到，尝试查找页面中所有table tr（优化：批量解析）
-                try:
-                    all_trs = self.driver.find_elements(By.CSS_SELECTOR, "table tr")
-                    if len(all_trs) > len(rows):
-                        if self._debug_mode:
-                            print(f"[调试] 在页面中找到 {len(all_trs)} 个table tr元素", flush=True)
-                        rows_html = []
-                        for tr in all_trs:
-                            try:
-                                html = tr.get_attribute('outerHTML')
-                                if html:
-                                    rows_html.append(html)
-                            except:
-                                continue
-                        
-                        # 批量解析（优化）
-                        if rows_html:
-                            combined_html = '<table>' + ''.join(rows_html) + '</table>'
-                            try:
-                                combined_soup = BeautifulSoup(combined_html, 'lxml')
-                                rows = combined_soup.find_all('tr')
-                            except:
-                                rows = []
-                                for html in rows_html:
-                                    try:
-                                        soup_row = BeautifulSoup(html, 'lxml').find('tr')
-                                        if soup_row:
-                                            rows.append(soup_row)
-                                    except:
-                                        continue
-                        
-                        if self._debug_mode:
-                            print(f"[调试] 成功解析 {len(rows)} 行HTML（从页面所有table tr）", flush=True)
-                except Exception as e:
-                    if self._debug_mode:
-                        print(f"[调试] 查找页面tr元素失败: {e}", flush=True)
+                log.debug("通过BeautifulSoup找到 %s 行数据", len(rows))
             
             if not rows or len(rows) <= 1:
-                print(f"[调试] 未找到任何数据行（只有 {len(rows)} 行）", flush=True)
+                log.debug("未找到任何数据行（只有 %s 行）", len(rows))
                 return []
             
-            page_data = []
-            header_skipped = False  # 标记是否已跳过表头
+            return self._rows_to_page_data(rows, headers, snapshot['page'])
             
-            # 定义表头关键词（用于识别重复的表头行）
-            header_keywords = ['序号', '企业名称', '企业名', '公司名称', '登记状态', '统一社会信', 
-                             '法定代表人', '成立日期', '注册资本', '实缴资本', '核准日期', 
-                             '营业期限', '所属省份', '所属城市', '所属区县', '电话', '邮箱', 
-                             '纳税人识', '纳税人识别']
+        except Exception as e:
+            log.error("解析表格数据时出错: %s", e)
+            return []
+    
+    def _el_table_rows(self, snapshot):
+        """
+        从快照中取出 Element UI 表格的表头和主表体行
+        
+        Returns:
+            tuple: (表头文字列表, 列编号列表, 行列表)；不是 el-table 时返回None
+        """
+        if 'el_table_headers' in snapshot:
+            header_list = el_table.extract_headers(snapshot['el_table_headers'])
+            combined_soup = BeautifulSoup('<table><tbody>' + ''.join(snapshot['rows_html']) + '</tbody></table>', 'lxml')
+            tbody = combined_soup.find('tbody')
+            rows = tbody.find_all('tr', recursive=False) if tbody else []
+        elif snapshot['page_source']:
+            found = el_table.find_el_table(BeautifulSoup(snapshot['page_source'], 'lxml'))
+            if not found:
+                return None
+            header_list, rows = found
+        else:
+            return None
+        
+        if not rows:
+            return None
+        if header_list:
+            # 选择框、展开列等没有表头文字的列按位置命名
+            headers = [text or f"列{i+1}" for i, (_, text) in enumerate(header_list)]
+            header_keys = [key for key, _ in header_list]
+        else:
+            headers, header_keys = list(DEFAULT_HEADERS), []
+        if self._debug_mode:
+            log.debug("el-table: %s 列，%s 行", len(headers), len(rows))
+        return headers, header_keys, rows
+    
+    def _rows_to_page_data(self, rows, headers, page, header_keys=None):
+        """
+        把表格行转换为企业数据字典列表
+        
+        Args:
+            rows: 表格行
+            headers: 表头文字
+            page: 页码
+            header_keys: el-table 的列编号，给出时按列编号对齐单元格，且行中不含表头
+        """
+        page_data = []
+        header_skipped = header_keys is not None  # 标记是否已跳过表头（el-table 主表体中没有表头行）
+        classifier = self._row_classifier
+        plan = self._planner.plan_for(headers)  # 表头不变时直接复用已编译的抽取计划
+        
+        for idx, row in enumerate(rows):
+            if row is None:
+                continue
             
-            for idx, row in enumerate(rows):
-                if row is None:
-                    continue
-                    
-                cells = row.find_all(['td', 'th'])
-                if len(cells) < 2:
-                    if self._debug_mode:
-                        print(f"[调试] 第 {idx+1} 行单元格数不足: {len(cells)}", flush=True)
-                    continue
-                
-                # 获取行文本内容
-                row_text = ' '.join([cell.get_text(strip=True) for cell in cells])
-                cell_texts = [cell.get_text(strip=True) for cell in cells]
-                
-                # 检查是否为表头行（检查所有行，不仅仅是前两行）
-                is_header = False
+            # 每个单元格的文本和链接只提取一次
+            if header_keys is not None:
+                cells = [classifier.extract_cell(cell) for cell in el_table.align_cells(row, header_keys)]
+            else:
+                cells = classifier.extract_cells(row)
+            kind = classifier.classify(cells, idx, len(headers), header_skipped)
+            
+            if kind == LEADING_HEADER:
+                header_skipped = True
+            if kind != DATA:
+                if self._debug_mode:
+                    log.debug("第 %s 行识别为%s，跳过", idx + 1, self._ROW_KIND_NAMES[kind])
+                continue
+            
+            company_data = plan.extract(cells)
+            
+            # 如果提取到数据，保存
+            if company_data:
+                company_data['页码'] = page
+                page_data.append(company_data)
+                if self._debug_mode:
+                    log.debug("成功提取第 %s 行数据: %s...", idx + 1, list(company_data.keys())[:3])
+        
+        log.debug("成功解析 %s 条企业数据", len(page_data))
+        return page_data
+    
+    def _is_saved_duplicate(self, item):
+        """检查数据是否与已保存的数据重复（优先按企业名称，其次按统一社会信用代码）"""
+        code = item.get('统一社会信用代码')
+        if '企业名称' in item:
+            if item['企业名称'] in self._seen_names:
+                return True
+            # 已保存的行没有企业名称时，只能通过信用代码比较
+            return code is not None and code in self._seen_codes_without_name
+        return code is not None and code in self._seen_codes
+    
+    def _remember_saved(self, items):
+        """把新保存的数据加入去重索引"""
+        for item in items:
+            code = item.get('统一社会信用代码')
+            if '企业名称' in item:
+                self._seen_names.add(item['企业名称'])
+            elif code is not None:
+                self._seen_codes_without_name.add(code)
+            if code is not None:
+                self._seen_codes.add(code)
+    
+    def _process_snapshot(self, snapshot):
+        """流水线工作线程：解析快照并去重保存"""
+        self._store_page_data(snapshot['page'], self.parse_table_snapshot(snapshot))
+    
+    def _store_page_data(self, page, page_data):
+        """
+        对一页的解析结果去重后保存
+        
+        Args:
+            page: 页码
+            page_data: parse_table_data / parse_table_snapshot 的返回值
+        """
+        page_done(page)
+        if not page_data:
+            log.warning("第 %s 页无数据，尝试继续...", page)
+            return
+        
+        # 去重：检查当前页数据是否与已有数据重复
+        unique_page_data = []
+        seen_keys = set()  # 用于快速检查重复
+        
+        for item in page_data:
+            # 使用企业名称或统一社会信用代码作为唯一标识
+            key = None
+            if '企业名称' in item:
+                key = item['企业名称']
+            elif '统一社会信用代码' in item:
+                key = item['统一社会信用代码']
+            elif '序号' in item and '企业名称' in item:
+                key = f"{item.get('序号', '')}_{item.get('企业名称', '')}"
+            
+            if key and key not in seen_keys:
+                # 检查是否与已有数据重复
+                is_duplicate = self._is_saved_duplicate(item)
                 
-                # 方法1: 检查是否包含多个表头关键词（如果一行包含3个或以上表头关键词，很可能是表头）
-                keyword_count = sum(1 for keyword in header_keywords if keyword in row_text)
-                if keyword_count >= 3:
-                    # 进一步验证：检查单元格内容是否都是表头关键词（短文本，无URL）
-                    has_urls = False
-                    all_short_text = True
-                    for cell in cells:
-                        text = cell.get_text(strip=True)
-                        # 检查是否有链接
-                        if cell.find('a') and cell.find('a').get('href'):
-                            has_urls = True
-                        # 检查文本长度（表头通常是短文本）
-                        if len(text) > 20:  # 如果文本超过20个字符，不太像表头
-                            all_short_text = False
-                    
-                    # 如果包含多个关键词，且没有URL，且文本较短，很可能是表头
-                    if not has_urls and all_short_text:
-                        is_header = True
-                        if self._debug_mode:
-                            print(f"[调试] 第 {idx+1} 行识别为重复表头行（包含{keyword_count}个表头关键词），跳过", flush=True)
-                        continue
+                if not is_duplicate:
+                    unique_page_data.append(item)
+                    seen_keys.add(key)
+                else:
+                    log.debug("发现重复数据，跳过: %s...", key[:50])
+        
+        if len(unique_page_data) != len(page_data):
+            log.warning("第 %s 页发现 %s 条重复数据，已过滤", page, len(page_data) - len(unique_page_data))
+        
+        # 检查是否与上一页数据重复（通过第一条数据判断）
+        if len(self.companies_data) > 0 and len(unique_page_data) > 0:
+            last_item = self.companies_data[-1]
+            first_item = unique_page_data[0]
+            
+            # 比较企业名称或统一社会信用代码
+            is_same = False
+            if '企业名称' in last_item and '企业名称' in first_item:
+                if last_item['企业名称'] == first_item['企业名称']:
+                    is_same = True
+            elif '统一社会信用代码' in last_item and '统一社会信用代码' in first_item:
+                if last_item['统一社会信用代码'] == first_item['统一社会信用代码']:
+                    is_same = True
+            
+            if is_same:
+                log.warning("检测到数据重复！第 %s 页第一条数据与上一页最后一条相同，可能页面未更新，跳过该页", page)
+                return
+        
+        if unique_page_data:
+            self.companies_data.extend(unique_page_data)
+            self._remember_saved(unique_page_data)
+            if self.enricher:
+                # 详情页在后台线程中抓取，与浏览器翻页同时进行
+                self.enricher.submit_rows(unique_page_data)
+            log.info("[步骤3.2] 第 %s 页提取了 %s 条企业信息（去重后）", page, len(unique_page_data))
+        else:
+            log.warning("第 %s 页解析的数据全部为重复数据，跳过", page)
+    
+    def _start_enricher(self):
+        """创建详情页补全器：详情页用HTTP请求抓取，带上浏览器中的登录Cookie和User-Agent"""
+        from detail_enricher import build_enricher
+        cookies = {}
+        headers = {'Referer': self.driver.current_url}
+        try:
+            cookies = {c['name']: c['value'] for c in self.driver.get_cookies()}
+            headers['User-Agent'] = self.driver.execute_script("return navigator.userAgent")
+        except Exception as e:
+            log.warning("[详情页] 读取浏览器Cookie失败: %s", e)
+        self.enricher = build_enricher(self.enrich, rate_limiter=self.rate_limiter,
+                                       headers=headers, cookies=cookies)
+    
+    def _read_tab_state(self):
+        """读取当前标签页的 (激活页码, 第一行文字, 是否正在加载)，读取失败返回 (None, None, True)"""
+        try:
+            active, first_row, loading = self.driver.execute_script(self._TAB_STATE_SCRIPT)
+        except DriverHangError:
+            raise
+        except Exception:
+            return None, None, True
+        return (int(active) if active and active.isdigit() else None), first_row, bool(loading)
+    
+    def _request_tab_page(self, page):
+        """多标签页模式：在当前标签页发出跳页请求，不等待加载完成"""
+        active, first_row, _ = self._read_tab_state()
+        if active == page:
+            # 标签页已显示该页（如第一个标签页的起始页），不需要等待表格变化
+            self._tab_requests[page] = (time.time(), None)
+            return
+        self.rate_limiter.acquire()
+        self._tab_requests[page] = (time.time(), first_row)
+        try:
+            if self.driver.execute_script(self._VUE_JUMP_SCRIPT, page):
+                return
+        except Exception as e:
+            if self._debug_mode:
+                log.debug("分页组件跳转失败: %s", e)
+        # 找不到分页组件实例时退回到跳转输入框（会等待加载完成）
+        self._pagination_cache = None
+        self.go_to_page(page)
+    
+    def _page_shown(self, page, previous_row):
+        """当前标签页是否已显示该页：激活页码正确、没有加载遮罩，表格第一行已换成新数据"""
+        active, first_row, loading = self._read_tab_state()
+        return active == page and not loading and bool(first_row) and first_row != previous_row
+    
+    def _tab_page_ready(self, page):
+        """多标签页模式：当前标签页是否已显示该页且表格已换成新数据"""
+        requested_at, previous_row = self._tab_requests.get(page, (None, None))
+        if not self._page_shown(page, previous_row):
+            return False
+        if requested_at is not None and previous_row is not None:
+            self.rate_limiter.record_success(time.time() - requested_at)
+        return True
+    
+    def _capture_tab_page(self, page):
+        """多标签页模式：抓取当前标签页的表格快照"""
+        self._tab_requests.pop(page, None)
+        self.current_page = page
+        self._table_cache = None  # 缓存的元素属于其他标签页
+        snapshot = self.capture_table_snapshot()
+        self._check_driver()
+        self._record_page(page)
+        return snapshot
+    
+    def _tab_page_timeout(self, page):
+        """多标签页模式：页面超时未就绪时检查验证码，已解决时返回True继续等待该页"""
+        if not self.detect_captcha():
+            return False
+        self.rate_limiter.record_captcha()
+        return self.wait_for_captcha_solve()
+    
+    def _prepare_tab(self, tab):
+        """新标签页加载结果页后：等待表格出现，并切换为与第一个标签页相同的每页条数"""
+        self._pagination_cache = None
+        self._table_cache = None
+        if not self._wait_for_table_rows(timeout=30):
+            return False
+        if self.maximize_page_size:
+            self.apply_max_page_size()
+        return True
+    
+    def _record_page(self, page):
+        """录制模式：保存当前页的DOM快照和URL，供 crawl_replay 离线回放"""
+        if self.recorder is None:
+            return
+        try:
+            self.recorder.record(page, self.driver.page_source, self.driver.current_url)
+        except DriverHangError:
+            raise
+        except Exception as e:
+            log.warning("[录制] 保存第 %s 页快照失败: %s", page, e)
+    
+    def _check_driver(self):
+        """浏览器已被看门狗判定卡死时抛出 DriverHangError（各处的 except 可能吞掉了原来的异常）"""
+        hung = getattr(self.driver, 'hung', None)
+        if hung:
+            raise DriverHangError(f"浏览器在调用 {hung} 时卡死")
+    
+    def _wait_for_table_rows(self, timeout=10):
+        """有上限地等待表格行出现，返回是否已出现"""
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=0.2).until(
+                lambda d: len(d.find_elements(By.CSS_SELECTOR, "table tr")) > 1
+            )
+            return True
+        except TimeoutException:
+            return False
+    
+    def _first_uncrawled_page(self):
+        """起始页之后第一个未爬取的页码（多标签页模式下已爬取的页码不连续，不能从当前页往后找）"""
+        page = max(self.start_page, 1)
+        while page in self.crawled_pages:
+            page += 1
+        return page
+    
+    def _restart_driver(self):
+        """
+        浏览器卡死后重启并回到第一个未爬取的页面
+        
+        Returns:
+            bool: 是否已就绪，可以继续爬取
+        """
+        page = self._first_uncrawled_page()
+        if self.total_pages and page > self.total_pages:
+            return False
+        
+        log.info("[看门狗] 正在重启浏览器，从第 %s 页继续...", page)
+        self.close_driver()
+        if not self.init_driver():
+            return False
+        if not self.load_page(self._result_url or self.url) or not self._wait_for_table_rows(timeout=30):
+            log.error("重启后未能加载结果页")
+            return False
+        if self.maximize_page_size:
+            self.apply_max_page_size()
+        if page > 1 and not self.go_to_page(page, timeout=10):
+            log.error("重启后无法跳转到第 %s 页", page)
+            return False
+        self.current_page = page
+        return True
+    
+    def _crawl_with_tabs(self, pipeline=None):
+        """
+        在同一浏览器中打开多个标签页并行翻页
+        
+        每个标签页负责一段连续的页码，通过直接跳页前进；主线程轮流切换标签页，
+        在一个标签页发出跳页请求后立即去抓取其他标签页中已加载好的页面。
+        浏览器重启后再次调用时，起始页到最后一页中未爬取的页面重新分配给各标签页
+        """
+        from browser_tabs import TabScheduler
+        
+        first_page, last_page = self._first_uncrawled_page(), self.total_pages
+        scheduler = TabScheduler(self.driver, tabs=self.tabs)
+        try:
+            log.info("[步骤3] 正在打开 %s 个标签页...", self.tabs)
+            opened = scheduler.open(self.driver.current_url, prepare=self._prepare_tab)
+            scheduler.assign(first_page, last_page, skip=self.crawled_pages)
+            for tab in scheduler.tabs:
+                if tab.pages:
+                    log.info("[标签页] 标签页%s: 第 %s-%s 页（%s 页）", tab.index + 1, tab.pages[0], tab.pages[-1], len(tab.pages))
+            if opened < self.tabs:
+                log.warning("只打开了 %s 个可用的标签页", opened)
+            
+            for page, snapshot in scheduler.run(self._request_tab_page, self._tab_page_ready,
+                                                self._capture_tab_page, self._tab_page_timeout):
+                if pipeline:
+                    log.info("[步骤3.1] 第 %s 页快照已提交解析...", page)
+                    pipeline.submit(snapshot)
+                else:
+                    self._store_page_data(page, self.parse_table_snapshot(snapshot))
+                self.crawled_pages.add(page)
+            
+            log.info("[标签页] %s", scheduler.summary())
+            if scheduler.failed_pages:
+                log.warning("以下页面未能加载: %s", sorted(scheduler.failed_pages))
+            self.current_page = max(self.crawled_pages, default=first_page)
+        finally:
+            scheduler.close()
+            self._tab_requests.clear()
+            self._pagination_cache = None
+            self._table_cache = None
+    
+    def _crawl_pages(self, pipeline=None):
+        """在当前标签页中逐页爬取（解析后翻到下一页，直到最后一页或无法翻页）"""
+        while True:
+            log.info('=' * 50)
+            log.info("[步骤3] 正在爬取第 %s 页...", self.current_page)
+            log.info('=' * 50)
+            
+            # 在主循环开始处添加严格的重复检测
+            log.debug("准备爬取第 %s 页", self.current_page)
+            log.debug("已爬取页面: %s", sorted(self.crawled_pages))
+            
+            # 严格检查是否已爬取
+            if self.current_page in self.crawled_pages:
+                log.error("第 %s 页已爬取，跳过避免重复", self.current_page)
                 
-                # 方法2: 对于前两行，使用更宽松的判断（兼容第一行表头）
-                if not header_skipped and idx < 2:
-                    if any(keyword in row_text for keyword in header_keywords[:5]):  # 只检查前5个关键词
-                        # 检查是否真的是表头（通常是第一行，或者单元格数和表头匹配）
-                        if idx == 0 or (len(headers) > 0 and len(cells) == len(headers)):
-                            is_header = True
-                            header_skipped = True
-                            if self._debug_mode:
-                                print(f"[调试] 第 {idx+1} 行识别为表头行，跳过", flush=True)
-                            continue
+                # 如果已爬取，直接尝试下一页
+                if self.total_pages and self.current_page >= self.total_pages:
+                    log.info("已爬取所有页面 (共 %s 页)", self.total_pages)
+                    break
+                else:
+                    # 检查下一页是否也已爬取（避免死循环）
+                    next_page_num = self.current_page + 1
+                    if next_page_num in self.crawled_pages:
+                        log.error("下一页 %s 也已爬取，可能陷入循环！", next_page_num)
+                        # 直接跳转到下一个未爬取的页面
+                        found_next = False
+                        test_page = next_page_num
+                        while test_page in self.crawled_pages:
+                            test_page += 1
+                        if not self.total_pages or test_page <= self.total_pages:
+                            log.debug("尝试跳转到未爬取的页面 %s", test_page)
+                            found_next = self.go_to_page(test_page)
+                        
+                        if not found_next:
+                            log.error("无法找到未爬取的页面，可能已完成所有页面")
+                            break
+                    else:
+                        # 正常翻页到下一页
+                        log.info("[步骤3.3] 进入第 %s 页...", next_page_num)
+                        if not self.click_next_page():
+                            log.error("无法进入第 %s 页", next_page_num)
+                            break
                 
-                # 检查是否有实际数据（不是空行）
-                has_data = False
-                cell_count = 0
-                for cell in cells:
-                    text = cell.get_text(strip=True)
-                    if text and len(text.strip()) > 0:
-                        cell_count += 1
-                        if len(text.strip()) > 1:  # 有实际内容（不是单个字符）
-                            has_data = True
+                # 重新验证翻页后的页码
+                try:
+                    pagination = self.driver.find_element(By.CSS_SELECTOR, 'ul.el-pager')
+                    active_element = pagination.find_element(By.CSS_SELECTOR, 'li.number.active')
+                    active_page = int(active_element.text.strip())
+                    if active_page != self.current_page:
+                        log.debug("翻页后页码更新：%s -> %s", self.current_page, active_page)
+                        self.current_page = active_page
+                except:
+                    pass
                 
-                # 如果有效单元格少于2个，认为是空行或无效行
-                if cell_count < 2 or not has_data:
+                continue  # 跳过当前页处理
+            
+            # 确保页面已加载
+            current_url_check = self.driver.current_url
+            log.debug("当前页面URL: %s", current_url_check)
+            
+            # 验证当前页是否匹配（通过active页码确认）
+            try:
+                pagination = self.driver.find_element(By.CSS_SELECTOR, 'ul.el-pager')
+                active_element = pagination.find_element(By.CSS_SELECTOR, 'li.number.active')
+                active_page_text = active_element.text.strip()
+                if active_page_text.isdigit():
+                    active_page = int(active_page_text)
+                    if active_page != self.current_page:
+                        log.warning("激活页码(%s)与当前页(%s)不匹配", active_page, self.current_page)
+                        
+                        # 如果页码变小，说明可能跳回了，这是严重错误
+                        if active_page < self.current_page:
+                            log.error("页码从 %s 跳回 %s，可能已到达最后一页或网站不支持该页码", self.current_page, active_page)
+                            # 如果跳回的页面已爬取，说明陷入循环
+                            if active_page in self.crawled_pages:
+                                log.error("跳回的页面 %s 已爬取，停止爬取避免死循环", active_page)
+                                break
+                            else:
+                                # 检查是否是因为页码超出范围（如网站只支持到第10页，但尝试访问第11页）
+                                all_number_elements = pagination.find_elements(By.CSS_SELECTOR, 'li.number')
+                                visible_pages = [int(e.text.strip()) for e in all_number_elements if e.text.strip().isdigit()]
+                                max_visible = max(visible_pages) if visible_pages else 0
+                                
+                                if self.current_page > max_visible and max_visible > 0:
+                                    log.info("[提示] 当前页码 %s 超出可见范围（最大可见: %s），已到达最后一页", self.current_page, max_visible)
+                                    break
+                                
+                                log.debug("更新页码为 %s", active_page)
+                                self.current_page = active_page
+                                # 重新检查是否已爬取
+                                if self.current_page in self.crawled_pages:
+                                    log.warning("更新后的页码 %s 已爬取过，跳过", self.current_page)
+                                    if self.total_pages and self.current_page >= self.total_pages:
+                                        break
+                                    else:
+                                        # 检查是否还有下一页
+                                        try:
+                                            next_btn = pagination.find_elements(By.CSS_SELECTOR, 'button.btn-next, a.btn-next, li.next')
+                                            if next_btn and not next_btn[0].get_attribute('disabled'):
+                                                next_page_num = self.current_page + 1
+                                                if not self.click_next_page():
+                                                    break
+                                                continue
+                                            else:
+                                                log.info("[提示] 下一页按钮已禁用或不存在，已到达最后一页")
+                                                break
+                                        except:
+                                            break
+                                continue
+                        else:
+                            # 页码变大，正常更新
+                            log.debug("更新页码为 %s", active_page)
+                            self.current_page = active_page
+                            # 如果更新后的页码已爬取过，跳过
+                            if self.current_page in self.crawled_pages:
+                                log.warning("更新后的页码 %s 已爬取过，跳过", self.current_page)
+                                if self.total_pages and self.current_page >= self.total_pages:
+                                    break
+                                else:
+                                    next_page_num = self.current_page + 1
+                                    if not self.click_next_page():
+                                        break
+                                    continue
+            except:
+                pass  # 如果找不到分页元素，忽略
+            
+            # 如果不在结果页面，尝试刷新
+            if not self.is_result_page(current_url_check):
+                log.warning("不在结果页面，尝试刷新...")
+                try:
+                    self.driver.refresh()
+                    self._pause(3)
+                except:
+                    pass
+            
+            # 等待表格数据稳定（优化：简化检查，减少等待时间）
+            try:
+                if self._debug_mode:
+                    log.debug("等待表格数据稳定...")
+                # 简化：只等待表格行出现，不再进行复杂的稳定性检查
+                try:
+                    WebDriverWait(self.driver, 2).until(
+                        lambda d: len(d.find_elements(By.CSS_SELECTOR, "table tr")) > 1
+                    )
+                    self._pause(0.3)  # 减少等待时间：从0.5秒改为0.3秒
                     if self._debug_mode:
-                        print(f"[调试] 第 {idx+1} 行为空行或无效行（有效单元格: {cell_count}），跳过", flush=True)
-                    continue
-                
-                company_data = {}
-                
-                # 如果表头数量不匹配，尝试按位置提取
-                for i, cell in enumerate(cells):
-                    if i < len(headers):
-                        value = cell.get_text(strip=True)
-                        if value:
-                            company_data[headers[i]] = value
-                    else:
-                        # 如果单元格数多于表头，按位置存储
-                        value = cell.get_text(strip=True)
-                        if value:
-                            company_data[f"列{i+1}"] = value
+                        rows_count = len(self.driver.find_elements(By.CSS_SELECTOR, "table tr"))
+                        log.debug("✓ 表格数据已稳定（%s行）", rows_count)
+                except:
+                    self._pause(0.5)  # 减少等待时间：从1秒改为0.5秒
+            except:
+                self._pause(0.5)  # 减少等待时间
+            
+            # 解析当前页数据（流水线模式下把快照交给工作线程，主线程立即翻页）
+            snapshot = self.capture_table_snapshot()
+            # 抓取途中浏览器卡死时快照不完整，不标记为已爬取，重启后重新抓取该页
+            self._check_driver()
+            self._record_page(self.current_page)
+            if pipeline:
+                log.info("[步骤3.1] 第 %s 页快照已提交解析...", self.current_page)
+                pipeline.submit(snapshot)
+            else:
+                log.info("[步骤3.1] 正在解析页面数据...")
+                self._store_page_data(self.current_page, self.parse_table_snapshot(snapshot))
+            # 标记该页已爬取（关键修复：避免重复读取）
+            self.crawled_pages.add(self.current_page)
+            
+            # 检查是否还有下一页
+            if self.total_pages and self.current_page >= self.total_pages:
+                log.info("已爬取所有页面 (共 %s 页)", self.total_pages)
+                break
+            
+            # 进入下一页（注意：click_next_page内部已更新current_page）
+            next_page_num = self.current_page + 1
+            log.info("[步骤3.3] 进入第 %s 页...", next_page_num)
+            
+            # 尝试翻页（翻页耗时反馈给限速器，用于检测延迟飙升）
+            self.rate_limiter.acquire()
+            nav_start = time.time()
+            if not self.click_next_page():
+                log.error("无法进入第 %s 页", next_page_num)
+                # 检查是否真的没有下一页了
+                try:
+                    # 检查是否有下一页按钮或更多页码
+                    pagination = self.driver.find_element(By.CSS_SELECTOR, 'ul.el-pager')
+                    next_btn = pagination.find_elements(By.CSS_SELECTOR, 'button.btn-next, a.btn-next, li.next, .next')
+                    # 检查下一页按钮是否被禁用
+                    if next_btn:
+                        is_disabled = next_btn[0].get_attribute('disabled') or 'disabled' in next_btn[0].get_attribute('class') or ''
+                        if is_disabled:
+                            log.info("[提示] 下一页按钮已禁用，已到达最后一页")
+                            break
                     
-                    # 提取链接
-                    link = cell.find('a')
-                    if link and link.get('href'):
-                        href = link.get('href')
-                        if href.startswith('/'):
-                            href = f"https://qiye.qizhidao.com{href}"
-                        elif not href.startswith('http'):
-                            href = f"https://qiye.qizhidao.com/{href}"
-                        # 如果这是企业名称列，添加链接
-                        if i < len(headers) and '企业' in headers[i]:
-                            company_data[f"{headers[i]}_链接"] = href
-                        else:
-                            company_data[f"链接{i+1}"] = href
+                    # 检查当前页是否是最后一个可见页码
+                    active_element = pagination.find_element(By.CSS_SELECTOR, 'li.number.active')
+                    active_page = int(active_element.text.strip())
+                    all_number_elements = pagination.find_elements(By.CSS_SELECTOR, 'li.number')
+                    visible_pages = [int(e.text.strip()) for e in all_number_elements if e.text.strip().isdigit()]
+                    max_visible = max(visible_pages) if visible_pages else 0
+                    
+                    if active_page >= max_visible and max_visible > 0:
+                        # 如果当前页是最后一个可见页码，可能还有更多页
+                        # 尝试点击下一页按钮
+                        try:
+                            next_btn = pagination.find_element(By.CSS_SELECTOR, 'button.btn-next, a.btn-next, li.next')
+                            if next_btn and not next_btn.get_attribute('disabled'):
+                                log.debug("尝试点击下一页按钮...")
+                                self.driver.execute_script("arguments[0].click();", next_btn)
+                                self._pause(2)
+                                # 检查是否成功翻页
+                                new_active = pagination.find_element(By.CSS_SELECTOR, 'li.number.active')
+                                new_active_page = int(new_active.text.strip())
+                                if new_active_page > active_page:
+                                    self.current_page = new_active_page
+                                    log.debug("通过下一页按钮成功翻到第 %s 页", new_active_page)
+                                    continue
+                                else:
+                                    log.info("[提示] 已到达最后一页")
+                                    break
+                        except:
+                            pass
+                except:
+                    pass
                 
-                # 如果提取到数据，保存
-                if company_data:
-                    company_data['页码'] = self.current_page
-                    page_data.append(company_data)
-                    if self._debug_mode:
-                        print(f"[调试] 成功提取第 {idx+1} 行数据: {list(company_data.keys())[:3]}...", flush=True)
+                # 如果total_pages已设置，且当前页已到达，则停止
+                if self.total_pages and self.current_page >= self.total_pages:
+                    log.info("已是最后一页，停止爬取")
+                    break
+                else:
+                    log.info("[提示] 翻页失败，可能已到达最后一页，停止爬取")
+                    break
             
-            print(f"[调试] 成功解析 {len(page_data)} 条企业数据", flush=True)
-            return page_data
+            # 检测验证码（注意：current_page已在click_next_page中更新）
+            if self.detect_captcha():
+                self.rate_limiter.record_captcha()
+                if not self.wait_for_captcha_solve():
+                    break
+            else:
+                self.rate_limiter.record_success(time.time() - nav_start)
             
-        except Exception as e:
-            print(f"解析表格数据时出错: {e}", flush=True)
-            return []
+            # 不再需要手动增加current_page，因为click_next_page已经更新了
+    
+    def _prepare_result_page(self, load=True):
+        """
+        爬取前的准备：加载结果页、等待表格、切换每页条数、获取总页数并跳转到起始页
+        
+        浏览器在这一阶段卡死时（包括被中间的 except 吞掉的情况）抛出 DriverHangError，
+        由 crawl_all_pages 重启浏览器后重新准备
+        
+        Args:
+            load: 是否加载页面（交互模式第一次准备时用户已在浏览器中打开结果页）
+        
+        Returns:
+            bool: 是否可以开始爬取
+        """
+        if load:
+            # 自动模式：加载第一页（load_page内部已处理验证码和页面跳转）；重启后直接加载已确认的结果页
+            log.info("[步骤1] 正在加载页面...")
+            if not self.load_page(self._result_url):
+                self._check_driver()
+                log.error("页面加载失败，退出爬取")
+                return False
+            log.info("[步骤1] 页面加载完成")
+        
+        # 再次确认当前URL（可能在加载过程中已跳转）
+        final_url = self.driver.current_url
+        log.debug("步骤1完成后的URL: %s", final_url)
+        
+        # 如果URL已经跳转到结果页面，可能需要刷新或等待数据加载（优化：减少滚动和等待）
+        if self.is_result_page(final_url):
+            if self._debug_mode:
+                log.debug("✓ 确认在结果页面，等待数据加载...")
+            # 有上限的显式等待（不依赖隐式等待），表格行出现即继续
+            self._wait_for_table_rows(timeout=10)
+            
+            # 优化：使用最小化滚动（仅在必要时触发懒加载）
+            try:
+                self.scroll_page(minimal=True)  # 使用最小化滚动
+            except Exception as e:
+                if self._debug_mode:
+                    log.debug("滚动页面时出错（可忽略）: %s", e)
+        
+        # 切换为最大的每页条数（必须在获取总页数之前，页数随条数变化）
+        if self.maximize_page_size:
+            log.info("[步骤1.5] 正在切换每页条数...")
+            self.apply_max_page_size()
+        
+        # 获取总页数
+        log.info("[步骤2] 正在获取总页数...")
+        self.total_pages = self.get_total_pages()
+        log.info("[步骤2] 检测到总页数: %s", self.total_pages)
+        self._result_url = self.driver.current_url
+        if self.record_dir and self.recorder is None:
+            from crawl_replay import SnapshotRecorder
+            self.recorder = SnapshotRecorder(self.record_dir)
+            self.recorder.start(self._result_url, self.total_pages, self.page_size)
+        
+        # 如果没找到分页，尝试直接解析当前页
+        if self.total_pages == 1:
+            log.info("[提示] 未检测到分页信息，尝试解析当前页面数据...")
+        elif self.total_pages is None:
+            log.info("[提示] 无法确定总页数，将在爬取时动态检测（遇到无法翻页时停止）...")
+        
+        # 断点续爬：直接跳转到起始页，而不是逐页点击过去
+        if self.start_page > 1:
+            log.info("[步骤2.1] 跳转到起始页 %s...", self.start_page)
+            if not self.go_to_page(self.start_page):
+                self._check_driver()
+                log.error("无法跳转到起始页 %s，退出爬取", self.start_page)
+                return False
+        # 卡死可能被上面各步骤的 except 吞掉（总页数等结果不可信），重启后重新准备
+        self._check_driver()
+        return True
     
     def crawl_all_pages(self):
         """爬取所有页面"""
-        print("=" * 50, flush=True)
-        print("企知道网站智能爬虫 - 开始运行", flush=True)
-        print("=" * 50, flush=True)
-        print(f"基础URL: {self.base_url}", flush=True)
-        print(f"无头模式: {self.headless}", flush=True)
-        print(flush=True)
+        log.info('=' * 50)
+        log.info("企知道网站智能爬虫 - 开始运行")
+        log.info('=' * 50)
+        log.info("基础URL: %s", self.base_url)
+        log.info("无头模式: %s", self.headless)
         
         # 初始化WebDriver
         if not self.init_driver():
             return None
         
+        pipeline = None
         try:
             if self.interactive:
                 # 交互模式：等待用户准备好
-                print("\n" + "=" * 60)
-                print("交互模式已启用")
-                print("=" * 60)
-                print("1. 浏览器将打开，请在浏览器中完成登录和验证")
-                print("2. 导航到结果页面（显示企业数据的页面）")
-                print("3. 准备就绪后，请在浏览器中保持结果页面打开")
-                print("4. 然后回到这里输入 '开始爬取' 或按回车键")
-                print("=" * 60 + "\n")
+                log.info('=' * 60)
+                log.info("交互模式已启用")
+                log.info('=' * 60)
+                log.info("1. 浏览器将打开，请在浏览器中完成登录和验证")
+                log.info("2. 导航到结果页面（显示企业数据的页面）")
+                log.info("3. 准备就绪后，请在浏览器中保持结果页面打开")
+                log.info("4. 然后回到这里输入 '开始爬取' 或按回车键")
+                log.info('=' * 60)
                 
                 # 加载初始页面
-                print("[步骤0] 正在打开浏览器...", flush=True)
+                log.info("[步骤0] 正在打开浏览器...")
                 if not self.load_page():
-                    print("页面加载失败，退出爬取", flush=True)
+                    log.error("页面加载失败，退出爬取")
                     return None
                 
                 # 检查当前URL，如果已经在结果页面，自动开始
                 current_url = self.driver.current_url
-                print(f"[调试] 当前URL: {current_url}", flush=True)
+                log.debug("当前URL: %s", current_url)
                 
                 auto_start = False
                 if self.is_result_page(current_url):
-                    print("[提示] 检测到已在结果页面，可以自动开始爬取", flush=True)
-                    print("[提示] 如果您已在结果页面准备好了，程序将自动开始", flush=True)
+                    log.info("[提示] 检测到已在结果页面，可以自动开始爬取")
+                    log.info("[提示] 如果您已在结果页面准备好了，程序将自动开始")
                     auto_start = True
                 
                 if not auto_start:
                     # 等待用户输入
                     try:
+                        crawl_log.flush()
                         user_input = input("\n请输入 '开始爬取' 或按回车键继续（输入 '退出' 取消）: ").strip().lower()
                         if user_input in ['退出', 'exit', 'quit', 'q']:
-                            print("用户取消爬取", flush=True)
+                            log.info("用户取消爬取")
                             return None
                         elif user_input in ['开始爬取', '开始', 'start', 's', '']:
-                            print("\n[用户确认] 开始爬取数据...\n", flush=True)
+                            log.info("[用户确认] 开始爬取数据...")
                         else:
-                            print("无效输入，将尝试自动开始...", flush=True)
+                            log.info("无效输入，将尝试自动开始...")
                     except (EOFError, KeyboardInterrupt):
-                        print("\n[自动模式] 检测到非交互环境，自动开始爬取...\n", flush=True)
+                        log.info("[自动模式] 检测到非交互环境，自动开始爬取...")
                 
                 # 再次检查当前URL（用户可能已经导航）
                 final_url = self.driver.current_url
-                print(f"[调试] 准备开始时的URL: {final_url}", flush=True)
+                log.debug("准备开始时的URL: %s", final_url)
                 
                 if not self.is_result_page(final_url):
-                    print("[警告] 当前不在结果页面（当前在登录页面）", flush=True)
-                    print("[提示] 请先在浏览器中完成登录，然后导航到结果页面", flush=True)
-                    print("[提示] 结果页面URL应该类似: https://qiye.qizhidao.com/batch-query-result?matchId=...", flush=True)
+                    log.warning("当前不在结果页面（当前在登录页面）")
+                    log.info("[提示] 请先在浏览器中完成登录，然后导航到结果页面")
+                    log.info("[提示] 结果页面URL应该类似: https://qiye.qizhidao.com/batch-query-result?matchId=...")
                     # 等待用户导航
-                    print("[提示] 等待您导航到结果页面...", flush=True)
+                    log.info("[提示] 等待您导航到结果页面...")
                     wait_start = time.time()
                     while time.time() - wait_start < 60:  # 最多等待60秒
                         time.sleep(2)
                         final_url = self.driver.current_url
                         if self.is_result_page(final_url):
-                            print(f"[调试] ✓ 已检测到结果页面: {final_url}", flush=True)
+                            log.debug("✓ 已检测到结果页面: %s", final_url)
                             break
-                        print(f"[调试] 等待中... 当前URL: {final_url}", flush=True)
+                        log.debug("等待中... 当前URL: %s", final_url)
                     
                     if not self.is_result_page(final_url):
-                        print("[错误] 超时：仍未在结果页面，无法继续爬取", flush=True)
+                        log.error("超时：仍未在结果页面，无法继续爬取")
                         return None
-            else:
-                # 自动模式：加载第一页（load_page内部已处理验证码和页面跳转）
-                print("\n[步骤1] 正在加载页面...", flush=True)
-                if not self.load_page():
-                    print("页面加载失败，退出爬取", flush=True)
-                    return None
-                print("[步骤1] 页面加载完成\n", flush=True)
-                
-                # 再次确认当前URL（可能在加载过程中已跳转）
-                final_url = self.driver.current_url
-                print(f"[调试] 步骤1完成后的URL: {final_url}", flush=True)
-                
-            # 如果URL已经跳转到结果页面，可能需要刷新或等待数据加载（优化：减少滚动和等待）
-            if self.is_result_page(final_url):
-                if self._debug_mode:
-                    print("[调试] ✓ 确认在结果页面，等待数据加载...", flush=True)
-                time.sleep(1.5)  # 减少等待时间：从3秒改为1.5秒
-                
-                # 优化：使用最小化滚动（仅在必要时触发懒加载）
-                try:
-                    self.scroll_page(minimal=True)  # 使用最小化滚动
-                except Exception as e:
-                    if self._debug_mode:
-                        print(f"[调试] 滚动页面时出错（可忽略）: {e}", flush=True)
-            
-            # 获取总页数
-            print("\n[步骤2] 正在获取总页数...", flush=True)
-            self.total_pages = self.get_total_pages()
-            print(f"[步骤2] 检测到总页数: {self.total_pages}\n", flush=True)
+                self._result_url = final_url
             
-            # 如果没找到分页，尝试直接解析当前页
-            if self.total_pages == 1:
-                print("[提示] 未检测到分页信息，尝试解析当前页面数据...", flush=True)
-            elif self.total_pages is None:
-                print("[提示] 无法确定总页数，将在爬取时动态检测（遇到无法翻页时停止）...", flush=True)
+            if self.pipeline:
+                pipeline = PagePipeline(self._process_snapshot, maxsize=self.pipeline_depth)
             
+            restarts = 0
+            # 准备阶段（加载结果页、切换每页条数、获取总页数、跳转起始页）同样可能卡死，与翻页一样由看门狗重启
+            prepared = False
             while True:
-                print(f"\n{'='*50}", flush=True)
-                print(f"[步骤3] 正在爬取第 {self.current_page} 页...", flush=True)
-                print(f"{'='*50}", flush=True)
-                
-                # 在主循环开始处添加严格的重复检测
-                print(f"[调试] 准备爬取第 {self.current_page} 页", flush=True)
-                print(f"[调试] 已爬取页面: {sorted(self.crawled_pages)}", flush=True)
-                
-                # 严格检查是否已爬取
-                if self.current_page in self.crawled_pages:
-                    print(f"[严重警告] 第 {self.current_page} 页已爬取，跳过避免重复", flush=True)
-                    
-                    # 如果已爬取，直接尝试下一页
-                    if self.total_pages and self.current_page >= self.total_pages:
-                        print(f"已爬取所有页面 (共 {self.total_pages} 页)", flush=True)
-                        break
-                    else:
-                        # 检查下一页是否也已爬取（避免死循环）
-                        next_page_num = self.current_page + 1
-                        if next_page_num in self.crawled_pages:
-                            print(f"[严重警告] 下一页 {next_page_num} 也已爬取，可能陷入循环！", flush=True)
-                            # 尝试找到下一个未爬取的页面
-                            found_next = False
-                            for test_page in range(next_page_num, next_page_num + 10):
-                                if test_page not in self.crawled_pages:
-                                    print(f"[调试] 尝试跳转到未爬取的页面 {test_page}", flush=True)
-                                    # 尝试直接跳转到该页
-                                    try:
-                                        pagination = self.driver.find_element(By.CSS_SELECTOR, 'ul.el-pager')
-                                        page_elements = pagination.find_elements(By.CSS_SELECTOR, 'li.number')
-                                        for elem in page_elements:
-                                            if elem.text.strip() == str(test_page):
-                                                self.driver.execute_script("arguments[0].click();", elem)
-                                                time.sleep(2)
-                                                self.current_page = test_page
-                                                found_next = True
-                                                break
-                                    except:
-                                        pass
-                                    if found_next:
-                                        break
-                            
-                            if not found_next:
-                                print(f"[错误] 无法找到未爬取的页面，可能已完成所有页面", flush=True)
-                                break
-                        else:
-                            # 正常翻页到下一页
-                            print(f"[步骤3.3] 进入第 {next_page_num} 页...", flush=True)
-                            if not self.click_next_page():
-                                print(f"[错误] 无法进入第 {next_page_num} 页", flush=True)
-                                break
-                    
-                    # 重新验证翻页后的页码
-                    try:
-                        pagination = self.driver.find_element(By.CSS_SELECTOR, 'ul.el-pager')
-                        active_element = pagination.find_element(By.CSS_SELECTOR, 'li.number.active')
-                        active_page = int(active_element.text.strip())
-                        if active_page != self.current_page:
-                            print(f"[调试] 翻页后页码更新：{self.current_page} -> {active_page}", flush=True)
-                            self.current_page = active_page
-                    except:
-                        pass
-                    
-                    continue  # 跳过当前页处理
-                
-                # 确保页面已加载
-                current_url_check = self.driver.current_url
-                print(f"[调试] 当前页面URL: {current_url_check}", flush=True)
-                
-                # 验证当前页是否匹配（通过active页码确认）
-                try:
-                    pagination = self.driver.find_element(By.CSS_SELECTOR, 'ul.el-pager')
-                    active_element = pagination.find_element(By.CSS_SELECTOR, 'li.number.active')
-                    active_page_text = active_element.text.strip()
-                    if active_page_text.isdigit():
-                        active_page = int(active_page_text)
-                        if active_page != self.current_page:
-                            print(f"[警告] 激活页码({active_page})与当前页({self.current_page})不匹配", flush=True)
-                            
-                            # 如果页码变小，说明可能跳回了，这是严重错误
-                            if active_page < self.current_page:
-                                print(f"[严重错误] 页码从 {self.current_page} 跳回 {active_page}，可能已到达最后一页或网站不支持该页码", flush=True)
-                                # 如果跳回的页面已爬取，说明陷入循环
-                                if active_page in self.crawled_pages:
-                                    print(f"[严重错误] 跳回的页面 {active_page} 已爬取，停止爬取避免死循环", flush=True)
-                                    break
-                                else:
-                                    # 检查是否是因为页码超出范围（如网站只支持到第10页，但尝试访问第11页）
-                                    all_number_elements = pagination.find_elements(By.CSS_SELECTOR, 'li.number')
-                                    visible_pages = [int(e.text.strip()) for e in all_number_elements if e.text.strip().isdigit()]
-                                    max_visible = max(visible_pages) if visible_pages else 0
-                                    
-                                    if self.current_page > max_visible and max_visible > 0:
-                                        print(f"[提示] 当前页码 {self.current_page} 超出可见范围（最大可见: {max_visible}），已到达最后一页", flush=True)
-                                        break
-                                    
-                                    print(f"[调试] 更新页码为 {active_page}", flush=True)
-                                    self.current_page = active_page
-                                    # 重新检查是否已爬取
-                                    if self.current_page in self.crawled_pages:
-                                        print(f"[警告] 更新后的页码 {self.current_page} 已爬取过，跳过", flush=True)
-                                        if self.total_pages and self.current_page >= self.total_pages:
-                                            break
-                                        else:
-                                            # 检查是否还有下一页
-                                            try:
-                                                next_btn = pagination.find_elements(By.CSS_SELECTOR, 'button.btn-next, a.btn-next, li.next')
-                                                if next_btn and not next_btn[0].get_attribute('disabled'):
-                                                    next_page_num = self.current_page + 1
-                                                    if not self.click_next_page():
-                                                        break
-                                                    continue
-                                                else:
-                                                    print(f"[提示] 下一页按钮已禁用或不存在，已到达最后一页", flush=True)
-                                                    break
-                                            except:
-                                                break
-                                    continue
-                            else:
-                                # 页码变大，正常更新
-                                print(f"[调试] 更新页码为 {active_page}", flush=True)
-                                self.current_page = active_page
-                                # 如果更新后的页码已爬取过，跳过
-                                if self.current_page in self.crawled_pages:
-                                    print(f"[警告] 更新后的页码 {self.current_page} 已爬取过，跳过", flush=True)
-                                    if self.total_pages and self.current_page >= self.total_pages:
-                                        break
-                                    else:
-                                        next_page_num = self.current_page + 1
-                                        if not self.click_next_page():
-                                            break
-                                        continue
-                except:
-                    pass  # 如果找不到分页元素，忽略
-                
-                # 如果不在结果页面，尝试刷新
-                if not self.is_result_page(current_url_check):
-                    print("[警告] 不在结果页面，尝试刷新...", flush=True)
-                    try:
-                        self.driver.refresh()
-                        time.sleep(3)
-                    except:
-                        pass
-                
-                # 等待表格数据稳定（优化：简化检查，减少等待时间）
                 try:
-                    if self._debug_mode:
-                        print(f"[调试] 等待表格数据稳定...", flush=True)
-                    # 简化：只等待表格行出现，不再进行复杂的稳定性检查
-                    try:
-                        WebDriverWait(self.driver, 2).until(
-                            lambda d: len(d.find_elements(By.CSS_SELECTOR, "table tr")) > 1
-                        )
-                        time.sleep(0.3)  # 减少等待时间：从0.5秒改为0.3秒
-                        if self._debug_mode:
-                            rows_count = len(self.driver.find_elements(By.CSS_SELECTOR, "table tr"))
-                            print(f"[调试] ✓ 表格数据已稳定（{rows_count}行）", flush=True)
-                    except:
-                        time.sleep(0.5)  # 减少等待时间：从1秒改为0.5秒
-                except:
-                    time.sleep(0.5)  # 减少等待时间
-                
-                # 解析当前页数据
-                print(f"[步骤3.1] 正在解析页面数据...", flush=True)
-                page_data = self.parse_table_data()
-                
-                if page_data:
-                    # 去重：检查当前页数据是否与已有数据重复
-                    unique_page_data = []
-                    seen_keys = set()  # 用于快速检查重复
-                    
-                    for item in page_data:
-                        # 使用企业名称或统一社会信用代码作为唯一标识
-                        key = None
-                        if '企业名称' in item:
-                            key = item['企业名称']
-                        elif '统一社会信用代码' in item:
-                            key = item['统一社会信用代码']
-                        elif '序号' in item and '企业名称' in item:
-                            key = f"{item.get('序号', '')}_{item.get('企业名称', '')}"
-                        
-                        if key and key not in seen_keys:
-                            # 检查是否与已有数据重复
-                            is_duplicate = False
-                            for existing_item in self.companies_data:
-                                if '企业名称' in existing_item and '企业名称' in item:
-                                    if existing_item['企业名称'] == item['企业名称']:
-                                        is_duplicate = True
-                                        break
-                                elif '统一社会信用代码' in existing_item and '统一社会信用代码' in item:
-                                    if existing_item['统一社会信用代码'] == item['统一社会信用代码']:
-                                        is_duplicate = True
-                                        break
-                            
-                            if not is_duplicate:
-                                unique_page_data.append(item)
-                                seen_keys.add(key)
-                            else:
-                                print(f"[调试] 发现重复数据，跳过: {key[:50]}...", flush=True)
-                    
-                    if len(unique_page_data) != len(page_data):
-                        print(f"[警告] 当前页发现 {len(page_data) - len(unique_page_data)} 条重复数据，已过滤", flush=True)
-                    
-                    # 检查是否与上一页数据重复（通过第一条数据判断）
-                    if len(self.companies_data) > 0 and len(unique_page_data) > 0:
-                        last_item = self.companies_data[-1]
-                        first_item = unique_page_data[0]
-                        
-                        # 比较企业名称或统一社会信用代码
-                        is_same = False
-                        if '企业名称' in last_item and '企业名称' in first_item:
-                            if last_item['企业名称'] == first_item['企业名称']:
-                                is_same = True
-                        elif '统一社会信用代码' in last_item and '统一社会信用代码' in first_item:
-                            if last_item['统一社会信用代码'] == first_item['统一社会信用代码']:
-                                is_same = True
-                        
-                        if is_same:
-                            print(f"[警告] 检测到数据重复！当前页第一条数据与上一页最后一条相同，可能页面未更新", flush=True)
-                            print(f"[调试] 跳过当前页，尝试翻页...", flush=True)
-                            # 标记为已爬取，避免重复
-                            self.crawled_pages.add(self.current_page)
-                            # 直接进入下一页
-                            if self.total_pages and self.current_page >= self.total_pages:
-                                print(f"已爬取所有页面 (共 {self.total_pages} 页)", flush=True)
-                                break
-                            else:
-                                next_page_num = self.current_page + 1
-                                print(f"[步骤3.3] 进入第 {next_page_num} 页...", flush=True)
-                                if not self.click_next_page():
-                                    print(f"[错误] 无法进入第 {next_page_num} 页", flush=True)
-                                    break
-                                continue
-                    
-                    if unique_page_data:
-                        self.companies_data.extend(unique_page_data)
-                        print(f"[步骤3.2] 第 {self.current_page} 页提取了 {len(unique_page_data)} 条企业信息（去重后）", flush=True)
-                        # 标记该页已爬取（关键修复：避免重复读取）
-                        self.crawled_pages.add(self.current_page)
-                        print(f"[调试] 已标记第 {self.current_page} 页为已爬取", flush=True)
+                    if not prepared:
+                        if not self._prepare_result_page(load=not self.interactive or restarts > 0):
+                            return None
+                        prepared = True
+                        if self.enrich:
+                            self._start_enricher()
+                    if self.tabs > 1 and self.total_pages and self.total_pages > self.current_page:
+                        self._crawl_with_tabs(pipeline)
                     else:
-                        print(f"[警告] 第 {self.current_page} 页解析的数据全部为重复数据，跳过", flush=True)
-                        self.crawled_pages.add(self.current_page)
-                else:
-                    print(f"[警告] 第 {self.current_page} 页无数据，尝试继续...", flush=True)
-                    # 即使无数据也标记为已爬取，避免重复尝试
-                    self.crawled_pages.add(self.current_page)
-                
-                # 检查是否还有下一页
-                if self.total_pages and self.current_page >= self.total_pages:
-                    print(f"已爬取所有页面 (共 {self.total_pages} 页)", flush=True)
+                        self._crawl_pages(pipeline)
+                except DriverHangError as e:
+                    log.info("[看门狗] %s", e)
+                # 卡死可能被各处的 except 吞掉，以看门狗的标记为准
+                if not getattr(self.driver, 'hung', None):
                     break
-                
-                # 进入下一页（注意：click_next_page内部已更新current_page）
-                next_page_num = self.current_page + 1
-                print(f"[步骤3.3] 进入第 {next_page_num} 页...", flush=True)
-                
-                # 尝试翻页
-                if not self.click_next_page():
-                    print(f"[错误] 无法进入第 {next_page_num} 页", flush=True)
-                    # 检查是否真的没有下一页了
-                    try:
-                        # 检查是否有下一页按钮或更多页码
-                        pagination = self.driver.find_element(By.CSS_SELECTOR, 'ul.el-pager')
-                        next_btn = pagination.find_elements(By.CSS_SELECTOR, 'button.btn-next, a.btn-next, li.next, .next')
-                        # 检查下一页按钮是否被禁用
-                        if next_btn:
-                            is_disabled = next_btn[0].get_attribute('disabled') or 'disabled' in next_btn[0].get_attribute('class') or ''
-                            if is_disabled:
-                                print(f"[提示] 下一页按钮已禁用，已到达最后一页", flush=True)
-                                break
-                        
-                        # 检查当前页是否是最后一个可见页码
-                        active_element = pagination.find_element(By.CSS_SELECTOR, 'li.number.active')
-                        active_page = int(active_element.text.strip())
-                        all_number_elements = pagination.find_elements(By.CSS_SELECTOR, 'li.number')
-                        visible_pages = [int(e.text.strip()) for e in all_number_elements if e.text.strip().isdigit()]
-                        max_visible = max(visible_pages) if visible_pages else 0
-                        
-                        if active_page >= max_visible and max_visible > 0:
-                            # 如果当前页是最后一个可见页码，可能还有更多页
-                            # 尝试点击下一页按钮
-                            try:
-                                next_btn = pagination.find_element(By.CSS_SELECTOR, 'button.btn-next, a.btn-next, li.next')
-                                if next_btn and not next_btn.get_attribute('disabled'):
-                                    print(f"[调试] 尝试点击下一页按钮...", flush=True)
-                                    self.driver.execute_script("arguments[0].click();", next_btn)
-                                    time.sleep(2)
-                                    # 检查是否成功翻页
-                                    new_active = pagination.find_element(By.CSS_SELECTOR, 'li.number.active')
-                                    new_active_page = int(new_active.text.strip())
-                                    if new_active_page > active_page:
-                                        self.current_page = new_active_page
-                                        print(f"[调试] 通过下一页按钮成功翻到第 {new_active_page} 页", flush=True)
-                                        continue
-                                    else:
-                                        print(f"[提示] 已到达最后一页", flush=True)
-                                        break
-                            except:
-                                pass
-                    except:
-                        pass
-                    
-                    # 如果total_pages已设置，且当前页已到达，则停止
-                    if self.total_pages and self.current_page >= self.total_pages:
-                        print(f"已是最后一页，停止爬取", flush=True)
-                        break
+                if restarts >= self.max_restarts:
+                    log.error("浏览器已重启 %s 次仍然卡死，停止爬取", restarts)
+                    break
+                restarts += 1
+                try:
+                    if prepared:
+                        ready = self._restart_driver()
                     else:
-                        print(f"[提示] 翻页失败，可能已到达最后一页，停止爬取", flush=True)
-                        break
-                
-                # 检测验证码（注意：current_page已在click_next_page中更新）
-                if self.detect_captcha():
-                    if not self.wait_for_captcha_solve():
-                        break
-                
-                # 不再需要手动增加current_page，因为click_next_page已经更新了
+                        log.info("[看门狗] 正在重启浏览器，重新准备结果页...")
+                        self.close_driver()
+                        ready = self.init_driver()
+                except DriverHangError as e:
+                    # 重启后的浏览器又卡住：下一轮循环中的调用会立即失败并再次重启
+                    log.info("[看门狗] 重启过程中 %s", e)
+                    continue
+                if not ready:
+                    break
+            if not prepared:
+                log.error("浏览器重启后仍未能准备好结果页，退出爬取")
+                return None
+            
+            if pipeline:
+                # 等待工作线程处理完最后几页
+                pipeline.close()
+                log.info("[流水线] 解析 %s 页，解析耗时 %.1f 秒，等待解析 %.1f 秒", pipeline.stats['processed'],
+                         pipeline.stats['handler_seconds'], pipeline.stats['submit_wait_seconds'])
+            
+            if self.enricher:
+                log.info("[详情页] 等待详情页补全完成...")
+                self.companies_data = RowStore(self.enricher.merge(self.companies_data))
+                log.info("[详情页] %s", self.enricher.summary())
             
-            print(f"\n总共提取了 {len(self.companies_data)} 条企业信息", flush=True)
+            log.info("总共提取了 %s 条企业信息", len(self.companies_data))
             
             return {
                 'title': '企知道',
                 'total_results': len(self.companies_data),
                 'total_pages': self.current_page,
+                'page_size': self.page_size,
                 'companies': self.companies_data
             }
             
         finally:
-            # 关闭浏览器
-            if self.driver:
-                self.driver.quit()
-                print("\n浏览器已关闭")
+            if pipeline:
+                pipeline.close()
+            if self.enricher:
+                self.enricher.close()
+            if self.recorder:
+                self.recorder.close()
+                log.info("[录制] %s", self.recorder.summary())
+            if isinstance(self.driver, WatchedDriver):
+                log.info("[看门狗] %s", self.driver.summary())
+            # 关闭浏览器（常驻Chrome只关闭本任务的标签页）
+            self.close_driver()
     
-    def save_to_json(self, data, filename=None):
-        """保存数据到JSON文件"""
+    def save_to_json(self, data, filename=None, pretty=False, compression=None):
+        """
+        保存数据到JSON文件
+        
+        Args:
+            data: 爬取结果
+            filename: 文件名，默认 qizhidao_data_时间戳.json
+            pretty: 是否缩进输出（默认紧凑格式）
+            compression: 'gzip' 或 'zstd' 时边写边压缩（文件名自动加上 .gz / .zst）
+        """
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"qizhidao_data_{timestamp}.json"
@@ -1541,55 +2139,66 @@ class QizhidaoSmartSpider:
                 'title': data.get('title', '企知道'),
                 'total_results': data.get('total_results', len(data.get('companies', []))),
                 'total_pages': data.get('total_pages', 1),
+                'page_size': data.get('page_size'),
                 'url': self.base_url,
                 'crawl_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             },
-            'companies': data.get('companies', []),
+            'companies': data.get('companies') or [],
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=2)
+        # 企业数据按块编码后逐块写出（有 orjson 时使用 orjson）
+        from json_writer import write_json
+        filename = write_json(filename, output_data, pretty=pretty, compression=compression)
         
-        print(f"数据已保存到: {filename}")
+        log.info("数据已保存到: %s", filename)
         return filename
     
     def save_to_excel(self, data, filename=None):
-        """保存数据到Excel文件"""
+        """保存数据到Excel文件，返回生成的文件列表（超过每个文件的行数上限时不止一个）"""
         if not data.get('companies'):
-            print("没有数据可保存")
-            return None
+            log.info("没有数据可保存")
+            return []
         
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"qizhidao_data_{timestamp}.xlsx"
         
-        df = pd.DataFrame(data['companies'])
-        df.to_excel(filename, index=False, engine='openpyxl')
+        # openpyxl只在导出Excel时才需要，延迟导入以加快启动
+        from excel_sink import write_excel
+        files = write_excel(filename, data['companies'])
         
-        print(f"数据已保存到: {filename}")
-        return filename
+        log.info("数据已保存到: %s", ', '.join(files))
+        return files
     
-    def run(self, save_json=True, save_excel=True):
-        """运行爬虫"""
+    def run(self, save_json=True, save_excel=True, output_dir=None, json_compression=None):
+        """
+        运行爬虫
+        
+        Args:
+            save_json: 是否保存JSON文件
+            save_excel: 是否保存Excel文件
+            output_dir: 输出目录，默认为当前目录（批量模式下每个任务一个目录）
+            json_compression: JSON文件的压缩方式（'gzip' 或 'zstd'），None表示不压缩
+        """
         # 爬取所有页面
         data = self.crawl_all_pages()
         
         if not data or not data.get('companies'):
-            print("没有获取到数据")
+            log.info("没有获取到数据")
             return None
         
         # 保存数据
         files = []
+        from batch_runner import output_file_names
+        json_file_name, excel_file_name = output_file_names(output_dir)
         if save_json:
-            json_file = self.save_to_json(data)
+            json_file = self.save_to_json(data, json_file_name, compression=json_compression)
             if json_file:
                 files.append(json_file)
         
         if save_excel:
-            excel_file = self.save_to_excel(data)
-            if excel_file:
-                files.append(excel_file)
+            files.extend(self.save_to_excel(data, excel_file_name))
         
         return {
             'data': data,
@@ -1604,14 +2213,14 @@ def main():
     result = spider.run()
     
     if result:
-        print("\n" + "=" * 50)
-        print("爬取完成！")
-        print("=" * 50)
-        print(f"提取了 {len(result['data']['companies'])} 条企业信息")
-        print(f"爬取了 {result['data'].get('total_pages', 1)} 页")
-        print(f"生成文件: {', '.join(result['files'])}")
+        log.info('=' * 50)
+        log.info("爬取完成！")
+        log.info('=' * 50)
+        log.info("提取了 %s 条企业信息", len(result['data']['companies']))
+        log.info("爬取了 %s 页", result['data'].get('total_pages', 1))
+        log.info("生成文件: %s", ', '.join(result['files']))
     else:
-        print("\n爬取失败，请检查网络连接和URL是否正确")
+        log.error("爬取失败，请检查网络连接和URL是否正确")
 
 
 if __name__ == "__main__":
@@ -5,24 +5,29 @@
 
 import requests
 from bs4 import BeautifulSoup
-import json
-import pandas as pd
 from datetime import datetime
 import time
 import os
+from row_store import RowStore
+from extraction_schema import ExtractionPlanner
+from crawl_log import get_logger
+
+log = get_logger('spider')
 
 
 class QizhidaoSpider:
     """企知道网站基础爬虫"""
     
-    def __init__(self, url=None):
+    def __init__(self, url=None, enrich=None):
         """
         初始化爬虫
         
         Args:
             url: 目标URL，默认为企知道批量查询结果页面
+            enrich: 详情页补全；True 使用默认字段，也可以是字段名列表或 DetailEnricher，None表示不补全
         """
         self.url = url or "https://qiye.qizhidao.com/batch-query-home"
+        self.enrich = enrich
         self.session = requests.Session()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
@@ -32,7 +37,8 @@ class QizhidaoSpider:
             'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1'
         }
-        self.companies_data = []
+        self.companies_data = RowStore()  # 紧凑行存储，导出时才还原为字典
+        self.planner = ExtractionPlanner()  # 表头 -> 抽取计划（同一表头只编译一次）
         
     def fetch_page(self):
         """获取页面内容"""
@@ -42,7 +48,7 @@ class QizhidaoSpider:
             response.encoding = 'utf-8'
             return response.text
         except requests.RequestException as e:
-            print(f"获取页面失败: {e}")
+            log.error("获取页面失败: %s", e)
             return None
     
     def parse_page(self, html_content):
@@ -65,7 +71,7 @@ class QizhidaoSpider:
                 table = table.find('table')
         
         if not table:
-            print("未找到企业信息表格")
+            log.warning("未找到企业信息表格")
             return None
         
         # 提取表头
@@ -82,32 +88,16 @@ class QizhidaoSpider:
             tbody = table
         
         rows = tbody.find_all('tr')
-        
+
+        # 按表头编译抽取计划（没有表头时使用模式中的默认列顺序）
+        plan = self.planner.plan_for(headers)
+
         for row in rows:
             cells = row.find_all(['td', 'th'])
             if len(cells) < 2:  # 跳过表头或空行
                 continue
-            
-            company_data = {}
-            
-            # 如果已有表头，按表头提取数据
-            if headers:
-                for i, cell in enumerate(cells):
-                    if i < len(headers):
-                        company_data[headers[i]] = cell.get_text(strip=True)
-                        
-                        # 提取链接
-                        link = cell.find('a')
-                        if link and link.get('href'):
-                            company_data[f"{headers[i]}_链接"] = link.get('href')
-            else:
-                # 如果没有表头，使用默认字段名
-                default_headers = ['序号', '企业名称', '登记状态', '统一社会信用代码', 
-                                 '法定代表人', '成立日期', '注册资本', '实缴资本']
-                for i, cell in enumerate(cells):
-                    if i < len(default_headers):
-                        company_data[default_headers[i]] = cell.get_text(strip=True)
-            
+
+            company_data = plan.extract(self.planner.cells(row))
             if company_data:
                 self.companies_data.append(company_data)
         
@@ -129,8 +119,16 @@ class QizhidaoSpider:
             'companies': self.companies_data
         }
     
-    def save_to_json(self, data, filename=None):
-        """保存数据到JSON文件"""
+    def save_to_json(self, data, filename=None, pretty=False, compression=None):
+        """
+        保存数据到JSON文件
+        
+        Args:
+            data: 爬取结果
+            filename: 文件名，默认 qizhidao_data_时间戳.json
+            pretty: 是否缩进输出（默认紧凑格式）
+            compression: 'gzip' 或 'zstd' 时边写边压缩（文件名自动加上 .gz / .zst）
+        """
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"qizhidao_data_{timestamp}.json"
@@ -142,63 +140,79 @@ class QizhidaoSpider:
                 'url': self.url,
                 'crawl_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             },
-            'companies': data.get('companies', []),
+            'companies': data.get('companies') or [],
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=2)
+        # 企业数据按块编码后逐块写出（有 orjson 时使用 orjson）
+        from json_writer import write_json
+        filename = write_json(filename, output_data, pretty=pretty, compression=compression)
         
-        print(f"数据已保存到: {filename}")
+        log.info("数据已保存到: %s", filename)
         return filename
     
     def save_to_excel(self, data, filename=None):
-        """保存数据到Excel文件"""
+        """保存数据到Excel文件，返回生成的文件列表（超过每个文件的行数上限时不止一个）"""
         if not data.get('companies'):
-            print("没有数据可保存")
-            return None
+            log.info("没有数据可保存")
+            return []
         
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"qizhidao_data_{timestamp}.xlsx"
         
-        df = pd.DataFrame(data['companies'])
-        df.to_excel(filename, index=False, engine='openpyxl')
+        # openpyxl只在导出Excel时才需要，延迟导入以加快启动
+        from excel_sink import write_excel
+        files = write_excel(filename, data['companies'])
         
-        print(f"数据已保存到: {filename}")
-        return filename
+        log.info("数据已保存到: %s", ', '.join(files))
+        return files
     
-    def run(self, save_json=True, save_excel=True):
-        """运行爬虫"""
-        print("开始爬取企知道网站数据...")
-        print(f"目标URL: {self.url}")
+    def run(self, save_json=True, save_excel=True, output_dir=None, json_compression=None):
+        """
+        运行爬虫
+        
+        Args:
+            save_json: 是否保存JSON文件
+            save_excel: 是否保存Excel文件
+            output_dir: 输出目录，默认为当前目录（批量模式下每个任务一个目录）
+            json_compression: JSON文件的压缩方式（'gzip' 或 'zstd'），None表示不压缩
+        """
+        log.info("开始爬取企知道网站数据...")
+        log.info("目标URL: %s", self.url)
         
         # 获取页面
         html_content = self.fetch_page()
         if not html_content:
-            print("无法获取页面内容")
+            log.error("无法获取页面内容")
             return None
         
         # 解析页面
-        print("正在解析页面...")
+        log.info("正在解析页面...")
         data = self.parse_page(html_content)
         if not data:
-            print("页面解析失败")
+            log.error("页面解析失败")
             return None
         
-        print(f"成功提取 {len(data['companies'])} 条企业信息")
+        log.info("成功提取 %s 条企业信息", len(data['companies']))
+        
+        if self.enrich:
+            from detail_enricher import enrich_rows
+            log.info("正在补全详情页...")
+            self.companies_data = RowStore(enrich_rows(self.enrich, data['companies'], headers=self.headers))
+            data['companies'] = self.companies_data
         
         # 保存数据
         files = []
+        from batch_runner import output_file_names
+        json_file_name, excel_file_name = output_file_names(output_dir)
         if save_json:
-            json_file = self.save_to_json(data)
+            json_file = self.save_to_json(data, json_file_name, compression=json_compression)
             if json_file:
                 files.append(json_file)
         
         if save_excel:
-            excel_file = self.save_to_excel(data)
-            if excel_file:
-                files.append(excel_file)
+            files.extend(self.save_to_excel(data, excel_file_name))
         
         return {
             'data': data,
@@ -212,11 +226,11 @@ def main():
     result = spider.run()
     
     if result:
-        print("\n爬取完成！")
-        print(f"提取了 {len(result['data']['companies'])} 条企业信息")
-        print(f"生成文件: {', '.join(result['files'])}")
+        log.info("爬取完成！")
+        log.info("提取了 %s 条企业信息", len(result['data']['companies']))
+        log.info("生成文件: %s", ', '.join(result['files']))
     else:
-        print("\n爬取失败，请检查网络连接和URL是否正确")
+        log.error("爬取失败，请检查网络连接和URL是否正确")
 
 
 if __name__ == "__main__":
@@ -5,24 +5,43 @@
 
 import requests
 from bs4 import BeautifulSoup
-import json
-import pandas as pd
+import os
 from datetime import datetime
 import time
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from urllib.parse import urljoin, urlparse, parse_qs, urlencode
+from row_store import RowStore
+from rate_limiter import get_host_limiter
+from profiling import page_done
+from table_parser import (parse_table_rows, parse_page_html, rows_to_dicts, find_title,
+                          find_total_pages, find_total_results, find_page_sizes)
+from crawl_log import get_logger
+
+log = get_logger('table_spider')
 
 
 class QizhidaoTableSpider:
     """企知道网站表格数据爬虫（支持分页）"""
     
-    def __init__(self, url=None, max_pages=None):
+    # 每页条数的查询参数名（与 page 参数并列）
+    PAGE_SIZE_PARAM = 'pageSize'
+    
+    def __init__(self, url=None, max_pages=None, rate_limiter=None, start_page=1, page_size='auto',
+                 parse_workers=None, enrich=None):
         """
         初始化爬虫
         
         Args:
             url: 目标URL
-            max_pages: 最大爬取页数，None表示爬取所有页
+            max_pages: 最大爬取页数（爬到该页码为止），None表示爬取所有页
+            rate_limiter: 自适应限速器，默认使用该主机共享的限速器
+            start_page: 起始页码（分布式爬取时每个节点负责一段页码）
+            page_size: 每页条数；'auto' 表示从第一页的分页组件中选择最大的可选值（start_page 大于1时不切换），
+                       None表示不指定
+            parse_workers: 解析进程数；设置后HTML解析交给进程池，主进程同时预取后续页面，None表示在主进程中解析
+            enrich: 详情页补全；True 使用默认字段，也可以是字段名列表或 DetailEnricher，None表示不补全
         """
         self.base_url = url or "https://qiye.qizhidao.com/batch-query-home"
         self.url = self.base_url
@@ -37,20 +56,45 @@ class QizhidaoTableSpider:
             'Upgrade-Insecure-Requests': '1',
             'Referer': 'https://qiye.qizhidao.com/'
         }
-        self.companies_data = []
-        self.current_page = 1
+        self.companies_data = RowStore()  # 紧凑行存储，导出时才还原为字典
+        self.start_page = start_page
+        self.current_page = start_page
         self.total_pages = None
+        self.page_size = None if page_size == 'auto' else page_size
+        # 起始页码是按网站默认条数计算的，切换条数后同一页码对应的是另一批数据，只有从第一页开始才自动切换
+        self._auto_page_size = page_size == 'auto' and start_page <= 1
+        # 同一主机的所有抓取共享一个限速器，根据服务器反馈自动调整速率
+        self.rate_limiter = rate_limiter or get_host_limiter(self.base_url, initial_rate=1.0)
+        self.parse_workers = parse_workers
+        self._parser_pool = None
+        self._in_flight = deque()  # 已提交给解析进程的 (页码, future)
+        self.enrich = enrich
+        self.enricher = None
+        
+    def fetch_page(self, page_url=None, raw=False):
+        """
+        获取页面内容
         
-    def fetch_page(self, page_url=None):
-        """获取页面内容"""
+        Args:
+            page_url: 页面URL，默认使用 self.url
+            raw: 是否返回原始字节（交给解析进程时避免解码和重新编码）
+        """
         url = page_url or self.url
+        self.rate_limiter.acquire()
         try:
+            start = time.time()
             response = self.session.get(url, headers=self.headers, timeout=30)
+            self.rate_limiter.on_response(response.status_code, time.time() - start, response.headers)
             response.raise_for_status()
+            if raw:
+                return response.content
             response.encoding = 'utf-8'
             return response.text
         except requests.RequestException as e:
-            print(f"获取页面失败: {e}")
+            if getattr(e, 'response', None) is None:
+                # 超时或连接错误没有响应可供 on_response 判断，单独让限速器降速
+                self.rate_limiter.record_failure()
+            log.error("获取页面失败: %s", e)
             return None
     
     def get_total_pages(self, soup):
@@ -58,40 +102,10 @@ class QizhidaoTableSpider:
         if self.total_pages:
             return self.total_pages
         
-        # 查找分页元素
-        pagination = soup.find('ul', class_=re.compile(r'pagination|page', re.I))
-        if not pagination:
-            pagination = soup.find('div', class_=re.compile(r'pagination|page', re.I))
-        
-        if pagination:
-            # 查找所有页码元素
-            page_numbers = pagination.find_all('li', class_='number')
-            if page_numbers:
-                # 获取最大的页码
-                max_page = 0
-                for page_li in page_numbers:
-                    page_text = page_li.get_text(strip=True)
-                    try:
-                        page_num = int(page_text)
-                        max_page = max(max_page, page_num)
-                    except ValueError:
-                        pass
-                if max_page > 0:
-                    self.total_pages = max_page
-                    return max_page
-            
-            # 尝试从文本中提取总页数
-            pagination_text = pagination.get_text()
-            page_patterns = [
-                re.compile(r'共\s*(\d+)\s*页', re.I),
-                re.compile(r'(\d+)\s*页', re.I),
-                re.compile(r'页\s*(\d+)', re.I),
-            ]
-            for pattern in page_patterns:
-                match = pattern.search(pagination_text)
-                if match:
-                    self.total_pages = int(match.group(1))
-                    return self.total_pages
+        total_pages = find_total_pages(soup)
+        if total_pages:
+            self.total_pages = total_pages
+            return total_pages
         
         # 如果找不到分页信息，默认返回1
         return 1
@@ -104,6 +118,8 @@ class QizhidaoTableSpider:
         
         # 更新或添加page参数
         query_params['page'] = [str(page_number)]
+        if self.page_size:
+            query_params[self.PAGE_SIZE_PARAM] = [str(self.page_size)]
         
         # 重新构建URL
         new_query = urlencode(query_params, doseq=True)
@@ -111,6 +127,10 @@ class QizhidaoTableSpider:
         
         return new_url
     
+    def get_page_sizes(self, soup):
+        """从分页组件的每页条数选择器（el-pagination__sizes）中提取可选的每页条数"""
+        return find_page_sizes(soup)
+    
     def find_next_page_link(self, soup):
         """查找下一页链接"""
         # 方法1: 查找分页中的下一页按钮或链接
@@ -157,71 +177,7 @@ class QizhidaoTableSpider:
     
     def parse_table_data(self, soup):
         """解析表格数据"""
-        # 查找企业信息表格
-        table = soup.find('table')
-        if not table:
-            table = soup.find('div', class_='table-container')
-            if table:
-                table = table.find('table')
-        
-        if not table:
-            return []
-        
-        # 提取表头
-        headers = []
-        thead = table.find('thead')
-        if thead:
-            header_row = thead.find('tr')
-            if header_row:
-                headers = [th.get_text(strip=True) for th in header_row.find_all(['th', 'td'])]
-        
-        # 如果没有表头，使用默认字段名
-        if not headers:
-            headers = ['序号', '企业名称', '登记状态', '统一社会信用代码', 
-                      '法定代表人', '成立日期', '注册资本', '实缴资本']
-        
-        # 提取数据行
-        tbody = table.find('tbody')
-        if not tbody:
-            tbody = table
-        
-        rows = tbody.find_all('tr')
-        page_data = []
-        
-        for row in rows:
-            cells = row.find_all(['td', 'th'])
-            if len(cells) < 2:
-                continue
-            
-            # 跳过表头行
-            row_text = ' '.join([cell.get_text(strip=True) for cell in cells])
-            if any(keyword in row_text for keyword in ['序号', '名称', '企业']):
-                if len(headers) == len(cells):
-                    continue
-            
-            company_data = {}
-            
-            for i, cell in enumerate(cells):
-                if i < len(headers):
-                    value = cell.get_text(strip=True)
-                    if value:
-                        company_data[headers[i]] = value
-                    
-                    # 提取链接
-                    link = cell.find('a')
-                    if link and link.get('href'):
-                        href = link.get('href')
-                        if href.startswith('/'):
-                            href = urljoin(self.base_url, href)
-                        elif not href.startswith('http'):
-                            href = urljoin(self.base_url, href)
-                        company_data[f"{headers[i]}_链接"] = href
-            
-            if company_data:
-                company_data['页码'] = self.current_page
-                page_data.append(company_data)
-        
-        return page_data
+        return parse_table_rows(soup, self.base_url, self.current_page)
     
     def parse_page(self, html_content):
         """解析页面内容"""
@@ -230,70 +186,147 @@ class QizhidaoTableSpider:
         
         soup = BeautifulSoup(html_content, 'lxml')
         
-        # 提取页面标题
-        title = soup.find('title')
-        title_text = title.text.strip() if title else "企知道"
-        
         # 提取表格数据
         page_data = self.parse_table_data(soup)
         
-        # 获取总页数
-        total_pages = self.get_total_pages(soup)
+        return {
+            'title': find_title(soup),
+            'total_pages': self.get_total_pages(soup),
+            'current_page': self.current_page,
+            'total_results': find_total_results(soup) or len(self.companies_data) + len(page_data),
+            'page_sizes': self.get_page_sizes(soup) if self._auto_page_size else [],
+            'page_data': page_data
+        }
+    
+    def _load_page(self, page):
+        """获取并解析指定页，失败时返回None"""
+        if self._parser_pool is not None:
+            return self._load_page_from_pool(page)
+        
+        html_content = self.fetch_page(self.get_page_url(page))
+        if not html_content:
+            log.error("无法获取第 %s 页内容", page)
+            return None
         
-        # 提取总数信息
-        total_results = len(self.companies_data) + len(page_data)
+        data = self.parse_page(html_content)
+        if not data:
+            log.error("第 %s 页解析失败", page)
+        return data
+    
+    def _load_page_from_pool(self, page):
+        """
+        从解析进程池取得指定页的结果
         
-        total_patterns = [
-            re.compile(r'共[:\s]*(\d+)', re.I),
-            re.compile(r'总计[:\s]*(\d+)', re.I),
-            re.compile(r'总数[:\s]*(\d+)', re.I),
-            re.compile(r'共找到[:\s]*(\d+)', re.I),
-        ]
+        总页数已知后，先把后续页面（最多 parse_workers 页）请求下来交给解析进程，
+        这样解析与后续页面的请求同时进行
+        """
+        if self._in_flight and self._in_flight[0][0] != page:
+            # 重新请求某一页（如切换每页条数后），丢弃已预取的结果
+            self._in_flight.clear()
         
-        page_text = soup.get_text()
-        for pattern in total_patterns:
-            match = pattern.search(page_text)
-            if match:
-                total_results = int(match.group(1))
+        next_page = self._in_flight[-1][0] + 1 if self._in_flight else page
+        last_page = page
+        if self.total_pages:
+            last_page = min(self.total_pages, self.max_pages or self.total_pages)
+        while len(self._in_flight) < self.parse_workers and next_page <= last_page:
+            if next_page != page:
+                log.info("预取第 %s 页...", next_page)
+            content = self.fetch_page(self.get_page_url(next_page), raw=True)
+            if not content:
+                log.error("无法获取第 %s 页内容", next_page)
                 break
+            future = self._parser_pool.submit(parse_page_html, content, self.base_url, next_page,
+                                              self._auto_page_size)
+            self._in_flight.append((next_page, future))
+            next_page += 1
+        
+        if not self._in_flight or self._in_flight[0][0] != page:
+            return None
+        
+        _, future = self._in_flight.popleft()
+        try:
+            result = future.result()
+        except Exception as e:
+            log.error("第 %s 页解析失败: %s", page, e)
+            return None
         
+        page_data = rows_to_dicts(result['columns'], result['rows'])
+        if result['total_pages'] and not self.total_pages:
+            self.total_pages = result['total_pages']
         return {
-            'title': title_text,
-            'total_pages': total_pages,
-            'current_page': self.current_page,
-            'total_results': total_results,
+            'title': result['title'],
+            'total_pages': self.total_pages or 1,
+            'current_page': page,
+            'total_results': result['total_results'] or len(self.companies_data) + len(page_data),
+            'page_sizes': result['page_sizes'],
             'page_data': page_data
         }
     
     def crawl_all_pages(self):
-        """爬取所有页面"""
-        print("=" * 50)
-        print("企知道网站表格数据爬虫 - 开始运行")
-        print("=" * 50)
-        print(f"基础URL: {self.base_url}")
-        print()
+        """爬取所有页面（设置了 parse_workers 时在进程池中解析，设置了 enrich 时同时抓取详情页）"""
+        if self.enrich:
+            from detail_enricher import build_enricher
+            self.enricher = build_enricher(self.enrich, rate_limiter=self.rate_limiter, headers=self.headers)
+        try:
+            data = self._crawl_with_pool() if self.parse_workers else self._crawl_pages()
+            if data and self.enricher:
+                log.info("等待详情页补全完成...")
+                self.companies_data = RowStore(self.enricher.merge(self.companies_data))
+                data['companies'] = self.companies_data
+                log.info("详情页补全: %s", self.enricher.summary())
+            return data
+        finally:
+            if self.enricher:
+                self.enricher.close()
+    
+    def _crawl_with_pool(self):
+        # 提交给子进程的只有 table_parser.parse_page_html：fork 启动时子进程继承主进程已导入的全部模块；
+        # spawn 启动时子进程重新导入主模块（启动脚本顶层只导入 crawl_log）后再导入 table_parser 和 bs4/lxml
+        self._parser_pool = ProcessPoolExecutor(max_workers=self.parse_workers)
+        try:
+            return self._crawl_pages()
+        finally:
+            # 预取但用不到的页面（提前结束时）不再解析（shutdown 的 cancel_futures 参数需要 Python 3.9）
+            for _, future in self._in_flight:
+                future.cancel()
+            self._in_flight.clear()
+            self._parser_pool.shutdown(wait=True)
+            self._parser_pool = None
+    
+    def _crawl_pages(self):
+        """逐页爬取，直到最后一页、最大页数或空页"""
+        log.info('=' * 50)
+        log.info("企知道网站表格数据爬虫 - 开始运行")
+        log.info('=' * 50)
+        log.info("基础URL: %s", self.base_url)
         
         while True:
-            print(f"正在爬取第 {self.current_page} 页...")
-            
-            # 获取当前页URL
-            page_url = self.get_page_url(self.current_page)
+            log.info("正在爬取第 %s 页...", self.current_page)
             
-            # 获取页面
-            html_content = self.fetch_page(page_url)
-            if not html_content:
-                print(f"无法获取第 {self.current_page} 页内容")
+            # 获取并解析页面
+            page_result = self._load_page(self.current_page)
+            if not page_result:
                 break
+            data = page_result
             
-            # 解析页面
-            data = self.parse_page(html_content)
-            if not data:
-                print(f"第 {self.current_page} 页解析失败")
-                break
+            # 首次请求后切换到最大的每页条数，按新的条数重新请求当前页（页码的含义随条数变化）
+            if self._auto_page_size:
+                self._auto_page_size = False
+                sizes = data['page_sizes']
+                more_pages = (data.get('total_pages') or 1) > 1
+                if sizes and more_pages and sizes[-1] > len(data['page_data']):
+                    self.page_size = sizes[-1]
+                    self.total_pages = None
+                    log.info("每页条数切换为 %s（可选: %s），重新请求第 %s 页", self.page_size, sizes, self.current_page)
+                    continue
             
             # 添加当前页数据
             self.companies_data.extend(data['page_data'])
-            print(f"第 {self.current_page} 页提取了 {len(data['page_data'])} 条企业信息")
+            log.info("第 %s 页提取了 %s 条企业信息", self.current_page, len(data['page_data']))
+            page_done(self.current_page)
+            if self.enricher:
+                # 详情页在后台线程中抓取，与后续翻页同时进行
+                self.enricher.submit_rows(data['page_data'])
             
             # 更新总页数
             if data.get('total_pages'):
@@ -301,32 +334,40 @@ class QizhidaoTableSpider:
             
             # 检查是否还有下一页
             if self.max_pages and self.current_page >= self.max_pages:
-                print(f"已达到最大页数限制: {self.max_pages}")
+                log.info("已达到最大页数限制: %s", self.max_pages)
                 break
             
             if self.total_pages and self.current_page >= self.total_pages:
-                print(f"已爬取所有页面 (共 {self.total_pages} 页)")
+                log.info("已爬取所有页面 (共 %s 页)", self.total_pages)
                 break
             
             # 检查是否有数据
             if not data['page_data']:
-                print("当前页无数据，停止爬取")
+                log.info("当前页无数据，停止爬取")
                 break
             
             # 准备下一页
-            self.current_page += 1
-            time.sleep(1)  # 避免请求过快
+            self.current_page += 1  # 请求频率由 fetch_page 中的限速器控制
         
-        print(f"\n总共提取了 {len(self.companies_data)} 条企业信息")
+        log.info("总共提取了 %s 条企业信息", len(self.companies_data))
         return {
             'title': data.get('title', '企知道') if 'data' in locals() else '企知道',
             'total_results': len(self.companies_data),
-            'total_pages': self.current_page - 1,
+            'total_pages': self.current_page - self.start_page,
+            'page_size': self.page_size,
             'companies': self.companies_data
         }
     
-    def save_to_json(self, data, filename=None):
-        """保存数据到JSON文件"""
+    def save_to_json(self, data, filename=None, pretty=False, compression=None):
+        """
+        保存数据到JSON文件
+        
+        Args:
+            data: 爬取结果
+            filename: 文件名，默认 qizhidao_data_时间戳.json
+            pretty: 是否缩进输出（默认紧凑格式）
+            compression: 'gzip' 或 'zstd' 时边写边压缩（文件名自动加上 .gz / .zst）
+        """
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"qizhidao_data_{timestamp}.json"
@@ -336,55 +377,66 @@ class QizhidaoTableSpider:
                 'title': data.get('title', '企知道'),
                 'total_results': data.get('total_results', len(data.get('companies', []))),
                 'total_pages': data.get('total_pages', 1),
+                'page_size': data.get('page_size'),
                 'url': self.base_url,
                 'crawl_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             },
-            'companies': data.get('companies', []),
+            'companies': data.get('companies') or [],
             'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=2)
+        # 企业数据按块编码后逐块写出（有 orjson 时使用 orjson）
+        from json_writer import write_json
+        filename = write_json(filename, output_data, pretty=pretty, compression=compression)
         
-        print(f"数据已保存到: {filename}")
+        log.info("数据已保存到: %s", filename)
         return filename
     
     def save_to_excel(self, data, filename=None):
-        """保存数据到Excel文件"""
+        """保存数据到Excel文件，返回生成的文件列表（超过每个文件的行数上限时不止一个）"""
         if not data.get('companies'):
-            print("没有数据可保存")
-            return None
+            log.info("没有数据可保存")
+            return []
         
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"qizhidao_data_{timestamp}.xlsx"
         
-        df = pd.DataFrame(data['companies'])
-        df.to_excel(filename, index=False, engine='openpyxl')
+        # openpyxl只在导出Excel时才需要，延迟导入以加快启动
+        from excel_sink import write_excel
+        files = write_excel(filename, data['companies'])
         
-        print(f"数据已保存到: {filename}")
-        return filename
+        log.info("数据已保存到: %s", ', '.join(files))
+        return files
     
-    def run(self, save_json=True, save_excel=True):
-        """运行爬虫"""
+    def run(self, save_json=True, save_excel=True, output_dir=None, json_compression=None):
+        """
+        运行爬虫
+        
+        Args:
+            save_json: 是否保存JSON文件
+            save_excel: 是否保存Excel文件
+            output_dir: 输出目录，默认为当前目录（批量模式下每个任务一个目录）
+            json_compression: JSON文件的压缩方式（'gzip' 或 'zstd'），None表示不压缩
+        """
         # 爬取所有页面
         data = self.crawl_all_pages()
         
         if not data or not data.get('companies'):
-            print("没有获取到数据")
+            log.info("没有获取到数据")
             return None
         
         # 保存数据
         files = []
+        from batch_runner import output_file_names
+        json_file_name, excel_file_name = output_file_names(output_dir)
         if save_json:
-            json_file = self.save_to_json(data)
+            json_file = self.save_to_json(data, json_file_name, compression=json_compression)
             if json_file:
                 files.append(json_file)
         
         if save_excel:
-            excel_file = self.save_to_excel(data)
-            if excel_file:
-                files.append(excel_file)
+            files.extend(self.save_to_excel(data, excel_file_name))
         
         return {
             'data': data,
@@ -398,14 +450,14 @@ def main():
     result = spider.run()
     
     if result:
-        print("\n" + "=" * 50)
-        print("爬取完成！")
-        print("=" * 50)
-        print(f"提取了 {len(result['data']['companies'])} 条企业信息")
-        print(f"爬取了 {result['data'].get('total_pages', 1)} 页")
-        print(f"生成文件: {', '.join(result['files'])}")
+        log.info('=' * 50)
+        log.info("爬取完成！")
+        log.info('=' * 50)
+        log.info("提取了 %s 条企业信息", len(result['data']['companies']))
+        log.info("爬取了 %s 页", result['data'].get('total_pages', 1))
+        log.info("生成文件: %s", ', '.join(result['files']))
     else:
-        print("\n爬取失败，请检查网络连接和URL是否正确")
+        log.error("爬取失败，请检查网络连接和URL是否正确")
 
 
 if __name__ == "__main__":
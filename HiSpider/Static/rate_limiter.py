@@ -0,0 +1,282 @@
+"""
+自适应限速器
+令牌桶 + AIMD（加性增、乘性减）：请求顺利时缓慢提速，遇到429/503、延迟飙升或验证码时成倍降速，
+并遵守服务器返回的 Retry-After。同一主机的所有并发抓取线程共享一个限速器实例
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from crawl_log import get_logger
+
+log = get_logger('rate_limiter')
+
+
+# 视为"服务器要求降速"的HTTP状态码
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+def parse_retry_after(value):
+    """
+    解析 Retry-After 头（秒数或HTTP日期），返回需要等待的秒数，无法解析时返回None
+    """
+    if value is None:
+        return None
+    value = str(value).strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AdaptiveRateLimiter:
+    """线程安全的自适应令牌桶限速器"""
+
+    def __init__(self, initial_rate=1.0, min_rate=0.05, max_rate=5.0, burst=1,
+                 increase_step=0.05, decrease_factor=0.5, captcha_factor=0.25,
+                 latency_spike_factor=3.0, jitter=0.0):
+        """
+        Args:
+            initial_rate: 初始速率（请求/秒）
+            min_rate: 最低速率
+            max_rate: 最高速率
+            burst: 令牌桶容量（允许的突发请求数）
+            increase_step: 每次成功请求后增加的速率（加性增）
+            decrease_factor: 被限流或延迟飙升时速率乘以的系数（乘性减）
+            captcha_factor: 遇到验证码时速率乘以的系数（比普通限流更严厉）
+            latency_spike_factor: 响应时间超过平均值的多少倍视为延迟飙升
+            jitter: 每次获取令牌后额外随机等待的比例（相对当前请求间隔），用于模拟人类行为
+        """
+        self.settings = {'initial_rate': initial_rate, 'min_rate': min_rate, 'max_rate': max_rate, 'burst': burst,
+                         'increase_step': increase_step, 'decrease_factor': decrease_factor,
+                         'captcha_factor': captcha_factor, 'latency_spike_factor': latency_spike_factor,
+                         'jitter': jitter}
+        self._merged = set()  # 已合并过的其他设置，同样的设置只合并并警告一次
+        self.rate = float(initial_rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate)
+        self.burst = max(1, int(burst))
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.captcha_factor = captcha_factor
+        self.latency_spike_factor = latency_spike_factor
+        self.jitter = jitter
+
+        self._lock = threading.Lock()
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._latency_avg = None  # 响应时间的指数移动平均
+
+        # 统计信息
+        self.stats = {'acquired': 0, 'waited_seconds': 0.0, 'increases': 0,
+                      'decreases': 0, 'throttled': 0, 'captchas': 0, 'failures': 0}
+
+    def _refill(self, now):
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._last_refill = now
+
+    def acquire(self):
+        """阻塞直到获得一个令牌，返回实际等待的秒数"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    self.stats['acquired'] += 1
+                    self.stats['waited_seconds'] += waited
+                    extra = random.uniform(0, self.jitter / self.rate) if self.jitter else 0.0
+                    break
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+        if extra:
+            time.sleep(extra)
+            waited += extra
+        return waited
+
+    def _decrease(self, factor):
+        self.rate = max(self.min_rate, self.rate * factor)
+        # 降速后清空积攒的令牌，避免降速立即被突发抵消
+        self._tokens = min(self._tokens, 0.0)
+        self.stats['decreases'] += 1
+
+    def record_success(self, latency=None):
+        """记录一次成功请求（加性增；延迟飙升时乘性减）"""
+        with self._lock:
+            if latency is not None:
+                if self._latency_avg is not None and latency > self._latency_avg * self.latency_spike_factor:
+                    self._decrease(self.decrease_factor)
+                    # 飙升的样本不计入平均值，以免抬高基线
+                    return
+                self._latency_avg = latency if self._latency_avg is None else (
+                    0.8 * self._latency_avg + 0.2 * latency)
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + self.increase_step)
+                self.stats['increases'] += 1
+
+    def record_throttle(self, retry_after=None):
+        """记录一次被限流（429/503），可附带 Retry-After 秒数"""
+        with self._lock:
+            self.stats['throttled'] += 1
+            self._decrease(self.decrease_factor)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+    def record_failure(self):
+        """记录一次超时或连接错误（服务器可能已过载，乘性减）"""
+        with self._lock:
+            self.stats['failures'] += 1
+            self._decrease(self.decrease_factor)
+
+    def record_captcha(self):
+        """记录一次验证码/人机校验（大幅降速）"""
+        with self._lock:
+            self.stats['captchas'] += 1
+            self._decrease(self.captcha_factor)
+
+    def on_response(self, status_code=None, latency=None, headers=None, captcha=False):
+        """
+        根据一次响应的结果调整速率
+
+        Args:
+            status_code: HTTP状态码（Selenium等无状态码的场景传None）
+            latency: 响应耗时（秒）
+            headers: 响应头，用于读取 Retry-After
+            captcha: 是否检测到验证码
+        """
+        if captcha:
+            self.record_captcha()
+        elif status_code in THROTTLE_STATUS_CODES:
+            retry_after = parse_retry_after(headers.get('Retry-After')) if headers else None
+            self.record_throttle(retry_after)
+        elif status_code is None or status_code < 400:
+            self.record_success(latency)
+
+    def merge_settings(self, **kwargs):
+        """
+        合并另一个调用方对同一主机提出的设置（参数同构造函数），取更保守的一方：
+        当前速率不超过对方的初始速率，最高速率取较小值，抖动取较大值，其余参数保持首次创建时的值
+
+        Returns:
+            dict: 与首次创建时不同的参数 {参数名: (创建时的值, 请求的值)}，已合并过的同样设置返回空字典
+        """
+        differences = {name: (self.settings.get(name), value) for name, value in kwargs.items()
+                       if self.settings.get(name) != value}
+        key = frozenset(differences.items())
+        with self._lock:
+            if not differences or key in self._merged:
+                return {}
+            self._merged.add(key)
+            if 'max_rate' in differences:
+                self.max_rate = min(self.max_rate, float(kwargs['max_rate']))
+            if 'initial_rate' in differences:
+                self.rate = min(self.rate, float(kwargs['initial_rate']))
+            self.rate = max(self.min_rate, min(self.rate, self.max_rate))
+            if 'jitter' in differences:
+                self.jitter = max(self.jitter, kwargs['jitter'])
+        return differences
+
+    def __repr__(self):
+        return f"AdaptiveRateLimiter(rate={self.rate:.2f}/s)"
+
+
+def host_key(url_or_host):
+    """URL或主机名 -> 统一的小写主机名（按主机共享的对象都以它为键）"""
+    host = urlparse(url_or_host).netloc if '://' in url_or_host else url_or_host
+    return host.lower()
+
+
+class HostRegistry:
+    """按主机共享对象的线程安全注册表（限速器、熔断器等）"""
+
+    def __init__(self, factory):
+        """
+        Args:
+            factory: 首次请求某主机时调用 factory(**kwargs) 创建对象
+        """
+        self.factory = factory
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, url_or_host, **kwargs):
+        """
+        Returns:
+            tuple: (对象, 是否本次新建)
+        """
+        host = host_key(url_or_host)
+        with self._lock:
+            item = self._items.get(host)
+            if item is None:
+                item = self._items[host] = self.factory(**kwargs)
+                return item, True
+            return item, False
+
+
+_host_limiters = HostRegistry(AdaptiveRateLimiter)
+
+# 本进程在同一主机总速率中所占的份额（批量模式中N个进程各取1/N，合计不超过单进程的速率）
+_rate_share = 1.0
+
+
+def set_rate_share(share):
+    """
+    设置本进程的速率份额，之后创建或合并的主机限速器按份额缩放初始速率和最高速率
+
+    每个进程有自己的限速器实例，进程池并发时不设置份额会使对主机的总请求速率随进程数成倍增加
+
+    Args:
+        share: 份额，(0, 1] 之间，大于1按1处理
+    """
+    global _rate_share
+    share = float(share)
+    if share <= 0:
+        raise ValueError(f"速率份额必须大于0: {share}")
+    _rate_share = min(1.0, share)
+
+
+def _scaled(kwargs):
+    if _rate_share >= 1.0:
+        return kwargs
+    kwargs = dict(kwargs)
+    kwargs['initial_rate'] = kwargs.get('initial_rate', 1.0) * _rate_share
+    kwargs['max_rate'] = kwargs.get('max_rate', 5.0) * _rate_share
+    return kwargs
+
+
+def get_host_limiter(url_or_host, **kwargs):
+    """
+    获取某主机共享的限速器（首次调用时按 kwargs 创建）
+
+    之后的调用方给出不同的设置时不会被静默忽略：速率、最高速率和抖动按更保守的一方合并
+    （见 AdaptiveRateLimiter.merge_settings），并输出警告
+
+    Args:
+        url_or_host: URL或主机名
+        **kwargs: 传给 AdaptiveRateLimiter 的参数（速率按 set_rate_share 设置的份额缩放）
+    """
+    kwargs = _scaled(kwargs)
+    limiter, created = _host_limiters.get(url_or_host, **kwargs)
+    differences = limiter.merge_settings(**kwargs) if kwargs and not created else {}
+    if differences:
+        log.warning("主机 %s 的限速器已按其他设置创建，合并为更保守的设置: %s（现为 %r）", host_key(url_or_host),
+                    ', '.join(f"{name} {old} / {new}" for name, (old, new) in differences.items()), limiter)
+    return limiter
@@ -0,0 +1,214 @@
+"""
+重试策略
+迭代式重试引擎：去相关抖动退避（decorrelated jitter）、每次运行的重试预算，
+以及按主机共享的熔断器（连续失败后暂停该主机，快速失败而不是逐次睡眠重试）
+"""
+
+import random
+import threading
+import time
+
+from rate_limiter import HostRegistry
+
+
+# 可重试的HTTP状态码
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，请求被直接拒绝"""
+
+    def __init__(self, retry_in):
+        self.retry_in = retry_in
+        super().__init__(f"熔断器已打开，{retry_in:.0f} 秒后再尝试")
+
+
+def default_should_retry(error):
+    """默认的重试判断：带响应的错误只重试特定状态码，其余（超时、连接错误等）都重试"""
+    response = getattr(error, 'response', None)
+    status_code = getattr(response, 'status_code', None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    return True
+
+
+class CircuitBreaker:
+    """
+    熔断器：连续失败达到阈值后打开，冷却期内直接拒绝请求；
+    冷却结束后进入半开状态，只放行一个探测请求，成功则关闭，失败则再次打开
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=60.0):
+        """
+        Args:
+            failure_threshold: 连续失败多少次后打开
+            reset_timeout: 打开后的冷却时间（秒）
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """当前是否允许发出请求"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def retry_in(self):
+        """距离允许下一次探测还有多少秒"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """一次运行内可用的重试总次数，防止重试风暴放大封禁"""
+
+    def __init__(self, max_retries=20):
+        self.max_retries = max_retries
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def try_spend(self):
+        """尝试消耗一次重试额度，额度不足时返回False"""
+        with self._lock:
+            if self.used >= self.max_retries:
+                return False
+            self.used += 1
+            return True
+
+    @property
+    def remaining(self):
+        return max(0, self.max_retries - self.used)
+
+
+class RetryPolicy:
+    """可复用的重试策略对象"""
+
+    def __init__(self, max_retries=3, base_delay=1.0, max_delay=30.0,
+                 budget=None, breaker=None, should_retry=default_should_retry, rng=None):
+        """
+        Args:
+            max_retries: 单次调用的最大重试次数
+            base_delay: 退避的基础时间（秒）
+            max_delay: 单次退避的上限（秒）
+            budget: RetryBudget，整个运行共享；None表示不限
+            breaker: CircuitBreaker，同一主机共享；None表示不熔断
+            should_retry: 判断异常是否可重试的函数
+            rng: 可选的 random.Random 实例，便于复现
+        """
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.breaker = breaker
+        self.should_retry = should_retry
+        self._rng = rng or random.Random()
+        self.stats = {'calls': 0, 'attempts': 0, 'retries': 0, 'successes': 0,
+                      'failures': 0, 'retry_sleep_seconds': 0.0,
+                      'budget_exhausted': 0, 'circuit_rejections': 0}
+
+    def next_delay(self, previous_delay):
+        """去相关抖动：在 [base, 上次延迟*3] 之间随机取值，并限制在上限以内"""
+        upper = max(self.base_delay, previous_delay * 3)
+        return min(self.max_delay, self._rng.uniform(self.base_delay, upper))
+
+    def run(self, operation, on_retry=None):
+        """
+        执行操作，失败时按策略重试
+
+        Args:
+            operation: 无参可调用对象，成功返回结果，失败抛出异常
+            on_retry: 可选回调 on_retry(重试序号, 异常, 退避秒数)
+
+        Returns:
+            operation 的返回值
+
+        Raises:
+            CircuitOpenError: 熔断器打开，请求未发出
+            最后一次失败的原始异常：不可重试、达到重试上限或预算用完
+        """
+        self.stats['calls'] += 1
+        delay = self.base_delay
+        attempt = 0
+        while True:
+            if self.breaker is not None and not self.breaker.allow():
+                self.stats['circuit_rejections'] += 1
+                raise CircuitOpenError(self.breaker.retry_in())
+
+            self.stats['attempts'] += 1
+            try:
+                result = operation()
+            except Exception as error:
+                retryable = self.should_retry(error)
+                if self.breaker is not None:
+                    if retryable:
+                        self.breaker.record_failure()
+                    else:
+                        # 主机有正常响应，只是该请求本身不可重试（如404）
+                        self.breaker.record_success()
+                if not retryable or attempt >= self.max_retries:
+                    self.stats['failures'] += 1
+                    raise
+                if self.budget is not None and not self.budget.try_spend():
+                    self.stats['budget_exhausted'] += 1
+                    self.stats['failures'] += 1
+                    raise
+                attempt += 1
+                delay = self.next_delay(delay)
+                self.stats['retries'] += 1
+                self.stats['retry_sleep_seconds'] += delay
+                if on_retry:
+                    on_retry(attempt, error, delay)
+                time.sleep(delay)
+                continue
+
+            if self.breaker is not None:
+                self.breaker.record_success()
+            self.stats['successes'] += 1
+            return result
+
+
+_host_breakers = HostRegistry(CircuitBreaker)
+
+
+def get_host_breaker(url_or_host, **kwargs):
+    """
+    获取某主机共享的熔断器（首次调用时按 kwargs 创建）
+
+    Args:
+        url_or_host: URL或主机名
+        **kwargs: 传给 CircuitBreaker 的参数，仅在首次创建时生效
+    """
+    return _host_breakers.get(url_or_host, **kwargs)[0]
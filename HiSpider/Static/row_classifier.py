@@ -0,0 +1,148 @@
+"""
+表格行分类器
+每个单元格的文本和链接只提取一次，用预编译的关键词匹配器识别表头行，
+并在整个爬取过程中缓存已识别的表头签名（同样的表头行再次出现时直接命中）
+"""
+
+import re
+
+
+# 表头关键词（用于识别重复的表头行）
+HEADER_KEYWORDS = ['序号', '企业名称', '企业名', '公司名称', '登记状态', '统一社会信',
+                   '法定代表人', '成立日期', '注册资本', '实缴资本', '核准日期',
+                   '营业期限', '所属省份', '所属城市', '所属区县', '电话', '邮箱',
+                   '纳税人识', '纳税人识别']
+
+_CELL_TAGS = ('td', 'th')
+
+# 行的分类结果
+HEADER = 'header'                  # 表头行（包含多个表头关键词的短文本行，可出现在任意位置）
+LEADING_HEADER = 'leading_header'  # 前两行中的表头行（较宽松的判断）
+EMPTY = 'empty'                    # 单元格不足、空行或无效行
+DATA = 'data'                      # 数据行
+
+
+class KeywordMatcher:
+    """
+    预编译的多关键词匹配器
+
+    所有关键词编译为一个按长度降序排列的前瞻正则（在每个位置匹配最长的关键词），
+    再用预先计算的"包含关系"补全同一位置上被更长关键词覆盖的短关键词，
+    结果与逐个关键词做 `keyword in text` 完全一致，但只扫描一遍文本
+    """
+
+    def __init__(self, keywords):
+        self.keywords = tuple(dict.fromkeys(keywords))
+        ordered = sorted(self.keywords, key=len, reverse=True)
+        self._pattern = re.compile('(?=(' + '|'.join(re.escape(k) for k in ordered) + '))')
+        # 每个关键词出现时，其中包含的其他关键词也一定出现
+        self._implied = {k: frozenset(other for other in self.keywords if other in k)
+                         for k in self.keywords}
+
+    def find_all(self, text):
+        """返回文本中出现的所有关键词"""
+        found = set()
+        for match in self._pattern.finditer(text):
+            found |= self._implied[match.group(1)]
+        return found
+
+    def count(self, text):
+        """文本中出现的不同关键词个数"""
+        return len(self.find_all(text))
+
+    def contains_any(self, text):
+        """文本中是否出现任一关键词"""
+        return self._pattern.search(text) is not None
+
+
+class RowClassifier:
+    """表格行分类器（一次爬取共用一个实例，以便复用表头签名缓存）"""
+
+    def __init__(self, keywords=HEADER_KEYWORDS, leading_keywords=None,
+                 min_keywords=3, max_header_text=20):
+        """
+        Args:
+            keywords: 表头关键词
+            leading_keywords: 前两行使用的宽松关键词，默认取前5个表头关键词
+            min_keywords: 包含多少个不同关键词时视为表头行
+            max_header_text: 表头单元格文本的最大长度
+        """
+        self.matcher = KeywordMatcher(keywords)
+        self.leading_matcher = KeywordMatcher(leading_keywords or list(keywords)[:5])
+        self.min_keywords = min_keywords
+        self.max_header_text = max_header_text
+        self.header_signatures = set()  # 已识别的表头行（单元格文本元组）
+        self.stats = {'rows': 0, HEADER: 0, LEADING_HEADER: 0, EMPTY: 0, DATA: 0,
+                      'signature_hits': 0}
+
+    @staticmethod
+    def extract_cells(row):
+        """
+        提取一行中每个单元格的文本和链接（每个单元格只提取一次）
+
+        Returns:
+            list: [(文本, 链接或None), ...]
+        """
+        # 直接遍历子孙节点，等价于 find_all(['td', 'th']) 和 find('a')，但省去每次构造匹配规则的开销
+        return [RowClassifier.extract_cell(cell) for cell in row.descendants
+                if cell.name in _CELL_TAGS]
+
+    @staticmethod
+    def extract_cell(cell):
+        """提取单个单元格的 (文本, 链接或None)，单元格为None时返回空单元格"""
+        if cell is None:
+            return '', None
+        href = None
+        for node in cell.descendants:
+            if node.name == 'a':
+                href = node.get('href')
+                break
+        return cell.get_text(strip=True), href or None
+
+    def classify(self, cells, index=0, header_length=0, header_skipped=True):
+        """
+        判断一行的类型
+
+        Args:
+            cells: extract_cells 的返回值
+            index: 行在当前页中的序号（从0开始）
+            header_length: 表头列数
+            header_skipped: 当前页是否已经跳过了开头的表头行
+
+        Returns:
+            str: HEADER / LEADING_HEADER / EMPTY / DATA
+        """
+        kind = self._classify(cells, index, header_length, header_skipped)
+        self.stats['rows'] += 1
+        self.stats[kind] += 1
+        return kind
+
+    def _classify(self, cells, index, header_length, header_skipped):
+        if len(cells) < 2:
+            return EMPTY
+
+        texts = tuple(text for text, _ in cells)
+        if texts in self.header_signatures:
+            self.stats['signature_hits'] += 1
+            return HEADER
+
+        row_text = ' '.join(texts)
+
+        # 方法1: 包含多个表头关键词，且没有链接、文本都较短，很可能是表头
+        if self.matcher.count(row_text) >= self.min_keywords:
+            if (not any(href for _, href in cells)
+                    and all(len(text) <= self.max_header_text for text in texts)):
+                self.header_signatures.add(texts)
+                return HEADER
+
+        # 方法2: 对于前两行，使用更宽松的判断（兼容第一行表头）
+        if not header_skipped and index < 2 and self.leading_matcher.contains_any(row_text):
+            if index == 0 or (header_length and len(cells) == header_length):
+                self.header_signatures.add(texts)
+                return LEADING_HEADER
+
+        # 有效单元格少于2个，或者没有超过一个字符的内容，认为是空行或无效行
+        non_empty = [text for text in texts if text]
+        if len(non_empty) < 2 or not any(len(text) > 1 for text in non_empty):
+            return EMPTY
+        return DATA
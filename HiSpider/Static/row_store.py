@@ -0,0 +1,163 @@
+"""
+紧凑的行存储
+列名（表头、链接列、页码等）在整个爬取过程中只保存一份，每行的所有值打包成一个字符串，
+只有在导出或访问单行时才临时还原成字典
+"""
+
+import re
+
+
+class _Missing:
+    """占位符：表示该行没有这一列（区别于值为None）"""
+
+    __slots__ = ()
+
+    def __repr__(self):
+        return '<missing>'
+
+
+MISSING = _Missing()
+
+# 打包格式：字段之间用 \x1f 分隔，\x1e 表示缺失列，\x1d 前缀表示整数
+_SEP = '\x1f'
+_MISSING_FIELD = '\x1e'
+_INT_PREFIX = '\x1d'
+_CONTROL_CHARS = re.compile('[\x1d\x1e\x1f]')
+
+
+def _pack(values):
+    """
+    把一行的值打包成单个字符串，无法无损打包时返回None
+
+    每个Python字符串对象都有几十字节的固定开销，一行十几个字段打包后只剩一个对象
+    """
+    fields = []
+    for value in values:
+        if value is MISSING:
+            fields.append(_MISSING_FIELD)
+        elif type(value) is str:
+            if _CONTROL_CHARS.search(value):
+                return None
+            fields.append(value)
+        elif type(value) is int:
+            fields.append(_INT_PREFIX + str(value))
+        else:
+            return None
+    return _SEP.join(fields)
+
+
+def _unpack(packed):
+    values = []
+    for field in packed.split(_SEP):
+        if field == _MISSING_FIELD:
+            values.append(MISSING)
+        elif field[:1] == _INT_PREFIX:
+            values.append(int(field[1:]))
+        else:
+            values.append(field)
+    return values
+
+
+class RowStore:
+    """
+    模式感知的行存储，接口与 list[dict] 基本兼容
+
+    支持 append/extend/len/迭代/下标访问，迭代和下标访问返回字典视图；
+    导出时使用 to_dicts() 或 iter_tuples() 避免重复构造
+    """
+
+    def __init__(self, rows=None):
+        self._columns = []  # 列名，按首次出现的顺序
+        self._index = {}    # 列名 -> 列位置
+        self._rows = []     # 每行一个打包字符串（含特殊值时退回为元组）
+        if rows:
+            self.extend(rows)
+
+    @property
+    def columns(self):
+        """当前所有列名（按首次出现的顺序）"""
+        return list(self._columns)
+
+    def _column_position(self, name):
+        position = self._index.get(name)
+        if position is None:
+            position = len(self._columns)
+            self._columns.append(name)
+            self._index[name] = position
+        return position
+
+    def append(self, row):
+        """追加一行（字典）"""
+        positions = [(self._column_position(key), value) for key, value in row.items()]
+        values = [MISSING] * len(self._columns)
+        for position, value in positions:
+            values[position] = value
+        # 去掉末尾缺失的列，早期行不必为后来出现的列占位
+        while values and values[-1] is MISSING:
+            values.pop()
+        packed = _pack(values) if values else None
+        self._rows.append(packed if packed is not None else tuple(values))
+
+    def extend(self, rows):
+        """追加多行"""
+        for row in rows:
+            self.append(row)
+
+    def _values(self, stored):
+        return _unpack(stored) if type(stored) is str else stored
+
+    def _to_dict(self, stored):
+        columns = self._columns
+        return {columns[i]: value for i, value in enumerate(self._values(stored))
+                if value is not MISSING}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __bool__(self):
+        return bool(self._rows)
+
+    def __iter__(self):
+        for stored in self._rows:
+            yield self._to_dict(stored)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._to_dict(stored) for stored in self._rows[index]]
+        return self._to_dict(self._rows[index])
+
+    def iter_tuples(self, columns=None, fill=None):
+        """
+        按指定列顺序逐行产出值元组，缺失的列用 fill 填充
+
+        Args:
+            columns: 列名列表，默认使用全部列
+            fill: 缺失值的填充值
+        """
+        columns = list(columns) if columns is not None else list(self._columns)
+        positions = [self._index.get(name) for name in columns]
+        for stored in self._rows:
+            values = self._values(stored)
+            width = len(values)
+            yield tuple(
+                values[p] if p is not None and p < width and values[p] is not MISSING else fill
+                for p in positions
+            )
+
+    def to_dicts(self):
+        """还原成 list[dict]，仅在导出时使用"""
+        return [self._to_dict(stored) for stored in self._rows]
+
+    def clear(self):
+        """清空所有行（保留列模式）"""
+        self._rows.clear()
+
+    def __repr__(self):
+        return f"RowStore(rows={len(self._rows)}, columns={len(self._columns)})"
+
+
+def as_dict_rows(rows):
+    """把 RowStore 或任意行序列转换为 list[dict]，供JSON/Excel导出使用"""
+    if isinstance(rows, RowStore):
+        return rows.to_dicts()
+    return list(rows or [])
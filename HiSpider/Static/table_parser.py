@@ -0,0 +1,210 @@
+"""
+表格页面解析器
+表格爬虫的HTML解析逻辑（只依赖 bs4/lxml），既供爬虫在主进程中直接调用，
+也可以在解析进程池的子进程中运行：本模块不导入 requests 等抓取依赖，spawn 启动的子进程只加载本模块和 bs4/lxml
+"""
+
+import re
+
+from bs4 import BeautifulSoup
+
+from el_table import find_el_table, align_cells
+from extraction_schema import ExtractionPlanner, DEFAULT_HEADERS
+
+
+# 本进程共用的抽取计划缓存：同一表头只编译一次（进程池中每个工作进程各有一份）
+_PLANNER = ExtractionPlanner()
+
+_PAGE_PATTERNS = [
+    re.compile(r'共\s*(\d+)\s*页', re.I),
+    re.compile(r'(\d+)\s*页', re.I),
+    re.compile(r'页\s*(\d+)', re.I),
+]
+
+_TOTAL_PATTERNS = [
+    re.compile(r'共[:\s]*(\d+)', re.I),
+    re.compile(r'总计[:\s]*(\d+)', re.I),
+    re.compile(r'总数[:\s]*(\d+)', re.I),
+    re.compile(r'共找到[:\s]*(\d+)', re.I),
+]
+
+_PAGE_SIZE_PATTERN = re.compile(r'(\d+)\s*条\s*/\s*页')
+
+
+def find_title(soup):
+    """页面标题，没有时返回"企知道" """
+    title = soup.find('title')
+    return title.text.strip() if title else "企知道"
+
+
+def find_total_pages(soup):
+    """从分页组件中提取总页数，找不到分页信息时返回None"""
+    pagination = soup.find('ul', class_=re.compile(r'pagination|page', re.I))
+    if not pagination:
+        pagination = soup.find('div', class_=re.compile(r'pagination|page', re.I))
+    if not pagination:
+        return None
+
+    # 查找所有页码元素，取最大的页码
+    max_page = 0
+    for page_li in pagination.find_all('li', class_='number'):
+        page_text = page_li.get_text(strip=True)
+        if page_text.isdigit():
+            max_page = max(max_page, int(page_text))
+    if max_page > 0:
+        return max_page
+
+    # 尝试从文本中提取总页数
+    pagination_text = pagination.get_text()
+    for pattern in _PAGE_PATTERNS:
+        match = pattern.search(pagination_text)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def find_total_results(soup):
+    """从页面文本中提取结果总数，找不到时返回None"""
+    page_text = soup.get_text()
+    for pattern in _TOTAL_PATTERNS:
+        match = pattern.search(page_text)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def find_page_sizes(soup):
+    """从分页组件的每页条数选择器（el-pagination__sizes）中提取可选的每页条数"""
+    sizes = set()
+    for element in soup.select('.el-pagination__sizes, .el-select-dropdown__item'):
+        sizes.update(int(n) for n in _PAGE_SIZE_PATTERN.findall(element.get_text(' ')))
+        for option in element.select('input[value], option[value]'):
+            sizes.update(int(n) for n in _PAGE_SIZE_PATTERN.findall(option.get('value', '')))
+    return sorted(sizes)
+
+
+def parse_table_rows(soup, base_url, page, planner=None):
+    """
+    解析表格数据行
+
+    Args:
+        soup: 页面的 BeautifulSoup 对象
+        base_url: 用于补全相对链接的基础URL
+        page: 写入每行"页码"字段的页码
+        planner: 抽取计划缓存（ExtractionPlanner），默认使用本进程共用的默认模式
+
+    Returns:
+        list: 企业数据字典列表
+    """
+    planner = planner or _PLANNER
+
+    # Element UI 表格：表头和表体是两个表格，固定列还有副本，按列编号对齐后只读主表体
+    el = find_el_table(soup)
+    if el and el[1]:
+        return _parse_el_table_rows(el, base_url, page, planner)
+
+    # 查找企业信息表格
+    table = soup.find('table')
+    if not table:
+        table = soup.find('div', class_='table-container')
+        if table:
+            table = table.find('table')
+
+    if not table:
+        return []
+
+    # 提取表头
+    headers = []
+    thead = table.find('thead')
+    if thead:
+        header_row = thead.find('tr')
+        if header_row:
+            headers = [th.get_text(strip=True) for th in header_row.find_all(['th', 'td'])]
+
+    # 按表头编译抽取计划（没有表头时使用模式中的默认列顺序）
+    plan = planner.plan_for(headers)
+    width = len(headers or DEFAULT_HEADERS)
+
+    # 提取数据行
+    tbody = table.find('tbody')
+    if not tbody:
+        tbody = table
+
+    page_data = []
+    for row in tbody.find_all('tr'):
+        cells = planner.cells(row)
+        if len(cells) < 2:
+            continue
+
+        # 跳过表头行
+        if len(cells) == width and any(keyword in text for text, _ in cells
+                                       for keyword in ('序号', '名称', '企业')):
+            continue
+
+        company_data = plan.extract(cells, base_url)
+        if company_data:
+            company_data['页码'] = page
+            page_data.append(company_data)
+
+    return page_data
+
+
+def _parse_el_table_rows(el, base_url, page, planner):
+    header_list, rows = el
+    headers = [text or f"列{i + 1}" for i, (_, text) in enumerate(header_list)]
+    header_keys = [key for key, _ in header_list]
+    plan = planner.plan_for(headers)
+    cell = planner.cell
+
+    page_data = []
+    for row in rows:
+        company_data = plan.extract([cell(td) for td in align_cells(row, header_keys)], base_url)
+        if company_data:
+            company_data['页码'] = page
+            page_data.append(company_data)
+
+    return page_data
+
+
+def parse_page_html(content, base_url, page, with_page_sizes=False):
+    """
+    解析一个完整页面（进程池中的工作函数）
+
+    为了降低进程间通信开销，输入是原始字节，输出只包含基本类型：
+    行数据用一份列名加若干元组表示（缺失的字段为None），而不是逐行的字典
+
+    Args:
+        content: 页面HTML（bytes 或 str）
+        base_url: 用于补全相对链接的基础URL
+        page: 页码
+        with_page_sizes: 是否同时提取可选的每页条数
+
+    Returns:
+        dict: title, total_pages, total_results, page_sizes, columns, rows
+    """
+    if isinstance(content, bytes):
+        soup = BeautifulSoup(content, 'lxml', from_encoding='utf-8')
+    else:
+        soup = BeautifulSoup(content, 'lxml')
+
+    page_data = parse_table_rows(soup, base_url, page)
+    columns = {}
+    for item in page_data:
+        for key in item:
+            columns.setdefault(key, len(columns))
+    rows = [tuple(item.get(column) for column in columns) for item in page_data]
+
+    return {
+        'title': find_title(soup),
+        'total_pages': find_total_pages(soup),
+        'total_results': find_total_results(soup),
+        'page_sizes': find_page_sizes(soup) if with_page_sizes else [],
+        'columns': list(columns),
+        'rows': rows,
+    }
+
+
+def rows_to_dicts(columns, rows):
+    """把 parse_page_html 返回的列名和元组还原为字典列表"""
+    return [{column: value for column, value in zip(columns, row) if value is not None}
+            for row in rows]
@@ -0,0 +1,127 @@
+"""
+内置User-Agent轮换池
+随项目一起发布，完全离线可用，加权随机选择，并为Chromium内核生成匹配的Sec-CH-UA请求头
+"""
+
+import random
+
+
+# (浏览器, 主版本号, 平台, 权重)，权重大致按国内桌面浏览器份额设置
+_AGENT_SPECS = [
+    ('chrome', 124, 'Windows', 22),
+    ('chrome', 123, 'Windows', 14),
+    ('chrome', 122, 'Windows', 8),
+    ('chrome', 124, 'macOS', 8),
+    ('chrome', 123, 'macOS', 5),
+    ('chrome', 124, 'Linux', 2),
+    ('edge', 124, 'Windows', 12),
+    ('edge', 123, 'Windows', 6),
+    ('firefox', 125, 'Windows', 5),
+    ('firefox', 124, 'Windows', 3),
+    ('firefox', 125, 'macOS', 2),
+    ('safari', 17, 'macOS', 5),
+]
+
+_PLATFORM_TOKENS = {
+    'Windows': 'Windows NT 10.0; Win64; x64',
+    'macOS': 'Macintosh; Intel Mac OS X 10_15_7',
+    'Linux': 'X11; Linux x86_64',
+}
+
+# 各浏览器对应的"GREASE"品牌，与真实Chromium的取值保持一致
+_GREASE_BRANDS = {
+    122: ('Not(A:Brand', '24'),
+    123: ('Not:A-Brand', '8'),
+    124: ('Not-A.Brand', '99'),
+}
+
+
+def _build_user_agent(browser, version, platform):
+    """根据浏览器、版本和平台拼出User-Agent字符串"""
+    token = _PLATFORM_TOKENS[platform]
+    if browser == 'chrome':
+        return (f"Mozilla/5.0 ({token}) AppleWebKit/537.36 (KHTML, like Gecko) "
+                f"Chrome/{version}.0.0.0 Safari/537.36")
+    if browser == 'edge':
+        return (f"Mozilla/5.0 ({token}) AppleWebKit/537.36 (KHTML, like Gecko) "
+                f"Chrome/{version}.0.0.0 Safari/537.36 Edg/{version}.0.0.0")
+    if browser == 'firefox':
+        return f"Mozilla/5.0 ({token}; rv:{version}.0) Gecko/20100101 Firefox/{version}.0"
+    return (f"Mozilla/5.0 ({token}) AppleWebKit/605.1.15 (KHTML, like Gecko) "
+            f"Version/{version}.4.1 Safari/605.1.15")
+
+
+def _build_client_hints(browser, version, platform):
+    """生成与User-Agent一致的Sec-CH-UA请求头，只有Chromium内核浏览器会发送"""
+    if browser not in ('chrome', 'edge'):
+        return {}
+    grease_brand, grease_version = _GREASE_BRANDS.get(version, ('Not-A.Brand', '99'))
+    vendor = 'Google Chrome' if browser == 'chrome' else 'Microsoft Edge'
+    brands = [
+        ('Chromium', str(version)),
+        (vendor, str(version)),
+        (grease_brand, grease_version),
+    ]
+    return {
+        'Sec-CH-UA': ', '.join(f'"{name}";v="{ver}"' for name, ver in brands),
+        'Sec-CH-UA-Mobile': '?0',
+        'Sec-CH-UA-Platform': f'"{platform}"',
+    }
+
+
+class UserAgentProfile:
+    """一个浏览器身份：User-Agent及与之匹配的客户端提示头"""
+
+    __slots__ = ('browser', 'version', 'platform', 'weight', 'user_agent', 'client_hints')
+
+    def __init__(self, browser, version, platform, weight):
+        self.browser = browser
+        self.version = version
+        self.platform = platform
+        self.weight = weight
+        self.user_agent = _build_user_agent(browser, version, platform)
+        self.client_hints = _build_client_hints(browser, version, platform)
+
+    def headers(self):
+        """返回该身份专属的请求头（User-Agent + Sec-CH-UA*）"""
+        headers = {'User-Agent': self.user_agent}
+        headers.update(self.client_hints)
+        return headers
+
+    def __repr__(self):
+        return f"UserAgentProfile({self.browser} {self.version}, {self.platform})"
+
+
+# 模块级常量：所有身份在导入时一次性构建，之后的选择不再有任何开销
+PROFILES = tuple(UserAgentProfile(*spec) for spec in _AGENT_SPECS)
+
+
+class UserAgentPool:
+    """加权随机的User-Agent池（可替代 fake_useragent.UserAgent）"""
+
+    def __init__(self, profiles=None, rng=None):
+        """
+        Args:
+            profiles: 可选的身份列表，默认使用内置的 PROFILES
+            rng: 可选的 random.Random 实例，便于复现
+        """
+        self.profiles = tuple(profiles) if profiles else PROFILES
+        self._rng = rng or random.Random()
+        cumulative = []
+        total = 0
+        for profile in self.profiles:
+            total += profile.weight
+            cumulative.append(total)
+        self._cum_weights = cumulative
+
+    def choice(self):
+        """按权重随机选择一个身份"""
+        return self._rng.choices(self.profiles, cum_weights=self._cum_weights)[0]
+
+    @property
+    def random(self):
+        """随机User-Agent字符串（与 fake_useragent 的 .random 用法一致）"""
+        return self.choice().user_agent
+
+    def __len__(self):
+        return len(self.profiles)
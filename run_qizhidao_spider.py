@@ -7,6 +7,7 @@
 import sys
 import os
 import io
+import time
 
 # 设置Windows控制台编码为UTF-8
 if sys.platform == 'win32':
@@ -17,9 +18,14 @@ if sys.platform == 'win32':
 # 添加路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'HiSpider', 'Static'))
 
+import crawl_log
+
+log = crawl_log.get_logger('launcher')
+
 
 def show_menu():
     """显示菜单"""
+    crawl_log.flush()
     print("\n" + "=" * 60)
     print("企知道网站爬虫 - 快速启动脚本")
     print("=" * 60)
@@ -48,34 +54,42 @@ def show_menu():
     print("=" * 60)
 
 
+def _enrich_arg():
+    """命令行中带 enrich 时返回True（详情页补全）"""
+    if any(arg.lower() in ['enrich', 'e', '详情'] for arg in sys.argv[2:]):
+        log.info("启用详情页补全（经营范围、股东、联系方式等）")
+        return True
+    return None
+
+
 def run_basic_spider():
     """运行基础版本爬虫"""
     from qizhidao_spider import QizhidaoSpider
-    print("\n正在启动基础版本爬虫...")
-    spider = QizhidaoSpider()
+    log.info("正在启动基础版本爬虫...")
+    spider = QizhidaoSpider(enrich=_enrich_arg())
     result = spider.run()
     
     if result:
-        print("\n✓ 爬取完成！")
-        print(f"  提取了 {len(result['data']['companies'])} 条企业信息")
-        print(f"  生成文件: {', '.join(result['files'])}")
+        log.info("✓ 爬取完成！")
+        log.info("  提取了 %s 条企业信息", len(result['data']['companies']))
+        log.info("  生成文件: %s", ', '.join(result['files']))
     else:
-        print("\n✗ 爬取失败")
+        log.error("✗ 爬取失败")
 
 
 def run_advanced_spider():
     """运行高级版本爬虫"""
     from qizhidao_advanced_spider import QizhidaoAdvancedSpider
-    print("\n正在启动高级版本爬虫...")
-    spider = QizhidaoAdvancedSpider()
+    log.info("正在启动高级版本爬虫...")
+    spider = QizhidaoAdvancedSpider(enrich=_enrich_arg())
     result = spider.run()
     
     if result:
-        print("\n✓ 爬取完成！")
-        print(f"  提取了 {len(result['data']['companies'])} 条企业信息")
-        print(f"  生成文件: {', '.join(result['files'])}")
+        log.info("✓ 爬取完成！")
+        log.info("  提取了 %s 条企业信息", len(result['data']['companies']))
+        log.info("  生成文件: %s", ', '.join(result['files']))
     else:
-        print("\n✗ 爬取失败")
+        log.error("✗ 爬取失败")
 
 
 def run_table_spider():
@@ -84,18 +98,20 @@ def run_table_spider():
     
     max_pages = None
     is_cmdline_mode = len(sys.argv) > 1
+    enrich = _enrich_arg()
     
     if len(sys.argv) > 2:
         # 从命令行参数获取页数
         try:
             max_pages = int(sys.argv[2])
-            print(f"\n命令行模式：将爬取前 {max_pages} 页")
+            log.info("命令行模式：将爬取前 %s 页", max_pages)
         except ValueError:
             pass
     
     # 只有在非命令行模式或没有指定页数时才需要交互输入
     if not is_cmdline_mode or max_pages is None:
         if max_pages is None:
+            crawl_log.flush()
             print("\n表格数据爬虫配置:")
             print("1. 爬取所有页面（默认）")
             print("2. 指定爬取页数")
@@ -106,26 +122,26 @@ def run_table_spider():
                     try:
                         max_pages = int(input("请输入要爬取的页数: "))
                     except ValueError:
-                        print("输入无效，将爬取所有页面")
+                        log.info("输入无效，将爬取所有页面")
                         max_pages = None
             except (EOFError, KeyboardInterrupt):
-                print("\n使用默认配置：爬取所有页面")
+                log.info("使用默认配置：爬取所有页面")
                 max_pages = None
     else:
         # 命令行模式已指定页数，直接使用
         pass
     
-    print("\n正在启动表格数据爬虫...")
-    spider = QizhidaoTableSpider(max_pages=max_pages)
+    log.info("正在启动表格数据爬虫...")
+    spider = QizhidaoTableSpider(max_pages=max_pages, enrich=enrich or None)
     result = spider.run()
     
     if result:
-        print("\n✓ 爬取完成！")
-        print(f"  提取了 {len(result['data']['companies'])} 条企业信息")
-        print(f"  爬取了 {result['data'].get('total_pages', 1)} 页")
-        print(f"  生成文件: {', '.join(result['files'])}")
+        log.info("✓ 爬取完成！")
+        log.info("  提取了 %s 条企业信息", len(result['data']['companies']))
+        log.info("  爬取了 %s 页", result['data'].get('total_pages', 1))
+        log.info("  生成文件: %s", ', '.join(result['files']))
     else:
-        print("\n✗ 爬取失败")
+        log.error("✗ 爬取失败")
 
 
 def run_smart_spider():
@@ -134,6 +150,11 @@ def run_smart_spider():
     
     headless = False
     interactive = False
+    pipeline = False
+    enrich = False
+    tabs = 1
+    debugger_address = None
+    record_dir = None
     url = None
     
     # 检查命令行参数
@@ -145,20 +166,37 @@ def run_smart_spider():
             arg_lower = arg.lower()
             if arg_lower in ['headless', 'true', '1']:
                 headless = True
-                print("\n使用无头模式运行智能爬虫")
+                log.info("使用无头模式运行智能爬虫")
             elif arg_lower in ['interactive', 'i', '交互']:
                 interactive = True
-                print("\n使用交互模式运行智能爬虫")
+                log.info("使用交互模式运行智能爬虫")
+            elif arg_lower in ['pipeline', 'p', '流水线']:
+                pipeline = True
+                log.info("使用流水线模式（解析与翻页并行）")
+            elif arg_lower in ['enrich', 'e', '详情']:
+                enrich = True
+                log.info("启用详情页补全（经营范围、股东、联系方式等）")
+            elif arg_lower.startswith('tabs=') and arg_lower[5:].isdigit():
+                tabs = int(arg_lower[5:])
+                log.info("使用 %s 个标签页并行翻页", tabs)
+            elif arg_lower == 'attach' or arg_lower.startswith('attach='):
+                from chrome_launcher import debugger_address as default_address
+                debugger_address = arg.split('=', 1)[1] if '=' in arg else default_address()
+                log.info("连接常驻Chrome: %s", debugger_address)
+            elif arg_lower.startswith('record='):
+                record_dir = arg.split('=', 1)[1]
+                log.info("录制每页快照到: %s（可用 --replay-benchmark 离线回放）", record_dir)
             elif arg.startswith('http'):
                 url = arg
-                print(f"\n使用指定URL: {url}")
+                log.info("使用指定URL: %s", url)
     
     if not headless and not interactive:
-        print("\n使用默认配置：有界面模式（便于处理验证码）")
+        log.info("使用默认配置：有界面模式（便于处理验证码）")
     
     # 只有在非命令行模式时才需要交互输入
     if not is_cmdline_mode:
         if not headless:
+            crawl_log.flush()
             print("\n智能爬虫配置:")
             print("1. 有界面模式（推荐，便于处理验证码）")
             print("2. 无头模式（后台运行）")
@@ -171,25 +209,188 @@ def run_smart_spider():
                 elif choice == '3':
                     interactive = True
             except (EOFError, KeyboardInterrupt):
-                print("\n使用默认配置：有界面模式")
+                log.info("使用默认配置：有界面模式")
                 headless = False
     
-    print("\n正在启动智能爬虫...")
+    log.info("正在启动智能爬虫...")
     if interactive:
-        print("注意：交互模式已启用，请在浏览器中准备好结果页面后输入'开始爬取'")
+        log.info("注意：交互模式已启用，请在浏览器中准备好结果页面后输入'开始爬取'")
     else:
-        print("注意：如果遇到验证码，请在浏览器中手动完成验证")
+        log.info("注意：如果遇到验证码，请在浏览器中手动完成验证")
     
-    spider = QizhidaoSmartSpider(url=url, headless=headless, interactive=interactive)
+    spider = QizhidaoSmartSpider(url=url, headless=headless, interactive=interactive, pipeline=pipeline,
+                                 enrich=enrich or None, tabs=tabs, debugger_address=debugger_address,
+                                 record_dir=record_dir)
     result = spider.run()
     
     if result:
-        print("\n✓ 爬取完成！")
-        print(f"  提取了 {len(result['data']['companies'])} 条企业信息")
-        print(f"  爬取了 {result['data'].get('total_pages', 1)} 页")
-        print(f"  生成文件: {', '.join(result['files'])}")
+        log.info("✓ 爬取完成！")
+        log.info("  提取了 %s 条企业信息", len(result['data']['companies']))
+        log.info("  爬取了 %s 页", result['data'].get('total_pages', 1))
+        log.info("  生成文件: %s", ', '.join(result['files']))
     else:
-        print("\n✗ 爬取失败")
+        log.error("✗ 爬取失败")
+
+
+def run_batch_mode(argv):
+    """批量模式：按任务清单并发运行多个爬虫任务"""
+    import argparse
+    from batch_runner import load_manifest, run_batch, parse_concurrency
+    
+    parser = argparse.ArgumentParser(
+        prog='run_qizhidao_spider.py batch',
+        description='按任务清单（URL/matchId列表）并发运行爬虫任务'
+    )
+    parser.add_argument('manifest', help='任务清单文件（.txt 每行一个URL或matchId，或 .json/.jsonl）')
+    parser.add_argument('-o', '--output', default=None,
+                        help='输出目录（默认 batch_output_时间戳）')
+    parser.add_argument('-s', '--spider', default='table',
+                        help='清单未指定时使用的爬虫类型（basic/advanced/table/smart 或 1-4，默认 table）')
+    parser.add_argument('-c', '--concurrency', default='',
+                        help='各爬虫类型的并发进程数，如 table=8,smart=2')
+    args = parser.parse_args(argv)
+    
+    jobs = load_manifest(args.manifest, default_spider=args.spider)
+    if not jobs:
+        log.info("任务清单为空")
+        return
+    
+    output_dir = args.output or f"batch_output_{time.strftime('%Y%m%d_%H%M%S')}"
+    log.info("共 %s 个任务，输出目录: %s", len(jobs), output_dir)
+    summary = run_batch(jobs, output_dir, concurrency=parse_concurrency(args.concurrency), progress=log.info)
+    
+    log.info("✓ 批量任务完成！")
+    log.info("  成功 %s，无数据 %s，失败 %s", summary['succeeded'], summary['empty'], summary['failed'])
+    log.info("  共提取 %s 条企业信息，耗时 %s 秒", summary['total_rows'], summary['elapsed_seconds'])
+    log.info("  汇总清单: %s", summary['summary_file'])
+
+
+def run_worker_mode(argv):
+    """分布式模式：从共享队列领取工作单元爬取，也用于入队、查看进度和合并结果"""
+    import argparse
+    from batch_runner import load_manifest
+    from job_queue import open_backend, plan_units, ResultSink, CrawlWorker
+    
+    parser = argparse.ArgumentParser(
+        prog='run_qizhidao_spider.py worker',
+        description='多个节点共享一个任务队列，各自领取不重叠的 matchId/页码范围进行爬取'
+    )
+    parser.add_argument('-q', '--queue', required=True,
+                        help='队列地址：SQLite文件路径（共享磁盘）或 redis://主机:端口/库号?prefix=前缀')
+    parser.add_argument('-r', '--results', default='worker_results',
+                        help='共享结果目录（默认 worker_results）')
+    parser.add_argument('--enqueue', metavar='清单文件',
+                        help='把清单中的matchId切分为工作单元加入队列后退出')
+    parser.add_argument('--total-pages', type=int, default=None,
+                        help='入队时每个matchId的总页数（已知时按页码范围切分）')
+    parser.add_argument('--pages-per-unit', type=int, default=10,
+                        help='入队时每个工作单元包含的页数（默认 10）')
+    parser.add_argument('--status', action='store_true', help='查看队列进度后退出')
+    parser.add_argument('--merge', metavar='JSON文件', help='把结果目录合并为一个JSON文件后退出')
+    parser.add_argument('--worker-id', default=None, help='节点ID（默认 主机名:进程号）')
+    parser.add_argument('--lease', type=float, default=120, help='租约时长（秒，默认 120）')
+    parser.add_argument('--heartbeat', type=float, default=30, help='心跳间隔（秒，默认 30）')
+    parser.add_argument('--max-attempts', type=int, default=3, help='单元最大尝试次数（默认 3）')
+    parser.add_argument('--wait', action='store_true', help='队列为空时继续等待新单元而不是退出')
+    args = parser.parse_args(argv)
+    
+    backend = open_backend(args.queue, max_attempts=args.max_attempts)
+    try:
+        if args.enqueue:
+            match_ids = [job.get('match_id') or job['url'].split('matchId=')[-1]
+                         for job in load_manifest(args.enqueue)]
+            units = plan_units(match_ids, args.total_pages, args.pages_per_unit)
+            added = backend.enqueue(units)
+            log.info("加入 %s 个工作单元（共 %s 个，已存在的忽略）", added, len(units))
+        elif args.status:
+            log.info("队列进度: %s", backend.stats())
+        elif args.merge:
+            count = ResultSink(args.results).merge(args.merge)
+            log.info("已合并 %s 条企业信息到 %s", count, args.merge)
+        else:
+            worker = CrawlWorker(backend, ResultSink(args.results), worker_id=args.worker_id,
+                                 lease_seconds=args.lease, heartbeat_interval=args.heartbeat,
+                                 idle_exit=not args.wait)
+            log.info("节点 %s 启动，队列: %s", worker.worker_id, args.queue)
+            stats = worker.run()
+            log.info("✓ 节点退出")
+            log.info("  完成 %s 个单元，失败 %s，租约失效 %s，共 %s 条",
+                     stats['completed'], stats['failed'], stats['lost_leases'], stats['rows'])
+            log.info("  队列进度: %s", backend.stats())
+    finally:
+        backend.close()
+
+
+def run_submit_mode(argv):
+    """批量提交模式：把企业名单切块提交到批量查询页面，收集matchId作为爬取任务"""
+    import argparse
+    from batch_runner import load_manifest, run_batch, parse_concurrency
+    from batch_submit import BatchSubmitter, read_company_list, write_jobs, DEFAULT_CHUNK_SIZE
+    
+    parser = argparse.ArgumentParser(
+        prog='run_qizhidao_spider.py submit',
+        description='把企业名称/统一社会信用代码名单分块提交到批量查询页面，生成爬取任务清单'
+    )
+    parser.add_argument('names', help='企业名单文件（.txt 每行一个，或 .csv 取第一列）')
+    parser.add_argument('-o', '--output', default=None,
+                        help='生成的任务清单（.jsonl，默认 submit_jobs_时间戳.jsonl）')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'每次提交的企业数（网站批量上限，默认 {DEFAULT_CHUNK_SIZE}）')
+    parser.add_argument('--drivers', type=int, default=2, help='同时提交的浏览器数（默认 2）')
+    parser.add_argument('--show-browser', action='store_true', help='显示浏览器窗口（需要手动登录时使用）')
+    parser.add_argument('-s', '--spider', default='smart', help='任务使用的爬虫类型（默认 smart）')
+    parser.add_argument('--crawl', metavar='输出目录', default=None,
+                        help='提交完成后立即按批量模式爬取所有结果页')
+    parser.add_argument('-c', '--concurrency', default='', help='--crawl 时各爬虫类型的并发进程数')
+    args = parser.parse_args(argv)
+    
+    names = read_company_list(args.names)
+    if not names:
+        log.info("企业名单为空")
+        return
+    log.info("共 %s 家企业，每块 %s 家，%s 个浏览器同时提交", len(names), args.chunk_size, args.drivers)
+    
+    with BatchSubmitter(drivers=args.drivers, chunk_size=args.chunk_size,
+                        headless=not args.show_browser, spider=args.spider) as submitter:
+        jobs = submitter.submit_all(names)
+    
+    output = args.output or f"submit_jobs_{time.strftime('%Y%m%d_%H%M%S')}.jsonl"
+    write_jobs(jobs, output)
+    stats = submitter.stats
+    log.info("✓ 提交完成！")
+    log.info("  成功 %s 块，失败 %s 块，耗时 %.1f 秒", stats['submitted'], stats['failed'], stats['seconds'])
+    log.info("  任务清单: %s（可用于 batch 模式或 worker --enqueue）", output)
+    
+    if args.crawl and jobs:
+        summary = run_batch(load_manifest(output), args.crawl, concurrency=parse_concurrency(args.concurrency))
+        log.info("✓ 爬取完成：成功 %s，失败 %s，共 %s 条企业信息",
+                 summary['succeeded'], summary['failed'], summary['total_rows'])
+
+
+def run_chrome_mode(argv):
+    """常驻Chrome：启动带远程调试端口的浏览器并看护它，供智能爬虫的 attach 模式连接"""
+    import argparse
+    from chrome_launcher import ChromeLauncher, DEFAULT_DEBUG_PORT, DEFAULT_PROFILE_DIR
+    
+    parser = argparse.ArgumentParser(
+        prog='run_qizhidao_spider.py chrome',
+        description='启动常驻Chrome（远程调试端口），浏览器退出或失去响应时自动重启'
+    )
+    parser.add_argument('--port', type=int, default=DEFAULT_DEBUG_PORT,
+                        help=f'远程调试端口（默认 {DEFAULT_DEBUG_PORT}）')
+    parser.add_argument('--profile', default=DEFAULT_PROFILE_DIR,
+                        help=f'用户数据目录，保存登录状态（默认 {DEFAULT_PROFILE_DIR}）')
+    parser.add_argument('--chrome', default=None, help='Chrome可执行文件路径（默认自动查找）')
+    parser.add_argument('--headless', action='store_true', help='无头运行（首次登录需要有界面）')
+    parser.add_argument('--interval', type=float, default=5.0, help='看护检查间隔（秒，默认 5）')
+    args = parser.parse_args(argv)
+    
+    launcher = ChromeLauncher(port=args.port, profile_dir=args.profile, chrome_path=args.chrome,
+                              headless=args.headless)
+    log.info("常驻Chrome调试地址: %s", launcher.address)
+    log.info("在浏览器中登录后，运行: python run_qizhidao_spider.py 4 attach=%s 结果页URL", launcher.address)
+    log.info("按 Ctrl+C 停止看护（浏览器继续运行）")
+    launcher.supervise(interval=args.interval)
 
 
 def main():
@@ -239,6 +440,7 @@ def main():
             if len(sys.argv) > 1:  # 命令行模式不等待输入
                 break
             try:
+                crawl_log.flush()
                 input("\n按回车键继续...")
             except (EOFError, KeyboardInterrupt):
                 print("\n\n程序退出")
@@ -248,6 +450,16 @@ def main():
 
 
 if __name__ == "__main__":
+    # 日志和剖析选项可以与任何命令组合，先从参数中取出
+    log_options, sys.argv[1:] = crawl_log.parse_log_args(sys.argv[1:])
+    if log_options:
+        crawl_log.configure(**log_options)
+    from profiling import ProfileSession, parse_profile_args
+    profile_options, sys.argv[1:] = parse_profile_args(sys.argv[1:])
+    profile_session = None
+    if profile_options:
+        label = sys.argv[1].lstrip('-') if len(sys.argv) > 1 else 'menu'
+        profile_session = ProfileSession(label=label, **profile_options).start()
     try:
         # 显示使用说明
         if len(sys.argv) > 1 and sys.argv[1] in ['-h', '--help', 'help']:
@@ -255,24 +467,88 @@ if __name__ == "__main__":
             print("=" * 60)
             print("\n使用方法:")
             print("  python run_qizhidao_spider.py              # 交互式菜单")
-            print("  python run_qizhidao_spider.py 1            # 运行基础版本爬虫")
-            print("  python run_qizhidao_spider.py 2            # 运行高级版本爬虫")
-            print("  python run_qizhidao_spider.py 3 [页数]     # 运行表格数据爬虫（可选指定页数）")
-            print("  python run_qizhidao_spider.py 4 [headless|interactive|URL] # 运行智能爬虫")
+            print("  python run_qizhidao_spider.py 1 [enrich]   # 运行基础版本爬虫")
+            print("  python run_qizhidao_spider.py 2 [enrich]   # 运行高级版本爬虫")
+            print("  python run_qizhidao_spider.py 3 [页数] [enrich] # 运行表格数据爬虫（可选指定页数）")
+            print("  python run_qizhidao_spider.py 4 [headless|interactive|pipeline|enrich|tabs=N|attach|record=目录|URL] # 运行智能爬虫")
             print("    - headless: 无头模式")
             print("    - interactive: 交互模式（等待用户准备好）")
+            print("    - pipeline: 流水线模式（后台线程解析当前页的同时加载下一页）")
+            print("    - enrich: 详情页补全（翻页的同时后台抓取企业详情页，按信用代码合并字段）")
+            print("    - tabs=N: 在同一浏览器中打开N个标签页，各自负责一段页码并行翻页")
+            print("    - attach[=地址]: 连接常驻Chrome（默认 127.0.0.1:9222），复用已登录的浏览器，结束时只关闭任务标签页")
+            print("    - record=目录: 录制每页的DOM快照和分页状态，供 --replay-benchmark 离线回放")
             print("    - URL: 直接使用结果页面URL（如: https://.../batch-query-result?...）")
+            print("  python run_qizhidao_spider.py batch 清单文件 [-o 输出目录] [-c table=8,smart=2]")
+            print("    - 批量模式：清单每行一个结果页URL或matchId（也支持 .json/.jsonl 带每个任务的参数）")
+            print("  python run_qizhidao_spider.py submit 企业名单 [-o 任务清单.jsonl] [--drivers 2] [--crawl 输出目录]")
+            print("    - 批量提交：名单按网站上限分块，多个浏览器同时提交批量查询，收集matchId生成任务清单")
+            print("  python run_qizhidao_spider.py chrome [--port 9222] [--profile 目录] [--headless]")
+            print("    - 常驻Chrome：启动带远程调试端口的浏览器并看护（退出后自动重启），供 attach 模式复用")
+            print("  python run_qizhidao_spider.py worker -q 队列 [--enqueue 清单文件|--status|--merge 文件]")
+            print("    - 分布式模式：多个节点共享SQLite文件或Redis队列，领取不重叠的matchId/页码范围")
+            print("  python run_qizhidao_spider.py --parser-benchmark [--pages N] [--corpus 目录]  # 解析进程池基准测试")
+            print("  python run_qizhidao_spider.py --parser-regression [--update] [--parsers table,smart]  # 解析回归检查与单行耗时")
+            print("  python run_qizhidao_spider.py --replay-benchmark [录制目录] [--tabs N] [--pipeline]  # 回放录制测量爬取吞吐量")
+            print("  python run_qizhidao_spider.py --import-budget  # 检查各模块导入耗时预算")
+            print("\n剖析选项（可与以上任何命令组合，结果写入 profiles/<时间>-<命令>/）:")
+            print("  --profile[=cprofile|pyinstrument]  CPU剖析：cpu.pstats、cpu.txt 和折叠栈 cpu.collapsed（可生成火焰图）")
+            print("  --trace-memory[=N]                 每N页（默认10）做一次tracemalloc快照，输出增长最多的分配位置")
+            print("  --profile-dir 目录                 指定结果目录")
+            print("\n日志选项（日志由后台线程输出，爬取循环不等待终端）:")
+            print("  --log-level=LEVEL                  DEBUG/INFO/WARNING/ERROR（默认INFO，DEBUG输出逐页、逐行的调试信息）")
+            print("  --log-json[=文件]                  输出JSON行日志（不带文件时替换终端输出，带文件时额外写入）")
+            print("  --log-time                         终端日志带时间和线程名")
+            print("  --log-burst=N                      同一位置的重复消息每5秒最多输出N条（默认10，0不限流）")
             print("\n示例:")
             print("  python run_qizhidao_spider.py 3 5          # 爬取前5页")
             print("  python run_qizhidao_spider.py 4 headless   # 无头模式运行")
+            print("  python run_qizhidao_spider.py 3 --profile --trace-memory=5  # 剖析表格爬虫的CPU和内存")
+            print("  python run_qizhidao_spider.py 4 --log-level=DEBUG --log-json=logs/run.jsonl  # 调试输出并保存JSON日志")
             print()
             sys.exit(0)
         
+        if len(sys.argv) > 1 and sys.argv[1] == 'batch':
+            run_batch_mode(sys.argv[2:])
+            sys.exit(0)
+        
+        if len(sys.argv) > 1 and sys.argv[1] == 'submit':
+            run_submit_mode(sys.argv[2:])
+            sys.exit(0)
+        
+        if len(sys.argv) > 1 and sys.argv[1] == 'chrome':
+            run_chrome_mode(sys.argv[2:])
+            sys.exit(0)
+        
+        if len(sys.argv) > 1 and sys.argv[1] == 'worker':
+            run_worker_mode(sys.argv[2:])
+            sys.exit(0)
+        
+        if len(sys.argv) > 1 and sys.argv[1] == '--parser-benchmark':
+            from parser_benchmark import main as run_parser_benchmark
+            run_parser_benchmark(sys.argv[2:])
+            sys.exit(0)
+        
+        if len(sys.argv) > 1 and sys.argv[1] == '--parser-regression':
+            from parser_regression import main as run_parser_regression
+            sys.exit(run_parser_regression(sys.argv[2:]))
+        
+        if len(sys.argv) > 1 and sys.argv[1] == '--replay-benchmark':
+            from crawl_replay import main as run_replay_benchmark
+            run_replay_benchmark(sys.argv[2:])
+            sys.exit(0)
+        
+        if len(sys.argv) > 1 and sys.argv[1] == '--import-budget':
+            from import_budget import check_import_budget
+            sys.exit(1 if check_import_budget() else 0)
+        
         main()
     except KeyboardInterrupt:
-        print("\n\n程序被用户中断")
+        log.info("程序被用户中断")
     except Exception as e:
-        print(f"\n发生错误: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("发生错误: %s", e)
+    finally:
+        if profile_session:
+            profile_session.stop()
+        crawl_log.shutdown()
 
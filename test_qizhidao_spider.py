@@ -9,10 +9,828 @@ import os
 # 添加路径
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'HiSpider', 'Static'))
 
-from qizhidao_spider import QizhidaoSpider
-from qizhidao_advanced_spider import QizhidaoAdvancedSpider
-from qizhidao_table_spider import QizhidaoTableSpider
-from qizhidao_smart_spider import QizhidaoSmartSpider
+# 各爬虫模块在测试函数内导入，避免只测试一个版本时加载全部依赖
+
+
+def test_import_budget():
+    """测试HTTP爬虫模块导入时不加载pandas/selenium等重型依赖"""
+    from import_budget import measure_module
+    for module_name in ['qizhidao_spider', 'qizhidao_advanced_spider', 'qizhidao_table_spider']:
+        result = measure_module(module_name)
+        assert result['error'] is None, result['error']
+        assert result['heavy_loaded'] == [], f"{module_name} 加载了 {result['heavy_loaded']}"
+
+
+def test_user_agent_pool():
+    """测试内置User-Agent池：离线可用，Sec-CH-UA与User-Agent版本一致"""
+    from user_agents import UserAgentPool
+    pool = UserAgentPool()
+    for _ in range(200):
+        profile = pool.choice()
+        headers = profile.headers()
+        assert headers['User-Agent'] == profile.user_agent
+        if 'Sec-CH-UA' in headers:
+            assert f'v="{profile.version}"' in headers['Sec-CH-UA']
+            assert f'/{profile.version}.' in profile.user_agent
+
+
+def test_row_store():
+    """测试紧凑行存储：还原出的字典与写入时一致"""
+    from row_store import RowStore
+    rows = [
+        {'序号': '1', '企业名称': '测试科技有限公司', '企业名称_链接': 'https://qiye.qizhidao.com/c/1', '页码': 1},
+        {'序号': '2', '统一社会信用代码': '91440300MA5XXXXX1X', '链接3': '/c/2', '页码': 2},
+    ]
+    store = RowStore(rows)
+    assert len(store) == 2
+    assert store.to_dicts() == rows
+    assert store[-1]['页码'] == 2
+    assert list(store.iter_tuples(['序号', '企业名称'])) == [('1', '测试科技有限公司'), ('2', None)]
+
+
+def test_retry_policy():
+    """测试重试策略：可重试错误会重试，熔断器打开后快速失败"""
+    from retry_policy import RetryPolicy, CircuitBreaker, CircuitOpenError
+    policy = RetryPolicy(max_retries=3, base_delay=0.001, max_delay=0.01,
+                         breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    calls = []
+    
+    def flaky():
+        calls.append(1)
+        if len(calls) < 2:
+            raise ConnectionError("模拟连接失败")
+        return 'ok'
+    
+    assert policy.run(flaky) == 'ok'
+    assert policy.stats['retries'] == 1
+    
+    def always_fail():
+        raise ConnectionError("模拟连接失败")
+    
+    try:
+        policy.run(always_fail)
+    except CircuitOpenError:
+        pass
+    else:
+        raise AssertionError("连续失败后熔断器应当打开")
+
+
+def test_host_limiter():
+    """测试主机共享限速器：不同调用方的设置按更保守的一方合并，超时和连接错误会降速"""
+    from rate_limiter import get_host_limiter, set_rate_share
+    limiter = get_host_limiter('https://limiter-test.example/a', initial_rate=1.0)
+    assert get_host_limiter('https://LIMITER-TEST.example/b', initial_rate=0.5, max_rate=2.0, jitter=0.5) is limiter
+    assert (limiter.rate, limiter.max_rate, limiter.jitter) == (0.5, 2.0, 0.5)
+    limiter.record_failure()
+    assert limiter.rate == 0.25 and limiter.stats['failures'] == 1
+
+    # 批量模式中每个进程只取总速率的一份
+    set_rate_share(0.25)
+    try:
+        shared = get_host_limiter('https://limiter-share.example/', initial_rate=2.0)
+        assert (shared.rate, shared.max_rate) == (0.5, 1.25)
+    finally:
+        set_rate_share(1.0)
+    try:
+        set_rate_share(0)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("份额为0应当报错，而不是按全速运行")
+
+
+def test_job_queue():
+    """测试分布式队列：单元不重复领取，租约过期后重新入队（SQLite 与本机Redis替身）"""
+    import tempfile
+    from job_queue import (SQLiteQueueBackend, RedisQueueBackend, LocalRedisStandIn,
+                           plan_units)
+    units = plan_units(['m1', 'm2'], total_pages=25, pages_per_unit=10)
+    assert [u.unit_id for u in units[:3]] == ['m1:1-10', 'm1:11-20', 'm1:21-25']
+
+    def check(backend):
+        assert backend.enqueue(units) == 6
+        assert backend.enqueue(units) == 0
+        a = backend.claim('a', lease_seconds=60)
+        b = backend.claim('b', lease_seconds=-1)  # 立即过期，模拟节点失联
+        assert a.unit_id != b.unit_id
+        assert backend.heartbeat(a.unit_id, 'a', 60)
+        assert backend.requeue_expired() == 1
+        assert not backend.heartbeat(b.unit_id, 'b', 60)
+        backend.complete(b.unit_id, 'b')  # 租约已被收回，原节点不能再标记完成
+        backend.complete(a.unit_id, 'a')
+        assert backend.stats() == {'pending': 5, 'leased': 0, 'done': 1, 'failed': 0}
+        backend.close()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        check(SQLiteQueueBackend(os.path.join(tmp, 'queue.db')))
+    with LocalRedisStandIn() as server:
+        check(RedisQueueBackend(port=server.port, prefix='test'))
+
+
+def test_page_size():
+    """测试表格爬虫从分页组件中识别每页条数，并与page参数一起放入URL"""
+    from bs4 import BeautifulSoup
+    from qizhidao_table_spider import QizhidaoTableSpider
+    html = ('<div class="el-pagination"><span class="el-pagination__sizes">'
+            '<input value="10条/页"></span></div>'
+            '<ul><li class="el-select-dropdown__item"><span>20条/页</span></li>'
+            '<li class="el-select-dropdown__item"><span>100条/页</span></li></ul>')
+    spider = QizhidaoTableSpider(url='https://qiye.qizhidao.com/batch-query-result?matchId=abc')
+    assert spider.get_page_sizes(BeautifulSoup(html, 'lxml')) == [10, 20, 100]
+    spider.page_size = 100
+    url = spider.get_page_url(3)
+    assert 'matchId=abc' in url and 'page=3' in url and 'pageSize=100' in url
+    # 从中间页开始时页码按默认条数计算，不自动切换
+    assert not QizhidaoTableSpider(url=spider.base_url, start_page=3)._auto_page_size
+
+    # 智能爬虫：结果只有一页时切换条数后不等待表格重新渲染
+    import time
+    from crawl_replay import ReplayDriver
+    from qizhidao_smart_spider import QizhidaoSmartSpider
+    rows = ''.join(f'<tr><td>{i}</td><td>测试{i}科技有限公司</td></tr>' for i in range(3))
+    page = (f'<table><tbody>{rows}</tbody></table><div class="el-pagination">'
+            '<span class="el-pagination__sizes"><div class="el-input"><input value="10条/页"></div></span>'
+            '<ul class="el-pager"><li class="number active">1</li></ul></div>'
+            '<ul><li class="el-select-dropdown__item"><span>100条/页</span></li></ul>')
+    smart = QizhidaoSmartSpider(url=spider.base_url)
+    smart.driver = ReplayDriver(pages={1: page}, url=spider.base_url)
+    smart.driver.get(spider.base_url)
+    start = time.time()
+    assert smart.apply_max_page_size() == 100 and time.time() - start < 3
+
+
+def test_snapshot_pipeline():
+    """测试智能爬虫的流水线模式：表格快照在工作线程中解析、去重并保存"""
+    from page_pipeline import PagePipeline
+    from qizhidao_smart_spider import QizhidaoSmartSpider
+    spider = QizhidaoSmartSpider(url='https://qiye.qizhidao.com/batch-query-result?matchId=abc')
+    header = '<tr><th>序号</th><th>企业名称</th><th>统一社会信用代码</th></tr>'
+
+    def snapshot(page, names):
+        rows = [f'<tr><td>{i}</td><td>{name}</td><td>9144{i:014d}</td></tr>'
+                for i, name in enumerate(names, 1)]
+        return {'page': page, 'url': 'about:blank', 'page_source': None,
+                'table_html': f'<table><thead>{header}</thead></table>',
+                'rows_html': [header] + rows}
+
+    with PagePipeline(spider._process_snapshot) as pipeline:
+        pipeline.submit(snapshot(1, ['甲科技有限公司', '乙科技有限公司']))
+        pipeline.submit(snapshot(2, ['乙科技有限公司', '丙科技有限公司']))
+    assert [row['企业名称'] for row in spider.companies_data] == ['甲科技有限公司', '乙科技有限公司', '丙科技有限公司']
+    assert spider.companies_data[-1]['页码'] == 2
+
+
+def test_parser_pool():
+    """测试解析进程返回的列名加元组能还原为与主进程解析相同的数据"""
+    from concurrent.futures import ProcessPoolExecutor
+    from bs4 import BeautifulSoup
+    from parser_benchmark import build_page, BENCHMARK_URL
+    from table_parser import parse_page_html, parse_table_rows, rows_to_dicts
+    content = build_page(3, rows_per_page=20)
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        result = pool.submit(parse_page_html, content, BENCHMARK_URL, 3).result()
+    expected = parse_table_rows(BeautifulSoup(content, 'lxml'), BENCHMARK_URL, 3)
+    assert len(expected) == 20 and result['total_pages'] == 50
+    assert rows_to_dicts(result['columns'], result['rows']) == expected
+
+
+def test_row_classifier():
+    """测试行分类器：关键词匹配与逐个 in 判断一致，重复表头行命中签名缓存"""
+    from bs4 import BeautifulSoup
+    from row_classifier import RowClassifier, KeywordMatcher, HEADER_KEYWORDS, HEADER, EMPTY, DATA
+    matcher = KeywordMatcher(HEADER_KEYWORDS)
+    for text in ['序号 企业名称 登记状态', '纳税人识别号 电话', '测试科技有限公司 存续', '']:
+        assert matcher.find_all(text) == {k for k in HEADER_KEYWORDS if k in text}
+
+    header = '<tr><th>序号</th><th>企业名称</th><th>登记状态</th></tr>'
+    html = ('<table>' + header + '<tr><td>1</td><td><a href="/c/1">测试科技有限公司</a></td><td>存续</td></tr>'
+            '<tr><td></td><td>-</td><td></td></tr>' + header + '</table>')
+    classifier = RowClassifier()
+    kinds = [classifier.classify(classifier.extract_cells(row), i, 3, i > 0)
+             for i, row in enumerate(BeautifulSoup(html, 'lxml').find_all('tr'))]
+    assert kinds == [HEADER, DATA, EMPTY, HEADER]
+    assert classifier.stats['signature_hits'] == 1
+    assert classifier.extract_cells(BeautifulSoup(html, 'lxml').find_all('tr')[1])[1] == ('测试科技有限公司', '/c/1')
+
+
+def test_el_table():
+    """测试Element UI表格：表头与表体按列编号对齐，固定列副本中的行不重复读取"""
+    from bs4 import BeautifulSoup
+    from table_parser import parse_table_rows
+    from qizhidao_smart_spider import QizhidaoSmartSpider
+
+    def th(n, name):
+        return f'<th class="el-table_1_column_{n} is-leaf"><div class="cell">{name}</div></th>'
+
+    def tr(i):
+        return (f'<tr class="el-table__row"><td class="el-table_1_column_1"><div class="cell">{i}</div></td>'
+                f'<td class="el-table_1_column_2"><div class="cell"><a href="/c/{i}">测试{i}科技有限公司</a></div></td>'
+                f'<td class="el-table_1_column_3"><div class="cell">9144{i:014d}</div></td></tr>')
+
+    header = th(1, '序号') + th(2, '企业名称') + th(3, '统一社会信用代码') + '<th class="gutter"></th>'
+    body = ''.join(tr(i) for i in (1, 2))
+    wrappers = (f'<div class="el-table__header-wrapper"><table><thead><tr>{header}</tr></thead></table></div>'
+                f'<div class="el-table__body-wrapper"><table><tbody>{body}</tbody></table></div>')
+    html = f'<div class="el-table">{wrappers}<div class="el-table__fixed">{wrappers}</div></div>'
+
+    rows = parse_table_rows(BeautifulSoup(html, 'lxml'), 'https://qiye.qizhidao.com/', 1)
+    assert [row['企业名称'] for row in rows] == ['测试1科技有限公司', '测试2科技有限公司']
+    assert rows[0]['企业名称_链接'] == 'https://qiye.qizhidao.com/c/1'
+
+    # 智能爬虫的快照：表头顺序与单元格顺序不同时按列编号对齐
+    spider = QizhidaoSmartSpider(url='https://qiye.qizhidao.com/batch-query-result?matchId=abc')
+    snapshot = {'page': 3, 'url': 'about:blank', 'table_html': None, 'page_source': None,
+                'el_table_headers': [['el-table_1_column_3 is-leaf', '统一社会信用代码'],
+                                     ['el-table_1_column_1 is-leaf', '序号'],
+                                     ['el-table_1_column_2 is-leaf', '企业名称']],
+                'rows_html': [tr(1), tr(2)]}
+    data = spider.parse_table_snapshot(snapshot)
+    assert len(data) == 2 and data[1]['统一社会信用代码'] == '9144' + '2'.zfill(14)
+    assert data[0]['企业名称_链接'] == 'https://qiye.qizhidao.com/c/1' and data[0]['页码'] == 3
+
+
+def test_extraction_schema():
+    """测试抽取模式：表头别名映射到统一列名，同一表头只编译一次，必填列为空的行被丢弃"""
+    from extraction_schema import ExtractionPlanner, ExtractionSchema, ColumnSpec
+
+    planner = ExtractionPlanner()
+    headers = ['序号', '公司名称', '法人', '成立日期', '备注']
+    plan = planner.plan_for(headers)
+    assert planner.plan_for(list(headers)) is plan
+    assert planner.stats == {'compiled': 1, 'reused': 1}
+    assert plan.columns == ['序号', '企业名称', '企业名称_链接', '法定代表人', '成立日期', '备注', '备注_链接']
+
+    row = plan.extract([('1', None), ('测试科技有限公司', '/c/1'), ('张三', None),
+                        ('2020年3月5日', None), ('', None), ('多出来的', None)])
+    assert row == {'序号': '1', '企业名称': '测试科技有限公司',
+                   '企业名称_链接': 'https://qiye.qizhidao.com/c/1',
+                   '法定代表人': '张三', '成立日期': '2020-03-05', '列6': '多出来的'}
+    assert plan.extract([('2', None), ('', None), ('李四', None)]) is None
+
+    # 没有表头时按默认列顺序对应
+    assert planner.plan_for([]).columns[:3] == ['序号', '企业名称', '企业名称_链接']
+
+    schema = ExtractionSchema([ColumnSpec('注册资本', ('资本',), type='float')], keep_unknown=False)
+    assert schema.compile(['名称', '注册资本(万元)']).extract([('x', None), ('1,000.5', None)]) == {'注册资本': 1000.5}
+
+
+def test_detail_enricher():
+    """测试详情页补全：每个链接只抓取一次，第二次运行命中磁盘缓存，字段按信用代码合并"""
+    import tempfile
+    from detail_enricher import DetailEnricher
+    detail = ('<html><body><table><tr><td>经营范围</td><td>软件开发；技术服务</td></tr></table>'
+              '<div><span>电话：</span><span>0755-12345678</span></div>'
+              '<h3>股东信息</h3><div><table><tr><td>1</td><td>张三</td></tr>'
+              '<tr><td>2</td><td>某某投资有限公司</td></tr></table></div></body></html>')
+    rows = [{'企业名称': f'测试{i}科技有限公司', '统一社会信用代码': f'9144{i:014d}',
+             '企业名称_链接': f'https://qiye.qizhidao.com/c/{i}'} for i in range(3)]
+    fetched = []
+
+    def fetch(link):
+        fetched.append(link)
+        return detail
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with DetailEnricher(max_workers=2, cache_dir=tmp, fetch=fetch) as enricher:
+            enricher.submit_rows(rows[:2])
+            enricher.submit_rows(rows[1:])  # 重复的链接不再提交
+            merged = list(enricher.merge([dict(row) for row in rows]))
+        assert sorted(fetched) == sorted(row['企业名称_链接'] for row in rows)
+        assert merged[2]['经营范围'] == '软件开发；技术服务'
+        assert merged[0]['电话'] == '0755-12345678'  # 与列表页抽取模式的列名一致
+        assert merged[1]['股东'] == '张三；某某投资有限公司'
+
+        with DetailEnricher(fields=['经营范围'], cache_dir=tmp, fetch=fetch) as enricher:
+            enricher.submit_rows(rows)
+            merged = list(enricher.merge([dict(row) for row in rows]))
+        assert len(fetched) == 3 and enricher.stats['cache_hits'] == 3
+        assert '电话' not in merged[0] and merged[0]['经营范围']
+
+    class ReadOnlyCache:
+        def get(self, link):
+            return None
+
+        def put(self, link, html):
+            raise OSError("磁盘已满")
+
+    # 缓存写入失败按链接计数，页面照常解析合并
+    with DetailEnricher(fields=['经营范围'], cache_dir=None, fetch=fetch) as enricher:
+        enricher.cache = ReadOnlyCache()
+        enricher.submit_rows(rows[:1])
+        merged = list(enricher.merge([dict(rows[0])]))
+    assert enricher.stats['cache_errors'] == 1 and merged[0]['经营范围']
+
+
+def test_batch_submit():
+    """测试批量提交：名单按上限分块，由多个浏览器提交，按分块顺序生成带matchId的任务"""
+    import itertools
+    import threading
+    from batch_submit import BatchSubmitter, chunk_list, extract_match_id
+    from batch_runner import RESULT_URL_TEMPLATE
+    from rate_limiter import AdaptiveRateLimiter
+    counter = itertools.count(1)
+    lock = threading.Lock()
+    submitted = []
+
+    class FakeDriver:
+        """只模拟提交流程用到的接口：填入名单、点击按钮后跳转到结果页"""
+        window_handles = ['main']
+
+        def __init__(self):
+            self.current_url = None
+            self.names = None
+
+        def get(self, url):
+            self.current_url = url
+
+        def get_cookies(self):
+            return [{'name': 'token', 'value': 'x'}]
+
+        def add_cookie(self, cookie):
+            pass
+
+        def execute_script(self, script, value):
+            if 'textarea' in script:
+                self.names = value.split('\n')
+                return True
+            with lock:
+                match_id = f"m{next(counter)}"
+                submitted.append((match_id, self.names))
+            self.current_url = RESULT_URL_TEMPLATE.format(match_id=match_id)
+            return '开始查询'
+
+        def quit(self):
+            pass
+
+    assert [len(c) for c in chunk_list(list(range(7)), 3)] == [3, 3, 1]
+    assert extract_match_id('https://qiye.qizhidao.com/batch-query-result?matchId=abc&page=2') == 'abc'
+    names = [f'测试{i}科技有限公司' for i in range(7)]
+    with BatchSubmitter(drivers=2, chunk_size=3, driver_factory=FakeDriver, poll_interval=0,
+                        rate_limiter=AdaptiveRateLimiter(initial_rate=1000, max_rate=1000)) as submitter:
+        jobs = submitter.submit_all(names)
+        assert len(submitter.drivers) == 2
+    assert [job['count'] for job in jobs] == [3, 3, 1]
+    by_match = dict(submitted)
+    assert [name for job in jobs for name in by_match[job['match_id']]] == names
+    assert jobs[0]['url'] == RESULT_URL_TEMPLATE.format(match_id=jobs[0]['match_id'])
+
+    class NoResultDriver(FakeDriver):
+        """点击提交后一直停在批量查询页面"""
+        clicks = 0
+
+        class switch_to:
+            @staticmethod
+            def window(handle):
+                pass
+
+        def execute_script(self, script, value):
+            if 'textarea' in script:
+                return True
+            NoResultDriver.clicks += 1
+            return '开始查询'
+
+    with BatchSubmitter(drivers=1, driver_factory=NoResultDriver, poll_interval=0, result_timeout=0,
+                        rate_limiter=AdaptiveRateLimiter(initial_rate=1000, max_rate=1000)) as submitter:
+        assert submitter.submit_all(names[:2]) == [] and submitter.stats['failed'] == 1
+    assert NoResultDriver.clicks == 1  # 点击之后的失败不重试，避免重复提交同一批名单
+
+
+def test_browser_tabs():
+    """测试多标签页：页码按段分给各标签页，轮流驱动，每页只抓取一次，结束后关闭额外的标签页"""
+    from browser_tabs import split_page_ranges
+    from qizhidao_smart_spider import QizhidaoSmartSpider
+    from rate_limiter import AdaptiveRateLimiter
+    import el_table
+
+    class FakeTabsDriver:
+        """每个标签页独立翻页：跳页请求后需要轮询两次才显示新页面"""
+
+        def __init__(self):
+            self.tabs = {'t0': [1, 0]}  # 句柄 -> [激活页码, 剩余加载轮询次数]
+            self.current_window_handle = 't0'
+            self.current_url = 'https://qiye.qizhidao.com/batch-query-result?matchId=abc'
+            self.served = []
+            driver = self
+
+            class SwitchTo:
+                def new_window(self, kind):
+                    driver.current_window_handle = f't{len(driver.tabs)}'
+                    driver.tabs[driver.current_window_handle] = [1, 0]
+
+                def window(self, handle):
+                    driver.current_window_handle = handle
+
+            self.switch_to = SwitchTo()
+
+        @property
+        def window_handles(self):
+            return list(self.tabs)
+
+        def get(self, url):
+            pass
+
+        def close(self):
+            del self.tabs[self.current_window_handle]
+
+        def find_elements(self, by, selector):
+            return [None, None]
+
+        def execute_script(self, script, *args):
+            state = self.tabs[self.current_window_handle]
+            if script == QizhidaoSmartSpider._VUE_JUMP_SCRIPT:
+                state[:] = [args[0], 2]
+                return True
+            if script == QizhidaoSmartSpider._TAB_STATE_SCRIPT:
+                if state[1]:
+                    state[1] -= 1
+                    return [None, 'loading', True]
+                return [str(state[0]), f'row{state[0]}', False]
+            if script == el_table.SNAPSHOT_SCRIPT:
+                page = state[0]
+                self.served.append((self.current_window_handle, page))
+                cell = '<td class="el-table_1_column_{}"><div class="cell">{}</div></td>'
+                return {'headers': [['el-table_1_column_1 is-leaf', '序号'], ['el-table_1_column_2 is-leaf', '企业名称']],
+                        'rows_html': [f'<tr>{cell.format(1, i)}{cell.format(2, f"第{page}页企业{i}")}</tr>'
+                                      for i in (1, 2)]}
+            return None
+
+    assert split_page_ranges(1, 7, 3) == [(1, 3), (4, 5), (6, 7)]
+    assert split_page_ranges(5, 6, 4) == [(5, 5), (6, 6)]
+
+    driver = FakeTabsDriver()
+    spider = QizhidaoSmartSpider(tabs=3, maximize_page_size=False,
+                                 rate_limiter=AdaptiveRateLimiter(initial_rate=1000, max_rate=1000))
+    spider.driver = driver
+    spider.total_pages = 7
+    spider._crawl_with_tabs()
+    assert sorted(spider.crawled_pages) == list(range(1, 8))
+    assert sorted(page for _, page in driver.served) == list(range(1, 8))
+    assert {handle for handle, _ in driver.served} == {'t0', 't1', 't2'}
+    assert len(spider.companies_data) == 14 and spider.current_page == 7
+    assert driver.window_handles == ['t0']
+
+
+def test_chrome_launcher():
+    """测试常驻Chrome：等待调试端口就绪，浏览器退出后自动重启；连接模式结束时只关闭任务标签页"""
+    import socket
+    import stat
+    import sys
+    import tempfile
+    from chrome_launcher import ChromeLauncher, is_debugger_alive
+    from qizhidao_smart_spider import QizhidaoSmartSpider
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+
+    # 用一个只提供 /json/version 的小HTTP服务代替Chrome
+    fake_chrome = f"""#!{sys.executable}
+import json, sys
+from http.server import BaseHTTPRequestHandler, HTTPServer
+port = int([a for a in sys.argv if a.startswith('--remote-debugging-port=')][0].split('=')[1])
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = json.dumps({{'Browser': 'FakeChrome/1.0'}}).encode()
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(body)
+    def log_message(self, *args):
+        pass
+HTTPServer(('127.0.0.1', port), Handler).serve_forever()
+"""
+    with tempfile.TemporaryDirectory() as tmp:
+        chrome = os.path.join(tmp, 'fake_chrome')
+        with open(chrome, 'w') as f:
+            f.write(fake_chrome)
+        os.chmod(chrome, os.stat(chrome).st_mode | stat.S_IEXEC)
+
+        launcher = ChromeLauncher(port=port, profile_dir=os.path.join(tmp, 'profile'), chrome_path=chrome,
+                                  start_timeout=15)
+        with launcher:
+            assert is_debugger_alive(launcher.address)
+            assert ChromeLauncher(port=port, chrome_path=chrome).start() == launcher.address  # 端口上已有浏览器时复用
+            launcher.process.kill()
+            launcher.process.wait()
+            assert launcher.ensure_running() == launcher.address
+            assert launcher.stats == {'starts': 2, 'restarts': 1, 'reused': 0}
+        assert not is_debugger_alive(launcher.address)
+
+    class AttachedDriver:
+        window_handles = ['main', 'job']
+
+        def __init__(self):
+            self.current = 'job'
+            self.quit_called = False
+            driver = self
+
+            class SwitchTo:
+                def window(self, handle):
+                    driver.current = handle
+
+            self.switch_to = SwitchTo()
+
+        def close(self):
+            self.window_handles = [h for h in self.window_handles if h != self.current]
+
+        def quit(self):
+            self.quit_called = True
+
+    spider = QizhidaoSmartSpider(debugger_address='127.0.0.1:9222')
+    spider.driver = driver = AttachedDriver()
+    spider._own_handles = {'main'}
+    spider.close_driver()
+    assert driver.window_handles == ['main'] and driver.current == 'main' and not driver.quit_called
+    assert spider.driver is None
+
+
+def test_driver_watchdog():
+    """测试看门狗：失败查找计入损失时间，超过截止时间判定卡死，之后的调用立即失败"""
+    import threading
+    import time
+    from selenium.common.exceptions import NoSuchElementException
+    from driver_watchdog import WatchedDriver, DriverHangError
+    release = threading.Event()
+
+    class SlowDriver:
+        def __init__(self):
+            self.timeouts = []
+
+        @property
+        def current_url(self):
+            return 'https://qiye.qizhidao.com/batch-query-result?matchId=abc'
+
+        def set_page_load_timeout(self, seconds):
+            self.timeouts.append(seconds)
+
+        def set_script_timeout(self, seconds):
+            self.timeouts.append(seconds)
+
+        def find_element(self, by, selector):
+            time.sleep(0.01)
+            raise NoSuchElementException(selector)
+
+        def find_elements(self, by, selector):
+            return []
+
+        def execute_script(self, script, *args):
+            release.wait(5)  # 模拟渲染进程无响应
+            return True
+
+    raw = SlowDriver()
+    driver = WatchedDriver(raw, call_timeout=0.3, call_timeouts={'get': 2})
+    assert raw.timeouts == [2, 0.3]
+    assert driver.current_url.endswith('matchId=abc')
+    try:
+        driver.find_element('css selector', '.missing')
+        assert False
+    except NoSuchElementException:
+        pass
+    assert driver.find_elements('css selector', '.missing') == []
+    assert driver.stats['failed_lookups'] == 1 and driver.stats['empty_lookups'] == 1
+    assert driver.lost_by_call['find_element'] >= 0.01
+
+    start = time.time()
+    try:
+        driver.execute_script('return 1')
+        assert False
+    except DriverHangError:
+        pass
+    assert time.time() - start < 2 and driver.hung == 'execute_script'
+    try:
+        driver.find_elements('css selector', 'table')
+        assert False
+    except DriverHangError:
+        pass
+    release.set()
+    assert driver.stats['hangs'] == 1 and '卡死 1 次' in driver.summary()
+
+
+def test_restart_during_setup():
+    """测试看门狗重启：浏览器在加载结果页和获取总页数的准备阶段卡死时，重启后重新准备并爬完所有页"""
+    import tempfile
+    import threading
+    from crawl_replay import build_recording, load_manifest, ReplayDriver
+    from qizhidao_smart_spider import QizhidaoSmartSpider
+    from rate_limiter import AdaptiveRateLimiter
+    release = threading.Event()
+    drivers = []
+
+    with tempfile.TemporaryDirectory() as source:
+        build_recording(source, pages=3, rows_per_page=5)
+
+        class HangingReplay(ReplayDriver):
+            def execute_script(self, script, *args):
+                if len(drivers) == 1:
+                    release.wait(5)  # 第一个浏览器在准备阶段无响应
+                return super().execute_script(script, *args)
+
+        def factory():
+            drivers.append(HangingReplay(source))
+            return drivers[-1]
+
+        spider = QizhidaoSmartSpider(url=load_manifest(source)['url'], maximize_page_size=False,
+                                     rate_limiter=AdaptiveRateLimiter(initial_rate=1000, max_rate=1000),
+                                     driver_factory=factory, wait_scale=0, call_timeout=0.3)
+        try:
+            data = spider.crawl_all_pages()
+        finally:
+            release.set()
+    assert len(drivers) == 2 and len(data['companies']) == 15
+
+
+def test_restart_with_tabs():
+    """测试多标签页模式的看门狗重启：两个标签页各负责一段页码，中途卡死后补爬所有未爬取的页面"""
+    import tempfile
+    import threading
+    from crawl_replay import build_recording, load_manifest, ReplayDriver
+    from qizhidao_smart_spider import QizhidaoSmartSpider
+    from rate_limiter import AdaptiveRateLimiter
+    release = threading.Event()
+    drivers = []
+
+    with tempfile.TemporaryDirectory() as source:
+        build_recording(source, pages=12, rows_per_page=5)
+
+        class HangingReplay(ReplayDriver):
+            calls = 0
+
+            def execute_script(self, script, *args):
+                self.calls += 1
+                if len(drivers) == 1 and self.calls == 40:
+                    release.wait(5)  # 第一个浏览器在两个标签页都爬了几页之后无响应
+                return super().execute_script(script, *args)
+
+        def factory():
+            drivers.append(HangingReplay(source))
+            return drivers[-1]
+
+        spider = QizhidaoSmartSpider(url=load_manifest(source)['url'], maximize_page_size=False, tabs=2,
+                                     rate_limiter=AdaptiveRateLimiter(initial_rate=1000, max_rate=1000),
+                                     driver_factory=factory, wait_scale=0, call_timeout=0.3)
+        try:
+            data = spider.crawl_all_pages()
+        finally:
+            release.set()
+    assert len(drivers) == 2
+    assert spider.crawled_pages == set(range(1, 13)) and len(data['companies']) == 60
+
+
+def test_crawl_replay():
+    """测试录制回放：智能爬虫在回放驱动上翻完所有页，并把经过的页面重新录制下来"""
+    import tempfile
+    from crawl_replay import build_recording, load_manifest, ReplayDriver
+    from qizhidao_smart_spider import QizhidaoSmartSpider
+    from rate_limiter import AdaptiveRateLimiter
+
+    with tempfile.TemporaryDirectory() as source, tempfile.TemporaryDirectory() as copy:
+        build_recording(source, pages=9, rows_per_page=5)
+        driver = ReplayDriver(source)
+        driver.get(load_manifest(source)['url'])
+        pager = driver.find_element('css selector', 'ul.el-pager')
+        pager.find_element('xpath', './/li[contains(@class, "number") and text()="2"]').click()
+        # 缓存的分页组件元素在翻页后仍指向新页面
+        assert pager.find_element('css selector', 'li.number.active').text == '2'
+        driver.execute_script("arguments[0].click();", driver.find_element('css selector', 'button.btn-next'))
+        assert driver.execute_script(QizhidaoSmartSpider._TAB_STATE_SCRIPT)[0] == '3'
+
+        spider = QizhidaoSmartSpider(url=load_manifest(source)['url'], maximize_page_size=False,
+                                     rate_limiter=AdaptiveRateLimiter(initial_rate=1000, max_rate=1000),
+                                     driver_factory=lambda: ReplayDriver(source), wait_scale=0, record_dir=copy)
+        data = spider.crawl_all_pages()
+        assert spider.crawled_pages == set(range(1, 10)) and len(data['companies']) == 45
+        assert sorted(map(int, load_manifest(copy)['pages'])) == list(range(1, 10))
+
+
+def test_parser_corpus():
+    """测试解析回归语料：四个解析器在每个页面上都得到期望行，已知错误单独列出且仍然存在"""
+    from parser_regression import check_corpus, failed, load_fixtures, time_parsers, KNOWN_DIVERGENCES
+
+    assert len(load_fixtures()) >= 6
+    checks = check_corpus()
+    assert not failed(checks), failed(checks)
+    assert all(item['status'] in ('ok', 'known') for item in checks), checks
+    assert sum(item['status'] == 'known' for item in checks) == len(KNOWN_DIVERGENCES)
+    timing = time_parsers(parsers=['table'], repeat=1)
+    assert all(item['us_per_row'] > 0 and item['peak_bytes_per_row'] > 0 for item in timing)
+
+
+def test_profiling():
+    """测试剖析钩子：命令行选项解析，CPU剖析和每N页的内存快照写入本次运行的目录"""
+    import os
+    import tempfile
+    import time
+    import profiling
+    from profiling import ProfileSession, parse_profile_args
+
+    options, rest = parse_profile_args(['4', '--profile', 'headless', '--trace-memory=2', '--profile-dir', 'out'])
+    assert options == {'cpu': 'cprofile', 'memory_every': 2, 'output_dir': 'out'} and rest == ['4', 'headless']
+    assert parse_profile_args(['3', '5']) == (None, ['3', '5'])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.join(tmp, 'run')
+        with ProfileSession(cpu='cprofile', memory_every=2, output_dir=directory, sample_interval=0.001):
+            kept = []
+            for page in range(1, 5):
+                kept.append([str(i) * 10 for i in range(2000)])  # 每页留下一些分配
+                deadline = time.time() + 0.02
+                while time.time() < deadline:
+                    pass
+                profiling.page_done(page)
+        assert profiling.active_session() is None
+        files = set(os.listdir(directory))
+        assert {'cpu.pstats', 'cpu.txt', 'cpu.collapsed', 'memory_page0002.txt', 'memory_page0004.txt',
+                'memory_final.txt', 'memory_timeline.json', 'session.json'} <= files
+        with open(os.path.join(directory, 'cpu.collapsed'), encoding='utf-8') as f:
+            assert any(line.startswith('MainThread;') for line in f)
+        with open(os.path.join(directory, 'memory_final.txt'), encoding='utf-8') as f:
+            assert 'test_qizhidao_spider.py' in f.read()
+
+
+def test_crawl_log():
+    """测试爬虫日志：命令行选项解析，后台线程写出JSON行，同一位置的重复消息限流并报告省略条数"""
+    import json
+    import tempfile
+    import time
+    import crawl_log
+
+    options, rest = crawl_log.parse_log_args(['4', '--log-level=debug', 'headless', '--log-json'])
+    assert options == {'level': 'DEBUG', 'json_output': '-'} and rest == ['4', 'headless']
+    assert crawl_log.parse_log_args(['3', '5']) == (None, ['3', '5'])
+
+    log = crawl_log.get_logger('test')
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'logs', 'run.jsonl')
+        try:
+            crawl_log.configure(level='DEBUG', json_output=path, console=False, burst=3, interval=0.2)
+            for page in range(11):
+                if page == 10:
+                    for _ in range(5):
+                        log.warning("警告不限流")
+                    time.sleep(0.25)  # 新的限流窗口
+                log.debug("第 %s 页", page)
+            with crawl_log.quiet():
+                log.error("不应输出")
+            crawl_log.flush()
+            assert crawl_log.rate_limit_stats()['suppressed'] == 7
+        finally:
+            crawl_log.configure()
+        with open(path, encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f]
+    messages = [entry['message'] for entry in entries]
+    assert messages == ['第 0 页', '第 1 页', '第 2 页'] + ['警告不限流'] * 5 + ['第 10 页']
+    assert entries[0]['level'] == 'DEBUG' and entries[0]['logger'] == 'qizhidao.test'
+    assert entries[-1]['suppressed'] == 7
+
+
+def test_excel_sink():
+    """测试流式Excel导出：达到行数上限时切换工作表，新列追加在右侧且已有列位置不变"""
+    import tempfile
+    from openpyxl import load_workbook
+    from excel_sink import ExcelSink, write_excel
+    from row_store import RowStore
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'out.xlsx')
+        with ExcelSink(path, max_rows_per_sheet=3, buffer_rows=2) as sink:
+            sink.append_rows([{'序号': str(i), '企业名称': f'测试{i}'} for i in range(4)])
+            sink.append_rows([{'序号': '4', '企业名称': '测试4', '企业名称_链接': '/c/4', '页码': 2}])
+        sheets = load_workbook(path).worksheets
+        assert [ws.title for ws in sheets] == ['企业数据', '企业数据_2', '企业数据_3']
+        assert [list(r) for r in sheets[1].values] == [['序号', '企业名称'], ['3', '测试3']]
+        assert list(sheets[2].values)[-1] == ('4', '测试4', '/c/4', 2)
+
+        store = RowStore([{'序号': '1', '企业名称': '甲'}, {'序号': '2', '企业名称': '乙\x01', '页码': 1}])
+        files = write_excel(path, store, max_rows_per_sheet=1, max_rows_per_file=1)
+        assert len(files) == 2
+        assert list(load_workbook(files[1]).active.values) == [('序号', '企业名称', '页码'), ('2', '乙', 1)]
+
+        # 爬虫返回生成的全部文件，run() 和批量汇总据此列出输出
+        from qizhidao_table_spider import QizhidaoTableSpider
+        spider = QizhidaoTableSpider(url='https://qiye.qizhidao.com/batch-query-result?matchId=abc')
+        assert spider.save_to_excel({'companies': store}, path) == [path]
+        assert spider.save_to_excel({'companies': []}, path) == []
+
+
+def test_json_writer():
+    """测试JSON输出：分块写出的紧凑/压缩文件与标准库编码结果一致，两种后端输出相同"""
+    import json
+    import tempfile
+    from json_writer import write_json, read_json, JsonSerializer
+    from row_store import RowStore
+    rows = [{'序号': str(i), '企业名称': f'测试{i}"科技"有限公司', '页码': i // 3 + 1} for i in range(7)]
+    data = {'metadata': {'title': '企知道', 'total_results': 7}, 'companies': RowStore(rows), 'timestamp': 'x'}
+    expected = {'metadata': data['metadata'], 'companies': rows, 'timestamp': 'x'}
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = []
+        for backend in ('auto', 'json'):
+            path = write_json(os.path.join(tmp, f'{backend}.json'), data, chunk_rows=3,
+                              serializer=JsonSerializer(backend=backend))
+            with open(path, 'rb') as f:
+                outputs.append(f.read())
+        assert outputs[0] == outputs[1] and json.loads(outputs[0]) == expected
+        path = write_json(os.path.join(tmp, 'out.json'), data, compression='gzip')
+        assert path.endswith('.json.gz') and read_json(path) == expected
+        path = write_json(os.path.join(tmp, 'pretty.json'), data, pretty=True)
+        assert read_json(path) == expected
 
 
 def test_basic_spider():
@@ -20,6 +838,7 @@ def test_basic_spider():
     print("\n" + "=" * 50)
     print("测试基础版本爬虫")
     print("=" * 50)
+    from qizhidao_spider import QizhidaoSpider
     spider = QizhidaoSpider()
     result = spider.run(save_json=True, save_excel=False)
     return result
@@ -30,6 +849,7 @@ def test_advanced_spider():
     print("\n" + "=" * 50)
     print("测试高级版本爬虫")
     print("=" * 50)
+    from qizhidao_advanced_spider import QizhidaoAdvancedSpider
     spider = QizhidaoAdvancedSpider()
     result = spider.run(save_json=True, save_excel=False)
     return result
@@ -40,6 +860,7 @@ def test_table_spider():
     print("\n" + "=" * 50)
     print("测试表格数据爬虫（支持分页）")
     print("=" * 50)
+    from qizhidao_table_spider import QizhidaoTableSpider
     spider = QizhidaoTableSpider(max_pages=2)  # 只测试前2页
     result = spider.run(save_json=True, save_excel=False)
     return result
@@ -51,6 +872,7 @@ def test_smart_spider():
     print("测试智能爬虫（Selenium，支持分页和验证码）")
     print("=" * 50)
     print("注意：智能爬虫需要Chrome浏览器和ChromeDriver")
+    from qizhidao_smart_spider import QizhidaoSmartSpider
     spider = QizhidaoSmartSpider(headless=False)
     result = spider.run(save_json=True, save_excel=False)
     return result
@@ -71,15 +893,18 @@ def main():
             test_table_spider()
         elif test_name == 'smart':
             test_smart_spider()
+        elif test_name == 'imports':
+            test_import_budget()
         else:
             print(f"未知的测试类型: {test_name}")
-            print("可用选项: basic, advanced, table, smart")
+            print("可用选项: basic, advanced, table, smart, imports")
     else:
         print("请选择要测试的爬虫版本:")
         print("1. 基础版本 (basic)")
         print("2. 高级版本 (advanced)")
         print("3. 表格数据版本 (table)")
         print("4. 智能版本 (smart)")
+        print("5. 导入耗时预算 (imports)")
         print("\n使用方法: python test_qizhidao_spider.py [版本名称]")
         print("例如: python test_qizhidao_spider.py table")
 